@@ -0,0 +1,73 @@
+import math
+import os
+import random
+import tempfile
+import time
+
+from roller485.archive import TelemetryReader, TelemetryWriter
+from roller485.roller485_protocol import Roller485Protocol as Proto
+from roller485.telemetry import Sample
+
+
+def make_samples(devices, seconds, rate):
+    """rate [Hz] で読み出したモータ状態を模したサンプル"""
+    rng = random.Random(0)
+    samples = []
+    t0 = time.time()
+    for i in range(int(seconds * rate)):
+        t = t0 + i / rate + rng.uniform(0, 0.0002)  # 受信時刻の揺らぎ
+        for device_id in range(devices):
+            speed = 1000 * math.sin(i / 200 + device_id) + rng.randint(-5, 5)
+            samples.append(
+                Sample(
+                    device_id,
+                    Proto.CommandCode.motor_status_readback,
+                    t,
+                    {
+                        "speed": round(speed, 2),
+                        "position": round(i * 0.37 + device_id, 2),
+                        "current": round(200 + rng.uniform(-3, 3), 2),
+                        "mode": 1,
+                        "status": 0,
+                        "error": 0,
+                    },
+                )
+            )
+    return samples
+
+
+def main():
+    DEVICES = 16
+    SECONDS = 60
+    RATE = 100
+    RAW_BYTES = 20  # motor_status_readback_resp のフレーム長
+
+    samples = make_samples(DEVICES, SECONDS, RATE)
+    print(f"{len(samples)} samples ({DEVICES} devices x {SECONDS} s x {RATE} Hz)")
+    print(
+        f"{'codec':<6} {'bytes/sample':>12} {'ratio':>7} {'encode[ks/s]':>13} {'decode[ks/s]':>13}"
+    )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for codec in ("none", "zlib", "lzma"):
+            path = os.path.join(tmp, f"{codec}.tlm")
+            start = time.perf_counter()
+            with TelemetryWriter(path, codec=codec) as writer:
+                for s in samples:
+                    writer.write(s)
+            encode = time.perf_counter() - start
+
+            start = time.perf_counter()
+            count = sum(1 for _ in TelemetryReader(path).samples())
+            decode = time.perf_counter() - start
+            assert count == len(samples)
+
+            per_sample = os.path.getsize(path) / len(samples)
+            print(
+                f"{codec:<6} {per_sample:>12.2f} {RAW_BYTES / per_sample:>6.1f}x "
+                f"{len(samples) / encode / 1000:>13.1f} {count / decode / 1000:>13.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import statistics
+import time
+
+from roller485 import Roller485Util
+from roller485.estop import EmergencyStop
+
+
+def main():
+    PORT = "/dev/tty.usbserial-10"
+    DEVICE_IDS = [0, 1, 2, 3]
+    BAUDRATE = 115200
+    TIMEOUT = 1
+    TRIALS = 20
+
+    r485 = Roller485Util(target=0, port=PORT, baudrate=BAUDRATE, timeout=TIMEOUT)
+    try:
+        while not r485.is_open:
+            time.sleep(0.1)  # ビジーループを防ぐため
+
+        # 1台ずつ motor_switch(Off) を送る従来の方法
+        samples = []
+        for _ in range(TRIALS):
+            start = time.perf_counter()
+            for device_id in DEVICE_IDS:
+                r485.target = device_id
+                r485.motor_switch(Roller485Util.Switch.Off)
+            samples.append(time.perf_counter() - start)
+        r485.target = 0
+        print(
+            f"sequential motor_switch: median {statistics.median(samples) * 1000:.2f} ms"
+        )
+
+        # 事前エンコードしたフレームを一括送信
+        estop = EmergencyStop(r485, DEVICE_IDS)
+        samples = [estop.trigger().time_to_last_byte for _ in range(TRIALS)]
+        print(
+            f"EmergencyStop ({len(estop.burst)} bytes): "
+            f"median {statistics.median(samples) * 1000:.2f} ms to last byte"
+        )
+
+    finally:
+        r485.flush()
+        r485.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,7 @@
 __version__ = "0.1.0"
 
+from .scheduler import CommandScheduler, Priority
+from .telemetry import TelemetryScheduler
 from .util import Roller485Util
 
-__all__ = ["Roller485Util"]
+__all__ = ["CommandScheduler", "Priority", "Roller485Util", "TelemetryScheduler"]
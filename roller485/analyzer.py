@@ -0,0 +1,361 @@
+"""キャプチャしたトラフィックのオフライン解析
+
+CaptureWriter (Roller485Util.capture や Sniffer) で記録したキャプチャを先頭から
+1 レコードずつ読み、リクエストとレスポンスを対応付けて、デバイスごとの応答時間の分布、
+無通信時間、1 秒ごとのバス使用率、リトライ・ゴミバイトの割合、バスを多く使っている
+デバイス・コマンドを集計します。サンプルを保存しないので、数時間のキャプチャでも
+メモリ使用量は一定です。
+"""
+
+import json
+import math
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .capture import TX, CaptureRecord, capture_files, read_captures
+from .latency import P2Quantile
+from .metrics import Histogram
+from .roller485_protocol import Roller485Protocol as Proto
+from .sniffer import FrameSplitter, SniffedFrame
+from .timing import BITS_PER_BYTE
+
+# 応答時間・無通信時間のヒストグラムの上限 [秒]
+GAP_BUCKETS = (0.0001, 0.0005, 0.001, 0.002, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0)
+
+
+class _Distribution:
+    """ヒストグラムと p50 / p99 の推定値"""
+
+    __slots__ = ("hist", "p50", "p99")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.hist = Histogram(buckets)
+        self.p50 = P2Quantile(0.5)
+        self.p99 = P2Quantile(0.99)
+
+    def add(self, value: float) -> None:
+        self.hist.observe(value)
+        self.p50.add(value)
+        self.p99.add(value)
+
+    def as_dict(self) -> dict:
+        h = self.hist
+        return {
+            "count": h.count,
+            "mean": h.sum / h.count if h.count else None,
+            "p50": self.p50.value(),
+            "p99": self.p99.value(),
+            "max": h.max if h.count else None,
+            "buckets": h.as_dict()["buckets"],
+        }
+
+
+class _DeviceStats:
+    __slots__ = (
+        "requests",
+        "responses",
+        "unanswered",
+        "retries",
+        "crc_errors",
+        "turnaround",
+    )
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.responses = 0
+        self.unanswered = 0
+        self.retries = 0
+        self.crc_errors = 0
+        self.turnaround = _Distribution(GAP_BUCKETS)
+
+
+class TrafficAnalyzer:
+    """キャプチャのストリーミング解析
+
+    タイムスタンプは各フレームの最後のバイトの時刻とみなし、フレームの開始時刻は
+    ボーレートから求めたワイヤ時間を引いて推定します。応答時間はリクエストの
+    最後のバイトからレスポンスの最後のバイトまでの時間です。
+
+    Examples:
+        >>> analyzer = TrafficAnalyzer(baudrate=115200)
+        >>> analyzer.feed_records(read_captures(capture_files("bus0.cap")))
+        >>> print(analyzer.format())
+    """
+
+    def __init__(self, baudrate: int = 115200, top: int = 10):
+        """
+        Args:
+            baudrate (int, optional): キャプチャしたバスのボーレート. Defaults to 115200.
+            top (int, optional): レポートに載せる上位のデバイス・コマンド数. Defaults to 10.
+        """
+        self.baudrate = baudrate
+        self.top = top
+        self.byte_time = BITS_PER_BYTE / baudrate
+        self.splitter = FrameSplitter(gap_ns=None)
+        self.records = 0
+        self.frames = 0
+        self.bytes = 0
+        self.first_ns: Optional[int] = None
+        self.last_ns: Optional[int] = None
+        self.busy = 0.0
+        self.idle_gaps = _Distribution(GAP_BUCKETS)
+        self.utilization = _Distribution(
+            (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+        )
+        self.peak_second: Optional[Tuple[int, float]] = None
+        self.devices: Dict[int, _DeviceStats] = {}
+        # (デバイスID, リクエストのコマンド) → バス占有時間 [秒], フレーム数
+        self.consumers: Dict[Tuple[int, int], List[float]] = {}
+        self._second: Optional[int] = None
+        self._second_busy = 0.0
+        self._frame_end: Optional[float] = None
+        # (デバイスID, レスポンスのコマンド) → (リクエストの時刻, リクエスト)
+        self._pending: Dict[Tuple[int, int], Tuple[float, bytes]] = {}
+        # (デバイスID, リクエストのコマンド) → 応答がなかった直前のリクエスト
+        self._failed: Dict[Tuple[int, int], bytes] = {}
+
+    def _device(self, device_id: int) -> _DeviceStats:
+        stats = self.devices.get(device_id)
+        if stats is None:
+            stats = self.devices[device_id] = _DeviceStats()
+        return stats
+
+    def feed_records(self, records: Iterable[CaptureRecord]) -> None:
+        """キャプチャのレコードを解析
+
+        Args:
+            records (Iterable[CaptureRecord]): read_capture() などの結果
+        """
+        for record in records:
+            self.feed_record(record)
+
+    def feed_record(self, record: CaptureRecord) -> None:
+        """キャプチャの 1 レコードを解析
+
+        1 レコードには 1 回の write() / read() のバイト列が入っているので、
+        複数のフレーム (緊急停止のバーストなど) や途中で切れたフレームも含みえます。
+        """
+        self.records += 1
+        self.bytes += len(record.data)
+        for frame in self.splitter.feed(record.data, record.timestamp_ns):
+            self.feed_frame(frame)
+        self.splitter.discard()
+
+    def feed_frame(self, frame: SniffedFrame) -> None:
+        """1 フレームを解析"""
+        self.frames += 1
+        end = frame.timestamp_ns / 1e9
+        wire = len(frame.data) * self.byte_time
+        start = end - wire
+        if self.first_ns is None:
+            self.first_ns = frame.timestamp_ns
+        self.last_ns = frame.timestamp_ns
+
+        if self._frame_end is not None and start > self._frame_end:
+            self.idle_gaps.add(start - self._frame_end)
+        self._frame_end = end if self._frame_end is None else max(self._frame_end, end)
+        self._account_busy(start, wire)
+
+        device = self._device(frame.device_id)
+        if frame.direction == TX:
+            self._request(frame, device, end, wire)
+        else:
+            self._response(frame, device, end, wire)
+
+    def _account_busy(self, start: float, wire: float) -> None:
+        self.busy += wire
+        second = math.floor(start)
+        if self._second is None:
+            self._second = second
+        while second > self._second:
+            self._close_second()
+        self._second_busy += wire
+
+    def _close_second(self) -> None:
+        assert self._second is not None
+        utilization = min(1.0, self._second_busy)
+        self.utilization.add(utilization)
+        if self.peak_second is None or utilization > self.peak_second[1]:
+            self.peak_second = (self._second, utilization)
+        self._second += 1
+        self._second_busy = 0.0
+
+    def _consume(self, device_id: int, command: int, wire: float) -> None:
+        entry = self.consumers.get((device_id, command))
+        if entry is None:
+            self.consumers[(device_id, command)] = [wire, 1]
+        else:
+            entry[0] += wire
+            entry[1] += 1
+
+    def _request(
+        self, frame: SniffedFrame, device: _DeviceStats, end: float, wire: float
+    ) -> None:
+        device.requests += 1
+        command = frame.command
+        self._consume(frame.device_id, command, wire)
+        key = (frame.device_id, command | 0x10)
+        if key in self._pending:
+            # 前のリクエストに応答がなかった
+            _, previous = self._pending.pop(key)
+            device.unanswered += 1
+            self._failed[(frame.device_id, command)] = previous
+        if self._failed.pop((frame.device_id, command), None) == frame.data:
+            device.retries += 1
+        self._pending[key] = (end, frame.data)
+
+    def _response(
+        self, frame: SniffedFrame, device: _DeviceStats, end: float, wire: float
+    ) -> None:
+        command = frame.command
+        self._consume(frame.device_id, command & ~0x10, wire)
+        pending = self._pending.pop((frame.device_id, command), None)
+        if not frame.crc_ok:
+            device.crc_errors += 1
+            if pending is not None:
+                self._failed[(frame.device_id, command & ~0x10)] = pending[1]
+            return
+        device.responses += 1
+        if pending is not None:
+            device.turnaround.add(end - pending[0])
+
+    def report(self) -> dict:
+        """解析結果 (JSON に変換できる dict)"""
+        # 集計中の 1 秒は途中までの値で扱う (状態は変えない)
+        utilization = self.utilization.as_dict()
+        peak = self.peak_second
+        if self._second is not None:
+            current = min(1.0, self._second_busy)
+            if peak is None or current > peak[1]:
+                peak = (self._second, current)
+        duration = (
+            (self.last_ns - self.first_ns) / 1e9
+            if self.first_ns is not None and self.last_ns is not None
+            else 0.0
+        )
+        requests = sum(d.requests for d in self.devices.values())
+        retries = sum(d.retries for d in self.devices.values())
+        top = sorted(self.consumers.items(), key=lambda kv: kv[1][0], reverse=True)
+        return {
+            "baudrate": self.baudrate,
+            "records": self.records,
+            "frames": self.frames,
+            "bytes": self.bytes,
+            "duration": duration,
+            "busy_seconds": self.busy,
+            "utilization": self.busy / duration if duration > 0 else None,
+            "utilization_per_second": {
+                **utilization,
+                "peak_second": None if peak is None else peak[0],
+                "peak": None if peak is None else peak[1],
+            },
+            "idle_gaps": self.idle_gaps.as_dict(),
+            "garbage_bytes": self.splitter.garbage_bytes,
+            "garbage_rate": self.splitter.garbage_bytes / self.bytes
+            if self.bytes
+            else 0.0,
+            "crc_errors": self.splitter.crc_errors,
+            "retry_rate": retries / requests if requests else 0.0,
+            "devices": {
+                device_id: {
+                    "requests": d.requests,
+                    "responses": d.responses,
+                    "unanswered": d.unanswered,
+                    "retries": d.retries,
+                    "crc_errors": d.crc_errors,
+                    "turnaround": d.turnaround.as_dict(),
+                }
+                for device_id, d in sorted(self.devices.items())
+            },
+            "top_consumers": [
+                {
+                    "device_id": device_id,
+                    "command": _command_name(command),
+                    "busy_seconds": busy,
+                    "frames": int(frames),
+                    "share": busy / self.busy if self.busy else 0.0,
+                }
+                for (device_id, command), (busy, frames) in top[: self.top]
+            ],
+        }
+
+    def format(self) -> str:
+        """解析結果のテキストの要約"""
+        r = self.report()
+
+        def ms(value: Optional[float]) -> str:
+            return "-" if value is None else f"{value * 1000:.2f}"
+
+        per_second = r["utilization_per_second"]
+        lines = [
+            f"duration        {r['duration']:.3f} s, {r['frames']} frames, "
+            f"{r['bytes']} bytes @ {r['baudrate']} baud",
+            f"utilization     {_percent(r['utilization'])} overall, "
+            f"p99 {_percent(per_second['p99'])}/s, peak {_percent(per_second['peak'])} "
+            f"(second {per_second['peak_second']})",
+            f"idle gaps [ms]  p50 {ms(r['idle_gaps']['p50'])}, "
+            f"p99 {ms(r['idle_gaps']['p99'])}, max {ms(r['idle_gaps']['max'])}",
+            f"errors          garbage {_percent(r['garbage_rate'])}, "
+            f"crc {r['crc_errors']}, retry {_percent(r['retry_rate'])}",
+            "",
+            f"{'dev':>3} {'req':>8} {'resp':>8} {'lost':>6} {'retry':>6} {'crc':>5} "
+            f"{'p50[ms]':>8} {'p99[ms]':>8} {'max[ms]':>8}",
+        ]
+        for device_id, d in r["devices"].items():
+            t = d["turnaround"]
+            lines.append(
+                f"{device_id:>3} {d['requests']:>8} {d['responses']:>8} "
+                f"{d['unanswered']:>6} {d['retries']:>6} {d['crc_errors']:>5} "
+                f"{ms(t['p50']):>8} {ms(t['p99']):>8} {ms(t['max']):>8}"
+            )
+        lines += [
+            "",
+            f"{'dev':>3} {'command':<36} {'frames':>8} {'busy[s]':>9} {'share':>7}",
+        ]
+        for c in r["top_consumers"]:
+            lines.append(
+                f"{c['device_id']:>3} {c['command']:<36} {c['frames']:>8} "
+                f"{c['busy_seconds']:>9.3f} {_percent(c['share']):>7}"
+            )
+        return "\n".join(lines)
+
+
+def _percent(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value * 100:.1f}%"
+
+
+def _command_name(command: int) -> str:
+    try:
+        return Proto.CommandCode(command).name
+    except ValueError:
+        return f"0x{command:02X}"
+
+
+def analyze(
+    paths: Iterable[str], baudrate: int = 115200, top: int = 10
+) -> TrafficAnalyzer:
+    """キャプチャファイル (ローテーションされたファイルを含む) を解析
+
+    Args:
+        paths (Iterable[str]): キャプチャファイル。ローテーションされている場合は
+            最新のファイル名を渡せば古い順にすべて読む
+        baudrate (int, optional): バスのボーレート. Defaults to 115200.
+        top (int, optional): 上位のデバイス・コマンド数. Defaults to 10.
+
+    Returns:
+        TrafficAnalyzer: 解析結果
+    """
+    analyzer = TrafficAnalyzer(baudrate, top)
+    for path in paths:
+        analyzer.feed_records(read_captures(capture_files(path) or [path]))
+    return analyzer
+
+
+def write_report(analyzer: TrafficAnalyzer, path: str) -> None:
+    """解析結果を JSON で書き出す
+
+    Args:
+        analyzer (TrafficAnalyzer): 解析結果
+        path (str): 出力先
+    """
+    with open(path, "w") as f:
+        json.dump(analyzer.report(), f, indent=2)
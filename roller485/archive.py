@@ -0,0 +1,425 @@
+"""テレメトリの圧縮アーカイブ
+
+TelemetryScheduler のサンプル (motor_status_readback / other_status_readback) を、
+(デバイスID, コマンド) ごとに block_size サンプルずつのブロックにまとめて保存します。
+ブロック内は列ごとに並べ、時刻は 2 階差分、その他の列は差分をとってから
+zigzag 符号化した可変長整数 (varint) にし、さらに zlib / lzma で圧縮できます。
+各ブロックのヘッダには時刻の範囲と列ごとの最小値・最大値を持つため、
+読み出し時に条件に合わないブロックは展開せずに読み飛ばします。
+
+値はプロトコル上の整数表現 (speed などは 100 倍) で保存し、読み出すときに
+get_motor_status() などと同じ形式に戻します。時刻はマイクロ秒単位に丸めます。
+
+ファイル形式:
+    ヘッダ: b"R485TLM" + バージョン (1 バイト)
+    ブロック: device_id (u8) command (u8) codec (u8) count (u32)
+              first_us (i64) last_us (i64) payload_length (u32)
+              + 列ごとの min (i64) max (i64) + ペイロード
+    (すべてリトルエンディアン)
+"""
+
+import lzma
+import struct
+import threading
+import zlib
+from dataclasses import dataclass
+from typing import (
+    BinaryIO,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from .roller485_protocol import Roller485Protocol as Proto
+from .telemetry import Sample
+
+MAGIC = b"R485TLM"
+VERSION = 1
+FILE_HEADER = MAGIC + bytes([VERSION])
+BLOCK_HEADER = struct.Struct("<BBBIqqI")
+COLUMN_STATS = struct.Struct("<qq")
+
+C = Proto.CommandCode
+
+# コマンド → (data のキー, 整数表現にする倍率)
+COLUMNS: Dict[int, List[Tuple[str, int]]] = {
+    C.motor_status_readback.value: [
+        ("speed", 100),
+        ("position", 100),
+        ("current", 100),
+        ("mode", 1),
+        ("status", 1),
+        ("error", 1),
+    ],
+    C.other_status_readback.value: [
+        ("vin", 100),
+        ("temp", 1),
+        ("encoder_counter", 1),
+        ("rgb_mode", 1),
+        ("rgb_brightness", 1),
+    ],
+}
+
+# ブロックの圧縮方式
+CODECS: Dict[str, int] = {"none": 0, "zlib": 1, "lzma": 2}
+_CODEC_NAMES = {v: k for k, v in CODECS.items()}
+
+
+def _compress(codec: int, payload: bytes, level: Optional[int]) -> bytes:
+    if codec == 1:
+        return zlib.compress(payload, 6 if level is None else level)
+    if codec == 2:
+        return lzma.compress(payload, preset=6 if level is None else level)
+    return payload
+
+
+def _decompress(codec: int, payload: bytes) -> bytes:
+    if codec == 1:
+        return zlib.decompress(payload)
+    if codec == 2:
+        return lzma.decompress(payload)
+    if codec == 0:
+        return payload
+    raise ValueError(f"unknown archive codec {codec}")
+
+
+def encode_varints(out: bytearray, values: Sequence[int], order: int = 1) -> None:
+    """整数列を order 階差分 + zigzag + varint で out に追記
+
+    Args:
+        out (bytearray): 出力先
+        values (Sequence[int]): 整数列
+        order (int, optional): 差分の階数 (0〜2). Defaults to 1.
+    """
+    prev = prev_delta = 0
+    for v in values:
+        d = v - prev
+        prev = v
+        if order == 2:
+            d, prev_delta = d - prev_delta, d
+        elif order == 0:
+            d = v
+        z = d << 1 if d >= 0 else ((-d) << 1) - 1
+        while z >= 0x80:
+            out.append((z & 0x7F) | 0x80)
+            z >>= 7
+        out.append(z)
+
+
+def decode_varints(
+    data: bytes, count: int, pos: int = 0, order: int = 1
+) -> Tuple[List[int], int]:
+    """encode_varints() の逆変換
+
+    Args:
+        data (bytes): 入力
+        count (int): 読む値の数
+        pos (int, optional): 読み始める位置. Defaults to 0.
+        order (int, optional): 差分の階数. Defaults to 1.
+
+    Returns:
+        Tuple[List[int], int]: 整数列と、読み終えた位置
+    """
+    values = []
+    prev = prev_delta = 0
+    for _ in range(count):
+        z = shift = 0
+        while True:
+            b = data[pos]
+            pos += 1
+            z |= (b & 0x7F) << shift
+            if b < 0x80:
+                break
+            shift += 7
+        d = z >> 1 if not z & 1 else -((z + 1) >> 1)
+        if order == 2:
+            prev_delta += d
+            d = prev_delta
+        if order == 0:
+            prev = d
+        else:
+            prev += d
+        values.append(prev)
+    return values, pos
+
+
+@dataclass
+class BlockInfo:
+    """ブロックのヘッダ"""
+
+    device_id: int
+    command: Proto.CommandCode
+    codec: str
+    count: int
+    first_us: int  # 最初のサンプルの時刻 [µs]
+    last_us: int  # 最後のサンプルの時刻 [µs]
+    stats: Dict[str, Tuple[int, int]]  # 列 → (最小値, 最大値) (整数表現)
+    offset: int  # ペイロードのファイル内の位置
+    length: int  # ペイロードのバイト数
+
+
+class TelemetryWriter:
+    """テレメトリを圧縮アーカイブに追記
+
+    サンプルは (デバイスID, コマンド) ごとにメモリ上に溜め、block_size に達したら
+    1 ブロックとして書き出します。motor_status_readback / other_status_readback
+    以外のサンプルと、CRC8 不一致で data が空のサンプルは skipped に数えて捨てます。
+
+    Examples:
+        >>> writer = TelemetryWriter("telemetry.tlm", codec="zlib")
+        >>> sched = TelemetryScheduler(r485, on_sample=writer.write)
+        >>> ...
+        >>> writer.close()
+    """
+
+    def __init__(
+        self,
+        path: str,
+        block_size: int = 1024,
+        codec: str = "zlib",
+        level: Optional[int] = None,
+    ):
+        """
+        Args:
+            path (str): 出力先 (既存のファイルには追記)
+            block_size (int, optional): 1 ブロックのサンプル数. Defaults to 1024.
+            codec (str, optional): "none", "zlib", "lzma" のいずれか. Defaults to "zlib".
+            level (Optional[int], optional): 圧縮レベル. None の場合は 6.
+        """
+        if codec not in CODECS:
+            raise ValueError(f"codec must be one of {sorted(CODECS)}")
+        self.path = path
+        self.block_size = block_size
+        self.codec = CODECS[codec]
+        self.level = level
+        self.samples = 0
+        self.skipped = 0
+        self.blocks = 0
+        self.bytes_written = 0
+        self._lock = threading.Lock()
+        # (デバイスID, コマンド) → 時刻と列ごとの値
+        self._pending: Dict[Tuple[int, int], List[List[int]]] = {}
+        self._file: Optional[BinaryIO] = open(path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(FILE_HEADER)
+            self.bytes_written += len(FILE_HEADER)
+
+    def write(self, sample: Sample) -> None:
+        """サンプルを追加 (TelemetryScheduler の on_sample に渡せる)
+
+        Args:
+            sample (Sample): テレメトリのサンプル
+        """
+        self.append(sample.device_id, sample.command, sample.timestamp, sample.data)
+
+    def append(
+        self, device_id: int, command: int, timestamp: float, data: dict
+    ) -> None:
+        """サンプルを追加
+
+        Args:
+            device_id (int): デバイスID
+            command (int): リードバックコマンド
+            timestamp (float): 時刻 [秒]
+            data (dict): get_motor_status() などと同じ形式の値
+        """
+        columns = COLUMNS.get(int(command))
+        if columns is None or not data:
+            self.skipped += 1
+            return
+        row = [round(timestamp * 1_000_000)]
+        row += [round(data[name] * scale) for name, scale in columns]
+        key = (device_id, int(command))
+        with self._lock:
+            pending = self._pending.get(key)
+            if pending is None:
+                pending = self._pending[key] = [[] for _ in row]
+            for column, value in zip(pending, row):
+                column.append(value)
+            self.samples += 1
+            if len(pending[0]) >= self.block_size:
+                self._write_block(key, self._pending.pop(key))
+
+    def _write_block(self, key: Tuple[int, int], pending: List[List[int]]) -> None:
+        if self._file is None:
+            raise ValueError("archive is closed")
+        device_id, command = key
+        timestamps, values = pending[0], pending[1:]
+        payload = bytearray()
+        encode_varints(payload, timestamps, order=2)
+        for column in values:
+            encode_varints(payload, column)
+        compressed = _compress(self.codec, bytes(payload), self.level)
+        header = BLOCK_HEADER.pack(
+            device_id,
+            command,
+            self.codec,
+            len(timestamps),
+            timestamps[0],
+            timestamps[-1],
+            len(compressed),
+        )
+        stats = b"".join(COLUMN_STATS.pack(min(c), max(c)) for c in values)
+        self._file.write(header + stats + compressed)
+        self.blocks += 1
+        self.bytes_written += len(header) + len(stats) + len(compressed)
+
+    def flush(self) -> None:
+        """溜まっているサンプルをブロックとして書き出す"""
+        with self._lock:
+            for key in sorted(self._pending):
+                self._write_block(key, self._pending[key])
+            self._pending.clear()
+            if self._file is not None:
+                self._file.flush()
+
+    def close(self) -> None:
+        """書き出してファイルを閉じる"""
+        self.flush()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __enter__(self) -> "TelemetryWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class TelemetryReader:
+    """圧縮アーカイブを先頭から 1 ブロックずつ読む
+
+    Examples:
+        >>> reader = TelemetryReader("telemetry.tlm")
+        >>> for s in reader.samples(device_id=0, start=t0, end=t1):
+        ...     print(s.timestamp, s.data["speed"])
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): アーカイブ
+        """
+        self.path = path
+        # 最後の samples() で展開したブロック数 (読み飛ばしの効果の確認用)
+        self.decoded_blocks = 0
+
+    def blocks(self) -> Iterator[BlockInfo]:
+        """ブロックのヘッダ (ペイロードは読まずに読み飛ばす)
+
+        Yields:
+            BlockInfo: ブロックのヘッダ。書き込み途中で切れた末尾のブロックは返さない
+        """
+        with open(self.path, "rb") as f:
+            yield from self._blocks(f)
+
+    def _blocks(self, f: BinaryIO) -> Iterator[BlockInfo]:
+        header = f.read(len(FILE_HEADER))
+        if header[: len(MAGIC)] != MAGIC:
+            raise ValueError(f"{self.path} is not a roller485 telemetry archive")
+        if header[len(MAGIC)] != VERSION:
+            raise ValueError(f"unsupported archive version {header[len(MAGIC)]}")
+        f.seek(0, 2)
+        size = f.tell()
+        pos = len(FILE_HEADER)
+        while pos + BLOCK_HEADER.size <= size:
+            f.seek(pos)
+            device_id, command, codec, count, first_us, last_us, length = (
+                BLOCK_HEADER.unpack(f.read(BLOCK_HEADER.size))
+            )
+            columns = COLUMNS.get(command)
+            if columns is None:
+                raise ValueError(f"unknown command 0x{command:02X} at offset {pos}")
+            stats_size = COLUMN_STATS.size * len(columns)
+            offset = pos + BLOCK_HEADER.size + stats_size
+            if offset + length > size:
+                return
+            raw = f.read(stats_size)
+            stats = {
+                name: COLUMN_STATS.unpack_from(raw, i * COLUMN_STATS.size)
+                for i, (name, _) in enumerate(columns)
+            }
+            yield BlockInfo(
+                device_id,
+                Proto.CommandCode(command),
+                _CODEC_NAMES.get(codec, str(codec)),
+                count,
+                first_us,
+                last_us,
+                stats,
+                offset,
+                length,
+            )
+            pos = offset + length
+
+    def samples(
+        self,
+        device_id: Optional[int] = None,
+        command: Optional[int] = None,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        block_filter: Optional[Callable[[BlockInfo], bool]] = None,
+    ) -> Iterator[Sample]:
+        """条件に合うサンプル (ブロックの順、ブロック内は時刻順)
+
+        Args:
+            device_id (Optional[int], optional): デバイスID. Defaults to None.
+            command (Optional[int], optional): リードバックコマンド. Defaults to None.
+            start (Optional[float], optional): この時刻 [秒] 以降. Defaults to None.
+            end (Optional[float], optional): この時刻 [秒] より前. Defaults to None.
+            block_filter (Optional[Callable[[BlockInfo], bool]], optional):
+                False を返したブロックを展開せずに読み飛ばす (BlockInfo.stats の
+                最小値・最大値で判定する). Defaults to None.
+
+        Yields:
+            Sample: サンプル
+        """
+        start_us = None if start is None else round(start * 1_000_000)
+        end_us = None if end is None else round(end * 1_000_000)
+        self.decoded_blocks = 0
+        with open(self.path, "rb") as f:
+            for block in self._blocks(f):
+                if (
+                    (device_id is not None and block.device_id != device_id)
+                    or (command is not None and block.command != command)
+                    or (start_us is not None and block.last_us < start_us)
+                    or (end_us is not None and block.first_us >= end_us)
+                    or (block_filter is not None and not block_filter(block))
+                ):
+                    continue
+                f.seek(block.offset)
+                yield from self._decode(block, f.read(block.length), start_us, end_us)
+
+    def _decode(
+        self,
+        block: BlockInfo,
+        payload: bytes,
+        start_us: Optional[int],
+        end_us: Optional[int],
+    ) -> Iterator[Sample]:
+        self.decoded_blocks += 1
+        data = _decompress(CODECS.get(block.codec, -1), payload)
+        timestamps, pos = decode_varints(data, block.count, order=2)
+        columns = COLUMNS[block.command.value]
+        values = []
+        for _, scale in columns:
+            column, pos = decode_varints(data, block.count, pos)
+            values.append([v / scale for v in column] if scale != 1 else column)
+        names = [name for name, _ in columns]
+        for i, ts in enumerate(timestamps):
+            if (start_us is not None and ts < start_us) or (
+                end_us is not None and ts >= end_us
+            ):
+                continue
+            yield Sample(
+                block.device_id,
+                block.command,
+                ts / 1_000_000,
+                {name: column[i] for name, column in zip(names, values)},
+            )
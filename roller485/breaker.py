@@ -0,0 +1,230 @@
+"""応答しないデバイスのためのサーキットブレーカー
+
+マルチドロップのバスで 1 台の電源が落ちると、そのデバイスへの呼び出しが毎回
+シリアルのタイムアウトまで待たされ、他のデバイスへの通信が滞ります。
+CircuitBreakers はデバイスごとに連続したタイムアウト・CRC エラーを数え、
+しきい値を超えたデバイスへの送信を止めて即座に DeviceUnavailableError を返します。
+"""
+
+import threading
+from dataclasses import dataclass
+from enum import Enum
+from typing import Callable, Dict, Optional
+
+from roller485.clock import SYSTEM_CLOCK, Clock
+
+
+class BreakerState(Enum):
+    """サーキットブレーカーの状態"""
+
+    Closed = "closed"  # 通常どおり送信する
+    Open = "open"  # 送信せずにエラーにする
+    HalfOpen = "half_open"  # プローブで復帰を確認している
+
+
+@dataclass
+class BreakerCounters:
+    """デバイス 1 台分のカウンタ"""
+
+    successes: int = 0
+    timeouts: int = 0
+    crc_failures: int = 0
+    rejected: int = 0
+    trips: int = 0
+    probes: int = 0
+    probe_failures: int = 0
+
+
+class CircuitBreaker:
+    """デバイス 1 台分のサーキットブレーカー"""
+
+    def __init__(
+        self,
+        device_id: int,
+        failure_threshold: int = 3,
+        probe_interval: float = 1.0,
+        on_state_change: Optional[
+            Callable[[int, BreakerState, BreakerState], None]
+        ] = None,
+        clock: Clock = SYSTEM_CLOCK,
+    ):
+        """
+        Args:
+            device_id (int): デバイスID
+            failure_threshold (int, optional): Open にする連続失敗回数. Defaults to 3.
+            probe_interval (float, optional): Open のデバイスをプローブする間隔 [秒].
+                Defaults to 1.0.
+            on_state_change (optional): 状態が変わったときに
+                (device_id, 変更前, 変更後) で呼ばれる. Defaults to None.
+            clock (Clock, optional): 時刻の取得. Defaults to SYSTEM_CLOCK.
+        """
+        self.device_id = device_id
+        self.failure_threshold = failure_threshold
+        self.probe_interval = probe_interval
+        self.on_state_change = on_state_change
+        self.clock = clock
+        self.state = BreakerState.Closed
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.counters = BreakerCounters()
+
+    def _transition(self, state: BreakerState) -> None:
+        previous, self.state = self.state, state
+        if state is BreakerState.Open:
+            self.opened_at = self.clock.monotonic()
+        if previous is not state and self.on_state_change is not None:
+            self.on_state_change(self.device_id, previous, state)
+
+    def probe_due(self) -> bool:
+        """Open のデバイスのプローブ時刻を過ぎているかどうか"""
+        return (
+            self.state is BreakerState.Open
+            and self.clock.monotonic() - self.opened_at >= self.probe_interval
+        )
+
+    def begin_probe(self) -> None:
+        """プローブを始める (HalfOpen に遷移)"""
+        self.counters.probes += 1
+        self._transition(BreakerState.HalfOpen)
+
+    def record(self, error: Optional[str]) -> None:
+        """往復の結果を記録
+
+        Args:
+            error (Optional[str]): 失敗理由 ("timeout", "crc")。成功時は None
+        """
+        if error is None:
+            self.counters.successes += 1
+            self.consecutive_failures = 0
+            if self.state is not BreakerState.Closed:
+                self._transition(BreakerState.Closed)
+            return
+
+        if error == "crc":
+            self.counters.crc_failures += 1
+        else:
+            self.counters.timeouts += 1
+        self.consecutive_failures += 1
+        if self.state is BreakerState.HalfOpen:
+            self.counters.probe_failures += 1
+            self._transition(BreakerState.Open)
+        elif (
+            self.state is BreakerState.Closed
+            and self.consecutive_failures >= self.failure_threshold
+        ):
+            self.counters.trips += 1
+            self._transition(BreakerState.Open)
+
+    def reset(self) -> None:
+        """Closed に戻す"""
+        self.consecutive_failures = 0
+        self._transition(BreakerState.Closed)
+
+
+class CircuitBreakers:
+    """デバイスIDごとのサーキットブレーカー
+
+    Roller485Util.circuit_breakers に設定すると、すべてのリクエストの前後で使われます。
+    Open のデバイスへのリクエストは送信せずに DeviceUnavailableError になり、
+    probe_interval ごとに最初のリクエストの前で軽いリードバックを送ってプローブします。
+    probe_open() を定期的に呼べば、リクエストがなくても復帰を確認できます。
+
+    Examples:
+        >>> r485.circuit_breakers = CircuitBreakers(
+        ...     failure_threshold=3, probe_interval=1.0, on_state_change=print
+        ... )
+        >>> try:
+        ...     r485.get_motor_status()
+        ... except DeviceUnavailableError:
+        ...     pass
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        probe_interval: float = 1.0,
+        on_state_change: Optional[
+            Callable[[int, BreakerState, BreakerState], None]
+        ] = None,
+        clock: Clock = SYSTEM_CLOCK,
+    ):
+        """
+        Args:
+            failure_threshold (int, optional): Open にする連続失敗回数. Defaults to 3.
+            probe_interval (float, optional): Open のデバイスをプローブする間隔 [秒].
+                Defaults to 1.0.
+            on_state_change (optional): 状態が変わったときに
+                (device_id, 変更前, 変更後) で呼ばれる. Defaults to None.
+            clock (Clock, optional): 時刻の取得. Defaults to SYSTEM_CLOCK.
+        """
+        self.failure_threshold = failure_threshold
+        self.probe_interval = probe_interval
+        self.on_state_change = on_state_change
+        self._breakers: Dict[int, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+        self.clock = clock
+
+    @property
+    def clock(self) -> Clock:
+        """時刻の取得 (Roller485Util に設定すると、その clock に差し替わる)"""
+        return self._clock
+
+    @clock.setter
+    def clock(self, clock: Clock) -> None:
+        self._clock = clock
+        for breaker in self:
+            breaker.clock = clock
+
+    def __getitem__(self, device_id: int) -> CircuitBreaker:
+        breaker = self._breakers.get(device_id)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.setdefault(
+                    device_id,
+                    CircuitBreaker(
+                        device_id,
+                        self.failure_threshold,
+                        self.probe_interval,
+                        self.on_state_change,
+                        self.clock,
+                    ),
+                )
+        return breaker
+
+    def __iter__(self):
+        return iter(list(self._breakers.values()))
+
+    def state(self, device_id: int) -> BreakerState:
+        """デバイスの状態"""
+        return self[device_id].state
+
+    def open_devices(self) -> list:
+        """Open または HalfOpen のデバイスID"""
+        return [b.device_id for b in self if b.state is not BreakerState.Closed]
+
+    def probe_open(self, r485) -> Dict[int, BreakerState]:
+        """プローブ時刻を過ぎた Open のデバイスをプローブ
+
+        Args:
+            r485 (Roller485Util): プローブに使うクライアント
+
+        Returns:
+            Dict[int, BreakerState]: プローブしたデバイスの新しい状態
+        """
+        result = {}
+        for breaker in self:
+            if breaker.probe_due():
+                r485.probe_device(breaker.device_id)
+                result[breaker.device_id] = breaker.state
+        return result
+
+    def snapshot(self) -> Dict[int, dict]:
+        """状態とカウンタ (デバイスID → dict)"""
+        return {
+            b.device_id: {
+                "state": b.state.value,
+                "consecutive_failures": b.consecutive_failures,
+                **vars(b.counters),
+            }
+            for b in sorted(self, key=lambda b: b.device_id)
+        }
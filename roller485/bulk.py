@@ -0,0 +1,282 @@
+"""NumPy によるステータスレスポンスの一括デコード
+
+アーカイブした 20 バイトのリードバックレスポンス (motor_status_resp, other_status_resp,
+readback_2_resp, readback_3_resp) を、連続したバッファのまま ``np.frombuffer`` で
+構造化配列として参照し、フィールドごとの列 (ndarray) に変換します。
+Roller485Util の get_motor_status() などと同じ列名・スケーリングです。CRC8 も
+1 フレームずつではなく、列ごとの表引きでまとめて検証します。
+
+NumPy はオプションの依存パッケージです (``pip install demo-roller485[numpy]``)。
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Tuple, Union
+
+import numpy as np
+
+from .roller485_protocol import Roller485Protocol as Proto
+
+# 20 バイトのレスポンス: マジックナンバー 2 + コマンド 1 + デバイスID 1 + ペイロード 15 + CRC8 1
+FRAME_LENGTH = 20
+MAGIC = 0x55AA  # 0xAA 0x55 をリトルエンディアンの u2 として読んだ値
+
+_HEADER = [("magic", "<u2"), ("command", "u1"), ("device_id", "u1")]
+_TRAILER = [("crc8", "u1")]
+
+C = Proto.CommandCode
+
+# レスポンスのコマンド → ksy のペイロードのレイアウト
+DTYPES: Dict[int, np.dtype] = {
+    C.motor_status_readback_resp.value: np.dtype(
+        _HEADER
+        + [
+            ("speed", "<i4"),
+            ("position", "<i4"),
+            ("current", "<i4"),
+            ("mode", "u1"),
+            ("status", "u1"),
+            ("error", "u1"),
+        ]
+        + _TRAILER
+    ),
+    C.other_status_readback_resp.value: np.dtype(
+        _HEADER
+        + [
+            ("vin_x100", "<u4"),
+            ("temp", "<i4"),
+            ("encoder_counter", "<i4"),
+            ("rgb_mode", "u1"),
+            ("rgb_brightness", "u1"),
+            ("reserve", "u1"),
+        ]
+        + _TRAILER
+    ),
+    C.readback_2_resp.value: np.dtype(
+        _HEADER
+        + [
+            ("speed_p", "<u4"),
+            ("speed_i", "<u4"),
+            ("speed_d", "<u4"),
+            ("rgb_b", "u1"),
+            ("rgb_g", "u1"),
+            ("rgb_r", "u1"),
+        ]
+        + _TRAILER
+    ),
+    C.readback_3_resp.value: np.dtype(
+        _HEADER
+        + [
+            ("position_p", "<u4"),
+            ("position_i", "<u4"),
+            ("position_d", "<u4"),
+            ("rs485_id", "u1"),
+            ("rs485_bps", "u1"),
+            ("button_switch_mode", "u1"),
+        ]
+        + _TRAILER
+    ),
+}
+
+# レスポンスのコマンド → (列名, フィールド名, 除数)。除数が 1 の列は整数のまま
+COLUMNS: Dict[int, List[Tuple[str, str, int]]] = {
+    C.motor_status_readback_resp.value: [
+        ("speed", "speed", 100),
+        ("position", "position", 100),
+        ("current", "current", 100),
+        ("mode", "mode", 1),
+        ("status", "status", 1),
+        ("error", "error", 1),
+    ],
+    C.other_status_readback_resp.value: [
+        ("vin", "vin_x100", 100),
+        ("temp", "temp", 1),
+        ("encoder_counter", "encoder_counter", 1),
+        ("rgb_mode", "rgb_mode", 1),
+        ("rgb_brightness", "rgb_brightness", 1),
+    ],
+    C.readback_2_resp.value: [
+        ("speed_p", "speed_p", 100_000),
+        ("speed_i", "speed_i", 100_000),
+        ("speed_d", "speed_d", 100_000),
+        ("rgb_b", "rgb_b", 1),
+        ("rgb_g", "rgb_g", 1),
+        ("rgb_r", "rgb_r", 1),
+    ],
+    C.readback_3_resp.value: [
+        ("position_p", "position_p", 100_000),
+        ("position_i", "position_i", 100_000),
+        ("position_d", "position_d", 100_000),
+        ("rs485_id", "rs485_id", 1),
+        ("rs485_bps", "rs485_bps", 1),
+        ("button_switch_mode", "button_switch_mode", 1),
+    ],
+}
+
+Buffer = Union[bytes, bytearray, memoryview, np.ndarray]
+
+
+def _crc8_table() -> np.ndarray:
+    table = np.zeros(256, dtype=np.uint8)
+    for i in range(256):
+        crc = i
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0x8C if crc & 0x01 else crc >> 1
+        table[i] = crc
+    return table
+
+
+# Roller485Util.calculate_crc8 (poly 0x8C, 右シフト) の 1 バイト分の表
+CRC8_TABLE = _crc8_table()
+
+
+@dataclass
+class StatusColumns:
+    """一括デコードの結果
+
+    columns の各列と valid は同じ長さで、i 番目の要素が i 番目のフレームに対応します。
+    valid が False のフレームの値は意味を持ちません。
+    """
+
+    command: Proto.CommandCode  # レスポンスのコマンド
+    device_id: np.ndarray
+    columns: Dict[str, np.ndarray]
+    valid: np.ndarray  # マジックナンバー・コマンド・CRC8 が正しいフレーム
+
+    def __len__(self) -> int:
+        return len(self.valid)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def rows(self) -> Iterator[dict]:
+        """有効なフレームを get_motor_status() などと同じ形式の dict で返す"""
+        names = list(self.columns)
+        for i in np.flatnonzero(self.valid):
+            yield {name: self.columns[name][i].item() for name in names}
+
+
+def frame_array(buffer: Buffer, frame_length: int = FRAME_LENGTH) -> np.ndarray:
+    """固定長フレームが連続したバッファを (N, frame_length) の uint8 配列として参照
+
+    バッファが bytes などの場合はコピーしません。
+
+    Args:
+        buffer (Buffer): フレームを連結したバッファ、または (N, frame_length) の配列
+        frame_length (int, optional): 1 フレームのバイト数. Defaults to FRAME_LENGTH.
+
+    Raises:
+        ValueError: バッファの長さが frame_length の倍数でない場合
+
+    Returns:
+        np.ndarray: (N, frame_length) の uint8 配列
+    """
+    if isinstance(buffer, np.ndarray):
+        arr = np.ascontiguousarray(buffer, dtype=np.uint8).reshape(-1)
+    else:
+        arr = np.frombuffer(buffer, dtype=np.uint8)
+    if arr.size % frame_length:
+        raise ValueError(
+            f"buffer length {arr.size} is not a multiple of {frame_length}"
+        )
+    return arr.reshape(-1, frame_length)
+
+
+def crc8_batch(frames: np.ndarray, start: int = 0) -> np.ndarray:
+    """各行の CRC8 を列ごとの表引きでまとめて計算
+
+    Args:
+        frames (np.ndarray): (N, L) の uint8 配列
+        start (int, optional): CRC の計算を始める列. Defaults to 0.
+
+    Returns:
+        np.ndarray: 各行の frames[i, start:] の CRC8 (uint8, 長さ N)
+    """
+    crc = np.zeros(frames.shape[0], dtype=np.uint8)
+    for col in range(start, frames.shape[1]):
+        np.bitwise_xor(crc, frames[:, col], out=crc)
+        np.take(CRC8_TABLE, crc, out=crc)
+    return crc
+
+
+def verify_crc(
+    buffer: Buffer, frame_length: int = FRAME_LENGTH, response: bool = True
+) -> np.ndarray:
+    """固定長フレームの CRC8 をまとめて検証
+
+    リクエストの CRC はフレーム全体 (最後のバイトを除く)、レスポンスの CRC は
+    マジックナンバー 0xAA 0x55 を除いたコマンドのバイト以降が対象です。
+
+    Args:
+        buffer (Buffer): フレームを連結したバッファ、または (N, frame_length) の配列
+        frame_length (int, optional): 1 フレームのバイト数. Defaults to FRAME_LENGTH.
+        response (bool, optional): レスポンスの場合は True. Defaults to True.
+
+    Returns:
+        np.ndarray: CRC8 が一致したフレームの bool マスク
+    """
+    frames = frame_array(buffer, frame_length)
+    crc = crc8_batch(frames[:, :-1], start=2 if response else 0)
+    return crc == frames[:, -1]
+
+
+def _response_command(command: Union[int, Proto.CommandCode]) -> Proto.CommandCode:
+    command = Proto.CommandCode(int(command) | 0x10)
+    if command.value not in DTYPES:
+        raise ValueError(f"{command!r} is not a status readback")
+    return command
+
+
+def decode_status(
+    buffer: Buffer, command: Union[int, Proto.CommandCode], check_crc: bool = True
+) -> StatusColumns:
+    """同じコマンドの 20 バイトのレスポンスを一括デコード
+
+    Args:
+        buffer (Buffer): レスポンスを連結したバッファ、または (N, 20) の uint8 配列
+        command (Union[int, Proto.CommandCode]): リードバックコマンド、
+            またはそのレスポンスのコマンド (例: motor_status_readback)
+        check_crc (bool, optional): False の場合は valid に CRC8 の検証を含めない.
+            Defaults to True.
+
+    Raises:
+        ValueError: リードバックコマンドでない場合、バッファの長さが 20 の倍数でない場合
+
+    Returns:
+        StatusColumns: 列ごとの配列と有効なフレームのマスク
+    """
+    resp = _response_command(command)
+    frames = frame_array(buffer)
+    records = frames.reshape(-1).view(DTYPES[resp.value])
+    columns: Dict[str, np.ndarray] = {}
+    for name, field, scale in COLUMNS[resp.value]:
+        raw = records[field]
+        columns[name] = raw / scale if scale != 1 else raw
+    valid = (records["magic"] == MAGIC) & (records["command"] == resp.value)
+    if check_crc:
+        valid &= verify_crc(frames)
+    return StatusColumns(resp, records["device_id"], columns, valid)
+
+
+def decode_mixed(
+    buffer: Buffer, check_crc: bool = True
+) -> Dict[Proto.CommandCode, StatusColumns]:
+    """異なるコマンドのレスポンスが混在したバッファをコマンドごとにデコード
+
+    Args:
+        buffer (Buffer): 20 バイトのレスポンスを連結したバッファ
+        check_crc (bool, optional): decode_status() の check_crc. Defaults to True.
+
+    Returns:
+        Dict[Proto.CommandCode, StatusColumns]: レスポンスのコマンド → デコード結果
+            (含まれていたコマンドのみ)
+    """
+    frames = frame_array(buffer)
+    commands = frames[:, 2]
+    result = {}
+    for value in DTYPES:
+        selected = commands == value
+        if selected.any():
+            result[Proto.CommandCode(value)] = decode_status(
+                frames[selected], value, check_crc
+            )
+    return result
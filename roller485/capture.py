@@ -0,0 +1,275 @@
+"""送受信フレームのバイナリキャプチャログ
+
+Roller485Util.capture に CaptureWriter を設定すると、write() / read() のたびに
+モノトニックな時刻・方向・ポートIDとバイト列を 1 レコードとして記録します。
+record() はメモリ上のバッファにレコードを追記するだけで、ファイルへの書き出しと
+ローテーションはバックグラウンドのスレッドが一定量または一定時間ごとにまとめて行うため、
+ポートのロックを持ったまま送受信するスレッドを遅くしません。
+
+ファイル形式:
+    ヘッダ: b"R485CAP" + バージョン (1 バイト)
+    レコード: timestamp_ns (u64) direction (u8) port_id (u8) length (u16) + データ
+    (すべてリトルエンディアン)
+"""
+
+import os
+import struct
+import threading
+from typing import BinaryIO, Iterable, Iterator, List, NamedTuple, Optional
+
+from roller485.clock import SYSTEM_CLOCK, Clock
+
+MAGIC = b"R485CAP"
+VERSION = 1
+FILE_HEADER = MAGIC + bytes([VERSION])
+RECORD_HEADER = struct.Struct("<QBBH")
+
+# 方向
+TX = 0
+RX = 1
+
+
+class CaptureRecord(NamedTuple):
+    """キャプチャの 1 レコード"""
+
+    timestamp_ns: int  # clock.monotonic_ns()
+    direction: int  # TX または RX
+    port_id: int
+    data: bytes
+
+
+class CaptureWriter:
+    """送受信フレームをバイナリログに追記
+
+    Examples:
+        >>> r485.capture = CaptureWriter("bus0.cap", port_id=0, max_bytes=64 << 20)
+        >>> r485.get_motor_status()
+        >>> r485.capture.close()
+    """
+
+    def __init__(
+        self,
+        path: str,
+        port_id: int = 0,
+        buffer_size: int = 64 * 1024,
+        flush_interval: Optional[float] = 1.0,
+        max_bytes: Optional[int] = None,
+        backup_count: int = 5,
+        clock: Clock = SYSTEM_CLOCK,
+    ):
+        """
+        Args:
+            path (str): 出力先
+            port_id (int, optional): レコードに付けるポートID (0〜255). Defaults to 0.
+            buffer_size (int, optional): バッファがこのバイト数を超えたら
+                バックグラウンドで書き出す. Defaults to 64 * 1024.
+            flush_interval (Optional[float], optional): バックグラウンドでこの秒数ごとに
+                書き出す. None ではバッファの量でだけ書き出す. Defaults to 1.0.
+            max_bytes (Optional[int], optional): ファイルがこのサイズを超えたら
+                path.1, path.2, ... にローテーションする. None ではローテーションしない.
+            backup_count (int, optional): 残す古いファイルの数. Defaults to 5.
+            clock (Clock, optional): レコードの時刻の取得 (書き出しの間隔は実時間).
+                Defaults to SYSTEM_CLOCK.
+        """
+        if not 0 <= port_id <= 0xFF:
+            raise ValueError("port_id must be 0-255")
+        self.path = path
+        self.port_id = port_id
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.clock = clock
+        self.records = 0
+        # 書き出し待ちのレコード (ローテーションをレコード単位で判定するため 1 件ずつ保持)
+        self._pending: List[bytes] = []
+        self._pending_bytes = 0
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        # ファイルへの書き出し (flush() と書き出しスレッドの排他)
+        self._io_lock = threading.Lock()
+        self._file: Optional[BinaryIO] = None
+        self._size = 0
+        self._closed = False
+        self._open()
+        self._thread = threading.Thread(
+            target=self._run, name="roller485-capture", daemon=True
+        )
+        self._thread.start()
+
+    def _open(self) -> None:
+        self._file = open(self.path, "ab")
+        self._size = self._file.tell()
+        if self._size == 0:
+            self._file.write(FILE_HEADER)
+            self._file.flush()
+            self._size = len(FILE_HEADER)
+
+    def record(
+        self, direction: int, data: bytes, timestamp_ns: Optional[int] = None
+    ) -> None:
+        """レコードをバッファに追記 (ファイルへの書き出しはバックグラウンドで行う)
+
+        Args:
+            direction (int): TX または RX
+            data (bytes): 送受信したバイト列 (65535 バイトまで)
+            timestamp_ns (Optional[int], optional): 時刻. None の場合は
+                clock.monotonic_ns().
+        """
+        if timestamp_ns is None:
+            timestamp_ns = self.clock.monotonic_ns()
+        entry = (
+            RECORD_HEADER.pack(timestamp_ns, direction, self.port_id, len(data)) + data
+        )
+        with self._lock:
+            self._pending.append(entry)
+            self._pending_bytes += len(entry)
+            self.records += 1
+            if self._pending_bytes >= self.buffer_size:
+                self._cond.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                if not self._closed and (
+                    not self._pending or self._pending_bytes < self.buffer_size
+                ):
+                    self._cond.wait(self.flush_interval)
+                if self._closed:
+                    return
+            self.flush()
+
+    def flush(self) -> None:
+        """バッファをファイルに書き出す (呼び出したスレッドで書き出しを待つ)"""
+        with self._io_lock:
+            with self._lock:
+                pending, self._pending = self._pending, []
+                self._pending_bytes = 0
+            if not pending or self._file is None:
+                return
+            chunk = bytearray()
+            for entry in pending:
+                size = self._size + len(chunk)
+                if (
+                    self.max_bytes is not None
+                    and size > len(FILE_HEADER)
+                    and size + len(entry) > self.max_bytes
+                ):
+                    self._write(chunk)
+                    chunk = bytearray()
+                    self._rotate()
+                chunk += entry
+            self._write(chunk)
+
+    def _write(self, chunk: bytearray) -> None:
+        assert self._file is not None
+        if chunk:
+            self._file.write(chunk)
+            self._file.flush()
+            self._size += len(chunk)
+
+    def _rotate(self) -> None:
+        assert self._file is not None
+        self._file.close()
+        for i in range(self.backup_count - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._open()
+
+    def close(self) -> None:
+        """書き出しスレッドを止め、バッファを書き出してファイルを閉じる"""
+        with self._lock:
+            self._closed = True
+            self._cond.notify()
+        if self._thread is not threading.current_thread():
+            self._thread.join()
+        self.flush()
+        with self._io_lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __enter__(self) -> "CaptureWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def read_capture(path: str, chunk_size: int = 64 * 1024) -> Iterator[CaptureRecord]:
+    """キャプチャファイルのレコードを先頭から順に読む
+
+    ファイル全体を読み込まず、chunk_size ずつ読みながらレコードを返します。
+    書き込み途中で切れた末尾のレコードは無視します。
+
+    Args:
+        path (str): キャプチャファイル
+        chunk_size (int, optional): 1 回に読むバイト数. Defaults to 64 * 1024.
+
+    Yields:
+        CaptureRecord: レコード
+    """
+    header_size = RECORD_HEADER.size
+    with open(path, "rb") as f:
+        header = f.read(len(FILE_HEADER))
+        if header[: len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a roller485 capture file")
+        if header[len(MAGIC)] != VERSION:
+            raise ValueError(f"unsupported capture version {header[len(MAGIC)]}")
+
+        buf = b""
+        pos = 0
+        while True:
+            chunk = f.read(chunk_size)
+            if chunk:
+                buf = buf[pos:] + chunk
+                pos = 0
+            while len(buf) - pos >= header_size:
+                ts, direction, port_id, length = RECORD_HEADER.unpack_from(buf, pos)
+                end = pos + header_size + length
+                if end > len(buf):
+                    break
+                yield CaptureRecord(
+                    ts, direction, port_id, buf[pos + header_size : end]
+                )
+                pos = end
+            if not chunk:
+                return
+
+
+def capture_files(path: str) -> List[str]:
+    """ローテーションされたファイルを古い順に (path.N, ..., path.1, path)
+
+    Args:
+        path (str): CaptureWriter に渡した出力先
+
+    Returns:
+        List[str]: 存在するファイル
+    """
+    backups = []
+    i = 1
+    while os.path.exists(f"{path}.{i}"):
+        backups.append(f"{path}.{i}")
+        i += 1
+    files = backups[::-1]
+    if os.path.exists(path):
+        files.append(path)
+    return files
+
+
+def read_captures(paths: Iterable[str]) -> Iterator[CaptureRecord]:
+    """複数のキャプチャファイルを順に読む
+
+    Args:
+        paths (Iterable[str]): キャプチャファイル (capture_files() の結果など)
+
+    Yields:
+        CaptureRecord: レコード
+    """
+    for path in paths:
+        yield from read_capture(path)
@@ -0,0 +1,401 @@
+"""インデックス付きキャプチャファイルの読み出し
+
+CaptureWriter のキャプチャファイル (形式はそのまま) に、疎なインデックスを
+サイドカーファイル (path + ".idx") として付け、キャプチャ本体をメモリマップして読みます。
+インデックスは stride レコードごとのブロックについて、先頭レコードの時刻とオフセット、
+ブロック内に現れるデバイスIDとコマンドコードのビットマスクを持ちます。
+
+- 時刻へのシークはインデックスの二分探索とブロック内の走査 (最大 stride レコード)
+- デバイスID・コマンドで絞り込むときは、該当しないブロックを読み飛ばし、
+  各レコードはヘッダと先頭 4 バイトだけを見る (Kaitai ではデコードしない)
+- レコードのデータはメモリマップ上の memoryview (コピーなし)
+
+インデックスのファイル形式:
+    ヘッダ: b"R485IDX" + バージョン (1 バイト)
+            stride (u32) インデックス済みのキャプチャのバイト数 (u64) レコード数 (u64)
+    エントリ: timestamp_ns (u64) offset (u64) デバイスIDのマスク (32 バイト)
+            コマンドのマスク (32 バイト)
+    (すべてリトルエンディアン)
+"""
+
+import bisect
+import mmap
+import os
+import struct
+from typing import TYPE_CHECKING, Iterator, List, NamedTuple, Optional, Tuple
+
+from .capture import FILE_HEADER, MAGIC, RECORD_HEADER, RX, VERSION
+
+if TYPE_CHECKING:
+    import numpy as np
+
+INDEX_MAGIC = b"R485IDX"
+INDEX_VERSION = 1
+INDEX_SUFFIX = ".idx"
+INDEX_HEADER = struct.Struct("<IQQ")
+INDEX_ENTRY = struct.Struct("<QQ32s32s")
+
+
+class IndexEntry(NamedTuple):
+    """stride レコードごとのブロックのインデックス"""
+
+    timestamp_ns: int  # 先頭レコードの時刻
+    offset: int  # 先頭レコードのファイル内の位置
+    devices: int  # ブロック内のデバイスIDのビットマスク
+    commands: int  # ブロック内のコマンドコードのビットマスク
+
+
+class IndexedRecord(NamedTuple):
+    """メモリマップ上のレコード"""
+
+    timestamp_ns: int
+    direction: int
+    port_id: int
+    offset: int  # レコードヘッダのファイル内の位置
+    data: memoryview  # メモリマップへのビュー (コピーなし)
+
+
+def frame_key(data) -> Optional[Tuple[int, int]]:
+    """レコードの先頭のフレームの (デバイスID, コマンドコード)
+
+    レスポンスは 0xAA 0x55 に続くバイト、リクエストは先頭のバイトから読みます。
+
+    Args:
+        data: レコードのデータ
+
+    Returns:
+        Optional[Tuple[int, int]]: 短すぎて判別できない場合は None
+    """
+    if len(data) >= 4 and data[0] == 0xAA and data[1] == 0x55:
+        return data[3], data[2]
+    if len(data) >= 2:
+        return data[1], data[0]
+    return None
+
+
+def index_path(path: str) -> str:
+    """キャプチャファイルのインデックスのパス"""
+    return path + INDEX_SUFFIX
+
+
+def _check_header(buf, path: str) -> None:
+    if buf[: len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} is not a roller485 capture file")
+    if buf[len(MAGIC)] != VERSION:
+        raise ValueError(f"unsupported capture version {buf[len(MAGIC)]}")
+
+
+def _scan(buf, start: int, stride: int) -> Tuple[List[IndexEntry], int, int]:
+    """start 以降のレコードを走査してインデックスを作る
+
+    Returns:
+        Tuple[List[IndexEntry], int, int]: エントリ、最後の完全なレコードの終端、レコード数
+    """
+    header_size = RECORD_HEADER.size
+    size = len(buf)
+    entries: List[IndexEntry] = []
+    pos = start
+    count = 0
+    devices = commands = 0
+    block_ts = block_offset = 0
+    while pos + header_size <= size:
+        ts, _, _, length = RECORD_HEADER.unpack_from(buf, pos)
+        end = pos + header_size + length
+        if end > size:
+            break
+        if count % stride == 0:
+            if count:
+                entries.append(IndexEntry(block_ts, block_offset, devices, commands))
+            block_ts, block_offset = ts, pos
+            devices = commands = 0
+        key = frame_key(buf[pos + header_size : min(end, pos + header_size + 4)])
+        if key is not None:
+            devices |= 1 << key[0]
+            commands |= 1 << key[1]
+        count += 1
+        pos = end
+    if count:
+        entries.append(IndexEntry(block_ts, block_offset, devices, commands))
+    return entries, pos, count
+
+
+def build_index(path: str, stride: int = 256) -> List[IndexEntry]:
+    """キャプチャファイルを走査してインデックスを書き出す
+
+    Args:
+        path (str): キャプチャファイル
+        stride (int, optional): インデックスを付けるレコードの間隔. Defaults to 256.
+
+    Returns:
+        List[IndexEntry]: インデックス
+    """
+    with open(path, "rb") as f:
+        data = f.read(len(FILE_HEADER))
+        _check_header(data, path)
+        if os.fstat(f.fileno()).st_size == len(FILE_HEADER):
+            entries: List[IndexEntry] = []
+            indexed, count = len(FILE_HEADER), 0
+        else:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                entries, indexed, count = _scan(mm, len(FILE_HEADER), stride)
+    _write_index(path, stride, indexed, count, entries)
+    return entries
+
+
+def _write_index(
+    path: str, stride: int, indexed: int, count: int, entries: List[IndexEntry]
+) -> None:
+    tmp = index_path(path) + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(INDEX_MAGIC + bytes([INDEX_VERSION]))
+        f.write(INDEX_HEADER.pack(stride, indexed, count))
+        for e in entries:
+            f.write(
+                INDEX_ENTRY.pack(
+                    e.timestamp_ns,
+                    e.offset,
+                    e.devices.to_bytes(32, "little"),
+                    e.commands.to_bytes(32, "little"),
+                )
+            )
+    os.replace(tmp, index_path(path))
+
+
+def load_index(path: str) -> Optional[Tuple[int, int, int, List[IndexEntry]]]:
+    """インデックスを読む
+
+    Args:
+        path (str): キャプチャファイル (インデックスのパスではない)
+
+    Returns:
+        Optional[Tuple[int, int, int, List[IndexEntry]]]:
+            (stride, インデックス済みのバイト数, レコード数, エントリ)。
+            インデックスがない、または壊れている場合は None
+    """
+    try:
+        with open(index_path(path), "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+    prefix = len(INDEX_MAGIC) + 1
+    if (
+        data[: len(INDEX_MAGIC)] != INDEX_MAGIC
+        or len(data) < prefix + INDEX_HEADER.size
+        or data[len(INDEX_MAGIC)] != INDEX_VERSION
+    ):
+        return None
+    stride, indexed, count = INDEX_HEADER.unpack_from(data, prefix)
+    body = data[prefix + INDEX_HEADER.size :]
+    if len(body) % INDEX_ENTRY.size:
+        return None
+    entries = [
+        IndexEntry(
+            ts, offset, int.from_bytes(dev, "little"), int.from_bytes(cmd, "little")
+        )
+        for ts, offset, dev, cmd in INDEX_ENTRY.iter_unpack(body)
+    ]
+    return stride, indexed, count, entries
+
+
+class IndexedCapture:
+    """インデックス付きでメモリマップしたキャプチャファイル
+
+    インデックスがない場合や、キャプチャファイルがインデックスを作った後に
+    追記されていた場合は、開くときにインデックスを作り直します。
+    レコードのタイムスタンプは (1 つの CaptureWriter が書いたファイルと同様に)
+    単調増加であることを前提とします。
+
+    records() が返す memoryview はメモリマップを参照しているため、
+    close() の前に手放してください。
+
+    Examples:
+        >>> with IndexedCapture("bus0.cap") as cap:
+        ...     for rec in cap.records(start_ns=t0, end_ns=t1, device_id=3):
+        ...         print(rec.timestamp_ns, bytes(rec.data).hex())
+    """
+
+    def __init__(self, path: str, stride: int = 256):
+        """
+        Args:
+            path (str): キャプチャファイル
+            stride (int, optional): インデックスを作るときのレコードの間隔.
+                Defaults to 256.
+        """
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            size = os.fstat(self._file.fileno()).st_size
+            _check_header(self._file.read(len(FILE_HEADER)), path)
+            index = load_index(path)
+            if index is None or not self._is_current(index[1], size):
+                build_index(path, stride)
+                index = load_index(path)
+            assert index is not None
+            self.stride, self.size, self.count, self.entries = index
+            self._mmap = (
+                mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+                if size > len(FILE_HEADER)
+                else None
+            )
+        except BaseException:
+            self._file.close()
+            raise
+        self._timestamps = [e.timestamp_ns for e in self.entries]
+        # 最後に走査したレコード数 (絞り込みの効果の確認用)
+        self.scanned = 0
+
+    def _is_current(self, indexed: int, size: int) -> bool:
+        # インデックス済みの位置以降に完全なレコードがなければ最新
+        if indexed > size:
+            return False
+        self._file.seek(indexed)
+        header = self._file.read(RECORD_HEADER.size)
+        if len(header) < RECORD_HEADER.size:
+            return True
+        _, _, _, length = RECORD_HEADER.unpack(header)
+        return indexed + RECORD_HEADER.size + length > size
+
+    def __len__(self) -> int:
+        return self.count
+
+    def close(self) -> None:
+        """メモリマップとファイルを閉じる"""
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
+
+    def __enter__(self) -> "IndexedCapture":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _block(self, timestamp_ns: Optional[int]) -> int:
+        if timestamp_ns is None:
+            return 0
+        return max(0, bisect.bisect_left(self._timestamps, timestamp_ns) - 1)
+
+    def seek(self, timestamp_ns: int) -> int:
+        """timestamp_ns 以降の最初のレコードの位置
+
+        Args:
+            timestamp_ns (int): 時刻
+
+        Returns:
+            int: レコードのファイル内の位置 (該当なしの場合はレコードの終端)
+        """
+        for rec in self.records(start_ns=timestamp_ns):
+            return rec.offset
+        return self.size
+
+    def records(
+        self,
+        start_ns: Optional[int] = None,
+        end_ns: Optional[int] = None,
+        device_id: Optional[int] = None,
+        command: Optional[int] = None,
+        direction: Optional[int] = None,
+    ) -> Iterator[IndexedRecord]:
+        """条件に合うレコード
+
+        デバイスIDとコマンドはレコードの先頭のフレームで判定します。
+
+        Args:
+            start_ns (Optional[int], optional): この時刻以降. Defaults to None.
+            end_ns (Optional[int], optional): この時刻より前. Defaults to None.
+            device_id (Optional[int], optional): デバイスID. Defaults to None.
+            command (Optional[int], optional): コマンドコード (レスポンスは
+                レスポンスのコマンドコード). Defaults to None.
+            direction (Optional[int], optional): TX または RX. Defaults to None.
+
+        Yields:
+            IndexedRecord: レコード
+        """
+        mm = self._mmap
+        if mm is None:
+            return
+        header_size = RECORD_HEADER.size
+        view = memoryview(mm)
+        self.scanned = 0
+        try:
+            for i in range(self._block(start_ns), len(self.entries)):
+                entry = self.entries[i]
+                if end_ns is not None and entry.timestamp_ns >= end_ns:
+                    return
+                if (device_id is not None and not entry.devices >> device_id & 1) or (
+                    command is not None and not entry.commands >> command & 1
+                ):
+                    continue
+                stop = (
+                    self.entries[i + 1].offset
+                    if i + 1 < len(self.entries)
+                    else self.size
+                )
+                pos = entry.offset
+                while pos < stop:
+                    ts, rec_dir, port_id, length = RECORD_HEADER.unpack_from(mm, pos)
+                    data_start = pos + header_size
+                    end = data_start + length
+                    self.scanned += 1
+                    offset, pos = pos, end
+                    if start_ns is not None and ts < start_ns:
+                        continue
+                    if end_ns is not None and ts >= end_ns:
+                        return
+                    if direction is not None and rec_dir != direction:
+                        continue
+                    if device_id is not None or command is not None:
+                        key = frame_key(mm[data_start : min(end, data_start + 4)])
+                        if key is None:
+                            continue
+                        if (device_id is not None and key[0] != device_id) or (
+                            command is not None and key[1] != command
+                        ):
+                            continue
+                    yield IndexedRecord(
+                        ts, rec_dir, port_id, offset, view[data_start:end]
+                    )
+        finally:
+            view.release()
+
+    def frame_array(
+        self,
+        command: int,
+        start_ns: Optional[int] = None,
+        end_ns: Optional[int] = None,
+        device_id: Optional[int] = None,
+    ) -> "np.ndarray":
+        """レスポンスのフレームを bulk.decode_status() に渡せる (N, 長さ) の配列にまとめる
+
+        レコードはヘッダを挟んで並んでいるため、該当するレコードの位置を集めてから
+        メモリマップ上の uint8 ビューから 1 回のインデックス操作で取り出します。
+        NumPy が必要です。
+
+        Args:
+            command (int): レスポンスのコマンドコード (リードバックコマンドも可)
+            start_ns (Optional[int], optional): この時刻以降. Defaults to None.
+            end_ns (Optional[int], optional): この時刻より前. Defaults to None.
+            device_id (Optional[int], optional): デバイスID. Defaults to None.
+
+        Returns:
+            np.ndarray: (N, フレーム長) の uint8 配列
+        """
+        import numpy as np
+
+        from .util import Roller485Util
+
+        command = int(command) | 0x10
+        length = Roller485Util.get_packet_length(command)
+        offsets = [
+            rec.offset + RECORD_HEADER.size
+            for rec in self.records(start_ns, end_ns, device_id, command, RX)
+            if len(rec.data) >= length
+        ]
+        if self._mmap is None or not offsets:
+            return np.empty((0, length), dtype=np.uint8)
+        buf = np.frombuffer(self._mmap, dtype=np.uint8)
+        index = np.asarray(offsets, dtype=np.int64)[:, None] + np.arange(length)
+        frames = buf[index]
+        del buf
+        return frames
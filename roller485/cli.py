@@ -10,17 +10,63 @@ import json
 import sys
 import time
 
+from roller485.analyzer import analyze, write_report
+from roller485.capture import CaptureWriter
+from roller485.estop import EmergencyStop
+from roller485.latency import READBACK_COMMANDS, LatencyProfile, calibrate
+from roller485.metrics import MetricsRegistry
+from roller485.retry import RetryPolicy
+from roller485.roller485_protocol import Roller485Protocol as Proto
+from roller485.sniffer import SniffedFrame, Sniffer
+from roller485.timing import BusTiming, CapacityPlanner
 from roller485.util import Roller485Util
 
 
+# シリアルポートを開かずに実行するコマンド
+PORTLESS_COMMANDS = {"plan", "analyze", "soak"}
+
+
+class _Parser(argparse.ArgumentParser):
+    """--port を PORTLESS_COMMANDS 以外で必須にする ArgumentParser"""
+
+    def parse_args(self, args=None, namespace=None):  # type: ignore[override]
+        ns = super().parse_args(args, namespace)
+        if ns.port is None and ns.command not in PORTLESS_COMMANDS:
+            self.error("the following arguments are required: --port")
+        return ns
+
+
+def _rate(value: str) -> tuple:
+    """COMMAND=HZ 形式のレート指定をパース"""
+    name, sep, hz = value.partition("=")
+    try:
+        return Proto.CommandCode[name], float(hz)
+    except (KeyError, ValueError):
+        raise argparse.ArgumentTypeError(
+            f"invalid rate {value!r} (expected COMMAND=HZ, "
+            "e.g. motor_status_readback=100)"
+        ) from None
+
+
+def _weight(value: str) -> tuple:
+    """OPERATION=WEIGHT 形式の比率指定をパース"""
+    name, sep, weight = value.partition("=")
+    try:
+        return name, float(weight)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"invalid mix {value!r} (expected OPERATION=WEIGHT, e.g. readback=3)"
+        ) from None
+
+
 def create_parser() -> argparse.ArgumentParser:
-    parser = argparse.ArgumentParser(
+    parser = _Parser(
         prog="roller485",
         description="Unit-Roller485 CLI control tool",
     )
     parser.add_argument(
         "--port",
-        required=True,
+        default=None,
         help="Serial port (e.g. /dev/ttyUSB0, /dev/tty.usbserial-10)",
     )
     parser.add_argument(
@@ -41,6 +87,18 @@ def create_parser() -> argparse.ArgumentParser:
         default=1.0,
         help="Timeout in seconds (default: 1.0)",
     )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=0,
+        help="Retry idempotent commands on timeout/CRC/echo mismatch (default: 0)",
+    )
+    parser.add_argument(
+        "--latency-profile",
+        default=None,
+        metavar="FILE",
+        help="Latency profile written by 'calibrate' (replaces the fixed 50 ms wait)",
+    )
 
     sub = parser.add_subparsers(dest="command", help="Command to execute")
     sub.required = True
@@ -162,6 +220,16 @@ def create_parser() -> argparse.ArgumentParser:
         "get-position-pid-and-other", help="Read position PID and other status"
     )
 
+    # --- get-full-status ---
+    p = sub.add_parser("get-full-status", help="Read all status readbacks back-to-back")
+    p.add_argument(
+        "--sections",
+        nargs="+",
+        choices=["motor", "other", "speed_pid_rgb", "position_pid_other"],
+        default=None,
+        help="Sections to read (default: all)",
+    )
+
     # --- read-i2c ---
     p = sub.add_parser("read-i2c", help="Read I2C register")
     p.add_argument("addr", type=lambda x: int(x, 0), help="I2C address (e.g. 0x50)")
@@ -197,11 +265,248 @@ def create_parser() -> argparse.ArgumentParser:
     )
     p.add_argument("data", help="Data to write (hex string, e.g. 0102ff)")
 
+    # --- estop ---
+    p = sub.add_parser("estop", help="Emergency stop: turn off all motors in one burst")
+    p.add_argument(
+        "--devices",
+        type=int,
+        nargs="+",
+        default=None,
+        help="Device IDs to stop (default: --target)",
+    )
+    p.add_argument(
+        "--verify",
+        action="store_true",
+        help="Confirm each device with a synchronous motor-switch off",
+    )
+    p.add_argument(
+        "--no-zero",
+        action="store_true",
+        help="Do not send zero current/speed setpoints after motor off",
+    )
+
+    # --- sniff ---
+    p = sub.add_parser(
+        "sniff", help="Passively decode bus traffic without transmitting"
+    )
+    p.add_argument("--count", type=int, default=None, help="Stop after N frames")
+    p.add_argument("--duration", type=float, default=None, help="Stop after S seconds")
+    p.add_argument("--json", action="store_true", help="Print frames as JSON lines")
+    p.add_argument(
+        "--output", default=None, help="Also write frames to a capture log file"
+    )
+    p.add_argument(
+        "--port-id",
+        type=int,
+        default=0,
+        help="Port ID recorded in the capture log (default: 0)",
+    )
+
+    # --- stats ---
+    p = sub.add_parser(
+        "stats", help="Poll status readbacks and print per-command metrics"
+    )
+    p.add_argument(
+        "--devices",
+        type=int,
+        nargs="+",
+        default=None,
+        help="Device IDs to poll (default: --target)",
+    )
+    p.add_argument("--count", type=int, default=10, help="Polling rounds (default: 10)")
+    p.add_argument(
+        "--interval",
+        type=float,
+        default=0.0,
+        help="Seconds between rounds (default: 0.0)",
+    )
+    p.add_argument("--json", action="store_true", help="Print the snapshot as JSON")
+
+    # --- calibrate ---
+    p = sub.add_parser(
+        "calibrate", help="Measure per-command response latency of --target"
+    )
+    p.add_argument("--output", required=True, help="Profile file to write (JSON)")
+    p.add_argument(
+        "--samples",
+        type=int,
+        default=20,
+        help="Samples per readback command (default: 20)",
+    )
+    p.add_argument(
+        "--include-settings",
+        action="store_true",
+        help="Also measure setting commands by re-sending current values "
+        "(writes to flash)",
+    )
+
+    # --- analyze ---
+    p = sub.add_parser(
+        "analyze", help="Analyze capture log files offline (no port needed)"
+    )
+    p.add_argument("files", nargs="+", help="Capture log files")
+    p.add_argument(
+        "--top",
+        type=int,
+        default=10,
+        help="Number of top bus consumers to report (default: 10)",
+    )
+    p.add_argument("--json", default=None, help="Also write the report as JSON")
+
+    # --- soak ---
+    p = sub.add_parser(
+        "soak", help="Run a soak test against the emulator (no port needed)"
+    )
+    p.add_argument(
+        "--duration",
+        type=float,
+        default=60.0,
+        help="Test duration in seconds (default: 60)",
+    )
+    p.add_argument(
+        "--interval",
+        type=float,
+        default=1.0,
+        help="Sampling interval in seconds (default: 1)",
+    )
+    p.add_argument(
+        "--warmup",
+        type=float,
+        default=1.0,
+        help="Unmeasured warm-up time in seconds (default: 1)",
+    )
+    p.add_argument(
+        "--devices", type=int, default=1, help="Number of devices (default: 1)"
+    )
+    p.add_argument(
+        "--mix",
+        type=_weight,
+        action="append",
+        default=[],
+        help="Operation weight as OPERATION=WEIGHT, one of setpoint, readback, i2c "
+        "(repeatable; default: setpoint=1 readback=3 i2c=1)",
+    )
+    p.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    p.add_argument(
+        "--max-rss-growth",
+        type=float,
+        default=32.0,
+        help="Fail if RSS grows by more than this many MiB (default: 32)",
+    )
+    p.add_argument(
+        "--max-throughput-drop",
+        type=float,
+        default=0.5,
+        help="Fail if throughput drops by more than this fraction (default: 0.5)",
+    )
+    p.add_argument(
+        "--max-error-rate",
+        type=float,
+        default=0.0,
+        help="Fail if the error rate exceeds this fraction (default: 0)",
+    )
+    p.add_argument("--json", default=None, help="Also write the report as JSON")
+
+    # --- plan ---
+    p = sub.add_parser(
+        "plan", help="Print bus timing and capacity plan (no port needed)"
+    )
+    p.add_argument(
+        "--devices", type=int, default=1, help="Number of devices (default: 1)"
+    )
+    p.add_argument(
+        "--rate",
+        type=_rate,
+        action="append",
+        default=[],
+        help="Per-device poll rate as COMMAND=HZ (repeatable)",
+    )
+    p.add_argument(
+        "--turnaround",
+        type=float,
+        default=0.001,
+        help="Device turnaround time in seconds (default: 0.001)",
+    )
+    p.add_argument(
+        "--host-delay",
+        type=float,
+        default=0.0,
+        help="Fixed host wait after each request in seconds (default: 0.0)",
+    )
+
     return parser
 
 
+def run_plan(args: argparse.Namespace) -> int:
+    """Print the timing table or a capacity plan."""
+    timing = BusTiming(
+        args.baudrate, turnaround=args.turnaround, host_delay=args.host_delay
+    )
+    if not args.rate:
+        print(
+            f"{'command':<40} {'req':>4} {'resp':>4} {'exchange[ms]':>12} {'max[Hz]':>9}"
+        )
+        for row in timing.table():
+            print(
+                f"{row['command']:<40} {row['request_bytes']:>4} "
+                f"{row['response_bytes']:>4} {row['exchange_time'] * 1000:>12.3f} "
+                f"{row['max_rate']:>9.1f}"
+            )
+        return 0
+
+    plan = CapacityPlanner(timing).plan(args.devices, dict(args.rate))
+    print(plan.format())
+    return 0 if plan.feasible else 1
+
+
+def run_analyze(args: argparse.Namespace) -> int:
+    """Print a summary of captured bus traffic."""
+    analyzer = analyze(args.files, baudrate=args.baudrate, top=args.top)
+    print(analyzer.format())
+    if args.json:
+        write_report(analyzer, args.json)
+    return 0
+
+
+def run_soak(args: argparse.Namespace) -> int:
+    """Drive the emulator at full rate and check for leaks and slowdowns."""
+    from roller485.soak import SoakHarness, SoakThresholds, emulated_client
+
+    device_ids = tuple(range(args.devices))
+    _, r485 = emulated_client(device_ids)
+    thresholds = SoakThresholds(
+        max_rss_growth=args.max_rss_growth * 1024 * 1024,
+        max_throughput_drop=args.max_throughput_drop,
+        max_error_rate=args.max_error_rate,
+    )
+    try:
+        harness = SoakHarness(
+            r485,
+            device_ids=device_ids,
+            mix=dict(args.mix) or None,
+            thresholds=thresholds,
+            seed=args.seed,
+        )
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    report = harness.run(args.duration, interval=args.interval, warmup=args.warmup)
+    print(report.format())
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report.as_dict(), f, indent=2)
+    return 0 if report.passed else 1
+
+
 def run(args: argparse.Namespace) -> int:
     """Execute a command and return the exit code."""
+    if args.command == "plan":
+        return run_plan(args)
+    if args.command == "analyze":
+        return run_analyze(args)
+    if args.command == "soak":
+        return run_soak(args)
+
     r485 = Roller485Util(
         target=args.target,
         port=args.port,
@@ -213,6 +518,13 @@ def run(args: argparse.Namespace) -> int:
         while not r485.is_open:
             time.sleep(0.1)
 
+        if args.retries > 0:
+            r485.retry_policy = RetryPolicy(attempts=args.retries + 1)
+
+        if args.latency_profile:
+            profile = LatencyProfile.load(args.latency_profile)
+            r485.latency_profiles[profile.device_id] = profile
+
         cmd = args.command
 
         # --- Setting commands (return bool) ---
@@ -312,6 +624,12 @@ def run(args: argparse.Namespace) -> int:
             print(json.dumps(result, indent=2, ensure_ascii=False))
             return 0 if result else 1
 
+        elif cmd == "get-full-status":
+            status = r485.get_full_status(args.sections)
+            print(json.dumps(status.as_dict(), indent=2, ensure_ascii=False))
+            sections = args.sections or status.SECTIONS
+            return 0 if all(getattr(status, s) for s in sections) else 1
+
         # --- I2C commands ---
         elif cmd == "read-i2c":
             data = r485.read_i2c(args.addr, args.reg_len, args.reg_addr, args.data_len)
@@ -339,6 +657,76 @@ def run(args: argparse.Namespace) -> int:
             data = bytes.fromhex(args.data)
             ok = r485.write_i2c_raw(args.addr, args.stop_bit, data)
 
+        # --- Emergency stop ---
+        elif cmd == "estop":
+            devices = args.devices if args.devices else [args.target]
+            estop = EmergencyStop(r485, devices, zero_setpoints=not args.no_zero)
+            estop_result = estop.trigger(verify=args.verify)
+            verified = estop_result.verified
+            print(
+                json.dumps(
+                    {
+                        "time_to_last_byte_ms": estop_result.time_to_last_byte * 1000,
+                        "bytes_sent": estop_result.bytes_sent,
+                        "verified": {str(k): v for k, v in verified.items()},
+                    },
+                    indent=2,
+                )
+            )
+            return 0 if all(verified.values()) else 1
+
+        # --- Sniffer ---
+        elif cmd == "sniff":
+
+            def show(frame: SniffedFrame) -> None:
+                line = json.dumps(frame.as_dict()) if args.json else frame.format()
+                print(line, flush=True)
+
+            capture = (
+                CaptureWriter(args.output, port_id=args.port_id, clock=r485.clock)
+                if args.output
+                else None
+            )
+            sniffer = Sniffer(
+                r485._transport, on_frame=show, capture=capture, clock=r485.clock
+            )
+            try:
+                sniffer.run(duration=args.duration, count=args.count)
+            except KeyboardInterrupt:
+                pass
+            finally:
+                if capture is not None:
+                    capture.close()
+            print(json.dumps(sniffer.stats()), file=sys.stderr)
+            return 0
+
+        # --- Metrics ---
+        elif cmd == "stats":
+            r485.metrics = MetricsRegistry()
+            devices = args.devices if args.devices else [args.target]
+            for i in range(args.count):
+                if i and args.interval > 0:
+                    time.sleep(args.interval)
+                for device_id in devices:
+                    for command in READBACK_COMMANDS:
+                        r485.readback(command, device_id=device_id)
+            if args.json:
+                print(json.dumps(r485.metrics.snapshot(), indent=2))
+            else:
+                print(r485.metrics.format())
+            return 0
+
+        # --- Latency calibration ---
+        elif cmd == "calibrate":
+            profile = calibrate(
+                r485,
+                samples=args.samples,
+                include_settings=args.include_settings,
+            )
+            profile.save(args.output)
+            print(json.dumps(profile.to_dict(), indent=2))
+            return 0 if profile.turnaround else 1
+
         else:
             print(f"Unknown command: {cmd}", file=sys.stderr)
             return 1
@@ -0,0 +1,192 @@
+"""roller485d のクライアント
+
+Roller485Util と同じメソッド名で、roller485d が所有するバスを操作します。
+Roller485Util(port=...) を Roller485Client(...) に置き換えるだけで切り替えられます。
+"""
+
+import itertools
+import json
+import socket
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional
+
+from .daemon import (
+    DEFAULT_SOCKET,
+    EXPOSED_METHODS,
+    decode_error,
+    decode_value,
+    encode_value,
+)
+from .scheduler import Priority
+from .util import Roller485Util
+
+
+class Roller485Client:
+    """roller485d のクライアント
+
+    EXPOSED_METHODS (Roller485Util の公開メソッド) は同名のメソッドとして呼び出せ、
+    宛先には target が使われます。1 本の接続を複数スレッドで共有でき、
+    submit() で投入したリクエストはパイプライン化されます。
+
+    Examples:
+        >>> r485 = Roller485Client(target=0, bus="main")
+        >>> r485.motor_switch(Roller485Client.Switch.On)
+        >>> r485.get_motor_status()
+        >>> future = r485.submit("read_i2c", 0x50, 0, 0, 16)
+        >>> r485.close()
+    """
+
+    Switch = Roller485Util.Switch
+    MotorMode = Roller485Util.MotorMode
+    ButtonMode = Roller485Util.ButtonMode
+    RS485BaudRate = Roller485Util.RS485BaudRate
+
+    def __init__(
+        self,
+        target: int = 0,
+        path: str = DEFAULT_SOCKET,
+        bus: Optional[str] = None,
+        timeout: Optional[float] = 5.0,
+    ):
+        """
+        Args:
+            target (int, optional): 宛先のデバイスID. Defaults to 0.
+            path (str, optional): roller485d のソケットのパス. Defaults to DEFAULT_SOCKET.
+            bus (Optional[str], optional): バス名. デーモンのバスが 1 本なら省略可.
+                Defaults to None.
+            timeout (Optional[float], optional): 同期呼び出しで応答を待つ時間 [秒].
+                None で無制限. Defaults to 5.0.
+        """
+        self.target = target
+        self.bus = bus
+        self.timeout = timeout
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.connect(path)
+        self._reader = self._sock.makefile("rb")
+        self._send_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, Future] = {}
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._receive, name="roller485-client", daemon=True
+        )
+        self._thread.start()
+
+    def __enter__(self) -> "Roller485Client":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """接続を閉じる (応答待ちのリクエストは ConnectionError で完了)"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        try:
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._thread.join()
+        self._reader.close()
+        self._sock.close()
+
+    def __getattr__(self, name: str) -> Callable[..., Any]:
+        if name not in EXPOSED_METHODS:
+            raise AttributeError(f"{type(self).__name__!r} has no attribute {name!r}")
+
+        def method(*args: Any, **kwargs: Any) -> Any:
+            return self.call(name, *args, **kwargs)
+
+        method.__name__ = name
+        method.__doc__ = getattr(Roller485Util, name).__doc__
+        return method
+
+    def submit(
+        self,
+        method: str,
+        *args: Any,
+        priority: Optional[Priority] = None,
+        deadline: Optional[float] = None,
+        **kwargs: Any,
+    ) -> Future:
+        """リクエストを送信し、応答を待たずに Future を返す
+
+        Args:
+            method (str): 呼び出す Roller485Util のメソッド名 (または "buses", "stats")
+            *args: メソッドの引数
+            priority (Optional[Priority], optional): 優先度. None の場合は
+                デーモンの METHOD_PRIORITY の既定値. Defaults to None.
+            deadline (Optional[float], optional): 期限 [秒]. Defaults to None.
+            **kwargs: メソッドのキーワード引数
+
+        Returns:
+            Future: メソッドの戻り値を受け取る Future
+        """
+        request: Dict[str, Any] = {
+            "id": next(self._ids),
+            "method": method,
+            "args": encode_value(args),
+            "kwargs": encode_value(kwargs),
+            "target": self.target,
+        }
+        if self.bus is not None:
+            request["bus"] = self.bus
+        if priority is not None:
+            request["priority"] = Priority(priority).name
+        if deadline is not None:
+            request["deadline"] = deadline
+        data = json.dumps(request, separators=(",", ":")).encode() + b"\n"
+
+        future: Future = Future()
+        with self._lock:
+            if self._closed:
+                raise ConnectionError("roller485d connection is closed")
+            self._pending[request["id"]] = future
+        try:
+            with self._send_lock:
+                self._sock.sendall(data)
+        except OSError as e:
+            with self._lock:
+                self._pending.pop(request["id"], None)
+            raise ConnectionError(f"roller485d connection failed: {e}") from e
+        return future
+
+    def call(self, method: str, *args: Any, **kwargs: Any) -> Any:
+        """リクエストを送信して応答を待つ
+
+        Raises:
+            concurrent.futures.TimeoutError: timeout までに応答がなかった
+        """
+        return self.submit(method, *args, **kwargs).result(self.timeout)
+
+    def buses(self) -> Dict[str, Dict[str, Any]]:
+        """デーモンのバス名 → ポートと既定の宛先"""
+        return self.call("buses")
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """デーモンのバスごとのリクエスト数、まとめた数、キュー待ち時間"""
+        return self.call("stats")
+
+    def _receive(self) -> None:
+        try:
+            for line in self._reader:
+                response = json.loads(line)
+                with self._lock:
+                    future = self._pending.pop(response.get("id"), None)
+                if future is None:
+                    continue
+                if "error" in response:
+                    future.set_exception(decode_error(response["error"]))
+                else:
+                    future.set_result(decode_value(response.get("result")))
+        except (OSError, ValueError):
+            pass
+        with self._lock:
+            self._closed = True
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            future.set_exception(ConnectionError("roller485d closed the connection"))
@@ -0,0 +1,119 @@
+"""時刻の取得と待ち時間の差し替え
+
+Roller485Util や TelemetryScheduler などは time モジュールを直接呼ばずに
+clock 経由で時刻を取得し、待ちます。既定の SYSTEM_CLOCK は実時間で、
+VirtualClock に差し替えると待ち時間は実際には待たずに仮想時刻を進めるため、
+エミュレータを相手にした長いシミュレーションを一瞬で、決定的に実行できます。
+
+Examples:
+    >>> clock = VirtualClock()
+    >>> bus = VirtualRoller485(device_ids=[0], default_latency=0.002, clock=clock)
+    >>> r485 = Roller485Util(target=0, transport=bus)
+    >>> r485.clock = clock
+    >>> for _ in range(12000):  # 実時間では 10 分以上 (_delay() が 50 ms)
+    ...     r485.get_motor_status()
+    >>> clock.monotonic()
+    600.0
+"""
+
+import math
+import threading
+import time
+from typing import Optional
+
+
+class Clock:
+    """実時間の時計 (time モジュールをそのまま呼ぶ)"""
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def monotonic_ns(self) -> int:
+        return time.monotonic_ns()
+
+    def perf_counter(self) -> float:
+        return time.perf_counter()
+
+    def perf_counter_ns(self) -> int:
+        return time.perf_counter_ns()
+
+    def time(self) -> float:
+        return time.time()
+
+    def sleep(self, seconds: float) -> None:
+        time.sleep(seconds)
+
+    def wait(self, waitable, timeout: Optional[float]) -> bool:
+        """threading.Event / Condition の wait()
+
+        Args:
+            waitable: wait(timeout) を持つ Event または (ロック取得済みの) Condition
+            timeout (Optional[float]): 待ち時間 [秒]. None の場合は無期限
+
+        Returns:
+            bool: waitable.wait() の戻り値
+        """
+        return waitable.wait(timeout)
+
+
+# 既定の実時間の時計
+SYSTEM_CLOCK = Clock()
+
+
+class VirtualClock(Clock):
+    """待たずに進む仮想時計
+
+    sleep() や wait() はその時間だけ仮想時刻を進めてすぐに返ります。
+    monotonic() と perf_counter() は同じ仮想時刻、time() は epoch からの仮想時刻です。
+    複数のスレッドが同時に待つと、それぞれの待ち時間だけ時刻が進みます
+    (1 スレッドで駆動するシミュレーション向け)。
+    """
+
+    def __init__(self, start: float = 0.0, epoch: float = 1_700_000_000.0):
+        """
+        Args:
+            start (float, optional): monotonic() の初期値 [秒]. Defaults to 0.0.
+            epoch (float, optional): monotonic() が 0 のときの time() [秒].
+                Defaults to 1_700_000_000.0.
+        """
+        self.epoch = epoch
+        self._now_ns = round(start * 1e9)
+        self._lock = threading.Lock()
+
+    def advance(self, seconds: float) -> None:
+        """仮想時刻を進める (負の値は無視)
+
+        ナノ秒単位に切り上げるため、正の値なら必ず進みます
+        (待ち続けるループが止まらないように)。
+        """
+        if seconds > 0:
+            with self._lock:
+                self._now_ns += math.ceil(seconds * 1e9)
+
+    def monotonic(self) -> float:
+        return self._now_ns / 1e9
+
+    def monotonic_ns(self) -> int:
+        return self._now_ns
+
+    def perf_counter(self) -> float:
+        return self._now_ns / 1e9
+
+    def perf_counter_ns(self) -> int:
+        return self._now_ns
+
+    def time(self) -> float:
+        return self.epoch + self._now_ns / 1e9
+
+    def sleep(self, seconds: float) -> None:
+        self.advance(seconds)
+
+    def wait(self, waitable, timeout: Optional[float]) -> bool:
+        """timeout だけ仮想時刻を進め、待たずに waitable の状態を返す
+
+        timeout が None の場合は (仮想時刻では解決しないため) 実際に待ちます。
+        """
+        if timeout is None:
+            return waitable.wait()
+        self.advance(timeout)
+        return waitable.wait(0)
@@ -0,0 +1,530 @@
+"""roller485d - シリアルポートを所有し、Unix ドメインソケットで共有するデーモン
+
+シリアルポートを開けるのは 1 プロセスだけなので、複数のサービス (コントローラ、
+ダッシュボード、ロガーなど) が同じモーターを使う場合は、このデーモンがポートを所有し、
+Roller485Util の操作を JSON-lines プロトコルで公開します。
+
+リクエストはバス (ポート) ごとの CommandScheduler で優先度順に送信され、
+同じバス・宛先・引数のリードバックが同時に届いた場合は 1 回だけ送信して結果を共有します。
+
+プロトコル (1 行 1 メッセージの JSON):
+    リクエスト: {"id": 1, "method": "get_motor_status", "args": [], "kwargs": {},
+                 "bus": "main", "target": 0, "priority": "Telemetry", "deadline": 0.1}
+    レスポンス: {"id": 1, "result": {...}}
+                 {"id": 1, "error": {"type": "ValueError", "message": "..."}}
+
+    id 以外は method のみ必須です。bytes は {"$bytes": "<hex>"}、FullStatus は
+    {"$full_status": {...}} として送ります。レスポンスは完了順に返るため、
+    1 本の接続でリクエストをパイプライン化できます。
+
+Examples:
+    roller485d --socket /run/roller485d.sock --port main=/dev/ttyUSB0
+"""
+
+import argparse
+import inspect
+import json
+import os
+import signal
+import socket
+import socketserver
+import stat
+import sys
+import threading
+from concurrent.futures import CancelledError, Future
+from enum import IntEnum
+from typing import Any, Callable, Dict, Optional, Tuple, Type
+
+from .clock import SYSTEM_CLOCK, Clock
+from .errors import (
+    DeadlineExceededError,
+    DeviceUnavailableError,
+    ExchangeError,
+    RemoteError,
+    Roller485Error,
+)
+from .retry import RetryPolicy
+from .scheduler import METHOD_PRIORITY, CommandScheduler, Priority
+from .util import FullStatus, Roller485Util
+
+DEFAULT_SOCKET = "/tmp/roller485d.sock"
+
+# 公開する Roller485Util のメソッド
+EXPOSED_METHODS = frozenset(METHOD_PRIORITY)
+
+# 同時に届いた同じリクエストをまとめるメソッド (状態を変えないリードバック)
+COALESCED_METHODS = frozenset(
+    name for name, priority in METHOD_PRIORITY.items() if priority == Priority.Telemetry
+)
+
+# デーモン自身が応答するメソッド
+DAEMON_METHODS = frozenset({"buses", "stats"})
+
+# クライアント側で同じ型の例外を再送出する例外
+_ERROR_CLASSES: Tuple[Type[Exception], ...] = (
+    Roller485Error,
+    DeadlineExceededError,
+    *ExchangeError.__subclasses__(),
+    AttributeError,
+    KeyError,
+    TypeError,
+    ValueError,
+)
+_ERROR_TYPES = {cls.__name__: cls for cls in _ERROR_CLASSES}
+
+
+def encode_value(value: Any) -> Any:
+    """JSON に変換できる値に変換 (bytes と FullStatus はタグ付きの dict にする)"""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return {"$bytes": bytes(value).hex()}
+    if isinstance(value, FullStatus):
+        return {"$full_status": value.as_dict()}
+    if isinstance(value, dict):
+        return {key: encode_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [encode_value(item) for item in value]
+    return value
+
+
+def decode_value(value: Any) -> Any:
+    """encode_value() の逆変換"""
+    if isinstance(value, dict):
+        if len(value) == 1:
+            if "$bytes" in value:
+                return bytes.fromhex(value["$bytes"])
+            if "$full_status" in value:
+                return FullStatus(**value["$full_status"])
+        return {key: decode_value(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [decode_value(item) for item in value]
+    return value
+
+
+def encode_error(error: BaseException) -> Dict[str, Any]:
+    """例外をレスポンスの error に変換"""
+    encoded: Dict[str, Any] = {
+        "type": type(error).__name__,
+        "message": str(error.args[0]) if isinstance(error, KeyError) else str(error),
+    }
+    for name in ("device_id", "command", "attempts"):
+        if hasattr(error, name):
+            encoded[name] = getattr(error, name)
+    return encoded
+
+
+def decode_error(error: Dict[str, Any]) -> BaseException:
+    """レスポンスの error を例外に戻す
+
+    roller485 の例外と一部の組み込み例外は同じ型で、それ以外は RemoteError になります。
+    """
+    name, message = error.get("type", ""), error.get("message", "")
+    if name == CancelledError.__name__:
+        return CancelledError(message)
+    if name == DeviceUnavailableError.__name__:
+        return DeviceUnavailableError(error["device_id"])
+    cls = _ERROR_TYPES.get(name)
+    if cls is None:
+        return RemoteError(name, message)
+    if issubclass(cls, ExchangeError):
+        return cls(error["device_id"], error["command"], error.get("attempts", 1))
+    return cls(message)
+
+
+def bind_arguments(
+    method: Callable, args: Any, kwargs: Any
+) -> Tuple[Tuple[Any, ...], Dict[str, Any]]:
+    """JSON から戻した引数をメソッドのシグネチャに合わせる
+
+    引数の型注釈が IntEnum (Roller485Util.Switch など) の場合は整数から変換します。
+
+    Raises:
+        TypeError: 引数がシグネチャに合わない
+        ValueError: 列挙型にない値
+    """
+    if not isinstance(args, list) or not isinstance(kwargs, dict):
+        raise TypeError("args must be a list and kwargs an object")
+    signature = inspect.signature(method)
+    bound = signature.bind(*decode_value(args), **decode_value(kwargs))
+    for name, value in bound.arguments.items():
+        annotation = signature.parameters[name].annotation
+        if (
+            isinstance(annotation, type)
+            and issubclass(annotation, IntEnum)
+            and not isinstance(value, annotation)
+        ):
+            bound.arguments[name] = annotation(value)
+    return bound.args, bound.kwargs
+
+
+class _Bus:
+    """デーモンが所有するバス 1 本"""
+
+    def __init__(self, r485: Roller485Util, scheduler: CommandScheduler):
+        self.r485 = r485
+        self.scheduler = scheduler
+        # Safety の割り込みで投入中に Future がキャンセルされ、_forget() が
+        # 同じスレッドから呼ばれることがあるので RLock
+        self.lock = threading.RLock()
+        # (メソッド, 宛先, 引数) → 送信待ち・送信中のリードバック
+        self.inflight: Dict[Tuple[str, Optional[int], str], Future] = {}
+        self.requests = 0
+        self.coalesced = 0
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """クライアント接続 1 本分 (リクエストを読み、完了したものから応答する)"""
+
+    server: "_Server"
+
+    def handle(self) -> None:
+        lock = threading.Lock()
+
+        def send(message: Dict[str, Any]) -> None:
+            data = json.dumps(message, separators=(",", ":")).encode() + b"\n"
+            with lock:
+                try:
+                    self.wfile.write(data)
+                except (OSError, ValueError):
+                    pass  # クライアントが切断済み
+
+        for line in self.rfile:
+            if line.strip():
+                self.server.bus_daemon.dispatch(line, send)
+
+
+class _Server(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+    bus_daemon: "BusDaemon"
+
+
+class BusDaemon:
+    """1 本以上のバスを所有し、Unix ドメインソケットで Roller485Util の操作を公開する
+
+    Examples:
+        >>> r485 = Roller485Util(port="/dev/ttyUSB0", baudrate=115200)
+        >>> with BusDaemon({"main": r485}, "/run/roller485d.sock") as daemon:
+        ...     daemon.serve_forever()
+    """
+
+    def __init__(
+        self,
+        buses: Dict[str, Roller485Util],
+        path: str = DEFAULT_SOCKET,
+        telemetry_deadline: Optional[float] = None,
+        clock: Clock = SYSTEM_CLOCK,
+    ):
+        """
+        Args:
+            buses (Dict[str, Roller485Util]): バス名 → クライアント
+            path (str, optional): ソケットのパス. Defaults to DEFAULT_SOCKET.
+            telemetry_deadline (Optional[float], optional): テレメトリの既定の期限 [秒]
+                (CommandScheduler を参照)。期限を過ぎたリードバックは送信されずに
+                DeadlineExceededError になる. None では期限なし. Defaults to None.
+            clock (Clock, optional): スケジューラに渡す時計. Defaults to SYSTEM_CLOCK.
+        """
+        if not buses:
+            raise ValueError("at least one bus is required")
+        self.path = path
+        self._buses = {
+            name: _Bus(
+                r485,
+                CommandScheduler(
+                    r485, telemetry_deadline=telemetry_deadline, clock=clock
+                ),
+            )
+            for name, r485 in buses.items()
+        }
+        self._server: Optional[_Server] = None
+
+    def __enter__(self) -> "BusDaemon":
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        """スケジューラを開始し、ソケットを作成 (接続の受け付けは serve_forever())
+
+        Raises:
+            RuntimeError: 別のデーモンが同じソケットで接続を受け付けている場合
+            FileExistsError: path にソケット以外のファイルがある場合
+        """
+        self._remove_stale_socket()
+        for bus in self._buses.values():
+            bus.scheduler.start()
+        self._server = _Server(self.path, _Handler)
+        self._server.bus_daemon = self
+
+    def _remove_stale_socket(self) -> None:
+        """前回のデーモンが残したソケットを削除 (接続できる場合は削除しない)"""
+        try:
+            mode = os.stat(self.path).st_mode
+        except FileNotFoundError:
+            return
+        if not stat.S_ISSOCK(mode):
+            raise FileExistsError(f"{self.path} exists and is not a socket")
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            try:
+                sock.connect(self.path)
+            except ConnectionRefusedError:
+                os.unlink(self.path)
+                return
+            except FileNotFoundError:
+                return
+        raise RuntimeError(f"another roller485d is already serving on {self.path}")
+
+    def serve_forever(self) -> None:
+        """shutdown() が呼ばれるまで接続を受け付ける"""
+        if self._server is None:
+            self.start()
+        assert self._server is not None
+        self._server.serve_forever()
+
+    def shutdown(self) -> None:
+        """serve_forever() を終了させる (別スレッドから呼ぶ)"""
+        if self._server is not None:
+            self._server.shutdown()
+
+    def stop(self) -> None:
+        """ソケットを閉じてスケジューラを停止"""
+        if self._server is not None:
+            self._server.server_close()
+            self._server = None
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+        for bus in self._buses.values():
+            bus.scheduler.stop()
+
+    def _bus(self, name: Optional[str]) -> _Bus:
+        if name is None and len(self._buses) == 1:
+            return next(iter(self._buses.values()))
+        try:
+            return self._buses[name]  # type: ignore[index]
+        except KeyError:
+            raise ValueError(
+                f"unknown bus {name!r} (expected one of {sorted(self._buses)})"
+            ) from None
+
+    def call(
+        self,
+        method: str,
+        args: Any = (),
+        kwargs: Optional[Dict[str, Any]] = None,
+        bus: Optional[str] = None,
+        target: Optional[int] = None,
+        priority: Optional[Priority] = None,
+        deadline: Optional[float] = None,
+    ) -> Future:
+        """リクエストをバスのスケジューラに投入
+
+        COALESCED_METHODS は、同じバス・宛先・引数のリクエストが送信待ちか送信中であれば
+        新たに投入せず、その Future を返します。
+
+        Args:
+            method (str): EXPOSED_METHODS のメソッド名
+            args (Any, optional): 位置引数 (JSON から戻した値). Defaults to ().
+            kwargs (Optional[Dict[str, Any]], optional): キーワード引数. Defaults to None.
+            bus (Optional[str], optional): バス名. バスが 1 本なら省略可. Defaults to None.
+            target (Optional[int], optional): 宛先のデバイスID. None の場合は
+                バスの Roller485Util.target. Defaults to None.
+            priority (Optional[Priority], optional): 優先度. Defaults to None.
+            deadline (Optional[float], optional): 期限 [秒]. Defaults to None.
+
+        Returns:
+            Future: メソッドの戻り値を受け取る Future
+        """
+        if method not in EXPOSED_METHODS:
+            raise AttributeError(f"roller485d does not expose {method!r}")
+        owner = self._bus(bus)
+        kwargs = {} if kwargs is None else kwargs
+        args, kwargs = bind_arguments(
+            getattr(owner.r485, method), list(args), dict(kwargs)
+        )
+        with owner.lock:
+            owner.requests += 1
+            if method not in COALESCED_METHODS:
+                key = None
+            else:
+                key = (method, target, repr((args, sorted(kwargs.items()))))
+                future = owner.inflight.get(key)
+                if future is not None and not future.done():
+                    owner.coalesced += 1
+                    return future
+            future = owner.scheduler.submit(
+                method,
+                *args,
+                priority=priority,
+                deadline=deadline,
+                target=target,
+                **kwargs,
+            )
+            if key is not None:
+                owner.inflight[key] = future
+        if key is not None:
+            future.add_done_callback(lambda f: self._forget(owner, key, f))
+        return future
+
+    @staticmethod
+    def _forget(owner: _Bus, key: Tuple[str, Optional[int], str], future: Future):
+        with owner.lock:
+            if owner.inflight.get(key) is future:
+                del owner.inflight[key]
+
+    def buses(self) -> Dict[str, Dict[str, Any]]:
+        """バス名 → ポートと既定の宛先"""
+        return {
+            name: {"port": bus.r485.port, "target": bus.r485.target}
+            for name, bus in self._buses.items()
+        }
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """バスごとのリクエスト数、まとめた数、キュー長、キュー待ち時間
+
+        Returns:
+            Dict[str, Dict[str, Any]]: バス名をキーとした requests, coalesced, pending,
+                latency (CommandScheduler.latency_stats())
+        """
+        stats = {}
+        for name, bus in self._buses.items():
+            with bus.lock:
+                requests, coalesced = bus.requests, bus.coalesced
+            stats[name] = {
+                "requests": requests,
+                "coalesced": coalesced,
+                "pending": bus.scheduler.pending,
+                "latency": bus.scheduler.latency_stats(),
+            }
+        return stats
+
+    def dispatch(self, line: bytes, send: Callable[[Dict[str, Any]], None]) -> None:
+        """1 行のリクエストを処理し、完了したら send() で応答する
+
+        Args:
+            line (bytes): JSON のリクエスト
+            send (Callable[[Dict[str, Any]], None]): レスポンスを送る関数
+                (スケジューラのスレッドから呼ばれることがある)
+        """
+        request_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("request must be a JSON object")
+            request_id = request.get("id")
+            method = request["method"]
+            if method in DAEMON_METHODS:
+                send({"id": request_id, "result": getattr(self, method)()})
+                return
+            priority = request.get("priority")
+            future = self.call(
+                method,
+                request.get("args", []),
+                request.get("kwargs", {}),
+                bus=request.get("bus"),
+                target=request.get("target"),
+                priority=None if priority is None else Priority[priority],
+                deadline=request.get("deadline"),
+            )
+        except Exception as e:
+            send({"id": request_id, "error": encode_error(e)})
+            return
+
+        def reply(f: Future) -> None:
+            if f.cancelled():
+                error = {"type": CancelledError.__name__, "message": "preempted"}
+                send({"id": request_id, "error": error})
+            elif (exc := f.exception()) is not None:
+                send({"id": request_id, "error": encode_error(exc)})
+            else:
+                send({"id": request_id, "result": encode_value(f.result())})
+
+        future.add_done_callback(reply)
+
+
+def _bus_spec(value: str) -> Tuple[str, str]:
+    """[NAME=]PORT 形式のバス指定をパース (NAME の省略時はポートのパス)"""
+    name, sep, port = value.partition("=")
+    return (name, port) if sep else (value, value)
+
+
+def create_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="roller485d",
+        description="Own Unit-Roller485 serial ports and share them over a Unix socket",
+    )
+    parser.add_argument(
+        "--socket",
+        default=DEFAULT_SOCKET,
+        help=f"Unix socket path (default: {DEFAULT_SOCKET})",
+    )
+    parser.add_argument(
+        "--port",
+        type=_bus_spec,
+        action="append",
+        required=True,
+        metavar="[NAME=]PORT",
+        help="Serial port to own, optionally named (repeatable)",
+    )
+    parser.add_argument(
+        "--baudrate",
+        type=int,
+        default=115200,
+        help="Baud rate (default: 115200)",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=1.0,
+        help="Timeout in seconds (default: 1.0)",
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=0,
+        help="Retry idempotent commands on timeout/CRC/echo mismatch (default: 0)",
+    )
+    parser.add_argument(
+        "--telemetry-deadline",
+        type=float,
+        default=None,
+        help="Drop readbacks queued longer than this many seconds (default: no limit)",
+    )
+    parser.add_argument(
+        "--mode",
+        type=lambda value: int(value, 8),
+        default=0o660,
+        help="Socket file permissions in octal (default: 660)",
+    )
+    return parser
+
+
+def main() -> None:
+    args = create_parser().parse_args()
+    buses = {}
+    for name, port in args.port:
+        r485 = Roller485Util(port=port, baudrate=args.baudrate, timeout=args.timeout)
+        if args.retries > 0:
+            r485.retry_policy = RetryPolicy(attempts=args.retries + 1)
+        buses[name] = r485
+
+    daemon = BusDaemon(buses, args.socket, telemetry_deadline=args.telemetry_deadline)
+    # SIGTERM でも後片付け (ソケットの削除とスケジューラの停止) をする
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        daemon.start()
+        os.chmod(args.socket, args.mode)
+        print(f"roller485d: serving {sorted(buses)} on {args.socket}", file=sys.stderr)
+        daemon.serve_forever()
+    except (RuntimeError, FileExistsError) as e:
+        print(f"roller485d: {e}", file=sys.stderr)
+        sys.exit(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.stop()
+        for r485 in buses.values():
+            r485.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+"""Unit-Roller485 のソフトウェアエミュレータ
+
+シリアルポートの代わりに Roller485Util(transport=...) に渡して使います。
+書き込まれたリクエストを解釈し、デバイスの状態を更新してレスポンスを返します。
+"""
+
+import struct
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Iterable, Optional, Tuple
+
+from .clock import SYSTEM_CLOCK, Clock
+from .roller485_protocol import Roller485Protocol as Proto
+from .util import Roller485Util
+
+C = Proto.CommandCode
+
+
+@dataclass
+class DeviceState:
+    """エミュレートするデバイスの状態 (値はプロトコル上の整数表現)"""
+
+    device_id: int
+    online: bool = True
+    switch: int = 0
+    mode: int = 1
+    speed: int = 0
+    position: int = 0
+    current: int = 0
+    max_current: int = 0
+    status: int = 0
+    error: int = 0
+    vin_x100: int = 1200
+    temp: int = 30
+    encoder_counter: int = 0
+    rgb: Tuple[int, int, int] = (0, 0, 0)
+    rgb_mode: int = 0
+    rgb_brightness: int = 100
+    speed_pid: Tuple[int, int, int] = (1_500_000, 1_000, 4_000_000)
+    position_pid: Tuple[int, int, int] = (10_000_000, 1_000, 4_000_000)
+    rs485_bps: int = 0
+    button_switch_mode: int = 0
+    jam_protection: int = 0
+    over_range_protection: int = 0
+    i2c_registers: Dict[int, bytearray] = field(default_factory=dict)
+
+    def register_bank(self, i2c_address: int) -> bytearray:
+        """I2C デバイスのレジスタ (64 KiB)"""
+        return self.i2c_registers.setdefault(i2c_address, bytearray(0x10000))
+
+
+def _response(command: int, device_id: int, payload: bytes) -> bytes:
+    body = bytes([command | 0x10, device_id]) + payload
+    return b"\xaa\x55" + body + bytes([Roller485Util.calculate_crc8(body)])
+
+
+class VirtualRoller485:
+    """複数の Unit-Roller485 が接続された RS485 バスのエミュレータ
+
+    pyserial の write() / read() / in_waiting / reset_input_buffer() /
+    reset_output_buffer() / flush() / timeout と同じインターフェースを持ちます。
+    レスポンスは書き込みから latency 秒後に受信可能になり、read() は
+    要求したバイト数が揃うか timeout 秒経つまで待ちます。
+
+    Examples:
+        >>> bus = VirtualRoller485(device_ids=[0, 1])
+        >>> r485 = Roller485Util(target=0, transport=bus)
+        >>> r485.motor_switch(Roller485Util.Switch.On)
+        True
+    """
+
+    def __init__(
+        self,
+        device_ids: Iterable[int] = (0,),
+        latency: Optional[Dict[int, float]] = None,
+        default_latency: float = 0.0,
+        timeout: Optional[float] = 1.0,
+        clock: Clock = SYSTEM_CLOCK,
+    ):
+        """
+        Args:
+            device_ids (Iterable[int], optional): バス上のデバイスID. Defaults to (0,).
+            latency (Optional[Dict[int, float]], optional): リクエストのコマンドコードごとの
+                応答時間 [秒]. Defaults to None.
+            default_latency (float, optional): latency にないコマンドの応答時間 [秒].
+                Defaults to 0.0.
+            timeout (Optional[float], optional): read() のタイムアウト [秒]. Defaults to 1.0.
+            clock (Clock, optional): 応答時間とタイムアウトの計測に使う時計.
+                Defaults to SYSTEM_CLOCK.
+        """
+        self.clock = clock
+        self.devices: Dict[int, DeviceState] = {i: DeviceState(i) for i in device_ids}
+        self.latency: Dict[int, float] = dict(latency or {})
+        self.default_latency = default_latency
+        self.timeout = timeout
+        self.requests = 0
+        self._rx = bytearray()
+        self._scheduled: Deque[Tuple[float, bytes]] = deque()
+        self._cond = threading.Condition()
+
+    # --- pyserial 互換インターフェース ---
+
+    def write(self, data: bytes) -> int:
+        """リクエストを書き込み (複数フレームの連結も可)"""
+        now = self.clock.monotonic()
+        data = bytes(data)
+        pos = 0
+        with self._cond:
+            while pos < len(data):
+                length = Roller485Util.get_packet_length(data[pos])
+                frame = data[pos : pos + length]
+                pos += length
+                resp = self._handle(frame)
+                if resp is None:
+                    continue
+                delay = self.latency.get(frame[0], self.default_latency)
+                self._scheduled.append((now + delay, resp))
+            self._cond.notify_all()
+        return len(data)
+
+    def read(self, size: int = 1) -> bytes:
+        """最大 size バイトを読み取り (timeout 秒で打ち切り)"""
+        deadline = (
+            None if self.timeout is None else self.clock.monotonic() + self.timeout
+        )
+        with self._cond:
+            while True:
+                now = self.clock.monotonic()
+                self._deliver(now)
+                if len(self._rx) >= size:
+                    break
+                if deadline is not None and now >= deadline:
+                    break
+                wakeups = [t for t, _ in self._scheduled]
+                if deadline is not None:
+                    wakeups.append(deadline)
+                if not wakeups:
+                    self._cond.wait()
+                else:
+                    self.clock.wait(self._cond, max(0.0, min(wakeups) - now))
+            out = bytes(self._rx[:size])
+            del self._rx[:size]
+            return out
+
+    @property
+    def in_waiting(self) -> int:
+        """受信済みのバイト数"""
+        with self._cond:
+            self._deliver(self.clock.monotonic())
+            return len(self._rx)
+
+    def reset_input_buffer(self) -> None:
+        with self._cond:
+            self._rx.clear()
+            self._scheduled.clear()
+
+    def reset_output_buffer(self) -> None:
+        pass
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    # --- デバイスの動作 ---
+
+    def _deliver(self, now: float) -> None:
+        while self._scheduled and self._scheduled[0][0] <= now:
+            self._rx += self._scheduled.popleft()[1]
+
+    def _handle(self, frame: bytes) -> Optional[bytes]:
+        """リクエストを処理し、レスポンスを返す (応答しない場合は None)"""
+        if len(frame) < 3 or frame[-1] != Roller485Util.calculate_crc8(frame[:-1]):
+            return None
+        device = self.devices.get(frame[1])
+        if device is None or not device.online:
+            return None
+        self.requests += 1
+        command = frame[0]
+
+        if command <= 0x0E or 0x20 <= command <= 0x24:
+            data1, data2, data3 = struct.unpack_from("<iii", frame, 2)
+            self._apply_setting(device, command, data1, data2, data3)
+            return _response(command, frame[1], frame[2:14])
+        if 0x40 <= command <= 0x43:
+            return _response(command, device.device_id, self._readback(device, command))
+        if command == C.i2c_read_register:
+            addr, reg_len, reg, length = struct.unpack_from("<BBHB", frame, 2)
+            length = min(16, length)
+            bank = device.register_bank(addr)
+            data = bytes(bank[reg : reg + length]).ljust(16, b"\x00")
+            payload = struct.pack("<BBB3s", 1, 0, length, bytes(3)) + data
+            return _response(command, device.device_id, payload)
+        if command == C.i2c_write_register:
+            addr, reg_len, reg, length = struct.unpack_from("<BBHB", frame, 2)
+            length = min(16, length)
+            bank = device.register_bank(addr)
+            bank[reg : reg + length] = frame[8 : 8 + length]
+            return _response(command, device.device_id, b"\x01")
+        if command == C.i2c_read_raw:
+            addr, length = struct.unpack_from("<BB", frame, 2)
+            length = min(16, length)
+            data = bytes(device.register_bank(addr)[:length]).ljust(16, b"\x00")
+            payload = struct.pack("<BBB3s", 1, 0, length, bytes(3)) + data
+            return _response(command, device.device_id, payload)
+        if command == C.i2c_write_raw:
+            addr, length = struct.unpack_from("<BB", frame, 2)
+            length = min(16, length)
+            device.register_bank(addr)[:length] = frame[8 : 8 + length]
+            return _response(command, device.device_id, b"\x01")
+        return None
+
+    def _apply_setting(
+        self, device: DeviceState, command: int, data1: int, data2: int, data3: int
+    ) -> None:
+        if command == C.motor_switch:
+            device.switch = data1
+            device.status = 1 if data1 else 0
+        elif command == C.mode_setting:
+            device.mode = data1
+        elif command == C.remove_protection:
+            device.error = 0
+        elif command == C.encoder:
+            device.encoder_counter = data1
+        elif command == C.button_switch_mode:
+            device.button_switch_mode = data1
+        elif command == C.rgb_led_control:
+            device.rgb = (data1 & 0xFF, (data1 >> 8) & 0xFF, (data1 >> 16) & 0xFF)
+            device.rgb_mode = (data1 >> 24) & 0xFF
+            device.rgb_brightness = data2
+        elif command == C.rs485_baud_rate:
+            device.rs485_bps = data1
+        elif command == C.device_id:
+            self.devices.pop(device.device_id)
+            device.device_id = data1
+            self.devices[data1] = device
+        elif command == C.motor_jam_protection:
+            device.jam_protection = data1
+        elif command == C.motor_position_over_range_protection:
+            device.over_range_protection = data1
+        elif command == C.speed_control:
+            device.speed = data1 if device.switch else 0
+            device.max_current = data2
+        elif command == C.speed_pid_config:
+            device.speed_pid = (data1, data2, data3)
+        elif command == C.position_control:
+            if device.switch:
+                device.position = data1
+            device.max_current = data2
+        elif command == C.position_pid_config:
+            device.position_pid = (data1, data2, data3)
+        elif command == C.current_control:
+            device.current = data1 if device.switch else 0
+
+    def _readback(self, device: DeviceState, command: int) -> bytes:
+        if command == C.motor_status_readback:
+            return struct.pack(
+                "<iiiBBB",
+                device.speed,
+                device.position,
+                device.current,
+                device.mode,
+                device.status,
+                device.error,
+            )
+        if command == C.other_status_readback:
+            return struct.pack(
+                "<IiiBBB",
+                device.vin_x100,
+                device.temp,
+                device.encoder_counter,
+                device.rgb_mode,
+                device.rgb_brightness,
+                0,
+            )
+        if command == C.readback_2:
+            r, g, b = device.rgb
+            return struct.pack("<IIIBBB", *device.speed_pid, b, g, r)
+        return struct.pack(
+            "<IIIBBB",
+            *device.position_pid,
+            device.device_id,
+            device.rs485_bps,
+            device.button_switch_mode,
+        )
@@ -0,0 +1,74 @@
+"""roller485 の例外クラス"""
+
+
+class Roller485Error(Exception):
+    """roller485 の例外の基底クラス"""
+
+
+class DeadlineExceededError(Roller485Error):
+    """期限を過ぎたため送信せずに破棄されたリクエスト"""
+
+
+class DeviceUnavailableError(Roller485Error):
+    """サーキットブレーカーが Open のため送信しなかったリクエスト"""
+
+    def __init__(self, device_id: int):
+        super().__init__(f"device {device_id} is unavailable (circuit open)")
+        self.device_id = device_id
+
+
+class ExchangeError(Roller485Error):
+    """リトライしても正しいレスポンスが得られなかったリクエスト
+
+    Attributes:
+        reason (str): 失敗理由 ("timeout", "crc", "mismatch")
+        device_id (int): 宛先のデバイスID
+        command (int): リクエストのコマンドコード
+        attempts (int): 送信した回数
+    """
+
+    reason = ""
+
+    def __init__(self, device_id: int, command: int, attempts: int = 1):
+        super().__init__(
+            f"{self.reason} on command 0x{command:02X} to device {device_id} "
+            f"after {attempts} attempt(s)"
+        )
+        self.device_id = device_id
+        self.command = command
+        self.attempts = attempts
+
+
+class ResponseTimeoutError(ExchangeError):
+    """レスポンスがタイムアウトまでに揃わなかった"""
+
+    reason = "timeout"
+
+
+class CrcError(ExchangeError):
+    """レスポンスのマジックナンバーまたは CRC8 が一致しなかった"""
+
+    reason = "crc"
+
+
+class ResponseMismatchError(ExchangeError):
+    """レスポンスのコマンドまたは設定値のエコーがリクエストと一致しなかった"""
+
+    reason = "mismatch"
+
+
+EXCHANGE_ERRORS = {
+    cls.reason: cls for cls in (ResponseTimeoutError, CrcError, ResponseMismatchError)
+}
+
+
+class RemoteError(Roller485Error):
+    """roller485d から返された、ローカルに対応する型がない例外
+
+    Attributes:
+        type (str): daemon 側の例外の型名
+    """
+
+    def __init__(self, type: str, message: str):
+        super().__init__(f"{type}: {message}")
+        self.type = type
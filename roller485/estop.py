@@ -0,0 +1,160 @@
+"""バス全体の緊急停止
+
+事前にエンコードした停止フレームを、応答を待たずに 1 回の書き込みで送信します。
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List
+
+from .errors import DeviceUnavailableError
+from .roller485_protocol import Roller485Protocol as Proto
+from .util import Roller485Util
+
+
+@dataclass
+class EStopResult:
+    """緊急停止の結果
+
+    Attributes:
+        time_to_last_byte (float): trigger() 開始から最後のバイトの送信完了までの時間 [秒]
+        bytes_sent (int): 送信したバイト数
+        verified (Dict[int, bool]): デバイスIDごとの停止確認結果 (verify=True の場合のみ)
+    """
+
+    time_to_last_byte: float
+    bytes_sent: int
+    verified: Dict[int, bool] = field(default_factory=dict)
+
+
+class EmergencyStop:
+    """バス全体の緊急停止
+
+    登録されたすべてのデバイスについて motor_switch Off と、
+    ゼロ電流・ゼロ速度のセットポイントのフレームを事前にエンコードしておきます。
+    trigger() は送信待ちの出力を破棄し、すべてのフレームを 1 回の書き込みで送信します。
+
+    他のスレッドが通信中でもポートのロックを待たずに書き込みます。
+    半二重のバスでは送信中のデバイスの応答と衝突する可能性があるため、
+    確実に停止させたい場合は verify=True で個別に確認してください。
+
+    Examples:
+        >>> estop = EmergencyStop(r485, device_ids=[0, 1, 2])
+        >>> result = estop.trigger(verify=True)
+        >>> print(result.time_to_last_byte, result.verified)
+    """
+
+    def __init__(
+        self,
+        r485: Roller485Util,
+        device_ids: Iterable[int] = (0,),
+        zero_setpoints: bool = True,
+    ):
+        """
+        Args:
+            r485 (Roller485Util): 送信に使うクライアント
+            device_ids (Iterable[int], optional): 停止するデバイスID. Defaults to (0,).
+            zero_setpoints (bool, optional): motor_switch Off の後にゼロ電流・ゼロ速度の
+                セットポイントも送信する. Defaults to True.
+        """
+        self.r485 = r485
+        self.zero_setpoints = zero_setpoints
+        self.device_ids: List[int] = []
+        self._off_frames: Dict[int, bytes] = {}
+        self._zero_frames: Dict[int, bytes] = {}
+        self._burst = b""
+        for device_id in device_ids:
+            self.add_device(device_id)
+
+    def add_device(self, device_id: int) -> None:
+        """停止対象のデバイスを追加し、フレームを事前にエンコード
+
+        Args:
+            device_id (int): デバイスID
+        """
+        if device_id in self._off_frames:
+            return
+        build = self.r485._build_setting
+        self.device_ids.append(device_id)
+        self._off_frames[device_id] = build(
+            Proto.CommandCode.motor_switch,
+            Roller485Util.Switch.Off.value,
+            device_id=device_id,
+        )
+        self._zero_frames[device_id] = build(
+            Proto.CommandCode.current_control, 0, device_id=device_id
+        ) + build(Proto.CommandCode.speed_control, 0, 0, device_id=device_id)
+        self._rebuild()
+
+    def remove_device(self, device_id: int) -> None:
+        """停止対象からデバイスを削除
+
+        Args:
+            device_id (int): デバイスID
+        """
+        if device_id not in self._off_frames:
+            return
+        self.device_ids.remove(device_id)
+        del self._off_frames[device_id]
+        del self._zero_frames[device_id]
+        self._rebuild()
+
+    def _rebuild(self) -> None:
+        # 全デバイスの停止を優先し、ゼロセットポイントは後ろにまとめる
+        burst = b"".join(self._off_frames[i] for i in self.device_ids)
+        if self.zero_setpoints:
+            burst += b"".join(self._zero_frames[i] for i in self.device_ids)
+        self._burst = burst
+
+    @property
+    def burst(self) -> bytes:
+        """trigger() で送信するバイト列"""
+        return self._burst
+
+    def trigger(
+        self,
+        verify: bool = False,
+        discard_replies: bool = True,
+        settle: float = 0.05,
+    ) -> EStopResult:
+        """緊急停止フレームを一括送信
+
+        Args:
+            verify (bool, optional): 送信後、各デバイスに motor_switch Off を同期的に
+                送り直してエコーで停止を確認する. Defaults to False.
+            discard_replies (bool, optional): settle 秒待ってから受信バッファを破棄し、
+                以降の通信がずれないようにする. Defaults to True.
+            settle (float, optional): 応答が出揃うまでの待ち時間 [秒]. Defaults to 0.05.
+
+        Returns:
+            EStopResult: 最後のバイトまでの時間と確認結果
+        """
+        r485 = self.r485
+        port = r485._transport
+        clock = r485.clock
+        start = clock.perf_counter()
+        port.reset_output_buffer()
+        r485._write_frame(self._burst)
+        port.flush()
+        result = EStopResult(clock.perf_counter() - start, len(self._burst))
+
+        if discard_replies or verify:
+            clock.sleep(settle)
+            with r485._port_lock:
+                r485._pending_echoes.clear()
+                port.reset_input_buffer()
+
+        if verify:
+            with r485._port_lock:
+                target = r485.target
+                try:
+                    for device_id in self.device_ids:
+                        r485.target = device_id
+                        try:
+                            result.verified[device_id] = r485.motor_switch(
+                                Roller485Util.Switch.Off
+                            )
+                        except DeviceUnavailableError:
+                            result.verified[device_id] = False
+                finally:
+                    r485.target = target
+        return result
@@ -0,0 +1,209 @@
+"""故障を注入する transport
+
+FaultInjector はシリアルポート (またはエミュレータ) を包み、Roller485Util の
+transport として使います。設定した確率でリクエストを捨て、受信したバイト列に
+遅延・揺らぎ・欠落・ビット化け・途中切れ・重複を加えます。乱数はシードで再現でき、
+注入した故障は時刻とともに記録されるので、ライブラリの回復時間やスループットの
+低下を計測できます。
+
+受信側の故障は inner.read() が返した 1 回分のバイト列 (通常は 1 フレーム) 単位で
+判定します。遅延した・重複したバイト列はタイムアウト後に届くこともあり、
+その場合は次の受信に古いバイトとして混ざります (実際のバスと同じ)。
+"""
+
+import random
+import threading
+from collections import Counter, deque
+from dataclasses import dataclass, replace
+from typing import Deque, List, NamedTuple, Optional, Tuple
+
+from .clock import SYSTEM_CLOCK, Clock
+
+# 故障の種類
+DROP_REQUEST = "drop_request"
+DROP = "drop"
+CORRUPT = "corrupt"
+TRUNCATE = "truncate"
+DUPLICATE = "duplicate"
+DELAY = "delay"
+
+
+@dataclass(frozen=True)
+class FaultConfig:
+    """注入する故障の設定 (確率は 0.0〜1.0)
+
+    Attributes:
+        latency (float): 受信に加える固定の遅延 [秒]
+        jitter (float): 受信に加える 0〜jitter 秒の一様乱数の遅延
+        drop_request (float): リクエストをデバイスに届けない確率
+        drop (float): 受信したバイト列を捨てる確率
+        corrupt (float): 受信したバイト列の 1 ビットを反転する確率
+        truncate (float): 受信したバイト列を途中で切る確率
+        duplicate (float): 受信したバイト列を 2 回届ける確率
+    """
+
+    latency: float = 0.0
+    jitter: float = 0.0
+    drop_request: float = 0.0
+    drop: float = 0.0
+    corrupt: float = 0.0
+    truncate: float = 0.0
+    duplicate: float = 0.0
+
+
+class InjectedFault(NamedTuple):
+    """注入した故障の記録"""
+
+    timestamp: float  # clock.monotonic()
+    kind: str  # DROP_REQUEST, DROP, CORRUPT, TRUNCATE, DUPLICATE, DELAY
+    data: bytes  # 故障を注入する前のバイト列
+    detail: float  # CORRUPT はバイト位置、TRUNCATE は残した長さ、DELAY は秒数
+
+
+class FaultInjector:
+    """故障を注入する transport
+
+    Examples:
+        >>> bus = VirtualRoller485(device_ids=[0])
+        >>> faulty = FaultInjector(bus, FaultConfig(drop=0.1, jitter=0.002), seed=1)
+        >>> r485 = Roller485Util(target=0, transport=faulty)
+        >>> r485.retry_policy = RetryPolicy(attempts=3)
+        >>> ...
+        >>> print(faulty.counts)
+    """
+
+    def __init__(
+        self,
+        inner,
+        config: Optional[FaultConfig] = None,
+        seed: Optional[int] = None,
+        history: int = 10_000,
+        clock: Clock = SYSTEM_CLOCK,
+    ):
+        """
+        Args:
+            inner: 包むシリアルポートまたはエミュレータ
+            config (Optional[FaultConfig], optional): 故障の設定. None の場合は故障なし.
+            seed (Optional[int], optional): 乱数のシード. Defaults to None.
+            history (int, optional): injected に残す記録の数. Defaults to 10_000.
+            clock (Clock, optional): 遅延の計測と待ちに使う時計. Defaults to SYSTEM_CLOCK.
+        """
+        self.inner = inner
+        self.clock = clock
+        self.config = config or FaultConfig()
+        self.rng = random.Random(seed)
+        self.injected: Deque[InjectedFault] = deque(maxlen=history)
+        self.counts: Counter = Counter()
+        self._rx = bytearray()
+        # (届く時刻, バイト列)。届く時刻の順
+        self._scheduled: List[Tuple[float, bytes]] = []
+        self._lock = threading.RLock()
+
+    def configure(self, **changes) -> None:
+        """設定の一部を変更 (例: configure(drop=0.0) で欠落を止める)"""
+        self.config = replace(self.config, **changes)
+
+    def _record(self, kind: str, data: bytes, detail: float = 0.0) -> None:
+        self.injected.append(InjectedFault(self.clock.monotonic(), kind, data, detail))
+        self.counts[kind] += 1
+
+    def _inject(self, data: bytes) -> None:
+        """受信したバイト列に故障を加えて配送を予約"""
+        config = self.config
+        rng = self.rng
+        if rng.random() < config.drop:
+            self._record(DROP, data)
+            return
+        original = data
+        if len(data) > 1 and rng.random() < config.truncate:
+            keep = rng.randrange(1, len(data))
+            self._record(TRUNCATE, original, keep)
+            data = data[:keep]
+        if data and rng.random() < config.corrupt:
+            pos = rng.randrange(len(data))
+            corrupted = bytearray(data)
+            corrupted[pos] ^= 1 << rng.randrange(8)
+            self._record(CORRUPT, original, pos)
+            data = bytes(corrupted)
+        delay = config.latency + (
+            rng.uniform(0.0, config.jitter) if config.jitter else 0.0
+        )
+        if delay > 0:
+            self._record(DELAY, original, delay)
+        now = self.clock.monotonic()
+        self._schedule(now + delay, data)
+        if rng.random() < config.duplicate:
+            self._record(DUPLICATE, original)
+            self._schedule(now + delay, data)
+
+    def _schedule(self, when: float, data: bytes) -> None:
+        self._scheduled.append((when, data))
+        self._scheduled.sort(key=lambda item: item[0])
+
+    def _deliver(self, now: float) -> None:
+        while self._scheduled and self._scheduled[0][0] <= now:
+            self._rx += self._scheduled.pop(0)[1]
+
+    # --- pyserial 互換インターフェース ---
+
+    @property
+    def timeout(self) -> Optional[float]:
+        return self.inner.timeout
+
+    @timeout.setter
+    def timeout(self, value: Optional[float]) -> None:
+        self.inner.timeout = value
+
+    def write(self, data: bytes) -> int:
+        """送信 (drop_request の確率でデバイスに届けない)"""
+        with self._lock:
+            if self.rng.random() < self.config.drop_request:
+                self._record(DROP_REQUEST, bytes(data))
+                return len(data)
+        return self.inner.write(data)
+
+    def read(self, size: int = 1) -> bytes:
+        """最大 size バイトを読み取り (timeout 秒で打ち切り)"""
+        timeout = self.inner.timeout
+        deadline = None if timeout is None else self.clock.monotonic() + timeout
+        with self._lock:
+            self._deliver(self.clock.monotonic())
+            pending = len(self._rx) + sum(len(d) for _, d in self._scheduled)
+            if pending < size:
+                chunk = self.inner.read(size - pending)
+                if chunk:
+                    self._inject(chunk)
+            while len(self._rx) < size and self._scheduled:
+                when = self._scheduled[0][0]
+                if deadline is not None and when > deadline:
+                    break
+                self.clock.sleep(max(0.0, when - self.clock.monotonic()))
+                self._deliver(self.clock.monotonic())
+            out = bytes(self._rx[:size])
+            del self._rx[:size]
+            return out
+
+    @property
+    def in_waiting(self) -> int:
+        """受信済みのバイト数"""
+        with self._lock:
+            waiting = self.inner.in_waiting
+            if waiting:
+                self._inject(self.inner.read(waiting))
+            self._deliver(self.clock.monotonic())
+            return len(self._rx)
+
+    def reset_input_buffer(self) -> None:
+        """受信済みのバイトを捨てる (遅延中のバイトはあとで届く)"""
+        with self._lock:
+            self._rx.clear()
+            self.inner.reset_input_buffer()
+
+    def reset_output_buffer(self) -> None:
+        self.inner.reset_output_buffer()
+
+    def flush(self) -> None:
+        self.inner.flush()
+
+    def close(self) -> None:
+        self.inner.close()
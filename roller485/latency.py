@@ -0,0 +1,628 @@
+"""コマンドごとの応答時間の計測とプロファイル
+
+固定の _delay() (0.05 秒) の代わりに、デバイスごと・コマンドごとに計測した
+応答時間 (turnaround) から待ち時間とタイムアウトを決めます。
+AdaptiveTimeouts は実行時の往復時間の分布から受信タイムアウトを学習します。
+"""
+
+import bisect
+import json
+import math
+import statistics
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .roller485_protocol import Roller485Protocol as Proto
+from .timing import BusTiming, response_command
+from .util import Roller485Util
+
+# 既定で計測するリードバックコマンド (デバイスの状態を変えない)
+READBACK_COMMANDS = (
+    Proto.CommandCode.motor_status_readback,
+    Proto.CommandCode.other_status_readback,
+    Proto.CommandCode.readback_2,
+    Proto.CommandCode.readback_3,
+)
+
+# include_settings=True で計測する設定コマンド (現在値を書き戻す)
+SETTING_COMMANDS = (
+    Proto.CommandCode.mode_setting,
+    Proto.CommandCode.speed_pid_config,
+    Proto.CommandCode.position_pid_config,
+    Proto.CommandCode.save_to_flash,
+)
+
+
+class LatencyProfile:
+    """デバイス 1 台分の、コマンドコードごとの応答時間
+
+    応答時間 (turnaround) はリクエストの送信完了からレスポンスの送信開始までの時間です。
+    計測時の往復時間から、ボーレートで決まるワイヤ時間を差し引いて求めます。
+
+    実行時に観測した往復時間は observe() で指数移動平均に反映され、
+    計測値から drift_tolerance 以上ずれたコマンドは drifted に入ります。
+    """
+
+    def __init__(
+        self,
+        device_id: int = 0,
+        baudrate: int = 115200,
+        turnaround: Optional[Dict[int, float]] = None,
+        margin: float = 1.5,
+        timeout_factor: float = 4.0,
+        min_timeout: float = 0.005,
+        default_wait: float = 0.05,
+        default_timeout: Optional[float] = 1.0,
+        drift_tolerance: float = 0.5,
+        ewma_alpha: float = 0.1,
+    ):
+        """
+        Args:
+            device_id (int, optional): デバイスID. Defaults to 0.
+            baudrate (int, optional): 計測時のボーレート. Defaults to 115200.
+            turnaround (Optional[Dict[int, float]], optional): コマンドコードごとの
+                応答時間 [秒]. Defaults to None.
+            margin (float, optional): 待ち時間に掛ける余裕. Defaults to 1.5.
+            timeout_factor (float, optional): タイムアウトを期待往復時間の何倍にするか.
+                Defaults to 4.0.
+            min_timeout (float, optional): タイムアウトの下限 [秒]. Defaults to 0.005.
+            default_wait (float, optional): 未計測のコマンドの待ち時間 [秒]. Defaults to 0.05.
+            default_timeout (Optional[float], optional): 未計測のコマンドのタイムアウト [秒].
+                Defaults to 1.0.
+            drift_tolerance (float, optional): ドリフトとみなす相対誤差. Defaults to 0.5.
+            ewma_alpha (float, optional): 観測値の指数移動平均の係数. Defaults to 0.1.
+        """
+        self.device_id = device_id
+        self.timing = BusTiming(baudrate, turnaround=0.0, host_gap=0.0)
+        self.turnaround: Dict[int, float] = dict(turnaround or {})
+        self.margin = margin
+        self.timeout_factor = timeout_factor
+        self.min_timeout = min_timeout
+        self.default_wait = default_wait
+        self.default_timeout = default_timeout
+        self.drift_tolerance = drift_tolerance
+        self.ewma_alpha = ewma_alpha
+        self.calibrated_at = 0.0
+        self.observed: Dict[int, float] = {}
+        self.drifted: Set[int] = set()
+
+    @property
+    def baudrate(self) -> int:
+        return self.timing.baudrate
+
+    def _wire_time(self, command: int) -> float:
+        c = Proto.CommandCode(command)
+        return self.timing.frame_time(c) + self.timing.frame_time(response_command(c))
+
+    def wait_time(self, command: int) -> float:
+        """リクエスト送信後、受信を始めるまでの待ち時間 [秒]
+
+        Args:
+            command (int): リクエストのコマンドコード
+
+        Returns:
+            float: 待ち時間
+        """
+        if command not in self.turnaround:
+            return self.default_wait
+        request = self.timing.frame_time(Proto.CommandCode(command))
+        return request + self.turnaround[command] * self.margin
+
+    def timeout(self, command: int) -> Optional[float]:
+        """受信タイムアウト [秒]
+
+        Args:
+            command (int): リクエストのコマンドコード
+
+        Returns:
+            Optional[float]: タイムアウト
+        """
+        if command not in self.turnaround:
+            return self.default_timeout
+        expected = self._wire_time(command) + self.turnaround[command]
+        return max(self.min_timeout, expected * self.timeout_factor)
+
+    def observe(self, command: int, rtt: float) -> bool:
+        """実行時に観測した往復時間を反映
+
+        Args:
+            command (int): リクエストのコマンドコード
+            rtt (float): 送信開始から受信完了までの時間 [秒]
+
+        Returns:
+            bool: このコマンドがドリフトしているかどうか
+        """
+        sample = max(0.0, rtt - self._wire_time(command))
+        prev = self.observed.get(command)
+        value = sample if prev is None else prev + self.ewma_alpha * (sample - prev)
+        self.observed[command] = value
+
+        calibrated = self.turnaround.get(command)
+        if calibrated is None:
+            return False
+        # 非常に短い応答時間で相対誤差が暴れないよう、0.5 ms を下限にする
+        tolerance = self.drift_tolerance * max(calibrated, 0.0005)
+        if abs(value - calibrated) > tolerance:
+            self.drifted.add(command)
+        else:
+            self.drifted.discard(command)
+        return command in self.drifted
+
+    def to_dict(self) -> dict:
+        """JSON に変換できる dict"""
+        return {
+            "device_id": self.device_id,
+            "baudrate": self.baudrate,
+            "calibrated_at": self.calibrated_at,
+            "turnaround": {
+                Proto.CommandCode(c).name: t for c, t in sorted(self.turnaround.items())
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, **kwargs) -> "LatencyProfile":
+        """to_dict() の出力からプロファイルを復元
+
+        Args:
+            data (dict): to_dict() の出力
+            **kwargs: LatencyProfile のその他の引数
+
+        Returns:
+            LatencyProfile: 復元したプロファイル
+        """
+        profile = cls(
+            device_id=data["device_id"],
+            baudrate=data["baudrate"],
+            turnaround={
+                Proto.CommandCode[name].value: t
+                for name, t in data["turnaround"].items()
+            },
+            **kwargs,
+        )
+        profile.calibrated_at = data.get("calibrated_at", 0.0)
+        return profile
+
+    def save(self, path: str) -> None:
+        """JSON ファイルに保存
+
+        Args:
+            path (str): 保存先
+        """
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> "LatencyProfile":
+        """JSON ファイルから読み込み
+
+        Args:
+            path (str): 読み込むファイル
+            **kwargs: LatencyProfile のその他の引数
+
+        Returns:
+            LatencyProfile: 読み込んだプロファイル
+        """
+        with open(path) as f:
+            return cls.from_dict(json.load(f), **kwargs)
+
+
+def _setting_frames(r485: Roller485Util, device_id: int) -> Dict[int, bytes]:
+    """設定コマンドごとに、現在値を書き戻すフレームを構築"""
+    motor = r485.readback(Proto.CommandCode.motor_status_readback, device_id)
+    speed = r485.readback(Proto.CommandCode.readback_2, device_id)
+    position = r485.readback(Proto.CommandCode.readback_3, device_id)
+    if not (motor and speed and position):
+        raise RuntimeError(f"device {device_id} did not answer readbacks")
+
+    def pid(values: dict, prefix: str) -> Tuple[int, int, int]:
+        p, i, d = (round(values[f"{prefix}_{k}"] * 100_000) for k in "pid")
+        return p, i, d
+
+    build = r485._build_setting
+    return {
+        Proto.CommandCode.mode_setting: build(
+            Proto.CommandCode.mode_setting, motor["mode"], device_id=device_id
+        ),
+        Proto.CommandCode.speed_pid_config: build(
+            Proto.CommandCode.speed_pid_config,
+            *pid(speed, "speed"),
+            device_id=device_id,
+        ),
+        Proto.CommandCode.position_pid_config: build(
+            Proto.CommandCode.position_pid_config,
+            *pid(position, "position"),
+            device_id=device_id,
+        ),
+        Proto.CommandCode.save_to_flash: build(
+            Proto.CommandCode.save_to_flash, 1, device_id=device_id
+        ),
+    }
+
+
+def calibrate(
+    r485: Roller485Util,
+    device_id: Optional[int] = None,
+    commands: Iterable[Proto.CommandCode] = READBACK_COMMANDS,
+    samples: int = 20,
+    include_settings: bool = False,
+    setting_samples: int = 3,
+    baudrate: Optional[int] = None,
+) -> LatencyProfile:
+    """コマンドごとの応答時間を計測してプロファイルを作成
+
+    各コマンドを _delay() なしで samples 回送信し、往復時間の中央値から
+    ワイヤ時間を差し引いた値を応答時間とします。
+    include_settings=True の場合は、mode_setting / speed_pid_config /
+    position_pid_config / save_to_flash も現在値を書き戻して計測します
+    (フラッシュへの書き込みが発生します)。
+
+    Args:
+        r485 (Roller485Util): 計測に使うクライアント (ハードウェアまたはエミュレータ)
+        device_id (Optional[int], optional): 計測するデバイスID. None の場合は target.
+        commands (Iterable[Proto.CommandCode], optional): 計測するリードバックコマンド.
+            Defaults to READBACK_COMMANDS.
+        samples (int, optional): リードバックの計測回数. Defaults to 20.
+        include_settings (bool, optional): 設定コマンドも計測する. Defaults to False.
+        setting_samples (int, optional): 設定コマンドの計測回数. Defaults to 3.
+        baudrate (Optional[int], optional): ボーレート. None の場合は r485.baudrate.
+
+    Returns:
+        LatencyProfile: 計測したプロファイル (r485 にも設定される)
+    """
+    device_id = r485.target if device_id is None else device_id
+    baudrate = r485.baudrate if baudrate is None else baudrate
+    profile = LatencyProfile(device_id=device_id, baudrate=baudrate)
+
+    frames = {
+        c.value: (r485._build_readback(c, device_id=device_id), samples)
+        for c in commands
+    }
+    # 計測中は既存のプロファイルの待ち時間とタイムアウトを使わない
+    previous = r485.latency_profiles.pop(device_id, None)
+    try:
+        if include_settings:
+            for code, frame in _setting_frames(r485, device_id).items():
+                frames[code] = (frame, setting_samples)
+
+        for code, (frame, count) in frames.items():
+            resp_command = response_command(Proto.CommandCode(code))
+            length = r485.get_packet_length(resp_command.value)
+            rtts = []
+            for _ in range(count):
+                start = r485.clock.perf_counter()
+                msg = r485._exchange(frame, resp_command, delay=False)
+                if len(msg) == length:
+                    rtts.append(r485.clock.perf_counter() - start)
+            if rtts:
+                rtt = statistics.median(rtts)
+                profile.turnaround[code] = max(0.0, rtt - profile._wire_time(code))
+    except BaseException:
+        if previous is not None:
+            r485.latency_profiles[device_id] = previous
+        raise
+
+    profile.calibrated_at = r485.clock.time()
+    r485.latency_profiles[device_id] = profile
+    return profile
+
+
+class LatencyCalibrator:
+    """応答時間プロファイルの読み込み・保存と定期的な再計測
+
+    Examples:
+        >>> calibrator = LatencyCalibrator(r485, path="roller0.json", interval=600)
+        >>> calibrator.load_or_calibrate()
+        >>> while True:
+        ...     r485.get_motor_status()
+        ...     calibrator.maybe_recalibrate()
+    """
+
+    def __init__(
+        self,
+        r485: Roller485Util,
+        device_id: Optional[int] = None,
+        path: Optional[str] = None,
+        interval: Optional[float] = None,
+        **calibrate_kwargs,
+    ):
+        """
+        Args:
+            r485 (Roller485Util): 計測に使うクライアント
+            device_id (Optional[int], optional): デバイスID. None の場合は target.
+            path (Optional[str], optional): プロファイルの保存先. Defaults to None.
+            interval (Optional[float], optional): 再計測の間隔 [秒]. None の場合は
+                ドリフトしたときだけ再計測する. Defaults to None.
+            **calibrate_kwargs: calibrate() のその他の引数
+        """
+        self.r485 = r485
+        self.device_id = r485.target if device_id is None else device_id
+        self.path = path
+        self.interval = interval
+        self.calibrate_kwargs = calibrate_kwargs
+        self.profile: Optional[LatencyProfile] = None
+
+    def calibrate(self) -> LatencyProfile:
+        """計測してプロファイルを設定し、path があれば保存"""
+        self.profile = calibrate(
+            self.r485, device_id=self.device_id, **self.calibrate_kwargs
+        )
+        if self.path is not None:
+            self.profile.save(self.path)
+        return self.profile
+
+    def load_or_calibrate(self) -> LatencyProfile:
+        """path のプロファイルを読み込み、なければ計測"""
+        if self.path is not None:
+            try:
+                self.profile = LatencyProfile.load(self.path)
+            except FileNotFoundError:
+                pass
+            else:
+                self.r485.latency_profiles[self.device_id] = self.profile
+                return self.profile
+        return self.calibrate()
+
+    def maybe_recalibrate(self) -> bool:
+        """ドリフトしているか interval を過ぎていれば再計測
+
+        Returns:
+            bool: 再計測したかどうか
+        """
+        profile = self.profile
+        if profile is None:
+            self.calibrate()
+            return True
+        expired = (
+            self.interval is not None
+            and self.r485.clock.time() - profile.calibrated_at >= self.interval
+        )
+        if not (profile.drifted or expired):
+            return False
+        self.calibrate()
+        return True
+
+
+class P2Quantile:
+    """P² アルゴリズムによるストリーミング分位点推定
+
+    5 つのマーカーだけを保持し、サンプルを保存せずに分位点を推定します
+    (R. Jain and I. Chlamtac, 1985)。
+    """
+
+    def __init__(self, quantile: float):
+        """
+        Args:
+            quantile (float): 推定する分位点 (0 < quantile < 1)
+        """
+        if not 0.0 < quantile < 1.0:
+            raise ValueError("quantile must be between 0 and 1")
+        self.quantile = quantile
+        self.count = 0
+        self._heights: List[float] = []
+        self._positions = [1.0, 2.0, 3.0, 4.0, 5.0]
+        p = quantile
+        self._desired = [1.0, 1.0 + 2 * p, 1.0 + 4 * p, 3.0 + 2 * p, 5.0]
+        self._increments = [0.0, p / 2, p, (1 + p) / 2, 1.0]
+
+    def add(self, x: float) -> None:
+        """サンプルを追加
+
+        Args:
+            x (float): サンプル
+        """
+        self.count += 1
+        q = self._heights
+        if self.count <= 5:
+            bisect.insort(q, x)
+            return
+
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = bisect.bisect_right(q, x) - 1
+
+        n = self._positions
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self._desired[i] += self._increments[i]
+
+        for i in (1, 2, 3):
+            d = self._desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                s = 1 if d > 0 else -1
+                h = self._parabolic(i, s)
+                if not q[i - 1] < h < q[i + 1]:
+                    h = q[i] + s * (q[i + s] - q[i]) / (n[i + s] - n[i])
+                q[i] = h
+                n[i] += s
+
+    def _parabolic(self, i: int, s: int) -> float:
+        q, n = self._heights, self._positions
+        return q[i] + s / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + s) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - s) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def value(self) -> Optional[float]:
+        """推定した分位点 (サンプルがなければ None)"""
+        q = self._heights
+        if not q:
+            return None
+        if self.count <= 5:
+            return q[min(len(q) - 1, int(self.quantile * len(q)))]
+        return q[2]
+
+
+class _RttStats:
+    """デバイス・コマンド 1 組分の往復時間の統計"""
+
+    __slots__ = ("p50", "tail", "timeouts", "consecutive_timeouts", "deadline")
+
+    def __init__(self, quantile: float, deadline: float):
+        self.p50 = P2Quantile(0.5)
+        self.tail = P2Quantile(quantile)
+        self.timeouts = 0
+        self.consecutive_timeouts = 0
+        self.deadline = deadline
+
+
+class AdaptiveTimeouts:
+    """往復時間の分布から学習する受信タイムアウト
+
+    デバイスID・コマンドコードごとに受信待ち時間 (受信開始から受信完了まで) の
+    分位点 (既定は p99) を推定し、その multiplier 倍を floor〜ceiling に収めた値を
+    受信タイムアウトにします。warmup 回観測するまでは ceiling を使います。
+    ポートのタイムアウトは read() にだけ効くため、送信と送信後の待ち (_delay()) は含めません。
+    送信後に待つ経路 (delay=True) と待たずに受信する経路 (delay=False) では受信待ち時間が
+    まったく違うため、別々に学習します。
+
+    タイムアウトは分布には加えず、widen_after 回連続すると期限を 2 倍 (ceiling まで) にします。
+    遅くなったコマンドも数回のタイムアウトのあとは成功し、その受信待ち時間から学習し直します。
+
+    Examples:
+        >>> r485.adaptive_timeouts = AdaptiveTimeouts(floor=0.005, ceiling=1.0)
+        >>> r485.get_motor_status()
+        >>> r485.adaptive_timeouts.snapshot()
+    """
+
+    def __init__(
+        self,
+        quantile: float = 0.99,
+        multiplier: float = 2.0,
+        floor: float = 0.005,
+        ceiling: float = 1.0,
+        warmup: int = 10,
+        resolution: float = 0.001,
+        widen_after: int = 2,
+    ):
+        """
+        Args:
+            quantile (float, optional): 基準にする分位点. Defaults to 0.99.
+            multiplier (float, optional): 分位点に掛ける倍率. Defaults to 2.0.
+            floor (float, optional): タイムアウトの下限 [秒]. Defaults to 0.005.
+            ceiling (float, optional): タイムアウトの上限、学習前の値 [秒]. Defaults to 1.0.
+            warmup (int, optional): 学習した値を使い始めるまでの観測回数. Defaults to 10.
+            resolution (float, optional): タイムアウトの刻み [秒]. 変化のたびに
+                シリアルポートを再設定しないよう、この単位に切り上げる. Defaults to 0.001.
+            widen_after (int, optional): 期限を 2 倍にする連続タイムアウト回数.
+                Defaults to 2.
+        """
+        if floor > ceiling:
+            raise ValueError("floor must not exceed ceiling")
+        self.quantile = quantile
+        self.multiplier = multiplier
+        self.floor = floor
+        self.ceiling = ceiling
+        self.warmup = warmup
+        self.resolution = resolution
+        self.widen_after = widen_after
+        self._stats: Dict[Tuple[int, int, bool], _RttStats] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, device_id: int, command: int, delay: bool) -> _RttStats:
+        key = (device_id, command, delay)
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = _RttStats(self.quantile, self.ceiling)
+        return stats
+
+    def timeout(self, device_id: int, command: int, delay: bool = True) -> float:
+        """受信タイムアウト [秒]
+
+        Args:
+            device_id (int): デバイスID
+            command (int): リクエストのコマンドコード
+            delay (bool, optional): 送信後に待ってから受信する経路かどうか.
+                Defaults to True.
+
+        Returns:
+            float: タイムアウト
+        """
+        stats = self._stats.get((device_id, command, delay))
+        return self.ceiling if stats is None else stats.deadline
+
+    def observe(
+        self, device_id: int, command: int, rtt: float, delay: bool = True
+    ) -> None:
+        """応答のあった受信待ち時間を反映
+
+        Args:
+            device_id (int): デバイスID
+            command (int): リクエストのコマンドコード
+            rtt (float): 受信開始から受信完了までの時間 [秒]
+            delay (bool, optional): 送信後に待ってから受信する経路かどうか.
+                Defaults to True.
+        """
+        with self._lock:
+            stats = self._get(device_id, command, delay)
+            stats.consecutive_timeouts = 0
+            stats.p50.add(rtt)
+            stats.tail.add(rtt)
+            tail = stats.tail.value()
+            if stats.tail.count < self.warmup or tail is None:
+                return
+            # 期限を広げたあとの遅い応答は、分位点が追いつく前から期限に反映する
+            stats.deadline = self._clamp(max(tail, rtt) * self.multiplier)
+
+    def observe_timeout(self, device_id: int, command: int, delay: bool = True) -> None:
+        """タイムアウトした往復を数え、widen_after 回連続したら期限を 2 倍にする
+
+        Args:
+            device_id (int): デバイスID
+            command (int): リクエストのコマンドコード
+            delay (bool, optional): 送信後に待ってから受信する経路かどうか.
+                Defaults to True.
+        """
+        with self._lock:
+            stats = self._get(device_id, command, delay)
+            stats.timeouts += 1
+            stats.consecutive_timeouts += 1
+            if stats.consecutive_timeouts >= self.widen_after:
+                stats.consecutive_timeouts = 0
+                stats.deadline = self._clamp(stats.deadline * 2)
+
+    def _clamp(self, deadline: float) -> float:
+        deadline = math.ceil(deadline / self.resolution) * self.resolution
+        return min(self.ceiling, max(self.floor, deadline))
+
+    def reset(self, device_id: Optional[int] = None) -> None:
+        """学習した値を破棄
+
+        Args:
+            device_id (Optional[int], optional): 破棄するデバイスID. None の場合はすべて.
+        """
+        with self._lock:
+            if device_id is None:
+                self._stats.clear()
+            else:
+                for key in [k for k in self._stats if k[0] == device_id]:
+                    del self._stats[key]
+
+    def snapshot(self) -> Dict[int, Dict[str, dict]]:
+        """学習した値 (デバイスID → コマンド名 → 統計)
+
+        delay=False の経路はコマンド名に "/nodelay" を付けたキーになります。
+
+        Returns:
+            Dict[int, Dict[str, dict]]: count, timeouts, p50, tail (quantile の推定値),
+                timeout [秒] を持つ dict
+        """
+        result: Dict[int, Dict[str, dict]] = {}
+        with self._lock:
+            for (device_id, command, delay), stats in sorted(self._stats.items()):
+                name = Proto.CommandCode(command).name
+                if not delay:
+                    name += "/nodelay"
+                result.setdefault(device_id, {})[name] = {
+                    "count": stats.tail.count,
+                    "timeouts": stats.timeouts,
+                    "p50": stats.p50.value(),
+                    "tail": stats.tail.value(),
+                    "timeout": stats.deadline,
+                }
+        return result
@@ -0,0 +1,234 @@
+"""デバイス・コマンドごとの計測
+
+Roller485Util.metrics に MetricsRegistry を設定すると、同期的な往復ごとに
+リクエスト数、送受信バイト数、往復時間のヒストグラム、タイムアウト・CRC エラー・
+エコー不一致、リトライの回数を記録します。設定しなければ何も記録しません。
+"""
+
+import bisect
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .roller485_protocol import Roller485Protocol as Proto
+
+# 往復時間のヒストグラムの上限 [秒] (最後のバケットは +Inf)
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.001,
+    0.002,
+    0.005,
+    0.01,
+    0.02,
+    0.05,
+    0.1,
+    0.2,
+    0.5,
+    1.0,
+)
+
+
+class Histogram:
+    """固定バケットのヒストグラム"""
+
+    __slots__ = ("bounds", "counts", "count", "sum", "max")
+
+    def __init__(self, bounds: Sequence[float] = DEFAULT_BUCKETS):
+        """
+        Args:
+            bounds (Sequence[float], optional): バケットの上限 (昇順).
+                Defaults to DEFAULT_BUCKETS.
+        """
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        """値を追加
+
+        Args:
+            value (float): 値
+        """
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """分位点の推定値 (バケットの上限。+Inf バケットの場合は最大値)
+
+        Args:
+            q (float): 分位点 (0〜1)
+
+        Returns:
+            Optional[float]: 推定値 (値がなければ None)
+        """
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.bounds, self.counts):
+            seen += n
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def as_dict(self) -> dict:
+        """dict に変換 (buckets は [上限, 件数] のリスト、上限 None は +Inf)"""
+        bounds: List[Optional[float]] = [*self.bounds, None]
+        return {
+            "buckets": [[b, n] for b, n in zip(bounds, self.counts)],
+            "count": self.count,
+            "sum": self.sum,
+            "max": self.max,
+        }
+
+
+class CommandMetrics:
+    """デバイス・コマンド 1 組分の計測値"""
+
+    __slots__ = (
+        "requests",
+        "bytes_sent",
+        "bytes_received",
+        "timeouts",
+        "crc_failures",
+        "mismatches",
+        "retries",
+        "rtt",
+    )
+
+    def __init__(self, buckets: Sequence[float]):
+        self.requests = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.timeouts = 0
+        self.crc_failures = 0
+        self.mismatches = 0
+        self.retries = 0
+        self.rtt = Histogram(buckets)
+
+    def as_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+            "timeouts": self.timeouts,
+            "crc_failures": self.crc_failures,
+            "mismatches": self.mismatches,
+            "retries": self.retries,
+            "rtt_p50": self.rtt.quantile(0.5),
+            "rtt_p99": self.rtt.quantile(0.99),
+            "rtt": self.rtt.as_dict(),
+        }
+
+
+class MetricsRegistry:
+    """デバイスID・コマンドコードごとの計測値
+
+    Examples:
+        >>> r485.metrics = MetricsRegistry()
+        >>> r485.get_motor_status()
+        >>> r485.metrics.snapshot()[0]["motor_status_readback"]["requests"]
+        1
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """
+        Args:
+            buckets (Sequence[float], optional): 往復時間のヒストグラムの上限 [秒].
+                Defaults to DEFAULT_BUCKETS.
+        """
+        self.buckets = tuple(buckets)
+        self._metrics: Dict[Tuple[int, int], CommandMetrics] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, device_id: int, command: int) -> CommandMetrics:
+        key = (device_id, command)
+        metrics = self._metrics.get(key)
+        if metrics is None:
+            metrics = self._metrics[key] = CommandMetrics(self.buckets)
+        return metrics
+
+    def record(
+        self,
+        device_id: int,
+        command: int,
+        sent: int,
+        received: int,
+        rtt: float,
+        error: Optional[str] = None,
+    ) -> None:
+        """1 往復を記録
+
+        Args:
+            device_id (int): デバイスID
+            command (int): リクエストのコマンドコード
+            sent (int): 送信したバイト数
+            received (int): 受信したバイト数
+            rtt (float): 送信開始から受信完了 (またはタイムアウト) までの時間 [秒]
+            error (Optional[str], optional): 失敗理由 ("timeout", "crc", "mismatch").
+                Defaults to None.
+        """
+        with self._lock:
+            m = self._get(device_id, command)
+            m.requests += 1
+            m.bytes_sent += sent
+            m.bytes_received += received
+            if error is None:
+                m.rtt.observe(rtt)
+            elif error == "timeout":
+                m.timeouts += 1
+            elif error == "crc":
+                m.crc_failures += 1
+            else:
+                m.mismatches += 1
+
+    def record_retry(self, device_id: int, command: int) -> None:
+        """リトライを記録
+
+        Args:
+            device_id (int): デバイスID
+            command (int): リクエストのコマンドコード
+        """
+        with self._lock:
+            self._get(device_id, command).retries += 1
+
+    def reset(self) -> None:
+        """すべての計測値を破棄"""
+        with self._lock:
+            self._metrics.clear()
+
+    def items(self) -> List[Tuple[int, int, dict]]:
+        """(デバイスID, コマンドコード, 計測値の dict) のリスト"""
+        with self._lock:
+            return [
+                (device_id, command, m.as_dict())
+                for (device_id, command), m in sorted(self._metrics.items())
+            ]
+
+    def snapshot(self) -> Dict[int, Dict[str, dict]]:
+        """計測値 (デバイスID → コマンド名 → 計測値の dict)"""
+        result: Dict[int, Dict[str, dict]] = {}
+        for device_id, command, values in self.items():
+            result.setdefault(device_id, {})[Proto.CommandCode(command).name] = values
+        return result
+
+    def format(self) -> str:
+        """計測値を表形式の文字列に"""
+        lines = [
+            f"{'dev':>3} {'command':<32} {'req':>7} {'tx[B]':>8} {'rx[B]':>8} "
+            f"{'p50[ms]':>8} {'p99[ms]':>8} {'tmo':>5} {'crc':>5} {'mis':>5} {'retry':>5}"
+        ]
+        for device_id, command, m in self.items():
+            p50, p99 = m["rtt_p50"], m["rtt_p99"]
+            lines.append(
+                f"{device_id:>3} {Proto.CommandCode(command).name:<32} "
+                f"{m['requests']:>7} {m['bytes_sent']:>8} {m['bytes_received']:>8} "
+                f"{'-' if p50 is None else f'{p50 * 1000:.1f}':>8} "
+                f"{'-' if p99 is None else f'{p99 * 1000:.1f}':>8} "
+                f"{m['timeouts']:>5} {m['crc_failures']:>5} {m['mismatches']:>5} "
+                f"{m['retries']:>5}"
+            )
+        return "\n".join(lines)
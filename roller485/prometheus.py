@@ -0,0 +1,256 @@
+"""Prometheus テキスト形式のメトリクスエクスポータ
+
+MetricsRegistry の計測値と、最新のリードバックから得た電圧・温度・電流を
+Prometheus のテキスト形式 (version 0.0.4) で出力します。
+ローカルの HTTP ポートで公開するか、node-exporter の textfile collector 用の
+ファイルに書き出します。
+"""
+
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+from .metrics import MetricsRegistry
+from .roller485_protocol import Roller485Protocol as Proto
+from .timing import BITS_PER_BYTE
+from .util import Roller485Util
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# リードバックの値 → (メトリクス名, ヘルプ, 基本単位への倍率)
+_TELEMETRY: Dict[str, Tuple[str, str, float]] = {
+    "vin": ("roller485_vin_volts", "Input voltage from the latest readback.", 1),
+    "temp": (
+        "roller485_temperature_celsius",
+        "Temperature from the latest readback.",
+        1,
+    ),
+    "current": (
+        "roller485_current_amperes",
+        "Motor current from the latest readback.",
+        0.001,  # mA → A
+    ),
+}
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class PrometheusExporter:
+    """Roller485Util のメトリクスを Prometheus 形式で公開
+
+    r485.metrics が未設定なら MetricsRegistry を設定し、リードバックの結果を
+    r485.readback_observers で受け取ります。
+
+    Examples:
+        >>> exporter = PrometheusExporter(r485, bus="rs485-0")
+        >>> exporter.serve(9485)  # http://127.0.0.1:9485/metrics
+        >>> exporter.write_textfile("/var/lib/node_exporter/roller485.prom")
+    """
+
+    def __init__(self, r485: Roller485Util, bus: Optional[str] = None):
+        """
+        Args:
+            r485 (Roller485Util): 対象のクライアント
+            bus (Optional[str], optional): bus ラベルの値. None の場合はポート名.
+        """
+        if r485.metrics is None:
+            r485.metrics = MetricsRegistry()
+        self.r485 = r485
+        self.registry: MetricsRegistry = r485.metrics
+        self.bus = bus if bus is not None else str(r485.port)
+        self.telemetry: Dict[Tuple[int, str], float] = {}
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        r485.readback_observers.append(self._observe)
+
+    def _observe(self, device_id: int, command: Proto.CommandCode, data: dict) -> None:
+        with self._lock:
+            for key in _TELEMETRY:
+                if key in data:
+                    self.telemetry[(device_id, key)] = data[key]
+
+    def close(self) -> None:
+        """HTTP サーバを止め、リードバックの受け取りをやめる"""
+        self.shutdown()
+        if self._observe in self.r485.readback_observers:
+            self.r485.readback_observers.remove(self._observe)
+
+    def render(self) -> str:
+        """テキスト形式のメトリクス
+
+        Returns:
+            str: Prometheus テキスト形式
+        """
+        items = self.registry.items()
+        bus = self.bus
+        out: List[str] = []
+
+        def family(name: str, kind: str, help_text: str) -> None:
+            out.append(f"# HELP {name} {help_text}")
+            out.append(f"# TYPE {name} {kind}")
+
+        family("roller485_requests_total", "counter", "Requests sent to the bus.")
+        for device_id, command, m in items:
+            labels = _labels(
+                bus=bus, device=device_id, command=Proto.CommandCode(command).name
+            )
+            out.append(f"roller485_requests_total{labels} {m['requests']}")
+
+        family(
+            "roller485_request_duration_seconds",
+            "histogram",
+            "Round-trip time of successful requests.",
+        )
+        for device_id, command, m in items:
+            name = Proto.CommandCode(command).name
+            cumulative = 0
+            for bound, count in m["rtt"]["buckets"]:
+                cumulative += count
+                le = "+Inf" if bound is None else _number(bound)
+                labels = _labels(bus=bus, device=device_id, command=name, le=le)
+                out.append(
+                    f"roller485_request_duration_seconds_bucket{labels} {cumulative}"
+                )
+            labels = _labels(bus=bus, device=device_id, command=name)
+            out.append(
+                f"roller485_request_duration_seconds_sum{labels} "
+                f"{_number(m['rtt']['sum'])}"
+            )
+            out.append(
+                f"roller485_request_duration_seconds_count{labels} {m['rtt']['count']}"
+            )
+
+        errors: Dict[Tuple[int, str], int] = {}
+        retries: Dict[int, int] = {}
+        sent = received = 0
+        for device_id, _, m in items:
+            for reason, key in (
+                ("timeout", "timeouts"),
+                ("crc", "crc_failures"),
+                ("mismatch", "mismatches"),
+            ):
+                errors[(device_id, reason)] = (
+                    errors.get((device_id, reason), 0) + m[key]
+                )
+            retries[device_id] = retries.get(device_id, 0) + m["retries"]
+            sent += m["bytes_sent"]
+            received += m["bytes_received"]
+
+        family("roller485_errors_total", "counter", "Failed requests by reason.")
+        for (device_id, reason), count in sorted(errors.items()):
+            labels = _labels(bus=bus, device=device_id, reason=reason)
+            out.append(f"roller485_errors_total{labels} {count}")
+
+        family("roller485_retries_total", "counter", "Requests resent after a failure.")
+        for device_id, count in sorted(retries.items()):
+            out.append(
+                f"roller485_retries_total{_labels(bus=bus, device=device_id)} {count}"
+            )
+
+        family("roller485_bytes_total", "counter", "Bytes on the wire by direction.")
+        out.append(f"roller485_bytes_total{_labels(bus=bus, direction='tx')} {sent}")
+        out.append(
+            f"roller485_bytes_total{_labels(bus=bus, direction='rx')} {received}"
+        )
+
+        # バスの占有時間 = 送受信バイト数 × 1 バイトのワイヤ時間
+        # (使用率は rate(roller485_bus_busy_seconds_total[1m]) で求める)
+        busy = (sent + received) * BITS_PER_BYTE / self.r485.baudrate
+        with self._lock:
+            telemetry = sorted(self.telemetry.items())
+        family(
+            "roller485_bus_busy_seconds_total",
+            "counter",
+            "Wire time of all frames at the configured baud rate.",
+        )
+        out.append(
+            f"roller485_bus_busy_seconds_total{_labels(bus=bus)} {_number(busy)}"
+        )
+
+        for key, (name, help_text, scale) in _TELEMETRY.items():
+            values = [(d, v) for (d, k), v in telemetry if k == key]
+            if not values:
+                continue
+            family(name, "gauge", help_text)
+            for device_id, value in values:
+                value = value * scale if scale != 1 else value
+                out.append(
+                    f"{name}{_labels(bus=bus, device=device_id)} {_number(value)}"
+                )
+
+        return "\n".join(out) + "\n"
+
+    def write_textfile(self, path: str) -> None:
+        """textfile collector 用のファイルに書き出す
+
+        読み取り中のファイルが途中で切れないよう、同じディレクトリの一時ファイルに
+        書いてから置き換えます。
+
+        Args:
+            path (str): 出力先 (拡張子 .prom)
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".roller485-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(self.render())
+            os.chmod(tmp, 0o644)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def serve(self, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """HTTP サーバをバックグラウンドで起動
+
+        Args:
+            port (int): ポート番号 (0 で空いているポート)
+            host (str, optional): 待ち受けるアドレス. Defaults to "127.0.0.1".
+
+        Returns:
+            ThreadingHTTPServer: 起動したサーバ (server_address で実際のポートを取得できる)
+        """
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = exporter.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args) -> None:
+                pass
+
+        self.shutdown()
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self._server = server
+        return server
+
+    def shutdown(self) -> None:
+        """HTTP サーバを止める"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
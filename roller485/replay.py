@@ -0,0 +1,232 @@
+"""記録したセッションの再生
+
+Roller485Util.capture に CaptureWriter を設定して実機とのセッションを記録しておき、
+ReplayTransport を transport に渡すと、記録したリクエストと同じリクエストに
+記録したレスポンスを (記録した応答時間で、または即座に) 返します。
+記録と異なるリクエストは divergences に記録します。
+
+Examples:
+    記録:
+        >>> r485.capture = CaptureWriter("session.cap")
+        >>> run_scenario(r485)
+        >>> r485.capture.close()
+
+    再生:
+        >>> replay = ReplayTransport(load_session(capture_files("session.cap")))
+        >>> run_scenario(Roller485Util(target=0, transport=replay))
+        >>> assert not replay.divergences
+"""
+
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+
+from .capture import TX, read_captures
+from .clock import SYSTEM_CLOCK, Clock
+
+
+@dataclass
+class Exchange:
+    """記録した 1 回の送信と、次の送信までに受信したバイト列"""
+
+    timestamp_ns: int  # 送信時刻
+    request: bytes  # 1 回の write() で送信したバイト列
+    response: bytes  # 受信したバイト列 (応答がなければ空)
+    delay: float  # 送信から最後の受信までの時間 [秒] (応答がなければ 0)
+
+
+@dataclass
+class Divergence:
+    """記録と異なるリクエスト"""
+
+    index: int  # 記録上の位置
+    kind: str  # "unexpected" (記録にない送信) または "skipped" (送られなかった記録)
+    expected: Optional[bytes]
+    actual: Optional[bytes]
+
+    def as_dict(self) -> dict:
+        """JSON に変換できる dict"""
+        return {
+            "index": self.index,
+            "kind": self.kind,
+            "expected": None if self.expected is None else self.expected.hex(),
+            "actual": None if self.actual is None else self.actual.hex(),
+        }
+
+
+def load_session(paths: Iterable[str]) -> List[Exchange]:
+    """キャプチャファイルから送信とその応答の組を読み出す
+
+    TX レコードごとに、次の TX レコードまでの RX レコードを応答とみなします。
+    最初の TX より前の RX レコードは無視します。
+
+    Args:
+        paths (Iterable[str]): キャプチャファイル (capture_files() の結果など)
+
+    Returns:
+        List[Exchange]: 記録順の送信と応答
+    """
+    exchanges: List[Exchange] = []
+    response = bytearray()
+    last_ns = 0
+    current: Optional[Tuple[int, bytes]] = None
+
+    def close() -> None:
+        if current is not None:
+            ts, request = current
+            delay = (last_ns - ts) / 1e9 if response else 0.0
+            exchanges.append(Exchange(ts, request, bytes(response), max(0.0, delay)))
+
+    for record in read_captures(paths):
+        if record.direction == TX:
+            close()
+            current = (record.timestamp_ns, record.data)
+            response.clear()
+        elif current is not None:
+            response += record.data
+            last_ns = record.timestamp_ns
+    close()
+    return exchanges
+
+
+class ReplayTransport:
+    """記録したセッションを再生する transport
+
+    送信されたバイト列を記録の次の送信と比較し、一致すればその応答を返します。
+    一致しない場合は resync_window 件先まで探し、見つかれば間の記録を "skipped"、
+    見つからなければ "unexpected" として divergences に追加し、同じバイト列の
+    最後の記録の応答を返します (記録にないバイト列には応答しません)。
+
+    Roller485Util の transport と同じ pyserial 互換のインターフェースを持ちます。
+    """
+
+    def __init__(
+        self,
+        exchanges: List[Exchange],
+        timing: str = "recorded",
+        timeout: Optional[float] = 1.0,
+        resync_window: int = 8,
+        clock: Clock = SYSTEM_CLOCK,
+    ):
+        """
+        Args:
+            exchanges (List[Exchange]): load_session() の結果
+            timing (str, optional): "recorded" は記録した応答時間で、"fast" は即座に
+                応答する. Defaults to "recorded".
+            timeout (Optional[float], optional): read() のタイムアウト [秒]。
+                "fast" では応答がないとわかっている read() は待たずに返る.
+                Defaults to 1.0.
+            resync_window (int, optional): 一致しないときに先を探す件数. Defaults to 8.
+            clock (Clock, optional): 応答時間とタイムアウトの計測に使う時計。
+                VirtualClock を使うと記録した応答時間を待たずに再現する.
+                Defaults to SYSTEM_CLOCK.
+        """
+        self.clock = clock
+        if timing not in ("recorded", "fast"):
+            raise ValueError('timing must be "recorded" or "fast"')
+        self.exchanges = exchanges
+        self.timing = timing
+        self.timeout = timeout
+        self.resync_window = resync_window
+        self.divergences: List[Divergence] = []
+        self.replayed = 0
+        self._cursor = 0
+        self._by_request: Dict[bytes, Exchange] = {e.request: e for e in exchanges}
+        self._rx = bytearray()
+        self._scheduled: Deque[Tuple[float, bytes]] = deque()
+        self._cond = threading.Condition()
+
+    @property
+    def remaining(self) -> int:
+        """まだ再生していない記録の数"""
+        return len(self.exchanges) - self._cursor
+
+    def report(self) -> dict:
+        """再生結果の要約"""
+        return {
+            "recorded": len(self.exchanges),
+            "replayed": self.replayed,
+            "remaining": self.remaining,
+            "divergences": len(self.divergences),
+        }
+
+    def _match(self, data: bytes) -> Optional[Exchange]:
+        end = min(len(self.exchanges), self._cursor + self.resync_window + 1)
+        for i in range(self._cursor, end):
+            if self.exchanges[i].request == data:
+                for j in range(self._cursor, i):
+                    self.divergences.append(
+                        Divergence(j, "skipped", self.exchanges[j].request, None)
+                    )
+                self._cursor = i + 1
+                return self.exchanges[i]
+        expected = self.exchanges[self._cursor].request if self.remaining > 0 else None
+        self.divergences.append(Divergence(self._cursor, "unexpected", expected, data))
+        return self._by_request.get(data)
+
+    # --- pyserial 互換インターフェース ---
+
+    def write(self, data: bytes) -> int:
+        """送信 (記録と比較して応答を予約)"""
+        now = self.clock.monotonic()
+        data = bytes(data)
+        with self._cond:
+            self.replayed += 1
+            exchange = self._match(data)
+            if exchange is not None and exchange.response:
+                delay = exchange.delay if self.timing == "recorded" else 0.0
+                self._scheduled.append((now + delay, exchange.response))
+            self._cond.notify_all()
+        return len(data)
+
+    def read(self, size: int = 1) -> bytes:
+        """最大 size バイトを読み取り (timeout 秒で打ち切り)"""
+        deadline = (
+            None if self.timeout is None else self.clock.monotonic() + self.timeout
+        )
+        with self._cond:
+            while True:
+                now = self.clock.monotonic()
+                self._deliver(now)
+                if len(self._rx) >= size:
+                    break
+                if self.timing == "fast" and not self._scheduled:
+                    break
+                if deadline is not None and now >= deadline:
+                    break
+                wakeups = [t for t, _ in self._scheduled]
+                if deadline is not None:
+                    wakeups.append(deadline)
+                if not wakeups:
+                    self._cond.wait()
+                else:
+                    self.clock.wait(self._cond, max(0.0, min(wakeups) - now))
+            out = bytes(self._rx[:size])
+            del self._rx[:size]
+            return out
+
+    @property
+    def in_waiting(self) -> int:
+        """受信済みのバイト数"""
+        with self._cond:
+            self._deliver(self.clock.monotonic())
+            return len(self._rx)
+
+    def reset_input_buffer(self) -> None:
+        with self._cond:
+            self._rx.clear()
+            self._scheduled.clear()
+
+    def reset_output_buffer(self) -> None:
+        pass
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def _deliver(self, now: float) -> None:
+        while self._scheduled and self._scheduled[0][0] <= now:
+            self._rx += self._scheduled.popleft()[1]
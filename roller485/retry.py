@@ -0,0 +1,88 @@
+"""冪等性を考慮したリトライポリシー
+
+Roller485Util.retry_policy に設定すると、タイムアウト・CRC エラー・エコーの不一致で
+失敗したリクエストを、受信バッファを捨ててから送り直します。
+同じリクエストを 2 回送っても結果が変わらないコマンドだけを自動でリトライします。
+"""
+
+from dataclasses import dataclass, field
+from typing import FrozenSet
+
+from .roller485_protocol import Roller485Protocol as Proto
+
+C = Proto.CommandCode
+
+# 2 回送っても結果が変わらず、フラッシュに書き込まないコマンド
+# (リードバック、RAM 上の絶対値の設定、I2C 読み取り)
+IDEMPOTENT_COMMANDS: FrozenSet[int] = frozenset(
+    c.value
+    for c in (
+        C.motor_switch,
+        C.remove_protection,
+        C.encoder,
+        C.button_switch_mode,
+        C.motor_jam_protection,
+        C.speed_control,
+        C.position_control,
+        C.current_control,
+        C.motor_status_readback,
+        C.other_status_readback,
+        C.readback_2,
+        C.readback_3,
+        C.i2c_read_register,
+        C.i2c_read_raw,
+    )
+)
+# それ以外 (フラッシュに保存される mode_setting・rgb_led_control・PID・位置範囲保護の設定、
+# save_to_flash、rs485_baud_rate、device_id、I2C 書き込み) は、送り直すとフラッシュの
+# 書き込みやアドレスの変更、I2C デバイスの副作用が重複する
+
+
+@dataclass
+class RetryPolicy:
+    """リトライの設定
+
+    Attributes:
+        attempts (int): 1 リクエストあたりの最大送信回数 (1 でリトライなし)
+        backoff (float): 最初のリトライ前の待ち時間 [秒]
+        backoff_factor (float): リトライごとに待ち時間に掛ける倍率
+        max_backoff (float): 待ち時間の上限 [秒]
+        retry_non_idempotent (bool): 冪等でないコマンドもリトライする
+        raise_errors (bool): リトライしても失敗した場合に ExchangeError を送出する。
+            False の場合は従来どおり False や空の dict を返す
+        idempotent (FrozenSet[int]): 冪等とみなすコマンドコード
+    """
+
+    attempts: int = 3
+    backoff: float = 0.005
+    backoff_factor: float = 2.0
+    max_backoff: float = 0.1
+    retry_non_idempotent: bool = False
+    raise_errors: bool = True
+    idempotent: FrozenSet[int] = field(default=IDEMPOTENT_COMMANDS)
+
+    def attempts_for(self, command: int) -> int:
+        """コマンドの最大送信回数
+
+        Args:
+            command (int): リクエストのコマンドコード
+
+        Returns:
+            int: 最大送信回数
+        """
+        if self.retry_non_idempotent or command in self.idempotent:
+            return max(1, self.attempts)
+        return 1
+
+    def backoff_time(self, attempt: int) -> float:
+        """attempt 回目の失敗のあとの待ち時間 [秒]
+
+        Args:
+            attempt (int): 失敗した回数 (1 から)
+
+        Returns:
+            float: 待ち時間
+        """
+        return min(
+            self.max_backoff, self.backoff * self.backoff_factor ** (attempt - 1)
+        )
@@ -0,0 +1,381 @@
+"""優先度付きコマンドスケジューラ
+
+Roller485Util の前段に置き、複数スレッドからのリクエストを優先度順に
+1 本のワーカースレッドでバスへ送り出します。
+"""
+
+import heapq
+import itertools
+import threading
+from collections import deque
+from concurrent.futures import Future
+from enum import IntEnum
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from .clock import SYSTEM_CLOCK, Clock
+from .errors import DeadlineExceededError
+from .util import Roller485Util
+
+
+class Priority(IntEnum):
+    """優先度クラス (値が小さいほど優先)"""
+
+    Safety = 0
+    Control = 1
+    Configuration = 2
+    Telemetry = 3
+    I2C = 4
+
+
+# Roller485Util のメソッドごとの既定の優先度 (停止要求は default_priority() で Safety)
+METHOD_PRIORITY: Dict[str, Priority] = {
+    "motor_switch": Priority.Configuration,
+    "remove_protection": Priority.Configuration,
+    "set_speed_and_max_current": Priority.Control,
+    "set_position_and_max_current": Priority.Control,
+    "set_current": Priority.Control,
+    "mode_setting": Priority.Configuration,
+    "save_to_flash": Priority.Configuration,
+    "set_encoder": Priority.Configuration,
+    "button_switching_mode": Priority.Configuration,
+    "rgb_led_control": Priority.Configuration,
+    "set_rs485_baud_rate": Priority.Configuration,
+    "set_device_id": Priority.Configuration,
+    "set_motor_jam_protection": Priority.Configuration,
+    "set_motor_position_over_range_protection": Priority.Configuration,
+    "set_speed_pid": Priority.Configuration,
+    "set_position_pid": Priority.Configuration,
+    "get_motor_status": Priority.Telemetry,
+    "get_other_status": Priority.Telemetry,
+    "get_speed_pid_and_rgb": Priority.Telemetry,
+    "get_position_pid_and_other": Priority.Telemetry,
+    "readback": Priority.Telemetry,
+    "get_full_status": Priority.Telemetry,
+    "probe_device": Priority.Telemetry,
+    "read_i2c": Priority.I2C,
+    "write_i2c": Priority.I2C,
+    "read_i2c_raw": Priority.I2C,
+    "write_i2c_raw": Priority.I2C,
+}
+
+# 停止要求が割り込んだときにバス全体でキャンセルするクラス
+PREEMPTIBLE = frozenset({Priority.Telemetry, Priority.I2C})
+# 停止要求が割り込んだときに同じ宛先だけキャンセルするクラス
+# (停止より前に投入された motor_switch(On) やセットポイントが停止のあとに送信されないように)
+PREEMPTIBLE_FOR_TARGET = frozenset({Priority.Control, Priority.Configuration})
+
+
+def default_priority(
+    method: str, args: Tuple[Any, ...], kwargs: Dict[str, Any]
+) -> Priority:
+    """リクエストの既定の優先度
+
+    停止要求 (motor_switch(Off)) は Safety、それ以外は METHOD_PRIORITY の値です。
+
+    Args:
+        method (str): Roller485Util のメソッド名
+        args (Tuple[Any, ...]): メソッドの引数
+        kwargs (Dict[str, Any]): メソッドのキーワード引数
+
+    Returns:
+        Priority: 優先度
+    """
+    if method == "motor_switch":
+        state = args[0] if args else kwargs.get("state")
+        if state == Roller485Util.Switch.Off:
+            return Priority.Safety
+    return METHOD_PRIORITY.get(method, Priority.Configuration)
+
+
+class _Job:
+    """キューに積まれたリクエスト"""
+
+    __slots__ = (
+        "priority",
+        "method",
+        "args",
+        "kwargs",
+        "future",
+        "queued_at",
+        "deadline",
+        "target",
+    )
+
+    def __init__(
+        self,
+        priority: Priority,
+        method: str,
+        args: Tuple[Any, ...],
+        kwargs: Dict[str, Any],
+        queued_at: float,
+        deadline: Optional[float],
+        target: Optional[int] = None,
+    ):
+        self.priority = priority
+        self.method = method
+        self.args = args
+        self.kwargs = kwargs
+        self.future: Future = Future()
+        self.queued_at = queued_at
+        self.deadline = deadline
+        self.target = target
+
+
+class _ClassStats:
+    """優先度クラスごとのキュー待ち時間の統計"""
+
+    def __init__(self, window: int):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.dropped = 0
+        self.preempted = 0
+        self.recent: Deque[float] = deque(maxlen=window)
+
+    def add(self, latency: float) -> None:
+        self.count += 1
+        self.total += latency
+        self.max = max(self.max, latency)
+        self.recent.append(latency)
+
+    def snapshot(self) -> Dict[str, float]:
+        recent = sorted(self.recent)
+
+        def quantile(q: float) -> float:
+            if not recent:
+                return 0.0
+            return recent[min(len(recent) - 1, int(q * len(recent)))]
+
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": quantile(0.50),
+            "p99": quantile(0.99),
+            "max": self.max,
+            "dropped": self.dropped,
+            "preempted": self.preempted,
+        }
+
+
+class CommandScheduler:
+    """優先度付きコマンドスケジューラ
+
+    停止要求 > 制御セットポイント > 設定 > テレメトリ > I2C の順でリクエストを送信します。
+    Safety クラスのリクエスト (既定では motor_switch(Off)) が投入されると、キューに残っている
+    テレメトリと I2C のリクエストと、同じ宛先の制御・設定のリクエストはキャンセルされます
+    (preempt_on_safety=False で無効化)。停止より前に投入されたリクエストが停止のあとに
+    送信されてモーターが再び動き出すことはありません。
+    期限付きのリクエストは、送信前に期限を過ぎていれば送信せずに
+    DeadlineExceededError で完了します。テレメトリには既定で telemetry_deadline が適用されます。
+
+    Examples:
+        >>> sched = CommandScheduler(r485)
+        >>> sched.start()
+        >>> status = sched.submit("get_motor_status").result()
+        >>> sched.submit("motor_switch", Roller485Util.Switch.Off).result()
+        >>> sched.stop()
+    """
+
+    def __init__(
+        self,
+        r485: Roller485Util,
+        telemetry_deadline: Optional[float] = 0.1,
+        preempt_on_safety: bool = True,
+        stats_window: int = 1024,
+        clock: Clock = SYSTEM_CLOCK,
+    ):
+        """
+        Args:
+            r485 (Roller485Util): リクエストを送信するクライアント
+            telemetry_deadline (Optional[float], optional): テレメトリの既定の期限 [秒].
+                None で期限なし. Defaults to 0.1.
+            preempt_on_safety (bool, optional): Safety リクエストでテレメトリと I2C、
+                同じ宛先の制御と設定をキャンセルするかどうか. Defaults to True.
+            stats_window (int, optional): パーセンタイル計算に使う直近サンプル数.
+                Defaults to 1024.
+            clock (Clock, optional): 期限と待ち時間の計測に使う時計.
+                Defaults to SYSTEM_CLOCK.
+        """
+        self.r485 = r485
+        self.clock = clock
+        self.telemetry_deadline = telemetry_deadline
+        self.preempt_on_safety = preempt_on_safety
+        self._queue: List[Tuple[int, int, _Job]] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._stats = {p: _ClassStats(stats_window) for p in Priority}
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+    def __enter__(self) -> "CommandScheduler":
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        """ワーカースレッドを開始"""
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(
+            target=self._worker, name="roller485-scheduler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, cancel_pending: bool = True) -> None:
+        """ワーカースレッドを停止
+
+        Args:
+            cancel_pending (bool, optional): キューに残ったリクエストをキャンセルする.
+                False の場合は送信し終えてから停止する. Defaults to True.
+        """
+        with self._cond:
+            if cancel_pending:
+                while self._queue:
+                    heapq.heappop(self._queue)[2].future.cancel()
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def submit(
+        self,
+        method: str,
+        *args: Any,
+        priority: Optional[Priority] = None,
+        deadline: Optional[float] = None,
+        target: Optional[int] = None,
+        **kwargs: Any,
+    ) -> Future:
+        """リクエストをキューに投入
+
+        Args:
+            method (str): 呼び出す Roller485Util のメソッド名
+            *args: メソッドの引数
+            priority (Optional[Priority], optional): 優先度. None の場合は
+                default_priority() の既定値. Defaults to None.
+            deadline (Optional[float], optional): 投入からの期限 [秒]. None の場合、
+                テレメトリには telemetry_deadline が適用される. Defaults to None.
+            target (Optional[int], optional): 宛先のデバイスID. 送信中だけ r485.target を
+                切り替える. None の場合は r485.target のまま. Defaults to None.
+            **kwargs: メソッドのキーワード引数
+
+        Returns:
+            Future: メソッドの戻り値を受け取る Future
+        """
+        if not callable(getattr(self.r485, method, None)):
+            raise AttributeError(f"Roller485Util has no method {method!r}")
+        if priority is None:
+            priority = default_priority(method, args, kwargs)
+        if deadline is None and priority == Priority.Telemetry:
+            deadline = self.telemetry_deadline
+
+        now = self.clock.monotonic()
+        job = _Job(
+            priority,
+            method,
+            args,
+            kwargs,
+            queued_at=now,
+            deadline=None if deadline is None else now + deadline,
+            target=target,
+        )
+        with self._cond:
+            if priority == Priority.Safety and self.preempt_on_safety:
+                self._preempt(job)
+            heapq.heappush(self._queue, (priority.value, next(self._seq), job))
+            self._cond.notify()
+        return job.future
+
+    def _same_target(self, a: Optional[int], b: Optional[int]) -> bool:
+        """宛先が同じかどうか (None は r485.target)"""
+        default = getattr(self.r485, "target", None)
+        return (default if a is None else a) == (default if b is None else b)
+
+    def _preempt(self, stop: _Job) -> None:
+        """停止要求 stop より前のリクエストをキャンセル (ロック取得済みで呼ぶ)
+
+        PREEMPTIBLE クラスはすべて、PREEMPTIBLE_FOR_TARGET クラスは stop と同じ宛先のものを
+        キャンセルします。
+        """
+        kept = []
+        for entry in self._queue:
+            job = entry[2]
+            if job.priority in PREEMPTIBLE or (
+                job.priority in PREEMPTIBLE_FOR_TARGET
+                and self._same_target(job.target, stop.target)
+            ):
+                if job.future.cancel():
+                    self._stats[job.priority].preempted += 1
+            else:
+                kept.append(entry)
+        heapq.heapify(kept)
+        self._queue = kept
+
+    @property
+    def pending(self) -> int:
+        """キューに残っているリクエスト数"""
+        with self._cond:
+            return len(self._queue)
+
+    def latency_stats(self) -> Dict[str, Dict[str, float]]:
+        """優先度クラスごとのキュー待ち時間 [秒] と破棄数
+
+        Returns:
+            Dict[str, Dict[str, float]]: クラス名をキーとした
+                count, mean, p50, p99, max, dropped, preempted
+        """
+        with self._cond:
+            return {p.name: self._stats[p].snapshot() for p in Priority}
+
+    def _next_job(self) -> Optional[_Job]:
+        """次に送信するリクエストを取得 (停止時は None)"""
+        with self._cond:
+            while True:
+                while not self._queue and self._running:
+                    self._cond.wait()
+                if not self._queue:
+                    return None
+                job = heapq.heappop(self._queue)[2]
+                if not job.future.set_running_or_notify_cancel():
+                    continue
+                now = self.clock.monotonic()
+                if job.deadline is not None and now > job.deadline:
+                    self._stats[job.priority].dropped += 1
+                    job.future.set_exception(
+                        DeadlineExceededError(
+                            f"{job.method} dropped after "
+                            f"{now - job.queued_at:.3f}s in queue"
+                        )
+                    )
+                    continue
+                self._stats[job.priority].add(now - job.queued_at)
+                return job
+
+    def _worker(self) -> None:
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            try:
+                result = self._call(job)
+            except BaseException as e:
+                job.future.set_exception(e)
+            else:
+                job.future.set_result(result)
+
+    def _call(self, job: _Job) -> Any:
+        """job のメソッドを呼び出す (target 指定時は送信中だけ宛先を切り替える)"""
+        method = getattr(self.r485, job.method)
+        if job.target is None:
+            return method(*job.args, **job.kwargs)
+        previous = self.r485.target
+        self.r485.target = job.target
+        try:
+            return method(*job.args, **job.kwargs)
+        finally:
+            self.r485.target = previous
@@ -0,0 +1,281 @@
+"""RS485 バスの受動的なスニファ
+
+送信は一切せずにポートを読み続け、バイト列をフレームに分割して
+Roller485Protocol でデコードします。リクエストは先頭のコマンドコードから長さを、
+レスポンスは 0xAA 0x55 のマジックナンバーに続くコマンドコードから長さを求めます。
+"""
+
+import io
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional
+
+from kaitaistruct import KaitaiStream
+
+from .capture import RX, TX
+from .clock import SYSTEM_CLOCK, Clock
+from .roller485_protocol import Roller485Protocol as Proto
+from .timing import request_commands, response_command
+from .util import Roller485Util
+
+MAGIC = b"\xaa\x55"
+
+# コマンドコード → フレーム長 (レスポンスはマジックナンバーを含む)
+REQUEST_LENGTHS: Dict[int, int] = {
+    c.value: Roller485Util.get_packet_length(c.value) for c in request_commands()
+}
+RESPONSE_LENGTHS: Dict[int, int] = {
+    response_command(c).value: Roller485Util.get_packet_length(
+        response_command(c).value
+    )
+    for c in request_commands()
+}
+
+
+@dataclass
+class SniffedFrame:
+    """スニファが切り出した 1 フレーム"""
+
+    timestamp_ns: int  # 最後のバイトを受信した時刻 (clock.monotonic_ns)
+    direction: int  # TX (リクエスト) または RX (レスポンス)
+    data: bytes
+    crc_ok: bool
+
+    @property
+    def command(self) -> int:
+        return self.data[2] if self.direction == RX else self.data[0]
+
+    @property
+    def device_id(self) -> int:
+        return self.data[3] if self.direction == RX else self.data[1]
+
+    def decode(self) -> dict:
+        """Roller485Protocol でデコードしたペイロード
+
+        Returns:
+            dict: ペイロードのフィールド (bytes は 16 進文字列)
+        """
+        prot = Proto(KaitaiStream(io.BytesIO(self.data)))
+        prot._read()
+        return {
+            k: v.hex() if isinstance(v, bytes) else v
+            for k, v in vars(prot.payload).items()
+            if not k.startswith("_")
+        }
+
+    def as_dict(self) -> dict:
+        """JSON に変換できる dict"""
+        return {
+            "timestamp_ns": self.timestamp_ns,
+            "direction": "tx" if self.direction == TX else "rx",
+            "device_id": self.device_id,
+            "command": Proto.CommandCode(self.command).name,
+            "crc_ok": self.crc_ok,
+            "payload": self.decode() if self.crc_ok else None,
+            "raw": self.data.hex(),
+        }
+
+    def format(self) -> str:
+        """1 行のテキスト"""
+        direction = "TX" if self.direction == TX else "RX"
+        crc = "ok" if self.crc_ok else "BAD"
+        body = self.decode() if self.crc_ok else self.data.hex()
+        return (
+            f"{self.timestamp_ns / 1e9:.6f} {direction} dev={self.device_id:<3} "
+            f"{Proto.CommandCode(self.command).name:<28} crc={crc} {body}"
+        )
+
+
+class FrameSplitter:
+    """受信したバイト列をフレームに分割
+
+    feed() に渡したバイト列を内部のバッファに追加し、揃ったフレームを返します。
+    リクエストにもレスポンスにも当てはまらないバイトは 1 バイトずつ読み飛ばして
+    garbage_bytes に数えます。CRC8 が一致しないレスポンスは crc_ok=False で返しますが、
+    リクエストは誤同期とみなして 1 バイトずつ読み飛ばします。gap_ns 以上の無通信が
+    あれば、途中まで受信したフレームを捨てて同期し直します。
+    """
+
+    def __init__(self, gap_ns: Optional[int] = 5_000_000, clock: Clock = SYSTEM_CLOCK):
+        """
+        Args:
+            gap_ns (Optional[int], optional): 途中のフレームを捨てる無通信時間 [ns].
+                None では捨てない. Defaults to 5 ms.
+            clock (Clock, optional): 時刻の取得. Defaults to SYSTEM_CLOCK.
+        """
+        self.gap_ns = gap_ns
+        self.clock = clock
+        self.frames = 0
+        self.crc_errors = 0
+        self.garbage_bytes = 0
+        self._buf = bytearray()
+        self._last_ns: Optional[int] = None
+
+    def feed(
+        self, data: bytes, timestamp_ns: Optional[int] = None
+    ) -> List[SniffedFrame]:
+        """バイト列を追加し、揃ったフレームを返す
+
+        Args:
+            data (bytes): 受信したバイト列
+            timestamp_ns (Optional[int], optional): 受信した時刻. None の場合は
+                clock.monotonic_ns().
+
+        Returns:
+            List[SniffedFrame]: 揃ったフレーム
+        """
+        if timestamp_ns is None:
+            timestamp_ns = self.clock.monotonic_ns()
+        buf = self._buf
+        if (
+            buf
+            and self.gap_ns is not None
+            and self._last_ns is not None
+            and timestamp_ns - self._last_ns >= self.gap_ns
+        ):
+            self.garbage_bytes += len(buf)
+            buf.clear()
+        self._last_ns = timestamp_ns
+        buf += data
+
+        frames = []
+        pos = 0
+        n = len(buf)
+        while pos < n:
+            first = buf[pos]
+            if first == 0xAA:
+                if n - pos < 3:
+                    break
+                if buf[pos + 1] != 0x55 or buf[pos + 2] not in RESPONSE_LENGTHS:
+                    self.garbage_bytes += 1
+                    pos += 1
+                    continue
+                length = RESPONSE_LENGTHS[buf[pos + 2]]
+                direction, crc_start = RX, 2
+            elif first in REQUEST_LENGTHS:
+                length = REQUEST_LENGTHS[first]
+                direction, crc_start = TX, 0
+            else:
+                self.garbage_bytes += 1
+                pos += 1
+                continue
+            if n - pos < length:
+                break
+            frame = bytes(buf[pos : pos + length])
+            crc_ok = Roller485Util.calculate_crc8(frame[crc_start:-1]) == frame[-1]
+            if not crc_ok:
+                if direction == TX:
+                    # リクエストは 1 バイトでしか同期できないので、誤同期とみなして
+                    # 1 バイトずらす
+                    self.garbage_bytes += 1
+                    pos += 1
+                    continue
+                self.crc_errors += 1
+            self.frames += 1
+            frames.append(SniffedFrame(timestamp_ns, direction, frame, crc_ok))
+            pos += length
+        del buf[:pos]
+        return frames
+
+    def discard(self) -> int:
+        """途中まで受信したフレームを捨てる
+
+        Returns:
+            int: 捨てたバイト数 (garbage_bytes に加算される)
+        """
+        n = len(self._buf)
+        self.garbage_bytes += n
+        self._buf.clear()
+        return n
+
+
+class Sniffer:
+    """ポートを読み続けてフレームを通知するスニファ
+
+    Examples:
+        >>> port = serial.Serial("/dev/ttyUSB0", 115200, timeout=0.05)
+        >>> sniffer = Sniffer(port, on_frame=lambda f: print(f.format()))
+        >>> sniffer.run(duration=10)
+    """
+
+    def __init__(
+        self,
+        port,
+        on_frame: Optional[Callable[[SniffedFrame], None]] = None,
+        capture=None,
+        gap_ns: Optional[int] = 5_000_000,
+        chunk_size: int = 4096,
+        clock: Clock = SYSTEM_CLOCK,
+    ):
+        """
+        Args:
+            port: 読み取るポート (read() / in_waiting を持つオブジェクト)。書き込みはしない
+            on_frame (optional): フレームごとに呼ばれる. Defaults to None.
+            capture (optional): フレームを記録する CaptureWriter。リクエストは TX、
+                レスポンスは RX として記録する. Defaults to None.
+            gap_ns (Optional[int], optional): FrameSplitter の gap_ns. Defaults to 5 ms.
+            chunk_size (int, optional): 1 回に読む最大バイト数. Defaults to 4096.
+            clock (Clock, optional): 時刻の取得. Defaults to SYSTEM_CLOCK.
+        """
+        self.port = port
+        self.on_frame = on_frame
+        self.capture = capture
+        self.clock = clock
+        self.splitter = FrameSplitter(gap_ns, clock)
+        self.chunk_size = chunk_size
+        self._stop = threading.Event()
+
+    def poll(self) -> List[SniffedFrame]:
+        """受信済みのバイトを読み、揃ったフレームを処理して返す
+
+        受信バッファが空なら 1 バイト目が届くかポートのタイムアウトまで待ちます。
+        """
+        waiting = self.port.in_waiting
+        data = self.port.read(min(max(1, waiting), self.chunk_size))
+        if not data:
+            return []
+        frames = self.splitter.feed(data, self.clock.monotonic_ns())
+        for frame in frames:
+            if self.capture is not None:
+                self.capture.record(frame.direction, frame.data, frame.timestamp_ns)
+            if self.on_frame is not None:
+                self.on_frame(frame)
+        return frames
+
+    def frames(self) -> Iterator[SniffedFrame]:
+        """stop() が呼ばれるまでフレームを返し続ける"""
+        while not self._stop.is_set():
+            yield from self.poll()
+
+    def run(self, duration: Optional[float] = None, count: Optional[int] = None) -> int:
+        """フレームを受信し続ける
+
+        Args:
+            duration (Optional[float], optional): 実行時間 [秒]. Defaults to None.
+            count (Optional[int], optional): このフレーム数で終了. Defaults to None.
+
+        Returns:
+            int: 受信したフレーム数
+        """
+        self._stop.clear()
+        end = None if duration is None else self.clock.monotonic() + duration
+        received = 0
+        while not self._stop.is_set():
+            if end is not None and self.clock.monotonic() >= end:
+                break
+            received += len(self.poll())
+            if count is not None and received >= count:
+                break
+        return received
+
+    def stop(self) -> None:
+        """run() / frames() を止める"""
+        self._stop.set()
+
+    def stats(self) -> dict:
+        """フレーム数・CRC エラー数・読み飛ばしたバイト数"""
+        return {
+            "frames": self.splitter.frames,
+            "crc_errors": self.splitter.crc_errors,
+            "garbage_bytes": self.splitter.garbage_bytes,
+        }
@@ -0,0 +1,334 @@
+"""長時間の負荷試験 (ソーク試験)
+
+Roller485Util (通常はエミュレータ相手) に、セットポイント・リードバック・I2C 転送を
+指定した比率で最大レートで送り続け、interval 秒ごとにスループット、往復時間の
+パーセンタイル、RSS、Python オブジェクト数、エラー率を記録します。
+最初と最後の区間を比べて、メモリの増加やスループットの低下が閾値を超えたら失敗です。
+"""
+
+import gc
+import os
+import random
+import sys
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .emulator import VirtualRoller485
+from .errors import Roller485Error
+from .latency import READBACK_COMMANDS, LatencyProfile, P2Quantile
+from .util import Roller485Util
+
+# 操作の種類 → 既定の比率
+DEFAULT_MIX: Dict[str, float] = {"setpoint": 1.0, "readback": 3.0, "i2c": 1.0}
+
+_I2C_ADDRESS = 0x50
+
+
+@dataclass
+class SoakThresholds:
+    """失敗とみなす閾値
+
+    Attributes:
+        max_rss_growth (float): 最初の区間からの RSS の増加 [バイト]
+        max_object_growth (float): 最初の区間からの Python オブジェクト数の増加率
+        max_throughput_drop (float): 最初の区間からのスループットの低下率 (0〜1)
+        max_error_rate (float): 全体のエラー率 (0〜1)
+    """
+
+    max_rss_growth: float = 32 * 1024 * 1024
+    max_object_growth: float = 0.2
+    max_throughput_drop: float = 0.5
+    max_error_rate: float = 0.0
+
+
+@dataclass
+class SoakSample:
+    """interval 秒ごとの計測値"""
+
+    elapsed: float  # 開始からの時間 [秒]
+    operations: int  # 区間内の操作数
+    errors: int  # 区間内のエラー数
+    throughput: float  # 操作数 / 秒
+    rtt_p50: Optional[float]  # [秒]
+    rtt_p99: Optional[float]  # [秒]
+    rss: int  # [バイト]
+    objects: int  # gc が追跡しているオブジェクト数
+
+
+@dataclass
+class SoakReport:
+    """ソーク試験の結果"""
+
+    operations: int
+    errors: int
+    duration: float
+    samples: List[SoakSample] = field(default_factory=list)
+    failures: List[str] = field(default_factory=list)
+
+    @property
+    def passed(self) -> bool:
+        return not self.failures
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.operations if self.operations else 0.0
+
+    def as_dict(self) -> dict:
+        """JSON に変換できる dict"""
+        return {
+            "passed": self.passed,
+            "operations": self.operations,
+            "errors": self.errors,
+            "error_rate": self.error_rate,
+            "duration": self.duration,
+            "failures": self.failures,
+            "samples": [asdict(s) for s in self.samples],
+        }
+
+    def format(self) -> str:
+        """区間ごとの表と判定"""
+
+        def ms(value: Optional[float]) -> str:
+            return "-" if value is None else f"{value * 1000:.3f}"
+
+        lines = [
+            f"{'t[s]':>8} {'ops/s':>9} {'err':>5} {'p50[ms]':>8} {'p99[ms]':>8} "
+            f"{'rss[MiB]':>9} {'objects':>9}"
+        ]
+        for s in self.samples:
+            lines.append(
+                f"{s.elapsed:>8.1f} {s.throughput:>9.1f} {s.errors:>5} "
+                f"{ms(s.rtt_p50):>8} {ms(s.rtt_p99):>8} "
+                f"{s.rss / (1 << 20):>9.1f} {s.objects:>9}"
+            )
+        lines.append(
+            f"{self.operations} operations, {self.errors} errors "
+            f"({self.error_rate * 100:.3f}%) in {self.duration:.1f} s: "
+            + ("PASS" if self.passed else "FAIL")
+        )
+        lines += [f"  - {failure}" for failure in self.failures]
+        return "\n".join(lines)
+
+
+def current_rss() -> int:
+    """現在の RSS [バイト]
+
+    /proc/self/statm が読めない環境では最大 RSS で代用し、
+    resource モジュールがない環境 (Windows) では 0 を返します。
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux は KiB、macOS はバイト
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def emulated_client(
+    device_ids: Tuple[int, ...] = (0,), latency: float = 0.0
+) -> Tuple[VirtualRoller485, Roller485Util]:
+    """エミュレータにつないだ、送信後の固定待ちなしのクライアント
+
+    Args:
+        device_ids (Tuple[int, ...], optional): デバイスID. Defaults to (0,).
+        latency (float, optional): エミュレータの応答時間 [秒]. Defaults to 0.0.
+
+    Returns:
+        Tuple[VirtualRoller485, Roller485Util]: エミュレータとクライアント
+    """
+    bus = VirtualRoller485(device_ids=device_ids, default_latency=latency)
+    r485 = Roller485Util(target=device_ids[0], transport=bus, baudrate=115200)
+    for device_id in device_ids:
+        r485.latency_profiles[device_id] = LatencyProfile(device_id, default_wait=0.0)
+    return bus, r485
+
+
+class SoakHarness:
+    """ソーク試験
+
+    Examples:
+        >>> _, r485 = emulated_client((0, 1))
+        >>> report = SoakHarness(r485, device_ids=(0, 1)).run(duration=600)
+        >>> print(report.format())
+        >>> assert report.passed
+    """
+
+    def __init__(
+        self,
+        r485: Roller485Util,
+        device_ids: Tuple[int, ...] = (0,),
+        mix: Optional[Dict[str, float]] = None,
+        thresholds: Optional[SoakThresholds] = None,
+        seed: Optional[int] = 0,
+    ):
+        """
+        Args:
+            r485 (Roller485Util): 試験するクライアント
+            device_ids (Tuple[int, ...], optional): 宛先のデバイスID. Defaults to (0,).
+            mix (Optional[Dict[str, float]], optional): "setpoint", "readback", "i2c" の
+                比率. Defaults to DEFAULT_MIX.
+            thresholds (Optional[SoakThresholds], optional): 失敗の閾値.
+                Defaults to SoakThresholds().
+            seed (Optional[int], optional): 操作を選ぶ乱数のシード. Defaults to 0.
+        """
+        mix = dict(DEFAULT_MIX if mix is None else mix)
+        unknown = set(mix) - set(DEFAULT_MIX)
+        if unknown:
+            raise ValueError(f"unknown operations: {sorted(unknown)}")
+        self.r485 = r485
+        self.device_ids = tuple(device_ids)
+        self.thresholds = thresholds or SoakThresholds()
+        self.rng = random.Random(seed)
+        self._operations: Dict[str, Callable[[int], object]] = {
+            "setpoint": self._setpoint,
+            "readback": self._readback,
+            "i2c": self._i2c,
+        }
+        self._names = [name for name, weight in mix.items() if weight > 0]
+        self._weights = [mix[name] for name in self._names]
+        if not self._names:
+            raise ValueError("mix has no operations")
+
+    def _setpoint(self, device_id: int) -> object:
+        self.r485.target = device_id
+        return self.r485.set_speed_and_max_current(
+            self.rng.randint(-3000, 3000), 1000.0
+        )
+
+    def _readback(self, device_id: int) -> object:
+        command = self.rng.choice(READBACK_COMMANDS)
+        return self.r485.readback(command, device_id=device_id, delay=False)
+
+    def _i2c(self, device_id: int) -> object:
+        self.r485.target = device_id
+        reg = self.rng.randrange(0, 0x100, 16)
+        if self.rng.random() < 0.5:
+            return self.r485.write_i2c(_I2C_ADDRESS, 0, reg, bytes(16))
+        return self.r485.read_i2c(_I2C_ADDRESS, 0, reg, 16)
+
+    def _step(self) -> bool:
+        """比率に従って操作を 1 つ送り、成功したかを返す"""
+        name = self.rng.choices(self._names, self._weights)[0]
+        device_id = self.rng.choice(self.device_ids)
+        try:
+            return bool(self._operations[name](device_id))
+        except Roller485Error:
+            return False
+
+    def run(
+        self,
+        duration: float,
+        interval: float = 1.0,
+        warmup: float = 0.0,
+        on_sample: Optional[Callable[[SoakSample], None]] = None,
+    ) -> SoakReport:
+        """duration 秒間 (r485.clock の時刻で) 操作を送り続ける
+
+        Args:
+            duration (float): 試験時間 [秒]
+            interval (float, optional): 計測の間隔 [秒]. Defaults to 1.0.
+            warmup (float, optional): 計測を始める前に操作を送り続ける時間 [秒].
+                キャッシュや乱数表の初期化が最初の区間に混ざるのを避ける. Defaults to 0.0.
+            on_sample (Optional[Callable[[SoakSample], None]], optional): 計測のたびに
+                呼ばれる. Defaults to None.
+
+        Returns:
+            SoakReport: 結果
+        """
+        clock = self.r485.clock
+        target = self.r485.target
+        try:
+            warmup_end = clock.perf_counter() + warmup
+            while clock.perf_counter() < warmup_end:
+                self._step()
+        finally:
+            self.r485.target = target
+        start = clock.perf_counter()
+        report = SoakReport(0, 0, 0.0)
+        window_start = start
+        ops = errors = 0
+        p50, p99 = P2Quantile(0.5), P2Quantile(0.99)
+        try:
+            while True:
+                now = clock.perf_counter()
+                if now - window_start >= interval or now - start >= duration:
+                    elapsed = now - window_start
+                    gc.collect()
+                    sample = SoakSample(
+                        now - start,
+                        ops,
+                        errors,
+                        ops / elapsed if elapsed > 0 else 0.0,
+                        p50.value(),
+                        p99.value(),
+                        current_rss(),
+                        len(gc.get_objects()),
+                    )
+                    report.samples.append(sample)
+                    if on_sample is not None:
+                        on_sample(sample)
+                    report.operations += ops
+                    report.errors += errors
+                    ops = errors = 0
+                    p50, p99 = P2Quantile(0.5), P2Quantile(0.99)
+                    window_start = clock.perf_counter()
+                    if now - start >= duration:
+                        break
+
+                began = clock.perf_counter()
+                ok = self._step()
+                rtt = clock.perf_counter() - began
+                p50.add(rtt)
+                p99.add(rtt)
+                ops += 1
+                if not ok:
+                    errors += 1
+        finally:
+            self.r485.target = target
+        report.duration = clock.perf_counter() - start
+        report.failures = self.check(report)
+        return report
+
+    def check(self, report: SoakReport) -> List[str]:
+        """閾値を超えた項目
+
+        最初と最後の区間を比べます (区間が 2 つ未満の場合はエラー率のみ)。
+
+        Args:
+            report (SoakReport): 結果
+
+        Returns:
+            List[str]: 失敗の説明 (空なら合格)
+        """
+        t = self.thresholds
+        failures = []
+        if report.error_rate > t.max_error_rate:
+            failures.append(
+                f"error rate {report.error_rate:.4f} exceeds {t.max_error_rate:.4f}"
+            )
+        # 最後の区間は duration の端数で短いことがあるので、完全な区間どうしを比べる
+        samples = report.samples[:-1] if len(report.samples) > 2 else report.samples
+        if len(samples) < 2:
+            return failures
+        first, last = samples[0], samples[-1]
+        growth = last.rss - first.rss
+        if growth > t.max_rss_growth:
+            failures.append(f"RSS grew by {growth / (1 << 20):.1f} MiB")
+        if first.objects and (last.objects - first.objects) / first.objects > (
+            t.max_object_growth
+        ):
+            failures.append(f"objects grew from {first.objects} to {last.objects}")
+        if first.throughput and 1 - last.throughput / first.throughput > (
+            t.max_throughput_drop
+        ):
+            failures.append(
+                f"throughput dropped from {first.throughput:.1f} "
+                f"to {last.throughput:.1f} ops/s"
+            )
+        return failures
@@ -0,0 +1,314 @@
+"""デバイスごとのマルチレート・テレメトリスケジューラ
+
+(デバイスID, リードバックコマンド) ごとに周期を設定し、ボーレートから求めた
+バスのバイト予算に収まるようにリクエストを織り交ぜて送信します。
+"""
+
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .clock import SYSTEM_CLOCK, Clock
+from .errors import DeviceUnavailableError
+from .roller485_protocol import Roller485Protocol as Proto
+from .timing import BITS_PER_BYTE, exchange_bytes
+from .util import Roller485Util
+
+# トークンバケットの上限 (リードバック 4 往復分)
+_BURST_BYTES = 4 * max(exchange_bytes(c) for c in Roller485Util._READBACKS)
+
+
+@dataclass
+class Sample:
+    """テレメトリの 1 サンプル
+
+    Attributes:
+        device_id (int): デバイスID
+        command (Proto.CommandCode): リードバックコマンド
+        timestamp (float): 受信時刻 (clock.time())
+        data (dict): 読み取った状態 (CRC8 不一致の場合は空)
+    """
+
+    device_id: int
+    command: Proto.CommandCode
+    timestamp: float
+    data: dict
+
+
+@dataclass
+class CapacityReport:
+    """要求レートとバス容量の比較
+
+    Attributes:
+        demand (float): 周期タスクが要求するバイト数 [bytes/s]
+        capacity (float): テレメトリに使えるバイト数 [bytes/s] (headroom 適用後)
+        utilization (float): demand / capacity
+        overloaded (bool): 要求レートが容量を超えているかどうか
+    """
+
+    demand: float
+    capacity: float
+    utilization: float
+    overloaded: bool
+
+
+class _Task:
+    __slots__ = ("device_id", "command", "period", "next_due", "samples", "late")
+
+    def __init__(self, device_id: int, command: Proto.CommandCode, period, now):
+        self.device_id = device_id
+        self.command = command
+        self.period: Optional[float] = period
+        self.next_due: Optional[float] = now
+        self.samples = 0
+        self.late = 0
+
+
+class TelemetryScheduler:
+    """デバイスごとのマルチレート・テレメトリスケジューラ
+
+    period=None のタスクは最初に 1 回だけ読み出し、以降は invalidate() されたときだけ
+    読み出します (PID や RGB の設定変更時など)。
+    期限の早いタスクから順に送信し、トークンバケットでバイト予算を超えないように
+    送信を待たせます。周期タスクの要求がバス容量を超えると on_overload が呼ばれます。
+
+    Examples:
+        >>> sched = TelemetryScheduler(r485, on_sample=print)
+        >>> sched.add(0, Proto.CommandCode.motor_status_readback, period=0.01)
+        >>> sched.add(0, Proto.CommandCode.other_status_readback, period=1.0)
+        >>> sched.add(0, Proto.CommandCode.readback_2, period=None)
+        >>> sched.start()
+    """
+
+    def __init__(
+        self,
+        r485: Roller485Util,
+        on_sample: Optional[Callable[[Sample], None]] = None,
+        on_overload: Optional[Callable[[CapacityReport], None]] = None,
+        baudrate: Optional[int] = None,
+        headroom: float = 0.8,
+        clock: Clock = SYSTEM_CLOCK,
+    ):
+        """
+        Args:
+            r485 (Roller485Util): リードバックに使うクライアント
+            on_sample (Optional[Callable[[Sample], None]], optional): サンプル受信時の
+                コールバック. Defaults to None.
+            on_overload (Optional[Callable[[CapacityReport], None]], optional): 要求レートが
+                容量を超えたときのコールバック. Defaults to None.
+            baudrate (Optional[int], optional): バスのボーレート. None の場合は
+                r485.baudrate. Defaults to None.
+            headroom (float, optional): テレメトリに使うバス時間の割合 (0〜1).
+                Defaults to 0.8.
+            clock (Clock, optional): 周期の計測と待ちに使う時計 (r485.clock と同じものを
+                渡す). Defaults to SYSTEM_CLOCK.
+        """
+        self.r485 = r485
+        self.clock = clock
+        self.on_sample = on_sample
+        self.on_overload = on_overload
+        self.baudrate = r485.baudrate if baudrate is None else baudrate
+        self.headroom = headroom
+        self.latest: Dict[Tuple[int, Proto.CommandCode], Sample] = {}
+        self._tasks: Dict[Tuple[int, Proto.CommandCode], _Task] = {}
+        self._lock = threading.Lock()
+        self._tokens = float(_BURST_BYTES)
+        self._refilled_at = clock.monotonic()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def bytes_per_second(self) -> float:
+        """テレメトリに使えるバイト数 [bytes/s]"""
+        return self.baudrate / BITS_PER_BYTE * self.headroom
+
+    def add(
+        self, device_id: int, command: Proto.CommandCode, period: Optional[float]
+    ) -> CapacityReport:
+        """タスクを追加 (既存のタスクは周期を更新)
+
+        Args:
+            device_id (int): デバイスID
+            command (Proto.CommandCode): リードバックコマンド (0x40〜0x43)
+            period (Optional[float]): 周期 [秒]. None の場合は変更時のみ
+
+        Returns:
+            CapacityReport: 追加後の容量の見積もり
+        """
+        if command not in Roller485Util._READBACKS:
+            raise ValueError(f"{command!r} is not a readback command")
+        if period is not None and period <= 0:
+            raise ValueError("period must be positive")
+        with self._lock:
+            self._tasks[(device_id, command)] = _Task(
+                device_id, command, period, self.clock.monotonic()
+            )
+        report = self.capacity()
+        if report.overloaded and self.on_overload is not None:
+            self.on_overload(report)
+        return report
+
+    def remove(self, device_id: int, command: Proto.CommandCode) -> None:
+        """タスクを削除
+
+        Args:
+            device_id (int): デバイスID
+            command (Proto.CommandCode): リードバックコマンド
+        """
+        with self._lock:
+            self._tasks.pop((device_id, command), None)
+
+    def invalidate(
+        self, device_id: int, command: Optional[Proto.CommandCode] = None
+    ) -> None:
+        """タスクを次の機会に読み出す
+
+        period=None のタスクはこれを呼んだときだけ再読み出しされます。
+
+        Args:
+            device_id (int): デバイスID
+            command (Optional[Proto.CommandCode], optional): リードバックコマンド.
+                None の場合はそのデバイスのすべてのタスク. Defaults to None.
+        """
+        now = self.clock.monotonic()
+        with self._lock:
+            for task in self._tasks.values():
+                if task.device_id == device_id and command in (None, task.command):
+                    task.next_due = now
+
+    def capacity(self) -> CapacityReport:
+        """周期タスクの要求レートとバス容量を比較
+
+        Returns:
+            CapacityReport: 容量の見積もり
+        """
+        with self._lock:
+            demand = sum(
+                exchange_bytes(t.command) / t.period
+                for t in self._tasks.values()
+                if t.period is not None
+            )
+        capacity = self.bytes_per_second
+        utilization = demand / capacity if capacity else float("inf")
+        return CapacityReport(demand, capacity, utilization, utilization > 1.0)
+
+    def stats(self) -> List[dict]:
+        """タスクごとのサンプル数と遅延回数
+
+        Returns:
+            List[dict]: device_id, command, period, samples, late
+        """
+        with self._lock:
+            return [
+                {
+                    "device_id": t.device_id,
+                    "command": t.command.name,
+                    "period": t.period,
+                    "samples": t.samples,
+                    "late": t.late,
+                }
+                for t in self._tasks.values()
+            ]
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(
+            _BURST_BYTES,
+            self._tokens + (now - self._refilled_at) * self.bytes_per_second,
+        )
+        self._refilled_at = now
+
+    def next_wakeup(self) -> Optional[float]:
+        """次のタスクの期限 (clock.monotonic()). タスクがなければ None"""
+        with self._lock:
+            dues = [t.next_due for t in self._tasks.values() if t.next_due is not None]
+        return min(dues) if dues else None
+
+    def step(self) -> Optional[Sample]:
+        """期限を過ぎたタスクを 1 つ実行
+
+        期限の最も早いタスクを選び、バイト予算が足りれば読み出します。
+
+        Returns:
+            Optional[Sample]: 読み出したサンプル. 実行しなかった場合は None
+        """
+        now = self.clock.monotonic()
+        with self._lock:
+            due = [
+                t
+                for t in self._tasks.values()
+                if t.next_due is not None and t.next_due <= now
+            ]
+            if not due:
+                return None
+            task = min(due, key=lambda t: now if t.next_due is None else t.next_due)
+            self._refill(now)
+            cost = exchange_bytes(task.command)
+            if self._tokens < cost:
+                return None
+            self._tokens -= cost
+
+            due_at = now if task.next_due is None else task.next_due
+            if task.period is None:
+                task.next_due = None
+            else:
+                if now - due_at > task.period:
+                    task.late += 1
+                # 遅れた分は取り戻さず、現在時刻から次の周期を数える
+                task.next_due = max(due_at + task.period, now)
+            task.samples += 1
+
+        try:
+            data = self.r485.readback(
+                task.command, device_id=task.device_id, delay=False
+            )
+        except DeviceUnavailableError:
+            # ブレーカーが Open のデバイスは読み取り失敗として扱う
+            data = {}
+        sample = Sample(task.device_id, task.command, self.clock.time(), data)
+        self.latest[(task.device_id, task.command)] = sample
+        if self.on_sample is not None:
+            self.on_sample(sample)
+        return sample
+
+    def run(self, duration: Optional[float] = None) -> None:
+        """タスクを実行し続ける
+
+        Args:
+            duration (Optional[float], optional): 実行時間 [秒]. None の場合は
+                stop() が呼ばれるまで. Defaults to None.
+        """
+        clock = self.clock
+        end = None if duration is None else clock.monotonic() + duration
+        while not self._stop.is_set():
+            now = clock.monotonic()
+            if end is not None and now >= end:
+                return
+            if self.step() is not None:
+                continue
+            wakeup = self.next_wakeup()
+            if wakeup is None or wakeup <= now:
+                # 予算待ち: 最小のリクエスト 1 往復分だけ待つ
+                wait = min(exchange_bytes(c) for c in Roller485Util._READBACKS)
+                wait_s = wait / self.bytes_per_second
+            else:
+                wait_s = wakeup - now
+            if end is not None:
+                wait_s = min(wait_s, end - now)
+            clock.wait(self._stop, wait_s)
+
+    def start(self) -> None:
+        """バックグラウンドスレッドで run() を開始"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self.run, name="roller485-telemetry", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """バックグラウンドスレッドを停止"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,271 @@
+"""バスのタイミングモデルと容量計画
+
+ボーレートとフレーム長から、リクエスト/レスポンス 1 往復のワイヤ時間と、
+デバイス数とポーリングレートに対するバスの使用率を見積もります。
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .roller485_protocol import Roller485Protocol as Proto
+from .util import Roller485Util
+
+# 1 バイトあたりのビット数 (スタート 1 + データ 8 + ストップ 1)
+BITS_PER_BYTE = 10
+
+
+def response_command(command: Proto.CommandCode) -> Proto.CommandCode:
+    """リクエストのコマンドに対応するレスポンスのコマンド
+
+    Args:
+        command (Proto.CommandCode): リクエストのコマンド
+
+    Returns:
+        Proto.CommandCode: レスポンスのコマンド (コマンドコード + 0x10)
+    """
+    return Proto.CommandCode(command.value | 0x10)
+
+
+def request_commands() -> List[Proto.CommandCode]:
+    """すべてのリクエストのコマンド"""
+    return [c for c in Proto.CommandCode if not c.value & 0x10]
+
+
+def exchange_bytes(command: Proto.CommandCode) -> int:
+    """1 往復でバスに流れるバイト数
+
+    Args:
+        command (Proto.CommandCode): リクエストのコマンド
+
+    Returns:
+        int: リクエストとレスポンスの合計バイト数
+    """
+    return Roller485Util.get_packet_length(
+        command.value
+    ) + Roller485Util.get_packet_length(response_command(command).value)
+
+
+class BusTiming:
+    """ボーレートからフレームのワイヤ時間を計算するタイミングモデル
+
+    1 往復の時間 = リクエストのワイヤ時間 + デバイスの応答時間 (turnaround)
+    + レスポンスのワイヤ時間 + ホスト側の待ち時間 (host_delay) + 送信方向の切り替え (host_gap)
+
+    host_delay には同期 API の _delay() (0.05 秒) を、delay=False の経路では 0 を指定します。
+    """
+
+    def __init__(
+        self,
+        baudrate: int = 115200,
+        turnaround: float = 0.001,
+        host_gap: float = 0.0002,
+        host_delay: float = 0.0,
+        bits_per_byte: int = BITS_PER_BYTE,
+    ):
+        """
+        Args:
+            baudrate (int, optional): ボーレート. Defaults to 115200.
+            turnaround (float, optional): リクエスト受信完了から応答開始までの時間 [秒].
+                Defaults to 0.001.
+            host_gap (float, optional): レスポンス受信から次の送信までの時間 [秒].
+                Defaults to 0.0002.
+            host_delay (float, optional): リクエスト送信後にホストが待つ固定時間 [秒].
+                Defaults to 0.0.
+            bits_per_byte (int, optional): 1 バイトあたりのビット数. Defaults to 10.
+        """
+        self.baudrate = baudrate
+        self.turnaround = turnaround
+        self.host_gap = host_gap
+        self.host_delay = host_delay
+        self.bits_per_byte = bits_per_byte
+
+    @property
+    def byte_time(self) -> float:
+        """1 バイトのワイヤ時間 [秒]"""
+        return self.bits_per_byte / self.baudrate
+
+    def frame_time(self, command: Proto.CommandCode) -> float:
+        """フレーム 1 つのワイヤ時間 [秒]
+
+        Args:
+            command (Proto.CommandCode): フレームのコマンド
+
+        Returns:
+            float: ワイヤ時間
+        """
+        return Roller485Util.get_packet_length(command.value) * self.byte_time
+
+    def exchange_time(self, command: Proto.CommandCode) -> float:
+        """リクエスト/レスポンス 1 往復の時間 [秒]
+
+        Args:
+            command (Proto.CommandCode): リクエストのコマンド
+
+        Returns:
+            float: 1 往復の時間
+        """
+        wait = max(self.turnaround, self.host_delay)
+        return (
+            self.frame_time(command)
+            + wait
+            + self.frame_time(response_command(command))
+            + self.host_gap
+        )
+
+    def max_rate(self, command: Proto.CommandCode) -> float:
+        """1 種類のコマンドだけを送り続けた場合の最大往復数 [回/秒]"""
+        return 1.0 / self.exchange_time(command)
+
+    def table(self) -> List[dict]:
+        """すべてのリクエストのコマンドのタイミング表
+
+        Returns:
+            List[dict]: command, request_bytes, response_bytes, exchange_time, max_rate
+        """
+        return [
+            {
+                "command": c.name,
+                "request_bytes": Roller485Util.get_packet_length(c.value),
+                "response_bytes": Roller485Util.get_packet_length(
+                    response_command(c).value
+                ),
+                "exchange_time": self.exchange_time(c),
+                "max_rate": self.max_rate(c),
+            }
+            for c in request_commands()
+        ]
+
+
+@dataclass
+class PlanEntry:
+    """計画の 1 行 (全デバイス分)
+
+    Attributes:
+        command (Proto.CommandCode): リクエストのコマンド
+        rate (float): デバイスあたりの要求レート [回/秒]
+        devices (int): デバイス数
+        exchange_time (float): 1 往復の時間 [秒]
+        utilization (float): このコマンドが占めるバス時間の割合
+    """
+
+    command: Proto.CommandCode
+    rate: float
+    devices: int
+    exchange_time: float
+    utilization: float
+
+
+@dataclass
+class Plan:
+    """容量計画の結果
+
+    Attributes:
+        entries (List[PlanEntry]): コマンドごとの内訳
+        utilization (float): バス使用率の合計 (1.0 で飽和)
+        max_scale (float): すべてのレートを何倍まで上げられるか (1 / utilization)
+        max_devices (int): 同じ構成で載せられる最大デバイス数
+    """
+
+    entries: List[PlanEntry] = field(default_factory=list)
+    utilization: float = 0.0
+    max_scale: float = float("inf")
+    max_devices: int = 0
+
+    @property
+    def feasible(self) -> bool:
+        """要求レートをバスが運べるかどうか"""
+        return self.utilization <= 1.0
+
+    def format(self) -> str:
+        """表形式の文字列"""
+        lines = [
+            f"{'command':<24} {'devices':>7} {'rate[Hz]':>9} "
+            f"{'exchange[ms]':>12} {'util[%]':>8}"
+        ]
+        for e in self.entries:
+            lines.append(
+                f"{e.command.name:<24} {e.devices:>7} {e.rate:>9.2f} "
+                f"{e.exchange_time * 1000:>12.3f} {e.utilization * 100:>8.2f}"
+            )
+        lines.append(f"total utilization: {self.utilization * 100:.2f}%")
+        lines.append(f"max rate scale: x{self.max_scale:.2f}")
+        lines.append(f"max devices: {self.max_devices}")
+        lines.append("feasible" if self.feasible else "OVERLOADED")
+        return "\n".join(lines)
+
+
+class CapacityPlanner:
+    """デバイス数とポーリングレートからバス使用率を見積もる
+
+    Examples:
+        >>> planner = CapacityPlanner(BusTiming(115200))
+        >>> plan = planner.plan(
+        ...     devices=8,
+        ...     rates={Proto.CommandCode.motor_status_readback: 100},
+        ... )
+        >>> print(plan.format())
+    """
+
+    def __init__(self, timing: Optional[BusTiming] = None):
+        """
+        Args:
+            timing (Optional[BusTiming], optional): タイミングモデル.
+                None の場合は 115200 baud の既定値. Defaults to None.
+        """
+        self.timing = BusTiming() if timing is None else timing
+
+    def plan(
+        self,
+        devices: int,
+        rates: Dict[Proto.CommandCode, float],
+    ) -> Plan:
+        """全デバイスが同じレートでポーリングする場合の計画
+
+        Args:
+            devices (int): デバイス数
+            rates (Dict[Proto.CommandCode, float]): コマンドごとのデバイスあたりのレート [Hz]
+
+        Returns:
+            Plan: 計画
+        """
+        return self.plan_per_device(
+            (device_id, command, rate)
+            for device_id in range(devices)
+            for command, rate in rates.items()
+        )
+
+    def plan_per_device(
+        self, polls: Iterable[Tuple[int, Proto.CommandCode, float]]
+    ) -> Plan:
+        """デバイスごとにレートが異なる場合の計画
+
+        Args:
+            polls (Iterable[Tuple[int, Proto.CommandCode, float]]):
+                (デバイスID, コマンド, レート [Hz]) の並び
+
+        Returns:
+            Plan: 計画
+        """
+        by_command: Dict[Proto.CommandCode, List[float]] = {}
+        device_ids = set()
+        for device_id, command, rate in polls:
+            by_command.setdefault(command, []).append(rate)
+            device_ids.add(device_id)
+
+        plan = Plan()
+        for command, rates in by_command.items():
+            exchange = self.timing.exchange_time(command)
+            plan.entries.append(
+                PlanEntry(
+                    command=command,
+                    rate=sum(rates) / len(rates),
+                    devices=len(rates),
+                    exchange_time=exchange,
+                    utilization=sum(rates) * exchange,
+                )
+            )
+        plan.utilization = sum(e.utilization for e in plan.entries)
+        if plan.utilization > 0:
+            plan.max_scale = 1.0 / plan.utilization
+            plan.max_devices = int(len(device_ids) * plan.max_scale)
+        return plan
@@ -0,0 +1,210 @@
+"""往復の各フェーズのトレース
+
+Roller485Util.tracer に Tracer を設定すると、リクエストごとに
+encode (Kaitai でのフレーム構築)、write、delay (固定またはプロファイルの待ち時間)、
+wait (レスポンスの受信待ち)、decode (パースと検証) の各フェーズを
+perf_counter_ns で記録します。記録は上限付きのバッファに保持され、
+Chrome のトレースイベント形式 (chrome://tracing、Perfetto) で書き出せます。
+"""
+
+import json
+import os
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, List
+
+from .clock import SYSTEM_CLOCK, Clock
+from .roller485_protocol import Roller485Protocol as Proto
+
+# 各リクエストで記録するフェーズ (exchange は write〜wait を囲む)
+PHASES = ("encode", "exchange", "write", "delay", "wait", "decode")
+
+
+@dataclass
+class Span:
+    """1 フェーズの記録"""
+
+    name: str
+    start_ns: int
+    end_ns: int
+    device_id: int
+    command: int
+    thread_id: int
+
+    @property
+    def duration_ns(self) -> int:
+        return self.end_ns - self.start_ns
+
+
+class _SpanContext:
+    __slots__ = ("tracer", "name", "device_id", "command", "start")
+
+    def __init__(self, tracer: "Tracer", name: str, device_id: int, command: int):
+        self.tracer = tracer
+        self.name = name
+        self.device_id = device_id
+        self.command = command
+
+    def __enter__(self) -> None:
+        self.start = self.tracer.clock.perf_counter_ns()
+
+    def __exit__(self, *exc) -> None:
+        self.tracer.add(
+            self.name,
+            self.start,
+            self.tracer.clock.perf_counter_ns(),
+            self.device_id,
+            self.command,
+        )
+
+
+class Tracer:
+    """フェーズの記録を保持し、Chrome のトレースイベント形式で書き出す
+
+    Examples:
+        >>> r485.tracer = Tracer(capacity=100_000)
+        >>> r485.get_motor_status()
+        >>> r485.tracer.export_chrome("roller485.trace.json")
+    """
+
+    def __init__(self, capacity: int = 100_000, clock: Clock = SYSTEM_CLOCK):
+        """
+        Args:
+            capacity (int, optional): 保持するフェーズ数の上限。超えると古いものから
+                捨てる. Defaults to 100_000.
+            clock (Clock, optional): 時刻の取得に使う時計 (r485.clock と同じものを渡す).
+                Defaults to SYSTEM_CLOCK.
+        """
+        self.clock = clock
+        self.spans: Deque[Span] = deque(maxlen=capacity)
+        self.recorded = 0
+        self._lock = threading.Lock()
+        # Chrome のタイムスタンプの原点 (perf_counter_ns)
+        self.origin_ns = clock.perf_counter_ns()
+
+    @property
+    def dropped(self) -> int:
+        """容量を超えて捨てたフェーズ数"""
+        return self.recorded - len(self.spans)
+
+    def add(
+        self, name: str, start_ns: int, end_ns: int, device_id: int, command: int
+    ) -> None:
+        """フェーズを記録
+
+        Args:
+            name (str): フェーズ名
+            start_ns (int): 開始時刻 (perf_counter_ns)
+            end_ns (int): 終了時刻 (perf_counter_ns)
+            device_id (int): デバイスID
+            command (int): リクエストのコマンドコード
+        """
+        span = Span(name, start_ns, end_ns, device_id, command, threading.get_ident())
+        with self._lock:
+            self.spans.append(span)
+            self.recorded += 1
+
+    def span(self, name: str, device_id: int, command: int) -> _SpanContext:
+        """with 文で囲んだ区間をフェーズとして記録
+
+        Args:
+            name (str): フェーズ名
+            device_id (int): デバイスID
+            command (int): リクエストのコマンドコード
+
+        Returns:
+            _SpanContext: コンテキストマネージャ
+        """
+        return _SpanContext(self, name, device_id, command)
+
+    def clear(self) -> None:
+        """記録を破棄"""
+        with self._lock:
+            self.spans.clear()
+            self.recorded = 0
+
+    def snapshot(self) -> List[Span]:
+        """記録のコピー"""
+        with self._lock:
+            return list(self.spans)
+
+    def to_chrome(self) -> dict:
+        """Chrome のトレースイベント形式 (JSON Object Format)
+
+        デバイスごとに 1 行 (tid) になり、各フェーズは完了イベント (ph="X") です。
+
+        Returns:
+            dict: traceEvents を持つ dict
+        """
+        spans = self.snapshot()
+        pid = os.getpid()
+        events: List[dict] = [
+            {
+                "name": "process_name",
+                "ph": "M",
+                "pid": pid,
+                "args": {"name": "roller485 bus"},
+            }
+        ]
+        for device_id in sorted({s.device_id for s in spans}):
+            events.append(
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": pid,
+                    "tid": device_id,
+                    "args": {"name": f"device {device_id}"},
+                }
+            )
+        for s in spans:
+            events.append(
+                {
+                    "name": s.name,
+                    "cat": _command_name(s.command),
+                    "ph": "X",
+                    "ts": (s.start_ns - self.origin_ns) / 1000,
+                    "dur": s.duration_ns / 1000,
+                    "pid": pid,
+                    "tid": s.device_id,
+                    "args": {
+                        "command": _command_name(s.command),
+                        "thread": s.thread_id,
+                    },
+                }
+            )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export_chrome(self, path: str) -> None:
+        """Chrome のトレースイベント形式で書き出す
+
+        Args:
+            path (str): 出力先
+        """
+        with open(path, "w") as f:
+            json.dump(self.to_chrome(), f)
+
+
+def _command_name(command: int) -> str:
+    try:
+        return Proto.CommandCode(command).name
+    except ValueError:
+        return f"0x{command:02X}"
+
+
+def phase_summary(spans: List[Span]) -> dict:
+    """フェーズごとの件数・合計・最大 [ns]
+
+    Args:
+        spans (List[Span]): 記録
+
+    Returns:
+        dict: フェーズ名 → {"count", "total_ns", "max_ns"}
+    """
+    summary: dict = {}
+    for s in spans:
+        entry = summary.setdefault(s.name, {"count": 0, "total_ns": 0, "max_ns": 0})
+        entry["count"] += 1
+        entry["total_ns"] += s.duration_ns
+        entry["max_ns"] = max(entry["max_ns"], s.duration_ns)
+    return summary
@@ -1,17 +1,174 @@
+import contextlib
 import io
-import time
+import threading
+from collections import deque
+from dataclasses import dataclass, field
 from enum import IntEnum
+from typing import (
+    Any,
+    Callable,
+    ContextManager,
+    Deque,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+)
 
 import serial.rs485 as rs
 from kaitaistruct import KaitaiStream
 
+from .breaker import BreakerState
+from .capture import RX, TX
+from .clock import SYSTEM_CLOCK, Clock
+from .errors import EXCHANGE_ERRORS, DeviceUnavailableError
 from .roller485_protocol import Roller485Protocol as Proto
 
+# tracer が未設定のときに使う何もしないコンテキストマネージャ
+_NO_SPAN = contextlib.nullcontext()
+
+
+@dataclass
+class PendingEcho:
+    """fire-and-forget モードで検証待ちのエコー
+
+    Attributes:
+        command (Proto.CommandCode): 期待するレスポンスのコマンド
+        data1 (int): 期待するデータ1
+        data2 (int): 期待するデータ2
+        data3 (int): 期待するデータ3
+        sent_at (float): リクエストを送信した時刻 (clock.monotonic())
+        deadline (Optional[float]): この時刻までに届かなければ "timeout" とする
+            (clock.monotonic())。None では期限なし
+    """
+
+    command: Proto.CommandCode
+    data1: int = 0
+    data2: int = 0
+    data3: int = 0
+    sent_at: float = 0.0
+    deadline: Optional[float] = None
+
+
+@dataclass
+class FullStatus:
+    """get_full_status() の結果
+
+    読み出さなかったセクション、または CRC8 不一致のセクションは空の dict になります。
+
+    Attributes:
+        timestamp (float): 最初のリクエストを送信した時刻 (time.time())
+        duration (float): すべてのセクションを読み出すのにかかった時間 [秒]
+        motor (dict): get_motor_status() と同じ内容
+        other (dict): get_other_status() と同じ内容
+        speed_pid_rgb (dict): get_speed_pid_and_rgb() と同じ内容
+        position_pid_other (dict): get_position_pid_and_other() と同じ内容
+    """
+
+    SECTIONS = ("motor", "other", "speed_pid_rgb", "position_pid_other")
+
+    timestamp: float
+    duration: float = 0.0
+    motor: dict = field(default_factory=dict)
+    other: dict = field(default_factory=dict)
+    speed_pid_rgb: dict = field(default_factory=dict)
+    position_pid_other: dict = field(default_factory=dict)
+
+    def as_dict(self) -> dict:
+        """JSON に変換できる dict を返す"""
+        return {
+            "timestamp": self.timestamp,
+            "duration": self.duration,
+            **{name: getattr(self, name) for name in self.SECTIONS},
+        }
+
 
 class Roller485Util(rs.RS485):
-    def __init__(self, target: int = 0, *args, **kwargs):
+    def __init__(self, target: int = 0, *args, transport=None, **kwargs):
+        """
+        Args:
+            target (int, optional): 宛先のデバイスID. Defaults to 0.
+            transport (optional): シリアルポートの代わりに使う送受信先
+                (write() / read() / in_waiting / reset_input_buffer() /
+                reset_output_buffer() / flush() / timeout を持つオブジェクト).
+                None の場合はこのインスタンス自身 (pyserial) を使う. Defaults to None.
+            *args, **kwargs: serial.rs485.RS485 の引数
+        """
         super().__init__(*args, **kwargs)
         self.target = target
+        self._transport = self if transport is None else transport
+        self._port_lock = threading.RLock()
+        self._circuit_breakers: Optional[Any] = None
+        self._capture: Optional[Any] = None
+        self.clock = SYSTEM_CLOCK
+
+        # デバイスIDごとの応答時間プロファイル (roller485.latency.LatencyProfile)
+        self.latency_profiles: Dict[int, Any] = {}
+        # 往復時間の分布から学習する受信タイムアウト (roller485.latency.AdaptiveTimeouts)
+        self.adaptive_timeouts: Optional[Any] = None
+        # 失敗したリクエストのリトライ (roller485.retry.RetryPolicy)
+        self.retry_policy: Optional[Any] = None
+        # コマンドごとの計測 (roller485.metrics.MetricsRegistry)
+        self.metrics: Optional[Any] = None
+        # 往復の各フェーズのトレース (roller485.tracing.Tracer)
+        self.tracer: Optional[Any] = None
+        # リードバックに成功するたびに (device_id, command, data) で呼ばれる
+        self.readback_observers: List[
+            Callable[[int, Proto.CommandCode, dict], None]
+        ] = []
+
+        # fire-and-forget モード (セットポイントのエコーを後から検証する)
+        self.fire_and_forget = False
+        self.echo_fallback_threshold = 3
+        self.echo_queue_limit = 32
+        self.on_echo_failure: Optional[Callable[[PendingEcho, str], None]] = None
+        self.echo_verified = 0
+        self.echo_failures = 0
+        self.echo_consecutive_failures = 0
+        self._pending_echoes: Deque[PendingEcho] = deque()
+
+    @property
+    def clock(self) -> Clock:
+        """時刻の取得と待ち (roller485.clock.VirtualClock でシミュレーションを高速化)
+
+        設定した clock は circuit_breakers と capture にも渡されます。
+        """
+        return self._clock
+
+    @clock.setter
+    def clock(self, clock: Clock) -> None:
+        self._clock = clock
+        for component in (self._circuit_breakers, self._capture):
+            if component is not None:
+                component.clock = clock
+
+    @property
+    def circuit_breakers(self) -> Optional[Any]:
+        """デバイスごとのサーキットブレーカー (roller485.breaker.CircuitBreakers)
+
+        設定すると、このインスタンスの clock で時刻を取得するようになります。
+        """
+        return self._circuit_breakers
+
+    @circuit_breakers.setter
+    def circuit_breakers(self, breakers: Optional[Any]) -> None:
+        if breakers is not None:
+            breakers.clock = self._clock
+        self._circuit_breakers = breakers
+
+    @property
+    def capture(self) -> Optional[Any]:
+        """送受信フレームのキャプチャ (roller485.capture.CaptureWriter)
+
+        設定すると、このインスタンスの clock で時刻を取得するようになります。
+        """
+        return self._capture
+
+    @capture.setter
+    def capture(self, capture: Optional[Any]) -> None:
+        if capture is not None:
+            capture.clock = self._clock
+        self._capture = capture
 
     @classmethod
     def calculate_crc8(cls, data: bytes) -> int:
@@ -101,25 +258,325 @@ class Roller485Util(rs.RS485):
 
     def _delay(self):
         """内部処理のウェイト"""
-        time.sleep(0.05)
+        self.clock.sleep(0.05)
 
-    def _setting(
-        self, command: Proto.CommandCode, data1: int, data2: int = 0, data3: int = 0
-    ) -> None:
-        """設定コマンドを送信
+    def _write_frame(self, frame: bytes) -> None:
+        """フレームを送信
+
+        Args:
+            frame (bytes): 送信するフレーム
+        """
+        self._transport.write(frame)
+        if self.capture is not None:
+            self.capture.record(TX, frame, self.clock.monotonic_ns())
+
+    def _read_frame(self, length: int) -> bytes:
+        """フレームを受信
+
+        Args:
+            length (int): 受信するバイト数
+
+        Returns:
+            bytes: 受信したバイト列 (タイムアウト時は length より短い)
+        """
+        msg = self._transport.read(length)
+        if msg and self.capture is not None:
+            self.capture.record(RX, msg, self.clock.monotonic_ns())
+        return msg
+
+    def _set_read_timeout(self, timeout: Optional[float]) -> None:
+        """受信タイムアウトを変更 (同じ値なら何もしない)
+
+        Args:
+            timeout (Optional[float]): タイムアウト [秒]
+        """
+        if self._transport.timeout != timeout:
+            self._transport.timeout = timeout
+
+    def _span(
+        self, name: str, command: Proto.CommandCode, device_id: Optional[int] = None
+    ) -> ContextManager:
+        """tracer が設定されていれば、with 文で囲んだ区間をフェーズとして記録
+
+        Args:
+            name (str): フェーズ名 ("encode", "decode")
+            command (Proto.CommandCode): リクエストのコマンド
+            device_id (Optional[int], optional): デバイスID. None の場合は target.
+
+        Returns:
+            ContextManager: コンテキストマネージャ
+        """
+        if self.tracer is None:
+            return _NO_SPAN
+        return self.tracer.span(
+            name, self.target if device_id is None else device_id, command
+        )
+
+    def _exchange(
+        self, frame: bytes, resp_command: Proto.CommandCode, delay: bool = True
+    ) -> bytes:
+        """リクエストを送信してレスポンスを受信
+
+        retry_policy が設定されていれば、タイムアウト・CRC エラー・エコーの不一致で
+        失敗した冪等なリクエストを、受信バッファを捨ててから送り直します。
+
+        Args:
+            frame (bytes): 送信するフレーム
+            resp_command (Proto.CommandCode): 期待するレスポンスのコマンド
+            delay (bool, optional): False の場合は _delay() を挟まず、
+                タイムアウトまでレスポンスの到着を待つ. Defaults to True.
+
+        Returns:
+            bytes: 受信したレスポンス (raise_errors=False でリトライしても失敗した場合は
+                最後に受信したもの)
+
+        Raises:
+            DeviceUnavailableError: 宛先デバイスのブレーカーが Open
+            ExchangeError: retry_policy.raise_errors が True で、リトライしても失敗した
+        """
+        policy = self.retry_policy
+        if policy is None:
+            return self._attempt(frame, resp_command, delay)
+
+        attempts = policy.attempts_for(frame[0])
+        error: Optional[str] = None
+        with self._port_lock:
+            for attempt in range(1, attempts + 1):
+                msg = self._attempt(frame, resp_command, delay)
+                error = self._response_error(frame, msg, resp_command)
+                if error is None:
+                    return msg
+                if attempt < attempts:
+                    if self.metrics is not None:
+                        self.metrics.record_retry(frame[1], frame[0])
+                    # 遅れて届くレスポンスを待ってから受信バッファを捨てる
+                    self.clock.sleep(policy.backoff_time(attempt))
+                    self._transport.reset_input_buffer()
+        if policy.raise_errors and error is not None:
+            raise EXCHANGE_ERRORS[error](frame[1], frame[0], attempts)
+        return msg
+
+    def _response_error(
+        self, frame: bytes, msg: bytes, resp_command: Proto.CommandCode
+    ) -> Optional[str]:
+        """レスポンスがリクエストに対応しているか検証
+
+        Args:
+            frame (bytes): 送信したフレーム
+            msg (bytes): 受信したレスポンス
+            resp_command (Proto.CommandCode): 期待するレスポンスのコマンド
+
+        Returns:
+            Optional[str]: 失敗理由 ("timeout", "crc", "mismatch")。成功時は None
+        """
+        length = self.get_packet_length(resp_command.value)
+        error = self._frame_error(msg, length)
+        if error is not None:
+            return error
+        if msg[2] != resp_command:
+            return "mismatch"
+        # 設定コマンドはデータ1〜3がそのままエコーされる
+        if length == 17 and msg[4:16] != frame[2:14]:
+            return "mismatch"
+        return None
+
+    def _attempt(
+        self, frame: bytes, resp_command: Proto.CommandCode, delay: bool = True
+    ) -> bytes:
+        """リクエストを 1 回送信してレスポンスを受信
+
+        circuit_breakers が設定されていれば、宛先デバイスのブレーカーを確認してから送信し、
+        結果を記録します。
+
+        Args:
+            frame (bytes): 送信するフレーム
+            resp_command (Proto.CommandCode): 期待するレスポンスのコマンド
+            delay (bool, optional): False の場合は _delay() を挟まず、
+                タイムアウトまでレスポンスの到着を待つ. Defaults to True.
+
+        Returns:
+            bytes: 受信したレスポンス
+
+        Raises:
+            DeviceUnavailableError: 宛先デバイスのブレーカーが Open
+        """
+        breakers = self.circuit_breakers
+        if breakers is None:
+            return self._transfer(frame, resp_command, delay)
+
+        breaker = breakers[frame[1]]
+        with self._port_lock:
+            self._admit(breaker)
+            msg = self._transfer(frame, resp_command, delay)
+            breaker.record(
+                self._frame_error(msg, self.get_packet_length(resp_command.value))
+            )
+        return msg
+
+    def _admit(self, breaker) -> None:
+        """ブレーカーが Open ならプローブし、復帰しなければ例外を送出
+
+        Args:
+            breaker (CircuitBreaker): 宛先デバイスのブレーカー
+
+        Raises:
+            DeviceUnavailableError: ブレーカーが Open のまま
+        """
+        if breaker.state is BreakerState.Closed:
+            return
+        if breaker.probe_due() and self.probe_device(breaker.device_id):
+            return
+        breaker.counters.rejected += 1
+        raise DeviceUnavailableError(breaker.device_id)
+
+    def probe_device(self, device_id: int) -> bool:
+        """リードバックを 1 回送ってデバイスが応答するか確認
+
+        circuit_breakers が設定されていれば、結果をブレーカーに記録します。
+
+        Args:
+            device_id (int): デバイスID
+
+        Returns:
+            bool: 正しいレスポンスが返ったかどうか
+        """
+        command = Proto.CommandCode.motor_status_readback
+        resp_command = Proto.CommandCode.motor_status_readback_resp
+        with self._port_lock:
+            breaker = None
+            if self.circuit_breakers is not None:
+                breaker = self.circuit_breakers[device_id]
+                breaker.begin_probe()
+            msg = self._transfer(
+                self._build_readback(command, device_id=device_id), resp_command
+            )
+            error = self._frame_error(msg, self.get_packet_length(resp_command.value))
+            if breaker is not None:
+                breaker.record(error)
+        return error is None
+
+    def _frame_error(self, msg: bytes, length: int) -> Optional[str]:
+        """受信したフレームの長さと CRC8 を検証
+
+        Args:
+            msg (bytes): 受信したレスポンス
+            length (int): 期待する長さ
+
+        Returns:
+            Optional[str]: 失敗理由 ("timeout", "crc")。成功時は None
+        """
+        if len(msg) < length:
+            return "timeout"
+        if msg[:2] != b"\xaa\x55" or self.calculate_crc8(msg[2:-1]) != msg[-1]:
+            return "crc"
+        return None
+
+    def _transfer(
+        self, frame: bytes, resp_command: Proto.CommandCode, delay: bool = True
+    ) -> bytes:
+        """リクエストを送信してレスポンスを受信 (ブレーカーなし)
+
+        fire-and-forget モードで保留中のエコーがあれば、先にすべて検証してから送信します。
+
+        Args:
+            frame (bytes): 送信するフレーム
+            resp_command (Proto.CommandCode): 期待するレスポンスのコマンド
+            delay (bool, optional): False の場合は _delay() を挟まず、
+                タイムアウトまでレスポンスの到着を待つ. Defaults to True.
+
+        Returns:
+            bytes: 受信したレスポンス
+        """
+        length = self.get_packet_length(resp_command.value)
+        with self._port_lock:
+            self.poll_echoes(block=True)
+            profile = self.latency_profiles.get(frame[1])
+            adaptive = self.adaptive_timeouts
+            metrics = self.metrics
+            tracer = self.tracer
+            if (
+                profile is None
+                and adaptive is None
+                and metrics is None
+                and tracer is None
+            ):
+                self._write_frame(frame)
+                if delay:
+                    self._delay()
+                return self._read_frame(length)
+
+            # 応答時間プロファイルから待ち時間を、学習した分布からタイムアウトを決める
+            if adaptive is not None:
+                self._set_read_timeout(adaptive.timeout(frame[1], frame[0], delay))
+            elif profile is not None:
+                self._set_read_timeout(profile.timeout(frame[0]))
+            clock = self.clock
+            start = clock.perf_counter_ns()
+            self._write_frame(frame)
+            written = clock.perf_counter_ns()
+            # プロファイルの待ち時間の間にレスポンスが揃っていれば、往復時間は待ち時間そのもの
+            buffered = False
+            if delay:
+                if profile is not None:
+                    clock.sleep(profile.wait_time(frame[0]))
+                    buffered = self._transport.in_waiting >= length
+                else:
+                    self._delay()
+            waited = clock.perf_counter_ns()
+            msg = self._read_frame(length)
+            end = clock.perf_counter_ns()
+            rtt = (end - start) / 1e9
+            if tracer is not None:
+                tracer.add("exchange", start, end, frame[1], frame[0])
+                tracer.add("write", start, written, frame[1], frame[0])
+                if delay:
+                    tracer.add("delay", written, waited, frame[1], frame[0])
+                tracer.add("wait", waited, end, frame[1], frame[0])
+            if len(msg) == length:
+                if profile is not None and not buffered:
+                    profile.observe(frame[0], rtt)
+                if adaptive is not None:
+                    # タイムアウトが効くのは read() だけなので、受信の区間を経路ごとに学習する
+                    adaptive.observe(frame[1], frame[0], (end - waited) / 1e9, delay)
+            elif adaptive is not None:
+                adaptive.observe_timeout(frame[1], frame[0], delay)
+            if metrics is not None:
+                metrics.record(
+                    frame[1],
+                    frame[0],
+                    len(frame),
+                    len(msg),
+                    rtt,
+                    self._response_error(frame, msg, resp_command),
+                )
+            return msg
+
+    def _build_setting(
+        self,
+        command: Proto.CommandCode,
+        data1: int,
+        data2: int = 0,
+        data3: int = 0,
+        device_id: Optional[int] = None,
+    ) -> bytes:
+        """設定コマンドのフレームを構築
 
         Args:
             command (Proto.CommandCode): 設定するコマンド
             data1 (int): データ1
             data2 (int, optional): データ2. Defaults to 0.
             data3 (int, optional): データ3. Defaults to 0.
+            device_id (Optional[int], optional): 宛先のデバイスID. None の場合は target.
+
+        Returns:
+            bytes: CRC8 付きのフレーム
         """
         length = self.get_packet_length(command.value)
         _io = KaitaiStream(io.BytesIO(bytes(length)))
 
         prot = Proto(_io)
         prot.first_byte = command
-        prot.device_id = self.target
+        prot.device_id = self.target if device_id is None else device_id
         prot.crc8 = 0  # 後で正しい値を計算
 
         payload = Proto.ConfigPayload(None, prot, prot._root)
@@ -134,8 +591,55 @@ class Roller485Util(rs.RS485):
         prot._write()
 
         self.replace_crc8(prot)
-        output = _io.to_byte_array()
-        self.write(output)
+        return _io.to_byte_array()
+
+    def _setting(
+        self, command: Proto.CommandCode, data1: int, data2: int = 0, data3: int = 0
+    ) -> None:
+        """設定コマンドを送信
+
+        Args:
+            command (Proto.CommandCode): 設定するコマンド
+            data1 (int): データ1
+            data2 (int, optional): データ2. Defaults to 0.
+            data3 (int, optional): データ3. Defaults to 0.
+        """
+        self._write_frame(self._build_setting(command, data1, data2, data3))
+
+    def _echo_error(
+        self,
+        msg: bytes,
+        command: Proto.CommandCode,
+        data1: int = 0,
+        data2: int = 0,
+        data3: int = 0,
+    ) -> Optional[str]:
+        """設定コマンドのレスポンスを検証
+
+        Args:
+            msg (bytes): 受信したレスポンス
+            command (Proto.CommandCode): 設定したコマンド
+            data1 (int, optional): データ1. Defaults to 0.
+            data2 (int, optional): データ2. Defaults to 0.
+            data3 (int, optional): データ3. Defaults to 0.
+
+        Returns:
+            Optional[str]: 失敗理由 ("timeout", "crc", "mismatch")。成功時は None
+        """
+        if len(msg) < self.get_packet_length(command.value):
+            return "timeout"
+        resp = Proto(KaitaiStream(io.BytesIO(msg)))
+        resp._read()
+        crc8 = self.calculate_crc8(msg[2:-1])
+        if crc8 != resp.crc8:
+            return "crc"
+        if (
+            resp.payload.data1 != data1
+            or resp.payload.data2 != data2
+            or resp.payload.data3 != data3
+        ):
+            return "mismatch"
+        return None
 
     def _setting_resp(
         self, command: Proto.CommandCode, data1: int = 0, data2: int = 0, data3: int = 0
@@ -151,17 +655,208 @@ class Roller485Util(rs.RS485):
         Returns:
             bool: レスポンスが期待通りかどうか
         """
-        msg = self.read(self.get_packet_length(command.value))
-        resp = Proto(KaitaiStream(io.BytesIO(msg)))
-        resp._read()
-        crc8 = self.calculate_crc8(msg[2:-1])
-        if crc8 != resp.crc8:
-            return False
-        return (
-            resp.payload.data1 == data1
-            and resp.payload.data2 == data2
-            and resp.payload.data3 == data3
-        )
+        msg = self._read_frame(self.get_packet_length(command.value))
+        return self._echo_error(msg, command, data1, data2, data3) is None
+
+    def _configure(
+        self,
+        command: Proto.CommandCode,
+        resp_command: Proto.CommandCode,
+        data1: int,
+        data2: int = 0,
+        data3: int = 0,
+    ) -> bool:
+        """設定コマンドを送信し、エコーを同期的に検証
+
+        Args:
+            command (Proto.CommandCode): 設定するコマンド
+            resp_command (Proto.CommandCode): 期待するレスポンスのコマンド
+            data1 (int): データ1
+            data2 (int, optional): データ2. Defaults to 0.
+            data3 (int, optional): データ3. Defaults to 0.
+
+        Returns:
+            bool: コマンドが成功したかどうか
+        """
+        with self._span("encode", command):
+            frame = self._build_setting(command, data1, data2, data3)
+        msg = self._exchange(frame, resp_command)
+        with self._span("decode", command):
+            return self._echo_error(msg, resp_command, data1, data2, data3) is None
+
+    def _setpoint(
+        self,
+        command: Proto.CommandCode,
+        resp_command: Proto.CommandCode,
+        data1: int,
+        data2: int = 0,
+        data3: int = 0,
+    ) -> bool:
+        """制御セットポイントを送信
+
+        fire-and-forget モードでは書き込み直後に True を返し、エコーは
+        poll_echoes() で後から検証されます。
+
+        Args:
+            command (Proto.CommandCode): 設定するコマンド
+            resp_command (Proto.CommandCode): 期待するレスポンスのコマンド
+            data1 (int): データ1
+            data2 (int, optional): データ2. Defaults to 0.
+            data3 (int, optional): データ3. Defaults to 0.
+
+        Returns:
+            bool: コマンドが成功したかどうか (fire-and-forget モードでは常に True)
+        """
+        if not self.fire_and_forget:
+            return self._configure(command, resp_command, data1, data2, data3)
+
+        with self._span("encode", command):
+            frame = self._build_setting(command, data1, data2, data3)
+        with self._port_lock:
+            if self.circuit_breakers is not None:
+                self._admit(self.circuit_breakers[self.target])
+            # 受信済みのエコーだけを検証し、残りは次の機会に回す
+            self.poll_echoes(block=False)
+            if (
+                not self.fire_and_forget
+                or len(self._pending_echoes) >= self.echo_queue_limit
+            ):
+                # 検証失敗が続いて同期検証に戻った、または検証待ちが上限に達した
+                return self._configure(command, resp_command, data1, data2, data3)
+            self._write_frame(frame)
+            sent_at = self.clock.monotonic()
+            timeout = self._echo_timeout(frame, resp_command)
+            self._pending_echoes.append(
+                PendingEcho(
+                    resp_command,
+                    data1,
+                    data2,
+                    data3,
+                    sent_at,
+                    None if timeout is None else sent_at + timeout,
+                )
+            )
+        return True
+
+    def _echo_timeout(
+        self, frame: bytes, resp_command: Proto.CommandCode
+    ) -> Optional[float]:
+        """fire-and-forget のエコーを待つ時間 (往復のワイヤ時間 + 受信タイムアウト) [秒]
+
+        Args:
+            frame (bytes): 送信したフレーム
+            resp_command (Proto.CommandCode): 期待するレスポンスのコマンド
+
+        Returns:
+            Optional[float]: 待つ時間. 受信タイムアウトが None の場合は None
+        """
+        profile = self.latency_profiles.get(frame[1])
+        if profile is not None:
+            timeout = profile.timeout(frame[0])
+            baudrate = profile.baudrate
+        else:
+            timeout = self._transport.timeout
+            baudrate = self.baudrate
+        if timeout is None:
+            return None
+        length = len(frame) + self.get_packet_length(resp_command.value)
+        return length * 10 / baudrate + timeout
+
+    def set_fire_and_forget(
+        self,
+        enabled: bool,
+        on_failure: Optional[Callable[[PendingEcho, str], None]] = None,
+        fallback_threshold: int = 3,
+        max_pending: int = 32,
+    ) -> None:
+        """fire-and-forget モードの設定
+
+        有効にすると set_speed_and_max_current()、set_position_and_max_current()、
+        set_current() は書き込み直後に戻り、エコーは次の通信時または
+        poll_echoes() の呼び出し時に検証されます。
+        エコーの検証に fallback_threshold 回連続で失敗すると同期検証に戻ります。
+        往復のワイヤ時間と受信タイムアウトを過ぎても届かないエコーは "timeout" になり、
+        検証待ちが max_pending 件に達している間は同期検証で送信します。
+
+        半二重のバスでは、エコーの送信中に次のフレームを書き込むと衝突するため、
+        セットポイントの送信間隔はエコーのワイヤ時間より長くしてください。
+
+        Args:
+            enabled (bool): True で有効、False で無効 (保留中のエコーは検証される)
+            on_failure (Optional[Callable[[PendingEcho, str], None]], optional):
+                エコー検証失敗時のコールバック. 失敗理由は "timeout", "crc", "mismatch"
+            fallback_threshold (int, optional): 同期検証に戻る連続失敗回数. Defaults to 3.
+            max_pending (int, optional): 検証待ちのエコーの上限. Defaults to 32.
+        """
+        with self._port_lock:
+            if not enabled:
+                self.poll_echoes(block=True)
+            self.fire_and_forget = enabled
+            self.on_echo_failure = on_failure
+            self.echo_fallback_threshold = fallback_threshold
+            self.echo_queue_limit = max_pending
+            self.echo_consecutive_failures = 0
+
+    @property
+    def pending_echoes(self) -> int:
+        """検証待ちのエコー数"""
+        return len(self._pending_echoes)
+
+    def poll_echoes(self, block: bool = False) -> int:
+        """保留中のエコーを検証
+
+        Args:
+            block (bool, optional): True ですべてのエコーを受信するまで待つ。
+                False では受信バッファに届いているエコーだけを検証する. Defaults to False.
+                どちらの場合も、期限を過ぎて届いていないエコーは待たずに "timeout" になる.
+
+        Returns:
+            int: 検証したエコー数
+        """
+        checked = 0
+        with self._port_lock:
+            while self._pending_echoes:
+                echo = self._pending_echoes[0]
+                length = self.get_packet_length(echo.command.value)
+                expired = (
+                    echo.deadline is not None
+                    and self.clock.monotonic() >= echo.deadline
+                )
+                if (expired or not block) and self._transport.in_waiting < length:
+                    if not expired:
+                        break
+                    # 期限を過ぎても届かないエコーは待たずに timeout とする
+                    self._pending_echoes.popleft()
+                    self._record_echo(echo, "timeout")
+                    checked += 1
+                    continue
+                self._pending_echoes.popleft()
+                msg = self._read_frame(length)
+                error = self._echo_error(
+                    msg, echo.command, echo.data1, echo.data2, echo.data3
+                )
+                self._record_echo(echo, error)
+                checked += 1
+        return checked
+
+    def _record_echo(self, echo: PendingEcho, error: Optional[str]) -> None:
+        """エコー検証結果を記録し、失敗が続けば同期検証に戻す
+
+        Args:
+            echo (PendingEcho): 検証したエコー
+            error (Optional[str]): 失敗理由。成功時は None
+        """
+        self.echo_verified += 1
+        if error is None:
+            self.echo_consecutive_failures = 0
+            return
+
+        self.echo_failures += 1
+        self.echo_consecutive_failures += 1
+        if self.on_echo_failure is not None:
+            self.on_echo_failure(echo, error)
+        if self.echo_consecutive_failures >= self.echo_fallback_threshold:
+            self.fire_and_forget = False
 
     class Switch(IntEnum):
         Off = 0
@@ -176,10 +871,10 @@ class Roller485Util(rs.RS485):
         Returns:
             bool: コマンドが成功したかどうか
         """
-        self._setting(Proto.CommandCode.motor_switch, data1=state.value)
-        self._delay()
-        return self._setting_resp(
-            Proto.CommandCode.motor_switch_resp, data1=state.value
+        return self._configure(
+            Proto.CommandCode.motor_switch,
+            Proto.CommandCode.motor_switch_resp,
+            data1=state.value,
         )
 
     class MotorMode(IntEnum):
@@ -199,9 +894,11 @@ class Roller485Util(rs.RS485):
         Returns:
             bool: コマンドが成功したかどうか
         """
-        self._setting(Proto.CommandCode.mode_setting, data1=mode.value)
-        self._delay()
-        return self._setting_resp(Proto.CommandCode.mode_setting_resp, data1=mode.value)
+        return self._configure(
+            Proto.CommandCode.mode_setting,
+            Proto.CommandCode.mode_setting_resp,
+            data1=mode.value,
+        )
 
     def remove_protection(self, state: int = 1) -> bool:
         """保護解除
@@ -213,10 +910,11 @@ class Roller485Util(rs.RS485):
             bool: コマンドが成功したかどうか
         """
         state = max(0, min(255, state))
-        self._setting(Proto.CommandCode.remove_protection, data1=0, data2=state)
-        self._delay()
-        return self._setting_resp(
-            Proto.CommandCode.remove_protection_resp, data1=0, data2=state
+        return self._configure(
+            Proto.CommandCode.remove_protection,
+            Proto.CommandCode.remove_protection_resp,
+            data1=0,
+            data2=state,
         )
 
     def save_to_flash(self) -> bool:
@@ -225,9 +923,11 @@ class Roller485Util(rs.RS485):
         Returns:
             bool: コマンドが成功したかどうか
         """
-        self._setting(Proto.CommandCode.save_to_flash, data1=1)
-        self._delay()
-        return self._setting_resp(Proto.CommandCode.save_to_flash_resp, data1=1)
+        return self._configure(
+            Proto.CommandCode.save_to_flash,
+            Proto.CommandCode.save_to_flash_resp,
+            data1=1,
+        )
 
     def set_encoder(self, value: int) -> bool:
         """エンコーダの設定
@@ -238,9 +938,9 @@ class Roller485Util(rs.RS485):
         Returns:
             bool: コマンドが成功したかどうか
         """
-        self._setting(Proto.CommandCode.encoder, data1=value)
-        self._delay()
-        return self._setting_resp(Proto.CommandCode.encoder_resp, data1=value)
+        return self._configure(
+            Proto.CommandCode.encoder, Proto.CommandCode.encoder_resp, data1=value
+        )
 
     class ButtonMode(IntEnum):
         Off = 0
@@ -255,10 +955,10 @@ class Roller485Util(rs.RS485):
         Returns:
             bool: コマンドが成功したかどうか
         """
-        self._setting(Proto.CommandCode.button_switch_mode, data1=mode.value)
-        self._delay()
-        return self._setting_resp(
-            Proto.CommandCode.button_switch_mode_resp, data1=mode.value
+        return self._configure(
+            Proto.CommandCode.button_switch_mode,
+            Proto.CommandCode.button_switch_mode_resp,
+            data1=mode.value,
         )
 
     def rgb_led_control(
@@ -291,10 +991,11 @@ class Roller485Util(rs.RS485):
         brightness = max(0, min(100, brightness))
         data1 = r + g * 256 + b * 256 * 256 + mode * 256 * 256 * 256
         data2 = brightness
-        self._setting(Proto.CommandCode.rgb_led_control, data1=data1, data2=data2)
-        self._delay()
-        return self._setting_resp(
-            Proto.CommandCode.rgb_led_control_resp, data1=data1, data2=data2
+        return self._configure(
+            Proto.CommandCode.rgb_led_control,
+            Proto.CommandCode.rgb_led_control_resp,
+            data1=data1,
+            data2=data2,
         )
 
     class RS485BaudRate(IntEnum):
@@ -313,10 +1014,10 @@ class Roller485Util(rs.RS485):
         Returns:
             bool: コマンドが成功したかどうか
         """
-        self._setting(Proto.CommandCode.rs485_baud_rate, data1=baud_rate.value)
-        self._delay()
-        return self._setting_resp(
-            Proto.CommandCode.rs485_baud_rate_resp, data1=baud_rate.value
+        return self._configure(
+            Proto.CommandCode.rs485_baud_rate,
+            Proto.CommandCode.rs485_baud_rate_resp,
+            data1=baud_rate.value,
         )
 
     def set_device_id(self, device_id: int) -> bool:
@@ -331,9 +1032,11 @@ class Roller485Util(rs.RS485):
             bool: コマンドが成功したかどうか
         """
         device_id = max(0, min(255, device_id))
-        self._setting(Proto.CommandCode.device_id, data1=device_id)
-        self._delay()
-        return self._setting_resp(Proto.CommandCode.device_id_resp, data1=device_id)
+        return self._configure(
+            Proto.CommandCode.device_id,
+            Proto.CommandCode.device_id_resp,
+            data1=device_id,
+        )
 
     def set_motor_jam_protection(self, enable: bool) -> bool:
         """モータジャム保護の設定
@@ -345,10 +1048,10 @@ class Roller485Util(rs.RS485):
             bool: コマンドが成功したかどうか
         """
         flag = 1 if enable else 0
-        self._setting(Proto.CommandCode.motor_jam_protection, data1=flag)
-        self._delay()
-        return self._setting_resp(
-            Proto.CommandCode.motor_jam_protection_resp, data1=flag
+        return self._configure(
+            Proto.CommandCode.motor_jam_protection,
+            Proto.CommandCode.motor_jam_protection_resp,
+            data1=flag,
         )
 
     def set_motor_position_over_range_protection(self, enable: bool) -> bool:
@@ -365,12 +1068,10 @@ class Roller485Util(rs.RS485):
             bool: コマンドが成功したかどうか
         """
         flag = 1 if enable else 0
-        self._setting(
-            Proto.CommandCode.motor_position_over_range_protection, data1=flag
-        )
-        self._delay()
-        return self._setting_resp(
-            Proto.CommandCode.motor_position_over_range_protection_resp, data1=flag
+        return self._configure(
+            Proto.CommandCode.motor_position_over_range_protection,
+            Proto.CommandCode.motor_position_over_range_protection_resp,
+            data1=flag,
         )
 
     def set_speed_and_max_current(self, speed: int, max_current: float) -> bool:
@@ -378,6 +1079,8 @@ class Roller485Util(rs.RS485):
 
         スピードモード設定
 
+        fire-and-forget モードでは書き込み直後に True を返します。
+
         Args:
             speed (int): 設定する速度 (-21000000-21000000) [RPM]
             max_current (float): 設定する最大電流 (-1200-1200) [mA]
@@ -387,11 +1090,8 @@ class Roller485Util(rs.RS485):
         """
         speed = max(-21_000_000, min(21_000_000, speed)) * 100
         max_current_int: int = int(max(-1200, min(1200, max_current))) * 100
-        self._setting(
-            Proto.CommandCode.speed_control, data1=speed, data2=max_current_int
-        )
-        self._delay()
-        return self._setting_resp(
+        return self._setpoint(
+            Proto.CommandCode.speed_control,
             Proto.CommandCode.speed_control_resp,
             data1=speed,
             data2=max_current_int,
@@ -415,11 +1115,8 @@ class Roller485Util(rs.RS485):
         int_p: int = int(p * 100_000)
         int_i: int = int(i * 100_000)
         int_d: int = int(d * 100_000)
-        self._setting(
-            Proto.CommandCode.speed_pid_config, data1=int_p, data2=int_i, data3=int_d
-        )
-        self._delay()
-        return self._setting_resp(
+        return self._configure(
+            Proto.CommandCode.speed_pid_config,
             Proto.CommandCode.speed_pid_config_resp,
             data1=int_p,
             data2=int_i,
@@ -431,6 +1128,8 @@ class Roller485Util(rs.RS485):
 
         ポジションモード設定
 
+        fire-and-forget モードでは書き込み直後に True を返します。
+
         Args:
             position (int): 設定する位置 (-21000000-21000000) [counts]
             max_current (float): 設定する最大電流 (-1200-1200) [mA]
@@ -440,13 +1139,8 @@ class Roller485Util(rs.RS485):
         """
         position = max(-21_000_000, min(21_000_000, position)) * 100
         max_current_int: int = int(max(-1200, min(1200, max_current))) * 100
-        self._setting(
+        return self._setpoint(
             Proto.CommandCode.position_control,
-            data1=position,
-            data2=max_current_int,
-        )
-        self._delay()
-        return self._setting_resp(
             Proto.CommandCode.position_control_resp,
             data1=position,
             data2=max_current_int,
@@ -470,11 +1164,8 @@ class Roller485Util(rs.RS485):
         int_p: int = int(p * 100_000)
         int_i: int = int(i * 100_000)
         int_d: int = int(d * 100_000)
-        self._setting(
-            Proto.CommandCode.position_pid_config, data1=int_p, data2=int_i, data3=int_d
-        )
-        self._delay()
-        return self._setting_resp(
+        return self._configure(
+            Proto.CommandCode.position_pid_config,
             Proto.CommandCode.position_pid_config_resp,
             data1=int_p,
             data2=int_i,
@@ -486,6 +1177,8 @@ class Roller485Util(rs.RS485):
 
         電流モード設定
 
+        fire-and-forget モードでは書き込み直後に True を返します。
+
         Args:
             current (float): 設定する電流 (-1200-1200) [mA]
 
@@ -493,25 +1186,34 @@ class Roller485Util(rs.RS485):
             bool: コマンドが成功したかどうか
         """
         current_int: int = int(max(-1200, min(1200, current)) * 100)
-        self._setting(Proto.CommandCode.current_control, data1=current_int)
-        self._delay()
-        return self._setting_resp(
-            Proto.CommandCode.current_control_resp, data1=current_int
+        return self._setpoint(
+            Proto.CommandCode.current_control,
+            Proto.CommandCode.current_control_resp,
+            data1=current_int,
         )
 
-    def _send_readback(self, command: Proto.CommandCode, read_flag: int = 0) -> None:
-        """リードバックコマンドを送信
+    def _build_readback(
+        self,
+        command: Proto.CommandCode,
+        read_flag: int = 0,
+        device_id: Optional[int] = None,
+    ) -> bytes:
+        """リードバックコマンドのフレームを構築
 
         Args:
             command (Proto.CommandCode): 送信するコマンド
             read_flag (int, optional): リードフラグ。0のみ
+            device_id (Optional[int], optional): 宛先のデバイスID. None の場合は target.
+
+        Returns:
+            bytes: CRC8 付きのフレーム
         """
         length = self.get_packet_length(command.value)
         _io = KaitaiStream(io.BytesIO(bytes(length)))
 
         prot = Proto(_io)
         prot.first_byte = command
-        prot.device_id = self.target
+        prot.device_id = self.target if device_id is None else device_id
         prot.crc8 = 0  # 後で正しい値を計算
 
         payload = Proto.ReadbackReq(None, prot, prot._root)
@@ -524,25 +1226,38 @@ class Roller485Util(rs.RS485):
         prot._write()
 
         self.replace_crc8(prot)
-        output = _io.to_byte_array()
-        self.write(output)
+        return _io.to_byte_array()
 
-    def get_motor_status(self) -> dict:
-        """モータの状態を読み取り
+    def _read_response(self, msg: bytes, command: Proto.CommandCode) -> Optional[Proto]:
+        """レスポンスをパースし、長さと CRC8 を検証
+
+        Args:
+            msg (bytes): 受信したレスポンス
+            command (Proto.CommandCode): 期待するレスポンスのコマンド
 
         Returns:
-            dict: モータの状態
+            Optional[Proto]: パース結果。長さ不足または CRC8 不一致の場合は None
         """
-        self._send_readback(Proto.CommandCode.motor_status_readback)
-        self._delay()
-
-        msg = self.read(
-            self.get_packet_length(Proto.CommandCode.motor_status_readback_resp.value)
-        )
+        if len(msg) < self.get_packet_length(command.value):
+            return None
         resp = Proto(KaitaiStream(io.BytesIO(msg)))
         resp._read()
         crc8 = self.calculate_crc8(msg[2:-1])
         if crc8 != resp.crc8:
+            return None
+        return resp
+
+    def _parse_motor_status(self, msg: bytes) -> dict:
+        """motor_status_readback_resp をパース
+
+        Args:
+            msg (bytes): 受信したレスポンス
+
+        Returns:
+            dict: モータの状態 (CRC8 不一致の場合は空)
+        """
+        resp = self._read_response(msg, Proto.CommandCode.motor_status_readback_resp)
+        if resp is None:
             return {}
         return {
             "speed": resp.payload.speed / 100,
@@ -553,22 +1268,17 @@ class Roller485Util(rs.RS485):
             "error": resp.payload.error,
         }
 
-    def get_other_status(self) -> dict:
-        """その他の状態を読み取り
+    def _parse_other_status(self, msg: bytes) -> dict:
+        """other_status_readback_resp をパース
+
+        Args:
+            msg (bytes): 受信したレスポンス
 
         Returns:
-            dict: その他の状態
+            dict: その他の状態 (CRC8 不一致の場合は空)
         """
-        self._send_readback(Proto.CommandCode.other_status_readback)
-        self._delay()
-
-        msg = self.read(
-            self.get_packet_length(Proto.CommandCode.other_status_readback_resp.value)
-        )
-        resp = Proto(KaitaiStream(io.BytesIO(msg)))
-        resp._read()
-        crc8 = self.calculate_crc8(msg[2:-1])
-        if crc8 != resp.crc8:
+        resp = self._read_response(msg, Proto.CommandCode.other_status_readback_resp)
+        if resp is None:
             return {}
         return {
             "vin": resp.payload.vin_x100 / 100,
@@ -578,20 +1288,17 @@ class Roller485Util(rs.RS485):
             "rgb_brightness": resp.payload.rgb_brightness,
         }
 
-    def get_speed_pid_and_rgb(self) -> dict:
-        """PIDとRGBの状態を読み取り
+    def _parse_speed_pid_and_rgb(self, msg: bytes) -> dict:
+        """readback_2_resp をパース
+
+        Args:
+            msg (bytes): 受信したレスポンス
 
         Returns:
-            dict: PIDとRGBの状態
+            dict: PIDとRGBの状態 (CRC8 不一致の場合は空)
         """
-        self._send_readback(Proto.CommandCode.readback_2)
-        self._delay()
-
-        msg = self.read(self.get_packet_length(Proto.CommandCode.readback_2_resp.value))
-        resp = Proto(KaitaiStream(io.BytesIO(msg)))
-        resp._read()
-        crc8 = self.calculate_crc8(msg[2:-1])
-        if crc8 != resp.crc8:
+        resp = self._read_response(msg, Proto.CommandCode.readback_2_resp)
+        if resp is None:
             return {}
         return {
             "speed_p": resp.payload.speed_p / 100_000,
@@ -602,20 +1309,17 @@ class Roller485Util(rs.RS485):
             "rgb_r": resp.payload.rgb_r,
         }
 
-    def get_position_pid_and_other(self) -> dict:
-        """位置とIDの状態を読み取り
+    def _parse_position_pid_and_other(self, msg: bytes) -> dict:
+        """readback_3_resp をパース
+
+        Args:
+            msg (bytes): 受信したレスポンス
 
         Returns:
-            dict: 位置とIDの状態
+            dict: 位置とIDの状態 (CRC8 不一致の場合は空)
         """
-        self._send_readback(Proto.CommandCode.readback_3)
-        self._delay()
-
-        msg = self.read(self.get_packet_length(Proto.CommandCode.readback_3_resp.value))
-        resp = Proto(KaitaiStream(io.BytesIO(msg)))
-        resp._read()
-        crc8 = self.calculate_crc8(msg[2:-1])
-        if crc8 != resp.crc8:
+        resp = self._read_response(msg, Proto.CommandCode.readback_3_resp)
+        if resp is None:
             return {}
         return {
             "position_p": resp.payload.position_p / 100_000,
@@ -626,16 +1330,133 @@ class Roller485Util(rs.RS485):
             "button_switch_mode": resp.payload.button_switch_mode,
         }
 
-    def _send_read_i2c(
+    def get_motor_status(self) -> dict:
+        """モータの状態を読み取り
+
+        Returns:
+            dict: モータの状態
+        """
+        return self.readback(Proto.CommandCode.motor_status_readback)
+
+    def get_other_status(self) -> dict:
+        """その他の状態を読み取り
+
+        Returns:
+            dict: その他の状態
+        """
+        return self.readback(Proto.CommandCode.other_status_readback)
+
+    def get_speed_pid_and_rgb(self) -> dict:
+        """PIDとRGBの状態を読み取り
+
+        Returns:
+            dict: PIDとRGBの状態
+        """
+        return self.readback(Proto.CommandCode.readback_2)
+
+    def get_position_pid_and_other(self) -> dict:
+        """位置とIDの状態を読み取り
+
+        Returns:
+            dict: 位置とIDの状態
+        """
+        return self.readback(Proto.CommandCode.readback_3)
+
+    # リードバックコマンド → (レスポンスのコマンド, パーサー名, FullStatus のセクション名)
+    _READBACKS = {
+        Proto.CommandCode.motor_status_readback: (
+            Proto.CommandCode.motor_status_readback_resp,
+            "_parse_motor_status",
+            "motor",
+        ),
+        Proto.CommandCode.other_status_readback: (
+            Proto.CommandCode.other_status_readback_resp,
+            "_parse_other_status",
+            "other",
+        ),
+        Proto.CommandCode.readback_2: (
+            Proto.CommandCode.readback_2_resp,
+            "_parse_speed_pid_and_rgb",
+            "speed_pid_rgb",
+        ),
+        Proto.CommandCode.readback_3: (
+            Proto.CommandCode.readback_3_resp,
+            "_parse_position_pid_and_other",
+            "position_pid_other",
+        ),
+    }
+
+    def readback(
+        self,
+        command: Proto.CommandCode,
+        device_id: Optional[int] = None,
+        delay: bool = True,
+    ) -> dict:
+        """任意のリードバックコマンドで状態を読み取り
+
+        Args:
+            command (Proto.CommandCode): リードバックコマンド (0x40〜0x43)
+            device_id (Optional[int], optional): 宛先のデバイスID. None の場合は target.
+            delay (bool, optional): False の場合は _delay() を挟まない. Defaults to True.
+
+        Returns:
+            dict: 読み取った状態 (get_motor_status() 等と同じ形式)
+        """
+        if command not in self._READBACKS:
+            raise ValueError(f"{command!r} is not a readback command")
+        resp_command, parser, _ = self._READBACKS[command]
+        device = self.target if device_id is None else device_id
+        with self._span("encode", command, device):
+            frame = self._build_readback(command, device_id=device)
+        msg = self._exchange(frame, resp_command, delay)
+        with self._span("decode", command, device):
+            data = getattr(self, parser)(msg)
+        if data and self.readback_observers:
+            for observer in self.readback_observers:
+                observer(device, command, data)
+        return data
+
+    def get_full_status(self, sections: Optional[Iterable[str]] = None) -> FullStatus:
+        """4種類のリードバックをまとめて読み取り
+
+        各リードバックは _delay() を挟まずに続けて送信し、レスポンスが届き次第
+        次のリクエストを送信します。
+
+        Args:
+            sections (Optional[Iterable[str]], optional): 読み出すセクション
+                ("motor", "other", "speed_pid_rgb", "position_pid_other").
+                None の場合はすべて. Defaults to None.
+
+        Returns:
+            FullStatus: 読み出した状態
+        """
+        names = FullStatus.SECTIONS if sections is None else tuple(sections)
+        unknown = set(names) - set(FullStatus.SECTIONS)
+        if unknown:
+            raise ValueError(f"unknown sections: {sorted(unknown)}")
+
+        with self._port_lock:
+            status = FullStatus(timestamp=self.clock.time())
+            start = self.clock.perf_counter()
+            for command, (_, _, name) in self._READBACKS.items():
+                if name in names:
+                    setattr(status, name, self.readback(command, delay=False))
+            status.duration = self.clock.perf_counter() - start
+        return status
+
+    def _build_read_i2c(
         self, addr: int, reg_len: int, reg_addr: int, data_len: int
-    ) -> None:
-        """I2Cレジスタの読み取り要求を送信
+    ) -> bytes:
+        """I2Cレジスタの読み取り要求を構築
 
         Args:
             addr (int): I2Cアドレス
             reg_len (int): レジスタの長さ (0: 1byte address, 1: 2byte address)
             reg_addr (int): レジスタのアドレス
             data_len (int): 読み取るデータの長さ (0-16)
+
+        Returns:
+            bytes: CRC8 付きのフレーム
         """
         command = Proto.CommandCode.i2c_read_register
         reg_len = max(0, min(1, addr))
@@ -662,26 +1483,40 @@ class Roller485Util(rs.RS485):
         prot._write()
 
         self.replace_crc8(prot)
-        output = _io.to_byte_array()
-        self.write(output)
+        return _io.to_byte_array()
 
-    def _send_read_i2c_resp(self) -> bytes:
-        """I2Cレジスタの読み取り応答を受信
+    def _parse_i2c_read_resp(self, msg: bytes, command: Proto.CommandCode) -> bytes:
+        """I2C読み取り応答をパース
+
+        Args:
+            msg (bytes): 受信したレスポンス
+            command (Proto.CommandCode): 期待するレスポンスのコマンド
 
         Returns:
             bytes: 読み取ったデータ
         """
-        command = Proto.CommandCode.i2c_read_register_resp
-        msg = self.read(self.get_packet_length(command.value))
-        resp = Proto(KaitaiStream(io.BytesIO(msg)))
-        resp._read()
-        crc8 = self.calculate_crc8(msg[2:-1])
-        if crc8 != resp.crc8 or resp.payload.read_status != 1:
+        resp = self._read_response(msg, command)
+        if resp is None or resp.payload.read_status != 1:
             return bytes()
         length: int = resp.payload.data_length
         data: bytes = resp.payload.data
         return data[:length]
 
+    def _parse_i2c_write_resp(self, msg: bytes, command: Proto.CommandCode) -> bool:
+        """I2C書き込み応答をパース
+
+        Args:
+            msg (bytes): 受信したレスポンス
+            command (Proto.CommandCode): 期待するレスポンスのコマンド
+
+        Returns:
+            bool: 書き込み成功かどうか
+        """
+        resp = self._read_response(msg, command)
+        if resp is None or resp.payload.write_status != 1:
+            return False
+        return True
+
     def read_i2c(self, addr: int, reg_len: int, reg_addr: int, data_len: int) -> bytes:
         """I2Cレジスタの読み取り
 
@@ -694,20 +1529,26 @@ class Roller485Util(rs.RS485):
         Returns:
             bytes: 読み取ったデータ
         """
-        self._send_read_i2c(addr, reg_len, reg_addr, data_len)
-        self._delay()
-        return self._send_read_i2c_resp()
+        command = Proto.CommandCode.i2c_read_register_resp
+        with self._span("encode", Proto.CommandCode.i2c_read_register):
+            frame = self._build_read_i2c(addr, reg_len, reg_addr, data_len)
+        msg = self._exchange(frame, command)
+        with self._span("decode", Proto.CommandCode.i2c_read_register):
+            return self._parse_i2c_read_resp(msg, command)
 
-    def _send_write_i2c(
+    def _build_write_i2c(
         self, addr: int, reg_len: int, reg_addr: int, data: bytes
-    ) -> None:
-        """I2Cレジスタの書き込み要求を送信
+    ) -> bytes:
+        """I2Cレジスタの書き込み要求を構築
 
         Args:
             addr (int): I2Cアドレス
             reg_len (int): レジスタの長さ (0: 1byte address, 1: 2byte address)
             reg_addr (int): レジスタのアドレス
             data (bytes): 書き込むデータ (0-16)
+
+        Returns:
+            bytes: CRC8 付きのフレーム
         """
         command = Proto.CommandCode.i2c_write_register
         reg_len = max(0, min(1, addr))
@@ -742,23 +1583,7 @@ class Roller485Util(rs.RS485):
         prot._write()
 
         self.replace_crc8(prot)
-        output = _io.to_byte_array()
-        self.write(output)
-
-    def _send_write_i2c_resp(self) -> bool:
-        """I2Cレジスタの書き込み応答を受信
-
-        Returns:
-            bool: 書き込み成功かどうか
-        """
-        command = Proto.CommandCode.i2c_write_register_resp
-        msg = self.read(self.get_packet_length(command.value))
-        resp = Proto(KaitaiStream(io.BytesIO(msg)))
-        resp._read()
-        crc8 = self.calculate_crc8(msg[2:-1])
-        if crc8 != resp.crc8 or resp.payload.write_status != 1:
-            return False
-        return True
+        return _io.to_byte_array()
 
     def write_i2c(self, addr: int, reg_len: int, reg_addr: int, data: bytes) -> bool:
         """I2Cレジスタの書き込み
@@ -772,16 +1597,22 @@ class Roller485Util(rs.RS485):
         Returns:
             bool: 書き込み成功かどうか
         """
-        self._send_write_i2c(addr, reg_len, reg_addr, data)
-        self._delay()
-        return self._send_write_i2c_resp()
+        command = Proto.CommandCode.i2c_write_register_resp
+        with self._span("encode", Proto.CommandCode.i2c_write_register):
+            frame = self._build_write_i2c(addr, reg_len, reg_addr, data)
+        msg = self._exchange(frame, command)
+        with self._span("decode", Proto.CommandCode.i2c_write_register):
+            return self._parse_i2c_write_resp(msg, command)
 
-    def _send_read_i2c_raw(self, addr: int, data_len: int) -> None:
-        """I2Cローデータの読み取り要求を送信
+    def _build_read_i2c_raw(self, addr: int, data_len: int) -> bytes:
+        """I2Cローデータの読み取り要求を構築
 
         Args:
             addr (int): I2Cアドレス
             data_len (int): 読み取るデータの長さ (0-16)
+
+        Returns:
+            bytes: CRC8 付きのフレーム
         """
         command = Proto.CommandCode.i2c_read_raw
         data_len = max(0, min(16, data_len))
@@ -796,6 +1627,7 @@ class Roller485Util(rs.RS485):
 
         payload = Proto.I2cReadRawReq(None, prot, prot._root)
         payload.i2c_address = addr
+        payload.data_length = data_len
         payload._check()
 
         prot.payload = payload
@@ -804,25 +1636,7 @@ class Roller485Util(rs.RS485):
         prot._write()
 
         self.replace_crc8(prot)
-        output = _io.to_byte_array()
-        self.write(output)
-
-    def _send_read_i2c_raw_resp(self) -> bytes:
-        """I2Cローデータの読み取り応答を受信
-
-        Returns:
-            bytes: 読み取ったデータ
-        """
-        command = Proto.CommandCode.i2c_read_raw_resp
-        msg = self.read(self.get_packet_length(command.value))
-        resp = Proto(KaitaiStream(io.BytesIO(msg)))
-        resp._read()
-        crc8 = self.calculate_crc8(msg[2:-1])
-        if crc8 != resp.crc8 or resp.payload.read_status != 1:
-            return bytes()
-        length: int = resp.payload.data_length
-        data: bytes = resp.payload.data
-        return data[:length]
+        return _io.to_byte_array()
 
     def read_i2c_raw(self, addr: int, data_len: int) -> bytes:
         """I2Cローデータの読み取り
@@ -834,17 +1648,23 @@ class Roller485Util(rs.RS485):
         Returns:
             bytes: 読み取ったデータ
         """
-        self._send_read_i2c_raw(addr, data_len)
-        self._delay()
-        return self._send_read_i2c_raw_resp()
+        command = Proto.CommandCode.i2c_read_raw_resp
+        with self._span("encode", Proto.CommandCode.i2c_read_raw):
+            frame = self._build_read_i2c_raw(addr, data_len)
+        msg = self._exchange(frame, command)
+        with self._span("decode", Proto.CommandCode.i2c_read_raw):
+            return self._parse_i2c_read_resp(msg, command)
 
-    def _send_write_i2c_raw(self, addr: int, stop_bit: int, data: bytes) -> None:
-        """I2Cローデータの書き込み要求を送信
+    def _build_write_i2c_raw(self, addr: int, stop_bit: int, data: bytes) -> bytes:
+        """I2Cローデータの書き込み要求を構築
 
         Args:
             addr (int): I2Cアドレス
             stop_bit (int): ストップ・コンディション (0: なし, 1: あり)
             data (bytes): 書き込むデータ (0-16)
+
+        Returns:
+            bytes: CRC8 付きのフレーム
         """
         command = Proto.CommandCode.i2c_write_raw
         data_len = max(0, min(16, len(data)))
@@ -877,23 +1697,7 @@ class Roller485Util(rs.RS485):
         prot._write()
 
         self.replace_crc8(prot)
-        output = _io.to_byte_array()
-        self.write(output)
-
-    def _send_write_i2c_raw_resp(self) -> bool:
-        """I2Cローデータの書き込み応答を受信
-
-        Returns:
-            bool: 書き込み成功かどうか
-        """
-        command = Proto.CommandCode.i2c_write_raw_resp
-        msg = self.read(self.get_packet_length(command.value))
-        resp = Proto(KaitaiStream(io.BytesIO(msg)))
-        resp._read()
-        crc8 = self.calculate_crc8(msg[2:-1])
-        if crc8 != resp.crc8 or resp.payload.write_status != 1:
-            return False
-        return True
+        return _io.to_byte_array()
 
     def write_i2c_raw(self, addr: int, stop_bit: int, data: bytes) -> bool:
         """I2Cローデータの書き込み
@@ -906,6 +1710,9 @@ class Roller485Util(rs.RS485):
         Returns:
             bool: 書き込み成功かどうか
         """
-        self._send_write_i2c_raw(addr, stop_bit, data)
-        self._delay()
-        return self._send_write_i2c_raw_resp()
+        command = Proto.CommandCode.i2c_write_raw_resp
+        with self._span("encode", Proto.CommandCode.i2c_write_raw):
+            frame = self._build_write_i2c_raw(addr, stop_bit, data)
+        msg = self._exchange(frame, command)
+        with self._span("decode", Proto.CommandCode.i2c_write_raw):
+            return self._parse_i2c_write_resp(msg, command)
@@ -5,6 +5,7 @@ setup(
     version="0.1.0",
     packages=find_packages(),
     install_requires=["kaitaistruct>=0.11", "pyserial>=3.5"],
+    extras_require={"numpy": ["numpy>=1.20"]},
     author="8ga3",
     description="A Python project for Unit Roller485",
     python_requires=">=3.9",
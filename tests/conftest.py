@@ -22,6 +22,9 @@ def mock_roller() -> Roller485Util:
         r.write = MagicMock()  # type: ignore[assignment]
         r.read = MagicMock()  # type: ignore[assignment]
         r.is_open = True  # type: ignore[assignment]
+        # RS485.__init__ を通らないため、参照される設定値だけを用意する
+        r._baudrate = 115200
+        r._timeout = None
         r.flush = MagicMock()  # type: ignore[assignment]
         r.close = MagicMock()  # type: ignore[assignment]
         return r
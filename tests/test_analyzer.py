@@ -0,0 +1,116 @@
+"""TrafficAnalyzer のテスト."""
+
+from __future__ import annotations
+
+import json
+import tracemalloc
+from pathlib import Path
+
+from roller485.analyzer import TrafficAnalyzer, analyze, write_report
+from roller485.capture import RX, TX, CaptureRecord, CaptureWriter
+from roller485.emulator import VirtualRoller485
+from roller485.roller485_protocol import Roller485Protocol as Proto
+from roller485.util import Roller485Util
+
+C = Proto.CommandCode
+MS = 1_000_000
+
+
+def _frames() -> tuple[bytes, bytes]:
+    """motor_status_readback の (リクエスト, レスポンス)"""
+    bus = VirtualRoller485(device_ids=[0])
+    r485 = Roller485Util(target=0, transport=bus)
+    request = r485._build_readback(C.motor_status_readback)
+    bus.write(request)
+    return request, bus.read(20)
+
+
+class TestTrafficAnalyzer:
+    def test_pairs_requests_and_responses(self) -> None:
+        request, response = _frames()
+        analyzer = TrafficAnalyzer(baudrate=115200)
+        for i in range(100):
+            t = 1_000_000_000 + MS + i * 10 * MS
+            analyzer.feed_record(CaptureRecord(t, 0, TX, request))
+            analyzer.feed_record(CaptureRecord(t + 3 * MS, 0, RX, response))
+
+        report = analyzer.report()
+        device = report["devices"][0]
+        assert device["requests"] == 100
+        assert device["responses"] == 100
+        assert device["unanswered"] == 0
+        assert abs(device["turnaround"]["p50"] - 0.003) < 1e-6
+        assert report["retry_rate"] == 0.0
+        assert report["garbage_bytes"] == 0
+        busy = 24 * 10 / 115200
+        assert abs(report["utilization_per_second"]["peak"] - 100 * busy) < 1e-6
+        # フレーム間の無通信: リクエスト後 ≒ 3 ms - レスポンスのワイヤ時間
+        assert report["idle_gaps"]["count"] == 199
+        top = report["top_consumers"][0]
+        assert top["command"] == "motor_status_readback"
+        assert top["frames"] == 200
+
+    def test_retry_and_garbage(self) -> None:
+        request, response = _frames()
+        analyzer = TrafficAnalyzer()
+        analyzer.feed_record(CaptureRecord(0, 0, TX, request))
+        analyzer.feed_record(CaptureRecord(1 * MS, 0, RX, response[:7]))  # 途中で切れた
+        analyzer.feed_record(CaptureRecord(10 * MS, 0, TX, request))  # リトライ
+        corrupt = bytearray(response)
+        corrupt[-1] ^= 0xFF
+        analyzer.feed_record(CaptureRecord(11 * MS, 0, RX, bytes(corrupt)))
+        analyzer.feed_record(CaptureRecord(20 * MS, 0, TX, request))  # リトライ
+        analyzer.feed_record(CaptureRecord(21 * MS, 0, RX, response))
+
+        report = analyzer.report()
+        device = report["devices"][0]
+        assert device["requests"] == 3
+        assert device["responses"] == 1
+        assert device["unanswered"] == 1
+        assert device["crc_errors"] == 1
+        assert device["retries"] == 2
+        assert report["garbage_bytes"] == 7
+        assert abs(report["retry_rate"] - 2 / 3) < 1e-9
+        assert "retry 66.7%" in analyzer.format()
+
+    def test_bounded_memory(self) -> None:
+        request, response = _frames()
+        analyzer = TrafficAnalyzer()
+
+        def feed(n: int, offset: int) -> None:
+            for i in range(offset, offset + n):
+                t = i * 5 * MS
+                analyzer.feed_record(CaptureRecord(t, 0, TX, request))
+                analyzer.feed_record(CaptureRecord(t + MS, 0, RX, response))
+
+        feed(2000, 0)
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        feed(20000, 2000)
+        after = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        assert after - before < 64 * 1024
+        assert analyzer.report()["devices"][0]["responses"] == 22000
+
+
+class TestAnalyze:
+    def test_emulator_capture(self, tmp_path: Path) -> None:
+        path = str(tmp_path / "bus.cap")
+        bus = VirtualRoller485(device_ids=[0, 1])
+        r485 = Roller485Util(target=0, transport=bus)
+        r485._delay = lambda: None  # type: ignore[method-assign]
+        r485.capture = CaptureWriter(path, max_bytes=2048)
+        for _ in range(20):
+            r485.get_full_status()
+            r485.readback(C.other_status_readback, device_id=1)
+        r485.capture.close()
+
+        analyzer = analyze([path])
+        report = analyzer.report()
+        assert report["devices"][0]["responses"] == 20 * 4
+        assert report["devices"][1]["responses"] == 20
+        assert report["crc_errors"] == 0
+
+        out = tmp_path / "report.json"
+        write_report(analyzer, str(out))
+        assert json.loads(out.read_text())["frames"] == 200
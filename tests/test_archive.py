@@ -0,0 +1,146 @@
+"""TelemetryWriter / TelemetryReader のテスト."""
+
+from __future__ import annotations
+
+import random
+from pathlib import Path
+
+import pytest
+
+from roller485.archive import (
+    TelemetryReader,
+    TelemetryWriter,
+    decode_varints,
+    encode_varints,
+)
+from roller485.roller485_protocol import Roller485Protocol as Proto
+from roller485.telemetry import Sample
+
+C = Proto.CommandCode
+
+
+def _samples(n: int, devices: int = 2, t0: float = 1_700_000_000.0) -> list[Sample]:
+    """100 Hz のモータ状態と 1 Hz のその他の状態"""
+    rng = random.Random(0)
+    out = []
+    for i in range(n):
+        t = t0 + i * 0.01
+        for device_id in range(devices):
+            out.append(
+                Sample(
+                    device_id,
+                    C.motor_status_readback,
+                    t,
+                    {
+                        "speed": rng.randint(-2000, 2000) / 100,
+                        "position": (i * 37 + device_id) / 100,
+                        "current": rng.randint(0, 50000) / 100,
+                        "mode": 1,
+                        "status": 0,
+                        "error": 0,
+                    },
+                )
+            )
+            if i % 100 == 0:
+                out.append(
+                    Sample(
+                        device_id,
+                        C.other_status_readback,
+                        t,
+                        {
+                            "vin": 11.95,
+                            "temp": 31,
+                            "encoder_counter": -i,
+                            "rgb_mode": 0,
+                            "rgb_brightness": 100,
+                        },
+                    )
+                )
+    return out
+
+
+def _key(s: Sample) -> tuple:
+    return (s.device_id, s.command, round(s.timestamp, 6), tuple(s.data.items()))
+
+
+@pytest.mark.parametrize("order", [0, 1, 2])
+def test_varint_roundtrip(order: int) -> None:
+    values = [0, 1, -1, 63, -64, 2**40, -(2**40), 300, 300, 301]
+    out = bytearray(b"x")
+    encode_varints(out, values, order)
+    assert decode_varints(bytes(out), len(values), pos=1, order=order) == (
+        values,
+        len(out),
+    )
+
+
+@pytest.mark.parametrize("codec", ["none", "zlib", "lzma"])
+def test_roundtrip(tmp_path: Path, codec: str) -> None:
+    path = str(tmp_path / "t.tlm")
+    samples = _samples(1000)
+    with TelemetryWriter(path, block_size=256, codec=codec) as writer:
+        for s in samples:
+            writer.write(s)
+    assert writer.samples == len(samples)
+
+    got = list(TelemetryReader(path).samples())
+    assert sorted(map(_key, got)) == sorted(map(_key, samples))
+    # 100 Hz の単調なデータは 1 サンプルあたり数バイトに収まる
+    if codec != "none":
+        assert writer.bytes_written / len(samples) < 12
+
+
+def test_block_skipping(tmp_path: Path) -> None:
+    path = str(tmp_path / "t.tlm")
+    samples = _samples(2000)
+    with TelemetryWriter(path, block_size=100) as writer:
+        for s in samples:
+            writer.write(s)
+    reader = TelemetryReader(path)
+    blocks = list(reader.blocks())
+    assert sum(b.count for b in blocks) == len(samples)
+
+    t0 = 1_700_000_000.0
+    got = list(reader.samples(device_id=1, start=t0 + 5.0, end=t0 + 6.0))
+    assert len(got) == 100 + 1
+    assert all(s.device_id == 1 and t0 + 5.0 <= s.timestamp < t0 + 6.0 for s in got)
+    assert reader.decoded_blocks <= 4
+
+    # ブロックの最大値で読み飛ばす
+    high = list(
+        reader.samples(
+            command=C.motor_status_readback,
+            block_filter=lambda b: b.stats["position"][1] >= 70000,
+        )
+    )
+    assert high and reader.decoded_blocks < len(blocks) / 2
+
+
+def test_skips_unsupported_and_empty(tmp_path: Path) -> None:
+    path = str(tmp_path / "t.tlm")
+    with TelemetryWriter(path) as writer:
+        writer.write(Sample(0, C.readback_2, 1.0, {"speed_p": 1.0}))
+        writer.write(Sample(0, C.motor_status_readback, 1.0, {}))
+    assert writer.skipped == 2
+    assert list(TelemetryReader(path).samples()) == []
+
+
+def test_append_and_truncated_tail(tmp_path: Path) -> None:
+    path = str(tmp_path / "t.tlm")
+    samples = _samples(10, devices=1)
+    for half in (samples[:5], samples[5:]):
+        with TelemetryWriter(path) as writer:
+            for s in half:
+                writer.write(s)
+    with open(path, "ab") as f:
+        f.write(b"\x00\x40\x01")  # 書き込み途中のブロック
+    assert len(list(TelemetryReader(path).samples())) == len(samples)
+
+
+def test_invalid(tmp_path: Path) -> None:
+    with pytest.raises(ValueError):
+        TelemetryWriter(str(tmp_path / "a.tlm"), codec="zstd")
+    path = tmp_path / "b.tlm"
+    path.write_bytes(b"garbage!")
+    with pytest.raises(ValueError):
+        list(TelemetryReader(str(path)).blocks())
@@ -0,0 +1,170 @@
+"""CircuitBreakers のテスト — エミュレータでデバイスの電源断を再現."""
+
+from __future__ import annotations
+
+import pytest
+
+from roller485.breaker import BreakerState, CircuitBreaker, CircuitBreakers
+from roller485.clock import SYSTEM_CLOCK, VirtualClock
+from roller485.emulator import VirtualRoller485
+from roller485.errors import DeviceUnavailableError
+from roller485.estop import EmergencyStop
+from roller485.roller485_protocol import Roller485Protocol as Proto
+from roller485.util import Roller485Util
+
+
+@pytest.fixture()
+def clock() -> VirtualClock:
+    return VirtualClock()
+
+
+@pytest.fixture()
+def bus() -> VirtualRoller485:
+    return VirtualRoller485(device_ids=[0, 1], timeout=0.01)
+
+
+@pytest.fixture()
+def r485(bus: VirtualRoller485, clock: VirtualClock) -> Roller485Util:
+    r = Roller485Util(target=0, transport=bus)
+    r._delay = lambda: None  # type: ignore[method-assign]
+    r.clock = clock
+    r.circuit_breakers = CircuitBreakers(failure_threshold=3, probe_interval=1.0)
+    return r
+
+
+class TestCircuitBreaker:
+    def test_trips_after_consecutive_failures(self) -> None:
+        breaker = CircuitBreaker(0, failure_threshold=2)
+        breaker.record("timeout")
+        breaker.record(None)
+        breaker.record("crc")
+        assert breaker.state is BreakerState.Closed
+        breaker.record("timeout")
+        assert breaker.state is BreakerState.Open
+        assert breaker.counters.trips == 1
+        assert breaker.counters.timeouts == 2
+        assert breaker.counters.crc_failures == 1
+
+    def test_failed_probe_reopens(self, clock: VirtualClock) -> None:
+        changes = []
+        breaker = CircuitBreaker(
+            0,
+            failure_threshold=1,
+            probe_interval=1.0,
+            on_state_change=lambda *a: changes.append(a),
+            clock=clock,
+        )
+        breaker.record("timeout")
+        assert not breaker.probe_due()
+        clock.advance(1.0)
+        assert breaker.probe_due()
+
+        breaker.begin_probe()
+        breaker.record("timeout")
+        assert breaker.state is BreakerState.Open
+        assert breaker.opened_at == 1.0
+        assert changes == [
+            (0, BreakerState.Closed, BreakerState.Open),
+            (0, BreakerState.Open, BreakerState.HalfOpen),
+            (0, BreakerState.HalfOpen, BreakerState.Open),
+        ]
+
+
+class TestRoller485Breaker:
+    def _power_off(self, r485: Roller485Util, bus: VirtualRoller485) -> None:
+        bus.devices[0].online = False
+        for _ in range(3):
+            assert r485.get_motor_status() == {}
+
+    def test_uses_util_clock(self, r485: Roller485Util, clock: VirtualClock) -> None:
+        breakers = r485.circuit_breakers
+        assert breakers.clock is clock
+        assert breakers[0].clock is clock
+
+        r485.clock = SYSTEM_CLOCK
+        assert breakers.clock is SYSTEM_CLOCK
+        assert breakers[0].clock is SYSTEM_CLOCK
+
+    def test_open_device_fails_immediately(
+        self, r485: Roller485Util, bus: VirtualRoller485
+    ) -> None:
+        self._power_off(r485, bus)
+        assert r485.circuit_breakers.state(0) is BreakerState.Open
+
+        requests = bus.requests
+        with pytest.raises(DeviceUnavailableError) as excinfo:
+            r485.get_motor_status()
+        assert excinfo.value.device_id == 0
+        assert bus.requests == requests
+
+        # 他のデバイスには影響しない
+        status = r485.readback(Proto.CommandCode.motor_status_readback, device_id=1)
+        assert status
+
+    def test_setpoints_rejected(
+        self, r485: Roller485Util, bus: VirtualRoller485
+    ) -> None:
+        self._power_off(r485, bus)
+        r485.set_fire_and_forget(True)
+        with pytest.raises(DeviceUnavailableError):
+            r485.set_current(10.0)
+
+    def test_probe_restores_device(
+        self, r485: Roller485Util, bus: VirtualRoller485, clock: VirtualClock
+    ) -> None:
+        changes = []
+        r485.circuit_breakers.on_state_change = lambda *a: changes.append(a[2])
+        self._power_off(r485, bus)
+
+        clock.advance(1.0)
+        bus.devices[0].online = True
+        assert r485.get_other_status()
+        assert r485.circuit_breakers.state(0) is BreakerState.Closed
+        assert changes == [
+            BreakerState.Open,
+            BreakerState.HalfOpen,
+            BreakerState.Closed,
+        ]
+
+    def test_probe_open(
+        self, r485: Roller485Util, bus: VirtualRoller485, clock: VirtualClock
+    ) -> None:
+        self._power_off(r485, bus)
+        assert r485.circuit_breakers.probe_open(r485) == {}
+
+        clock.advance(1.0)
+        assert r485.circuit_breakers.probe_open(r485) == {0: BreakerState.Open}
+        clock.advance(1.0)
+        bus.devices[0].online = True
+        assert r485.circuit_breakers.probe_open(r485) == {0: BreakerState.Closed}
+
+        snap = r485.circuit_breakers.snapshot()[0]
+        assert snap["state"] == "closed"
+        assert snap["probes"] == 2
+        assert snap["probe_failures"] == 1
+        assert snap["trips"] == 1
+
+    def test_crc_failures_trip(
+        self, r485: Roller485Util, bus: VirtualRoller485
+    ) -> None:
+        original = bus.write
+
+        def corrupt(data: bytes) -> int:
+            n = original(data)
+            with bus._cond:
+                t, resp = bus._scheduled[-1]
+                bus._scheduled[-1] = (t, resp[:-1] + bytes([resp[-1] ^ 0xFF]))
+            return n
+
+        bus.write = corrupt  # type: ignore[method-assign]
+        for _ in range(3):
+            assert r485.get_motor_status() == {}
+        assert r485.circuit_breakers.snapshot()[0]["crc_failures"] == 3
+        assert r485.circuit_breakers.open_devices() == [0]
+
+    def test_estop_verify_reports_open_device(
+        self, r485: Roller485Util, bus: VirtualRoller485
+    ) -> None:
+        self._power_off(r485, bus)
+        result = EmergencyStop(r485, device_ids=[0, 1]).trigger(verify=True)
+        assert result.verified == {0: False, 1: True}
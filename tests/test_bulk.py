@@ -0,0 +1,131 @@
+"""bulk (NumPy 一括デコード) のテスト."""
+
+from __future__ import annotations
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from roller485.bulk import (  # noqa: E402
+    crc8_batch,
+    decode_mixed,
+    decode_status,
+    frame_array,
+    verify_crc,
+)
+from roller485.emulator import VirtualRoller485  # noqa: E402
+from roller485.latency import READBACK_COMMANDS  # noqa: E402
+from roller485.roller485_protocol import Roller485Protocol as Proto  # noqa: E402
+from roller485.util import Roller485Util  # noqa: E402
+
+C = Proto.CommandCode
+
+
+def _responses(command: Proto.CommandCode, n: int) -> tuple[list[bytes], list[dict]]:
+    """エミュレータのレスポンスと Roller485Util でパースした結果"""
+    bus = VirtualRoller485(device_ids=[0, 3])
+    r485 = Roller485Util(target=0, transport=bus)
+    frames, parsed = [], []
+    for i in range(n):
+        device = (0, 3)[i % 2]
+        bus.devices[device].switch = 1
+        bus.devices[device].speed = -1234 * i
+        bus.devices[device].position = 56789 * i
+        bus.devices[device].encoder_counter = -7 * i
+        bus.devices[device].vin_x100 = 1150 + i
+        bus.devices[device].speed_pid = (123_456 * i, 7, 1)
+        bus.write(r485._build_readback(command, device_id=device))
+        msg = bus.read(20)
+        frames.append(msg)
+        _, parser, _ = Roller485Util._READBACKS[command]
+        parsed.append(getattr(r485, parser)(msg))
+    return frames, parsed
+
+
+@pytest.mark.parametrize("command", READBACK_COMMANDS)
+def test_matches_scalar_parser(command: Proto.CommandCode) -> None:
+    frames, parsed = _responses(command, 6)
+    result = decode_status(b"".join(frames), command)
+
+    assert len(result) == 6
+    assert result.valid.all()
+    assert result.device_id.tolist() == [0, 3, 0, 3, 0, 3]
+    assert list(result.rows()) == parsed
+
+
+def test_validity_mask() -> None:
+    frames, _ = _responses(C.motor_status_readback, 3)
+    frames[1] = b"\x00" + frames[1][1:]  # マジックナンバーが壊れている
+    frames[2] = frames[2][:2] + bytes([C.other_status_readback_resp]) + frames[2][3:]
+    result = decode_status(b"".join(frames), C.motor_status_readback_resp)
+
+    assert result.valid.tolist() == [True, False, False]
+    assert len(list(result.rows())) == 1
+
+
+def test_crc_in_validity_mask() -> None:
+    frames, _ = _responses(C.motor_status_readback, 3)
+    frames[0] = frames[0][:5] + bytes([frames[0][5] ^ 0x01]) + frames[0][6:]
+    buffer = b"".join(frames)
+
+    assert decode_status(buffer, C.motor_status_readback).valid.tolist() == [
+        False,
+        True,
+        True,
+    ]
+    assert decode_status(buffer, C.motor_status_readback, check_crc=False).valid.all()
+
+
+def test_crc8_batch_matches_scalar() -> None:
+    rng = np.random.default_rng(0)
+    data = rng.integers(0, 256, size=(500, 17), dtype=np.uint8)
+    expected = [Roller485Util.calculate_crc8(bytes(row)) for row in data]
+    assert crc8_batch(data).tolist() == expected
+    expected = [Roller485Util.calculate_crc8(bytes(row[3:])) for row in data]
+    assert crc8_batch(data, start=3).tolist() == expected
+
+
+def test_verify_crc_requests_and_responses() -> None:
+    r485 = Roller485Util(target=0, transport=VirtualRoller485())
+    requests = [
+        r485._build_readback(C.motor_status_readback, device_id=i) for i in range(4)
+    ]
+    requests[2] = requests[2][:-1] + bytes([requests[2][-1] ^ 0xFF])
+    assert verify_crc(b"".join(requests), 4, response=False).tolist() == [
+        True,
+        True,
+        False,
+        True,
+    ]
+
+    frames, _ = _responses(C.other_status_readback, 4)
+    assert verify_crc(b"".join(frames)).all()
+    # マジックナンバーは CRC の対象外
+    frames[1] = b"\x00\x00" + frames[1][2:]
+    assert verify_crc(b"".join(frames)).all()
+    assert not verify_crc(b"".join(frames), response=False)[0]
+
+
+def test_zero_copy_view() -> None:
+    frames, _ = _responses(C.motor_status_readback, 4)
+    buffer = bytearray(b"".join(frames))
+    result = decode_status(buffer, C.motor_status_readback)
+    assert np.shares_memory(result["mode"], np.frombuffer(buffer, dtype=np.uint8))
+
+
+def test_mixed() -> None:
+    motor, _ = _responses(C.motor_status_readback, 3)
+    other, _ = _responses(C.other_status_readback, 2)
+    mixed = decode_mixed(b"".join([motor[0], other[0], motor[1], other[1], motor[2]]))
+
+    assert set(mixed) == {C.motor_status_readback_resp, C.other_status_readback_resp}
+    assert len(mixed[C.motor_status_readback_resp]) == 3
+    assert mixed[C.other_status_readback_resp]["encoder_counter"].tolist() == [0, -7]
+
+
+def test_invalid_input() -> None:
+    with pytest.raises(ValueError):
+        frame_array(b"\x00" * 21)
+    with pytest.raises(ValueError):
+        decode_status(b"", C.motor_switch)
+    assert len(decode_status(b"", C.readback_2)) == 0
@@ -0,0 +1,152 @@
+"""CaptureWriter / read_capture のテスト."""
+
+from __future__ import annotations
+
+import time
+from pathlib import Path
+
+import pytest
+
+from roller485.capture import (
+    FILE_HEADER,
+    RECORD_HEADER,
+    RX,
+    TX,
+    CaptureRecord,
+    CaptureWriter,
+    capture_files,
+    read_capture,
+    read_captures,
+)
+from roller485.clock import VirtualClock
+from roller485.emulator import VirtualRoller485
+from roller485.util import Roller485Util
+
+
+class TestCaptureWriter:
+    def test_round_trip(self, tmp_path: Path) -> None:
+        path = str(tmp_path / "bus.cap")
+        with CaptureWriter(path, port_id=3) as writer:
+            writer.record(TX, b"\x40\x00\x00\x00", timestamp_ns=10)
+            writer.record(RX, b"\xaa\x55", timestamp_ns=20)
+
+        assert list(read_capture(path)) == [
+            CaptureRecord(10, TX, 3, b"\x40\x00\x00\x00"),
+            CaptureRecord(20, RX, 3, b"\xaa\x55"),
+        ]
+
+    def test_clock(self, tmp_path: Path) -> None:
+        path = str(tmp_path / "bus.cap")
+        with CaptureWriter(path, clock=VirtualClock(start=1.5)) as writer:
+            writer.record(TX, b"\x40\x00\x00\x00")
+
+        assert [r.timestamp_ns for r in read_capture(path)] == [1_500_000_000]
+
+    def test_buffered(self, tmp_path: Path) -> None:
+        path = tmp_path / "bus.cap"
+        writer = CaptureWriter(str(path), buffer_size=1024, flush_interval=None)
+        writer.record(TX, b"\x00" * 15)
+        assert path.stat().st_size == len(FILE_HEADER)
+
+        writer.flush()
+        assert path.stat().st_size == len(FILE_HEADER) + RECORD_HEADER.size + 15
+        writer.close()
+
+    def test_flush_on_size(self, tmp_path: Path) -> None:
+        path = tmp_path / "bus.cap"
+        writer = CaptureWriter(str(path), buffer_size=40, flush_interval=None)
+        writer.record(TX, b"\x00" * 15)
+        writer.record(TX, b"\x00" * 15)
+        # 書き出しスレッドが書き終えるのを待つ
+        deadline = time.monotonic() + 1.0
+        while len(list(read_capture(str(path)))) < 2:
+            assert time.monotonic() < deadline
+            time.sleep(0.001)
+        writer.close()
+
+    def test_flush_on_interval(self, tmp_path: Path) -> None:
+        path = tmp_path / "bus.cap"
+        writer = CaptureWriter(str(path), flush_interval=0.01)
+        writer.record(TX, b"\x00")
+        # record() は書き出さず、バックグラウンドのスレッドが書き出す
+        deadline = time.monotonic() + 1.0
+        while not list(read_capture(str(path))):
+            assert time.monotonic() < deadline
+            time.sleep(0.001)
+        writer.close()
+
+    def test_append_existing(self, tmp_path: Path) -> None:
+        path = str(tmp_path / "bus.cap")
+        for i in range(2):
+            with CaptureWriter(path) as writer:
+                writer.record(TX, bytes([i]))
+        assert [r.data for r in read_capture(path)] == [b"\x00", b"\x01"]
+
+    def test_rotation(self, tmp_path: Path) -> None:
+        path = str(tmp_path / "bus.cap")
+        writer = CaptureWriter(
+            path, buffer_size=0, flush_interval=None, max_bytes=100, backup_count=2
+        )
+        for i in range(20):
+            writer.record(TX, bytes([i]) * 20, timestamp_ns=i)
+        writer.close()
+
+        files = capture_files(path)
+        assert files == [path + ".2", path + ".1", path]
+        assert all(Path(f).stat().st_size <= 100 for f in files)
+        stamps = [r.timestamp_ns for r in read_captures(files)]
+        assert stamps == sorted(stamps)
+        assert stamps[-1] == 19
+
+    def test_invalid_port_id(self, tmp_path: Path) -> None:
+        with pytest.raises(ValueError):
+            CaptureWriter(str(tmp_path / "bus.cap"), port_id=256)
+
+
+class TestReadCapture:
+    def test_lazy_and_truncated_tail(self, tmp_path: Path) -> None:
+        path = str(tmp_path / "bus.cap")
+        with CaptureWriter(path) as writer:
+            for i in range(1000):
+                writer.record(RX, bytes(20), timestamp_ns=i)
+        with open(path, "ab") as f:
+            f.write(RECORD_HEADER.pack(0, RX, 0, 20) + b"\x00" * 5)
+
+        records = read_capture(path, chunk_size=37)
+        assert next(records).timestamp_ns == 0
+        assert sum(1 for _ in records) == 999
+
+    def test_not_a_capture(self, tmp_path: Path) -> None:
+        path = tmp_path / "bad.cap"
+        path.write_bytes(b"garbage!")
+        with pytest.raises(ValueError):
+            list(read_capture(str(path)))
+
+
+class TestRoller485Capture:
+    def test_records_both_directions(self, tmp_path: Path) -> None:
+        path = str(tmp_path / "bus.cap")
+        r485 = Roller485Util(target=0, transport=VirtualRoller485())
+        r485._delay = lambda: None  # type: ignore[method-assign]
+        r485.capture = CaptureWriter(path, port_id=1)
+        r485.get_motor_status()
+        r485.set_current(5.0)
+        r485.capture.close()
+
+        records = list(read_capture(path))
+        assert [(r.direction, len(r.data)) for r in records] == [
+            (TX, 4),
+            (RX, 20),
+            (TX, 15),
+            (RX, 17),
+        ]
+        assert all(r.port_id == 1 for r in records)
+        assert records[0].timestamp_ns < records[1].timestamp_ns
+
+    def test_uses_util_clock(self, tmp_path: Path) -> None:
+        clock = VirtualClock()
+        r485 = Roller485Util(target=0, transport=VirtualRoller485())
+        r485.clock = clock
+        with CaptureWriter(str(tmp_path / "bus.cap")) as writer:
+            r485.capture = writer
+            assert writer.clock is clock
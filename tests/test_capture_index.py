@@ -0,0 +1,123 @@
+"""IndexedCapture のテスト."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from roller485.capture import RX, TX, CaptureWriter, read_capture
+from roller485.capture_index import IndexedCapture, build_index, index_path, load_index
+from roller485.emulator import VirtualRoller485
+from roller485.roller485_protocol import Roller485Protocol as Proto
+from roller485.util import Roller485Util
+
+C = Proto.CommandCode
+MS = 1_000_000
+
+
+def _write(path: str, n: int, start: int = 0) -> None:
+    """デバイス 0〜3 の motor_status_readback を 1 ms ごとに記録"""
+    bus = VirtualRoller485(device_ids=range(4))
+    r485 = Roller485Util(target=0, transport=bus)
+    with CaptureWriter(path) as capture:
+        for i in range(start, start + n):
+            device = i % 4
+            request = r485._build_readback(C.motor_status_readback, device_id=device)
+            bus.write(request)
+            capture.record(TX, request, i * MS)
+            capture.record(RX, bus.read(20), i * MS + 500_000)
+
+
+class TestIndexedCapture:
+    def test_matches_sequential_reader(self, tmp_path: Path) -> None:
+        path = str(tmp_path / "bus.cap")
+        _write(path, 500)
+        with IndexedCapture(path, stride=16) as cap:
+            assert len(cap) == 1000
+            got = [(r.timestamp_ns, r.direction, bytes(r.data)) for r in cap.records()]
+        assert got == [
+            (r.timestamp_ns, r.direction, r.data) for r in read_capture(path)
+        ]
+
+    def test_time_range(self, tmp_path: Path) -> None:
+        path = str(tmp_path / "bus.cap")
+        _write(path, 1000)
+        with IndexedCapture(path, stride=32) as cap:
+            records = list(cap.records(start_ns=400 * MS, end_ns=410 * MS))
+            assert [r.timestamp_ns for r in records][:2] == [
+                400 * MS,
+                400 * MS + 500_000,
+            ]
+            assert len(records) == 20
+            # 二分探索でブロックを選ぶので、走査するのは範囲と最大 1 ブロック分のみ
+            assert cap.scanned <= 20 + 32 + 1
+            assert cap.seek(400 * MS + 1) == records[1].offset
+            assert cap.seek(10_000 * MS) == cap.size
+            del records
+
+    def test_filter_by_device_and_command(self, tmp_path: Path) -> None:
+        path = str(tmp_path / "bus.cap")
+        _write(path, 200)
+        with IndexedCapture(path, stride=8) as cap:
+            responses = [
+                bytes(r.data)
+                for r in cap.records(
+                    device_id=2, command=C.motor_status_readback_resp, direction=RX
+                )
+            ]
+            assert len(responses) == 50
+            assert all(
+                r[3] == 2 and r[2] == C.motor_status_readback_resp for r in responses
+            )
+            requests = list(cap.records(device_id=1, command=C.motor_status_readback))
+            assert {r.direction for r in requests} == {TX}
+            del requests
+            # 該当しないブロックは読み飛ばす
+            assert list(cap.records(device_id=9)) == []
+            assert cap.scanned == 0
+
+    def test_index_is_persisted_and_refreshed(self, tmp_path: Path) -> None:
+        path = str(tmp_path / "bus.cap")
+        _write(path, 10)
+        entries = build_index(path, stride=4)
+        assert load_index(path) is not None
+        assert len(entries) == 5
+        size = Path(path).stat().st_size
+        with open(path, "ab") as f:
+            f.write(b"\x00" * 5)  # 書き込み途中のレコード
+        with IndexedCapture(path) as cap:
+            assert cap.stride == 4  # 作り直さない
+            assert len(cap) == 20
+
+        with open(path, "r+b") as f:
+            f.truncate(size)
+        _write(path, 10, start=10)  # 追記されたので作り直す
+        with IndexedCapture(path, stride=8) as cap:
+            assert cap.stride == 8
+            assert len(cap) == 40
+
+    def test_empty_and_invalid(self, tmp_path: Path) -> None:
+        path = str(tmp_path / "bus.cap")
+        CaptureWriter(path).close()
+        with IndexedCapture(path) as cap:
+            assert len(cap) == 0
+            assert list(cap.records()) == []
+        Path(index_path(path)).write_bytes(b"junk")
+        assert load_index(path) is None
+
+        other = tmp_path / "other.bin"
+        other.write_bytes(b"not a capture")
+        with pytest.raises(ValueError):
+            IndexedCapture(str(other))
+
+    def test_frame_array_for_bulk_decoder(self, tmp_path: Path) -> None:
+        bulk = pytest.importorskip("roller485.bulk")
+        path = str(tmp_path / "bus.cap")
+        _write(path, 100)
+        with IndexedCapture(path, stride=16) as cap:
+            frames = cap.frame_array(C.motor_status_readback, device_id=3)
+        status = bulk.decode_status(frames, C.motor_status_readback)
+        assert len(status) == 25
+        assert status.valid.all()
+        assert set(status.device_id.tolist()) == {3}
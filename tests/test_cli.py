@@ -2,11 +2,16 @@
 
 from __future__ import annotations
 
+import json
 from unittest.mock import MagicMock, patch
 
 import pytest
 
+from roller485.capture import CaptureWriter
 from roller485.cli import create_parser, run
+from roller485.estop import EStopResult
+from roller485.latency import LatencyProfile
+from roller485.roller485_protocol import Roller485Protocol as Proto
 from roller485.util import Roller485Util
 
 
@@ -198,6 +203,100 @@ class TestCreateParser:
         assert ns.command == "write-i2c"
         assert ns.data == "0102ff"
 
+    # --- get-full-status ---
+    def test_get_full_status_sections(self) -> None:
+        ns = self._parse(
+            "--port", "/dev/ttyUSB0", "get-full-status", "--sections", "motor", "other"
+        )
+        assert ns.command == "get-full-status"
+        assert ns.sections == ["motor", "other"]
+
+    def test_get_full_status_invalid_section(self) -> None:
+        with pytest.raises(SystemExit):
+            self._parse("--port", "/dev/ttyUSB0", "get-full-status", "--sections", "x")
+
+    # --- estop ---
+    def test_estop_defaults(self) -> None:
+        ns = self._parse("--port", "/dev/ttyUSB0", "estop")
+        assert ns.command == "estop"
+        assert ns.devices is None
+        assert ns.verify is False
+        assert ns.no_zero is False
+
+    def test_estop_devices(self) -> None:
+        ns = self._parse(
+            "--port", "/dev/ttyUSB0", "estop", "--devices", "0", "1", "2", "--verify"
+        )
+        assert ns.devices == [0, 1, 2]
+        assert ns.verify is True
+
+    # --- sniff ---
+    def test_sniff(self) -> None:
+        ns = self._parse(
+            "--port", "/dev/ttyUSB0", "sniff", "--count", "10", "--output", "a.cap"
+        )
+        assert ns.command == "sniff"
+        assert ns.count == 10
+        assert ns.duration is None
+        assert ns.output == "a.cap"
+        assert ns.port_id == 0
+
+    # --- stats ---
+    def test_stats(self) -> None:
+        ns = self._parse(
+            "--port", "/dev/ttyUSB0", "stats", "--devices", "0", "1", "--count", "3"
+        )
+        assert ns.command == "stats"
+        assert ns.devices == [0, 1]
+        assert ns.count == 3
+        assert ns.json is False
+
+    # --- calibrate ---
+    def test_calibrate(self) -> None:
+        ns = self._parse(
+            "--port",
+            "/dev/ttyUSB0",
+            "calibrate",
+            "--output",
+            "p.json",
+            "--samples",
+            "5",
+        )
+        assert ns.command == "calibrate"
+        assert ns.output == "p.json"
+        assert ns.samples == 5
+        assert ns.include_settings is False
+
+    def test_calibrate_requires_output(self) -> None:
+        with pytest.raises(SystemExit):
+            self._parse("--port", "/dev/ttyUSB0", "calibrate")
+
+    def test_latency_profile_option(self) -> None:
+        ns = self._parse(
+            "--port", "/dev/ttyUSB0", "--latency-profile", "p.json", "get-motor-status"
+        )
+        assert ns.latency_profile == "p.json"
+
+    def test_retries_option(self) -> None:
+        ns = self._parse("--port", "/dev/ttyUSB0", "get-motor-status")
+        assert ns.retries == 0
+        ns = self._parse("--port", "/dev/ttyUSB0", "--retries", "2", "get-motor-status")
+        assert ns.retries == 2
+
+    # --- plan ---
+    def test_plan_without_port(self) -> None:
+        """plan は --port なしで実行できる."""
+        ns = self._parse(
+            "plan", "--devices", "4", "--rate", "motor_status_readback=100"
+        )
+        assert ns.port is None
+        assert ns.devices == 4
+        assert ns.rate == [(Proto.CommandCode.motor_status_readback, 100.0)]
+
+    def test_plan_invalid_rate(self) -> None:
+        with pytest.raises(SystemExit):
+            self._parse("plan", "--rate", "motor_status_readback")
+
     # --- サブコマンドなし ---
     def test_no_subcommand(self) -> None:
         with pytest.raises(SystemExit):
@@ -219,6 +318,8 @@ class TestRun:
             "target": 0,
             "baudrate": 115200,
             "timeout": 1.0,
+            "latency_profile": None,
+            "retries": 0,
         }
         defaults.update(kwargs)
 
@@ -342,3 +443,136 @@ class TestRun:
 
         mock_inst.mode_setting.assert_called_once_with(Roller485Util.MotorMode.Speed)
         assert exit_code == 0
+
+    @patch("roller485.cli.EmergencyStop")
+    @patch("roller485.cli.Roller485Util")
+    def test_estop(self, MockClass: MagicMock, MockEStop: MagicMock, capsys) -> None:
+        mock_inst = MockClass.return_value
+        mock_inst.is_open = True
+        MockEStop.return_value.trigger.return_value = EStopResult(
+            0.001, 90, {0: True, 1: True}
+        )
+
+        args = self._make_args(
+            command="estop", devices=[0, 1], verify=True, no_zero=False
+        )
+        exit_code = run(args)
+
+        MockEStop.assert_called_once_with(mock_inst, [0, 1], zero_setpoints=True)
+        MockEStop.return_value.trigger.assert_called_once_with(verify=True)
+        assert '"bytes_sent": 90' in capsys.readouterr().out
+        assert exit_code == 0
+
+    @patch("roller485.cli.Sniffer")
+    @patch("roller485.cli.Roller485Util")
+    def test_sniff(self, MockClass: MagicMock, MockSniffer: MagicMock, capsys) -> None:
+        mock_inst = MockClass.return_value
+        mock_inst.is_open = True
+        MockSniffer.return_value.stats.return_value = {"frames": 3}
+
+        args = self._make_args(
+            command="sniff", count=3, duration=None, json=False, output=None
+        )
+        exit_code = run(args)
+
+        assert MockSniffer.call_args.args == (mock_inst._transport,)
+        MockSniffer.return_value.run.assert_called_once_with(duration=None, count=3)
+        mock_inst.write.assert_not_called()
+        assert '"frames": 3' in capsys.readouterr().err
+        assert exit_code == 0
+
+    @patch("roller485.cli.Roller485Util")
+    def test_stats(self, MockClass: MagicMock, capsys) -> None:
+        mock_inst = MockClass.return_value
+        mock_inst.is_open = True
+
+        args = self._make_args(
+            command="stats", devices=[0, 1], count=2, interval=0.0, json=True
+        )
+        exit_code = run(args)
+
+        assert mock_inst.readback.call_count == 2 * 2 * 4
+        assert capsys.readouterr().out.strip() == "{}"
+        assert exit_code == 0
+
+    @patch("roller485.cli.calibrate")
+    @patch("roller485.cli.Roller485Util")
+    def test_calibrate(
+        self, MockClass: MagicMock, mock_calibrate: MagicMock, tmp_path, capsys
+    ) -> None:
+        mock_inst = MockClass.return_value
+        mock_inst.is_open = True
+        mock_calibrate.return_value = LatencyProfile(
+            turnaround={Proto.CommandCode.motor_status_readback: 0.002}
+        )
+        output = tmp_path / "p.json"
+
+        args = self._make_args(
+            command="calibrate",
+            output=str(output),
+            samples=5,
+            include_settings=False,
+        )
+        exit_code = run(args)
+
+        mock_calibrate.assert_called_once_with(
+            mock_inst, samples=5, include_settings=False
+        )
+        assert "motor_status_readback" in output.read_text()
+        assert "motor_status_readback" in capsys.readouterr().out
+        assert exit_code == 0
+
+    @patch("roller485.cli.Roller485Util")
+    def test_latency_profile_loaded(self, MockClass: MagicMock, tmp_path) -> None:
+        mock_inst = MockClass.return_value
+        mock_inst.is_open = True
+        mock_inst.latency_profiles = {}
+        mock_inst.get_motor_status.return_value = {"speed": 0}
+        path = tmp_path / "p.json"
+        LatencyProfile(device_id=2, turnaround={}).save(str(path))
+
+        args = self._make_args(
+            command="get-motor-status", target=2, latency_profile=str(path)
+        )
+        assert run(args) == 0
+        assert mock_inst.latency_profiles[2].device_id == 2
+
+    @patch("roller485.cli.Roller485Util")
+    def test_retries_set_policy(self, MockClass: MagicMock) -> None:
+        mock_inst = MockClass.return_value
+        mock_inst.is_open = True
+        mock_inst.get_motor_status.return_value = {"speed": 0}
+
+        assert run(self._make_args(command="get-motor-status", retries=2)) == 0
+        assert mock_inst.retry_policy.attempts == 3
+
+    @patch("roller485.cli.Roller485Util")
+    def test_plan_does_not_open_port(self, MockClass: MagicMock, capsys) -> None:
+        args = create_parser().parse_args(
+            ["plan", "--devices", "2", "--rate", "motor_status_readback=10"]
+        )
+        exit_code = run(args)
+
+        MockClass.assert_not_called()
+        assert "total utilization" in capsys.readouterr().out
+        assert exit_code == 0
+
+    @patch("roller485.cli.Roller485Util")
+    def test_analyze_does_not_open_port(
+        self, MockClass: MagicMock, tmp_path, capsys
+    ) -> None:
+        path = str(tmp_path / "bus.cap")
+        CaptureWriter(path).close()
+        out = tmp_path / "report.json"
+        args = create_parser().parse_args(["analyze", path, "--json", str(out)])
+        assert args.port is None
+        assert run(args) == 0
+
+        MockClass.assert_not_called()
+        assert "utilization" in capsys.readouterr().out
+        assert json.loads(out.read_text())["frames"] == 0
+
+    def test_plan_table(self, capsys) -> None:
+        args = create_parser().parse_args(["--baudrate", "9600", "plan"])
+        assert run(args) == 0
+        assert "motor_status_readback" in capsys.readouterr().out
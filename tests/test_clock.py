@@ -0,0 +1,95 @@
+"""VirtualClock を使ったシミュレーションのテスト."""
+
+from __future__ import annotations
+
+import threading
+import time
+
+from roller485.clock import SYSTEM_CLOCK, VirtualClock
+from roller485.emulator import VirtualRoller485
+from roller485.roller485_protocol import Roller485Protocol as Proto
+from roller485.telemetry import TelemetryScheduler
+from roller485.tracing import Tracer
+from roller485.util import Roller485Util
+
+C = Proto.CommandCode
+
+
+def _client(
+    clock: VirtualClock, **bus_kwargs
+) -> tuple[VirtualRoller485, Roller485Util]:
+    bus = VirtualRoller485(device_ids=[0], clock=clock, **bus_kwargs)
+    r485 = Roller485Util(target=0, transport=bus)
+    r485.clock = clock
+    return bus, r485
+
+
+class TestVirtualClock:
+    def test_sleep_and_wait_advance_instantly(self) -> None:
+        clock = VirtualClock(start=10.0, epoch=1000.0)
+        clock.sleep(2.5)
+        assert clock.monotonic() == 12.5
+        assert clock.perf_counter_ns() == 12_500_000_000
+        assert clock.time() == 1012.5
+
+        event = threading.Event()
+        assert clock.wait(event, 1.0) is False
+        event.set()
+        assert clock.wait(event, 1.0) is True
+        assert clock.monotonic() == 14.5
+        clock.advance(-1.0)
+        assert clock.monotonic() == 14.5
+
+    def test_system_clock(self) -> None:
+        before = time.monotonic()
+        assert SYSTEM_CLOCK.monotonic() >= before
+        assert (
+            Roller485Util(target=0, transport=VirtualRoller485()).clock is SYSTEM_CLOCK
+        )
+
+
+class TestSimulation:
+    def test_thousands_of_commands(self) -> None:
+        """_delay() (50 ms) を含む 12000 コマンドが実時間では一瞬で終わる."""
+        clock = VirtualClock()
+        _, r485 = _client(clock, default_latency=0.002)
+        start = time.monotonic()
+        for _ in range(12000):
+            assert r485.get_motor_status()
+        assert time.monotonic() - start < 10.0
+        assert abs(clock.monotonic() - 600.0) < 1e-6
+
+    def test_timeout_in_virtual_time(self) -> None:
+        clock = VirtualClock()
+        bus, r485 = _client(clock, timeout=0.5)
+        bus.devices[0].online = False
+        r485._delay = lambda: None  # type: ignore[method-assign]
+        start = time.monotonic()
+        assert r485.get_motor_status() == {}
+        assert time.monotonic() - start < 0.5
+        assert clock.monotonic() == 0.5
+
+    def test_latency_shows_in_traces(self) -> None:
+        clock = VirtualClock()
+        _, r485 = _client(clock, latency={C.motor_status_readback: 0.003})
+        r485._delay = lambda: None  # type: ignore[method-assign]
+        r485.tracer = Tracer(clock=clock)
+        r485.get_motor_status()
+        exchange = [s for s in r485.tracer.snapshot() if s.name == "exchange"][0]
+        assert exchange.end_ns - exchange.start_ns == 3_000_000
+
+    def test_telemetry_is_deterministic(self) -> None:
+        counts = []
+        for _ in range(2):
+            clock = VirtualClock()
+            _, r485 = _client(clock, default_latency=0.001)
+            sched = TelemetryScheduler(r485, baudrate=115200, clock=clock)
+            sched.add(0, C.motor_status_readback, period=0.01)
+            sched.add(0, C.other_status_readback, period=1.0)
+            start = time.monotonic()
+            sched.run(duration=30.0)
+            assert time.monotonic() - start < 10.0
+            counts.append([s["samples"] for s in sched.stats()])
+        assert counts[0] == counts[1]
+        assert 2900 <= counts[0][0] <= 3001
+        assert counts[0][1] == 30
@@ -0,0 +1,254 @@
+"""BusDaemon と Roller485Client のテスト — エミュレータ上のバスを共有して検証."""
+
+from __future__ import annotations
+
+import json
+import socket
+import threading
+from concurrent.futures import CancelledError
+
+import pytest
+
+from roller485.client import Roller485Client
+from roller485.daemon import (
+    BusDaemon,
+    bind_arguments,
+    create_parser,
+    decode_error,
+    decode_value,
+    encode_error,
+    encode_value,
+)
+from roller485.emulator import VirtualRoller485
+from roller485.errors import (
+    DeadlineExceededError,
+    DeviceUnavailableError,
+    RemoteError,
+    ResponseTimeoutError,
+)
+from roller485.latency import LatencyProfile
+from roller485.roller485_protocol import Roller485Protocol as Proto
+from roller485.scheduler import Priority
+from roller485.util import FullStatus, Roller485Util
+
+
+def _r485(bus: VirtualRoller485) -> Roller485Util:
+    r485 = Roller485Util(target=0, transport=bus)
+    for device_id in bus.devices:
+        r485.latency_profiles[device_id] = LatencyProfile(device_id, default_wait=0.0)
+    return r485
+
+
+@pytest.fixture()
+def emulators() -> dict:
+    return {
+        "main": VirtualRoller485(device_ids=[0, 1]),
+        "aux": VirtualRoller485(device_ids=[0]),
+    }
+
+
+@pytest.fixture()
+def daemon(tmp_path, emulators: dict):
+    daemon = BusDaemon(
+        {name: _r485(bus) for name, bus in emulators.items()},
+        str(tmp_path / "d.sock"),
+    )
+    daemon.start()
+    thread = threading.Thread(target=daemon.serve_forever, daemon=True)
+    thread.start()
+    yield daemon
+    daemon.shutdown()
+    thread.join()
+    daemon.stop()
+
+
+class TestClient:
+    def test_same_methods_as_util(self, daemon: BusDaemon, emulators: dict) -> None:
+        with Roller485Client(target=1, path=daemon.path, bus="main") as r485:
+            assert r485.motor_switch(Roller485Client.Switch.On) is True
+            assert r485.set_speed_and_max_current(1200, 1000.0) is True
+            assert r485.get_motor_status()["speed"] == 1200
+            assert (
+                r485.readback(Proto.CommandCode.motor_status_readback, device_id=0)[
+                    "speed"
+                ]
+                == 0
+            )
+
+        assert emulators["main"].devices[1].switch == 1
+        assert emulators["main"].devices[0].switch == 0
+        assert emulators["aux"].requests == 0
+
+    def test_bytes_and_full_status(self, daemon: BusDaemon) -> None:
+        with Roller485Client(path=daemon.path, bus="aux") as r485:
+            assert r485.write_i2c(0x50, 0, 0x10, b"\x01\x02\x03") is True
+            assert r485.read_i2c(0x50, 0, 0x10, 3) == b"\x01\x02\x03"
+            status = r485.get_full_status(["motor"])
+            assert isinstance(status, FullStatus)
+            assert status.motor and not status.other
+
+    def test_errors(self, daemon: BusDaemon) -> None:
+        with Roller485Client(path=daemon.path) as r485:
+            with pytest.raises(ValueError, match="unknown bus"):
+                r485.get_motor_status()
+            r485.bus = "main"
+            with pytest.raises(ValueError):
+                r485.mode_setting(9)
+            with pytest.raises(TypeError):
+                r485.set_current()
+            with pytest.raises(AttributeError):
+                r485.call("close")
+            with pytest.raises(AttributeError):
+                _ = r485.no_such_method
+            # エラーのあとも同じ接続を使える
+            assert r485.get_motor_status()["mode"] == 1
+
+    def test_daemon_methods(self, daemon: BusDaemon) -> None:
+        with Roller485Client(path=daemon.path, bus="main") as r485:
+            r485.get_motor_status()
+            assert set(r485.buses()) == {"main", "aux"}
+            stats = r485.stats()
+        assert stats["main"]["requests"] == 1
+        assert stats["aux"]["requests"] == 0
+
+    def test_pipelined_clients(self, daemon: BusDaemon) -> None:
+        clients = [Roller485Client(path=daemon.path, bus="main") for _ in range(3)]
+        try:
+            futures = [
+                c.submit(
+                    "set_speed_and_max_current", i * 10, 500.0, priority=Priority.I2C
+                )
+                for i, c in enumerate(clients)
+                for _ in range(5)
+            ]
+            assert all(f.result(timeout=5) is True for f in futures)
+        finally:
+            for c in clients:
+                c.close()
+
+    def test_closed_connection(self, daemon: BusDaemon) -> None:
+        r485 = Roller485Client(path=daemon.path, bus="main")
+        r485.close()
+        with pytest.raises(ConnectionError):
+            r485.get_motor_status()
+
+    def test_raw_json_lines(self, daemon: BusDaemon) -> None:
+        with socket.socket(socket.AF_UNIX) as sock:
+            sock.connect(daemon.path)
+            f = sock.makefile("rwb")
+            f.write(b'{"id": 7, "method": "motor_switch", "args": [1], "bus": "aux"}\n')
+            f.write(b"not json\n")
+            f.flush()
+            responses = {
+                r["id"]: r for r in (json.loads(f.readline()) for _ in range(2))
+            }
+        assert responses[7] == {"id": 7, "result": True}
+        assert responses[None]["error"]["type"] == "JSONDecodeError"
+
+
+class TestCoalescing:
+    def test_identical_readbacks_share_one_exchange(
+        self, tmp_path, emulators: dict
+    ) -> None:
+        bus = emulators["main"]
+        daemon = BusDaemon({"main": _r485(bus)}, str(tmp_path / "d.sock"))
+        # スケジューラを開始する前に投入して、送信待ちの状態を作る
+        first = daemon.call("get_motor_status")
+        assert daemon.call("get_motor_status") is first
+        other = daemon.call("get_motor_status", target=1)
+        assert other is not first
+        setpoint = daemon.call("set_speed_and_max_current", [0, 500.0])
+        assert daemon.call("set_speed_and_max_current", [0, 500.0]) is not setpoint
+        assert daemon.stats()["main"]["coalesced"] == 1
+        try:
+            daemon.start()
+            assert first.result(timeout=5)["mode"] == 1
+            other.result(timeout=5)
+            setpoint.result(timeout=5)
+            assert bus.requests == 4
+            # 完了後は新たに送信する
+            again = daemon.call("get_motor_status")
+            assert again is not first
+            again.result(timeout=5)
+        finally:
+            daemon.stop()
+        assert bus.requests == 5
+
+    def test_preempted_readback_is_forgotten(self, tmp_path, emulators: dict) -> None:
+        daemon = BusDaemon({"main": _r485(emulators["main"])}, str(tmp_path / "d.sock"))
+        readback = daemon.call("get_motor_status")
+        daemon.call("motor_switch", [0])
+        assert readback.cancelled()
+        assert daemon.call("get_motor_status") is not readback
+
+
+class TestSocket:
+    def test_no_telemetry_deadline_by_default(self, daemon: BusDaemon) -> None:
+        assert create_parser().parse_args(["--port", "p"]).telemetry_deadline is None
+        for bus in daemon._buses.values():
+            assert bus.scheduler.telemetry_deadline is None
+
+    def test_removes_stale_socket(self, tmp_path, emulators: dict) -> None:
+        path = str(tmp_path / "d.sock")
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(path)
+        stale.close()
+        with BusDaemon({"main": _r485(emulators["main"])}, path) as daemon:
+            thread = threading.Thread(target=daemon.serve_forever, daemon=True)
+            thread.start()
+            with Roller485Client(path=path) as client:
+                assert client.get_motor_status()["mode"] == 1
+            daemon.shutdown()
+            thread.join()
+
+    def test_refuses_running_daemon(self, daemon: BusDaemon, emulators: dict) -> None:
+        other = BusDaemon({"main": _r485(emulators["main"])}, daemon.path)
+        with pytest.raises(RuntimeError, match="already serving"):
+            other.start()
+        other.stop()
+        with Roller485Client(path=daemon.path, bus="main") as client:
+            assert client.get_motor_status()["mode"] == 1
+
+    def test_refuses_regular_file(self, tmp_path, emulators: dict) -> None:
+        path = tmp_path / "d.sock"
+        path.write_text("keep me")
+        daemon = BusDaemon({"main": _r485(emulators["main"])}, str(path))
+        with pytest.raises(FileExistsError):
+            daemon.start()
+        assert path.read_text() == "keep me"
+
+
+class TestWireFormat:
+    def test_values_round_trip(self) -> None:
+        status = FullStatus(timestamp=1.0, motor={"speed": 1})
+        value = {"data": b"\x00\xff", "items": (1, status)}
+        decoded = decode_value(json.loads(json.dumps(encode_value(value))))
+        assert decoded == {"data": b"\x00\xff", "items": [1, status]}
+
+    @pytest.mark.parametrize(
+        "error",
+        [
+            ResponseTimeoutError(1, 0x40, 3),
+            DeviceUnavailableError(2),
+            DeadlineExceededError("late"),
+            ValueError("bad"),
+            CancelledError("preempted"),
+        ],
+    )
+    def test_errors_round_trip(self, error: BaseException) -> None:
+        decoded = decode_error(json.loads(json.dumps(encode_error(error))))
+        assert type(decoded) is type(error)
+        assert str(decoded) == str(error)
+
+    def test_unknown_error_type(self) -> None:
+        decoded = decode_error(encode_error(OSError("port gone")))
+        assert isinstance(decoded, RemoteError)
+        assert decoded.type == "OSError"
+
+    def test_bind_arguments_converts_enums(self) -> None:
+        r485 = Roller485Util()
+        args, kwargs = bind_arguments(r485.motor_switch, [1], {})
+        assert args == (Roller485Util.Switch.On,)
+        assert isinstance(args[0], Roller485Util.Switch)
+        args, _ = bind_arguments(r485.readback, [0x40], {"device_id": 1})
+        assert isinstance(args[0], Proto.CommandCode)
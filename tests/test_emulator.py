@@ -0,0 +1,95 @@
+"""VirtualRoller485 のテスト — Roller485Util(transport=...) で往復を検証."""
+
+from __future__ import annotations
+
+import pytest
+
+from roller485.emulator import VirtualRoller485
+from roller485.roller485_protocol import Roller485Protocol as Proto
+from roller485.util import Roller485Util
+
+
+@pytest.fixture()
+def bus() -> VirtualRoller485:
+    return VirtualRoller485(device_ids=[0, 1], timeout=0.05)
+
+
+@pytest.fixture()
+def r485(bus: VirtualRoller485) -> Roller485Util:
+    r = Roller485Util(target=0, transport=bus)
+    r._delay = lambda: None  # type: ignore[method-assign]
+    return r
+
+
+class TestSettings:
+    def test_motor_switch(self, r485: Roller485Util, bus: VirtualRoller485) -> None:
+        assert r485.motor_switch(Roller485Util.Switch.On) is True
+        assert bus.devices[0].switch == 1
+        assert bus.devices[1].switch == 0
+
+    def test_speed_round_trip(self, r485: Roller485Util) -> None:
+        assert r485.mode_setting(Roller485Util.MotorMode.Speed) is True
+        assert r485.motor_switch(Roller485Util.Switch.On) is True
+        assert r485.set_speed_and_max_current(1200, 500.0) is True
+        status = r485.get_motor_status()
+        assert status["speed"] == 1200
+        assert status["mode"] == Roller485Util.MotorMode.Speed
+
+    def test_motor_off_ignores_speed(self, r485: Roller485Util) -> None:
+        assert r485.set_speed_and_max_current(1200, 500.0) is True
+        assert r485.get_motor_status()["speed"] == 0
+
+    def test_speed_pid_round_trip(self, r485: Roller485Util) -> None:
+        assert r485.set_speed_pid(2.5, 0.01, 3.0) is True
+        status = r485.get_speed_pid_and_rgb()
+        assert status["speed_p"] == 2.5
+        assert status["speed_i"] == 0.01
+        assert status["speed_d"] == 3.0
+
+
+class TestReadback:
+    def test_other_device(self, r485: Roller485Util, bus: VirtualRoller485) -> None:
+        bus.devices[1].vin_x100 = 2400
+        status = r485.readback(Proto.CommandCode.other_status_readback, device_id=1)
+        assert status["vin"] == 24.0
+
+    def test_offline_device_times_out(
+        self, r485: Roller485Util, bus: VirtualRoller485
+    ) -> None:
+        bus.devices[0].online = False
+        assert r485.get_motor_status() == {}
+
+    def test_unknown_device_times_out(self, r485: Roller485Util) -> None:
+        assert r485.readback(Proto.CommandCode.motor_status_readback, 9) == {}
+
+    def test_request_count(self, r485: Roller485Util, bus: VirtualRoller485) -> None:
+        r485.get_full_status()
+        assert bus.requests == 4
+
+
+class TestI2C:
+    def test_register_round_trip(self, r485: Roller485Util) -> None:
+        assert r485.write_i2c(0x50, 1, 0x0010, b"\x01\x02\x03") is True
+        assert r485.read_i2c(0x50, 1, 0x0010, 3) == b"\x01\x02\x03"
+
+    def test_raw_round_trip(self, r485: Roller485Util) -> None:
+        assert r485.write_i2c_raw(0x50, 1, b"\xaa\xbb") is True
+        assert r485.read_i2c_raw(0x50, 2) == b"\xaa\xbb"
+
+
+class TestLatency:
+    def test_response_waits_for_latency(self) -> None:
+        bus = VirtualRoller485(
+            latency={Proto.CommandCode.motor_status_readback: 0.2}, timeout=0.05
+        )
+        r485 = Roller485Util(target=0, transport=bus)
+        r485._delay = lambda: None  # type: ignore[method-assign]
+        # 応答時間がタイムアウトより長いので読み取れない
+        assert r485.get_motor_status() == {}
+
+    def test_buffer_reset_discards_responses(self, bus: VirtualRoller485) -> None:
+        r485 = Roller485Util(target=0, transport=bus)
+        r485._write_frame(r485._build_readback(Proto.CommandCode.readback_2))
+        assert bus.in_waiting == 20
+        bus.reset_input_buffer()
+        assert bus.in_waiting == 0
@@ -0,0 +1,103 @@
+"""EmergencyStop のテスト — シリアル通信をモックして検証."""
+
+from __future__ import annotations
+
+import struct
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from roller485.estop import EmergencyStop
+from roller485.roller485_protocol import Roller485Protocol as Proto
+from roller485.util import Roller485Util
+
+from tests.conftest import build_setting_response
+
+
+@pytest.fixture()
+def bus(mock_roller: Roller485Util) -> Roller485Util:
+    """バッファ操作もモックした Roller485Util."""
+    mock_roller.reset_output_buffer = MagicMock()  # type: ignore[assignment]
+    mock_roller.reset_input_buffer = MagicMock()  # type: ignore[assignment]
+    return mock_roller
+
+
+def _split_frames(burst: bytes) -> list[bytes]:
+    return [burst[i : i + 15] for i in range(0, len(burst), 15)]
+
+
+class TestBurst:
+    """事前エンコードされたフレームの検証."""
+
+    def test_off_frames_first(self, bus: Roller485Util) -> None:
+        """全デバイスの motor_switch Off が先、ゼロセットポイントが後."""
+        estop = EmergencyStop(bus, device_ids=[1, 2])
+        frames = _split_frames(estop.burst)
+
+        assert len(frames) == 6
+        assert [(f[0], f[1]) for f in frames] == [
+            (Proto.CommandCode.motor_switch, 1),
+            (Proto.CommandCode.motor_switch, 2),
+            (Proto.CommandCode.current_control, 1),
+            (Proto.CommandCode.speed_control, 1),
+            (Proto.CommandCode.current_control, 2),
+            (Proto.CommandCode.speed_control, 2),
+        ]
+        for f in frames:
+            assert struct.unpack_from("<iii", f, 2) == (0, 0, 0)
+            assert f[-1] == Roller485Util.calculate_crc8(f[:-1])
+
+    def test_without_zero_setpoints(self, bus: Roller485Util) -> None:
+        estop = EmergencyStop(bus, device_ids=[0, 1], zero_setpoints=False)
+        assert len(estop.burst) == 2 * 15
+
+    def test_add_and_remove_device(self, bus: Roller485Util) -> None:
+        estop = EmergencyStop(bus, device_ids=[0])
+        estop.add_device(3)
+        estop.add_device(3)
+        assert estop.device_ids == [0, 3]
+        estop.remove_device(0)
+        assert estop.device_ids == [3]
+        assert _split_frames(estop.burst)[0][1] == 3
+
+
+class TestTrigger:
+    """trigger() の送信と確認の検証."""
+
+    @patch("roller485.clock.time.sleep")
+    def test_single_burst_without_reading(
+        self, _mock_sleep, bus: Roller485Util
+    ) -> None:
+        estop = EmergencyStop(bus, device_ids=[0, 1, 2])
+        result = estop.trigger()
+
+        bus.reset_output_buffer.assert_called_once()  # type: ignore[attr-defined]
+        bus.write.assert_called_once_with(estop.burst)  # type: ignore[attr-defined]
+        bus.flush.assert_called_once()  # type: ignore[attr-defined]
+        bus.read.assert_not_called()  # type: ignore[attr-defined]
+        bus.reset_input_buffer.assert_called_once()  # type: ignore[attr-defined]
+        assert result.bytes_sent == len(estop.burst)
+        assert result.time_to_last_byte >= 0.0
+        assert result.verified == {}
+
+    @patch("roller485.clock.time.sleep")
+    def test_keep_replies(self, mock_sleep, bus: Roller485Util) -> None:
+        EmergencyStop(bus).trigger(discard_replies=False)
+        mock_sleep.assert_not_called()
+        bus.reset_input_buffer.assert_not_called()  # type: ignore[attr-defined]
+
+    @patch("roller485.clock.time.sleep")
+    @patch("roller485.clock.time.sleep")
+    def test_verify(self, _estop_sleep, _util_sleep, bus: Roller485Util) -> None:
+        """verify=True で各デバイスへ同期的に Off を送り直す."""
+        bus.target = 7
+        bus.read.side_effect = [  # type: ignore[attr-defined]
+            build_setting_response(Proto.CommandCode.motor_switch_resp, 1, data1=0),
+            build_setting_response(Proto.CommandCode.motor_switch_resp, 2, data1=1),
+        ]
+        result = EmergencyStop(bus, device_ids=[1, 2]).trigger(verify=True)
+
+        assert result.verified == {1: True, 2: False}
+        assert bus.target == 7
+        sent = [c.args[0] for c in bus.write.call_args_list[1:]]  # type: ignore[attr-defined]
+        assert [f[1] for f in sent] == [1, 2]
@@ -0,0 +1,92 @@
+"""FaultInjector のテスト."""
+
+from __future__ import annotations
+
+import time
+
+from roller485.emulator import VirtualRoller485
+from roller485.faults import (
+    CORRUPT,
+    DELAY,
+    DROP,
+    DROP_REQUEST,
+    DUPLICATE,
+    TRUNCATE,
+    FaultConfig,
+    FaultInjector,
+)
+from roller485.retry import RetryPolicy
+from roller485.util import Roller485Util
+
+
+def _setup(config: FaultConfig | None = None, seed: int = 0):
+    bus = VirtualRoller485(device_ids=[0], timeout=0.02)
+    faulty = FaultInjector(bus, config, seed=seed)
+    r485 = Roller485Util(target=0, transport=faulty)
+    r485._delay = lambda: None  # type: ignore[method-assign]
+    return bus, faulty, r485
+
+
+class TestFaultInjector:
+    def test_transparent_without_faults(self) -> None:
+        _, faulty, r485 = _setup()
+        assert r485.motor_switch(Roller485Util.Switch.On) is True
+        assert r485.get_motor_status()["mode"] == 1
+        assert not faulty.counts
+
+    def test_drop_request(self) -> None:
+        bus, faulty, r485 = _setup(FaultConfig(drop_request=1.0))
+        assert r485.get_motor_status() == {}
+        assert bus.requests == 0
+        assert faulty.counts[DROP_REQUEST] == 1
+
+    def test_response_faults(self) -> None:
+        for kind, config in [
+            (DROP, FaultConfig(drop=1.0)),
+            (CORRUPT, FaultConfig(corrupt=1.0)),
+            (TRUNCATE, FaultConfig(truncate=1.0)),
+        ]:
+            bus, faulty, r485 = _setup(config)
+            assert r485.get_motor_status() == {}, kind
+            assert bus.requests == 1
+            assert faulty.counts == {kind: 1}
+            record = faulty.injected[0]
+            assert record.kind == kind and len(record.data) == 20
+
+    def test_duplicate(self) -> None:
+        _, faulty, r485 = _setup(FaultConfig(duplicate=1.0))
+        assert r485.get_motor_status() != {}
+        assert faulty.in_waiting == 20  # 2 回目のコピーが残る
+        assert faulty.counts[DUPLICATE] == 1
+
+    def test_latency_and_late_bytes(self) -> None:
+        _, faulty, r485 = _setup(FaultConfig(latency=0.01, jitter=0.005))
+        start = time.monotonic()
+        assert r485.get_motor_status() != {}
+        assert time.monotonic() - start >= 0.01
+        assert 0.01 <= faulty.injected[0].detail <= 0.015
+
+        # タイムアウトより長い遅延: 応答は間に合わず、あとで古いバイトとして届く
+        faulty.configure(latency=0.05, jitter=0.0)
+        assert r485.get_motor_status() == {}
+        time.sleep(0.06)
+        assert faulty.in_waiting == 20
+        assert faulty.counts[DELAY] == 2
+
+    def test_seeded(self) -> None:
+        config = FaultConfig(drop=0.3, corrupt=0.3, truncate=0.2)
+        runs = []
+        for _ in range(2):
+            _, faulty, r485 = _setup(config, seed=42)
+            for _ in range(20):
+                r485.get_motor_status()
+            runs.append([(f.kind, f.detail) for f in faulty.injected])
+        assert runs[0] == runs[1]
+        assert runs[0]
+
+    def test_retry_recovers(self) -> None:
+        _, faulty, r485 = _setup(FaultConfig(drop=0.2, corrupt=0.2), seed=3)
+        r485.retry_policy = RetryPolicy(attempts=8, backoff=0.0, raise_errors=False)
+        results = [r485.get_motor_status() for _ in range(30)]
+        assert all(results)
+        assert faulty.counts[DROP] + faulty.counts[CORRUPT] > 0
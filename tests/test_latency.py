@@ -0,0 +1,305 @@
+"""LatencyProfile / calibrate() のテスト — エミュレータで応答時間を再現."""
+
+from __future__ import annotations
+
+import random
+import time
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+from roller485.clock import VirtualClock
+from roller485.emulator import VirtualRoller485
+from roller485.latency import (
+    AdaptiveTimeouts,
+    LatencyCalibrator,
+    LatencyProfile,
+    P2Quantile,
+    calibrate,
+)
+from roller485.roller485_protocol import Roller485Protocol as Proto
+from roller485.util import Roller485Util
+
+C = Proto.CommandCode
+
+
+@pytest.fixture()
+def bus() -> VirtualRoller485:
+    return VirtualRoller485(
+        latency={C.motor_status_readback: 0.004, C.readback_2: 0.008},
+        default_latency=0.001,
+        timeout=0.5,
+    )
+
+
+@pytest.fixture()
+def r485(bus: VirtualRoller485) -> Roller485Util:
+    return Roller485Util(target=0, baudrate=115200, transport=bus)
+
+
+class TestLatencyProfile:
+    def test_unknown_command_uses_defaults(self) -> None:
+        profile = LatencyProfile(default_wait=0.05, default_timeout=1.0)
+        assert profile.wait_time(C.motor_status_readback) == 0.05
+        assert profile.timeout(C.motor_status_readback) == 1.0
+
+    def test_wait_time_includes_request_wire_time(self) -> None:
+        profile = LatencyProfile(turnaround={C.motor_status_readback: 0.002})
+        request = profile.timing.frame_time(C.motor_status_readback)
+        wait = profile.wait_time(C.motor_status_readback)
+        assert wait == pytest.approx(request + 0.002 * profile.margin)
+
+    def test_timeout_floor(self) -> None:
+        profile = LatencyProfile(
+            turnaround={C.motor_status_readback: 0.0}, min_timeout=0.02
+        )
+        assert profile.timeout(C.motor_status_readback) == 0.02
+
+    def test_observe_flags_drift(self) -> None:
+        profile = LatencyProfile(
+            turnaround={C.motor_status_readback: 0.002}, ewma_alpha=1.0
+        )
+        wire = profile._wire_time(C.motor_status_readback)
+        assert profile.observe(C.motor_status_readback, wire + 0.002) is False
+        assert profile.observe(C.motor_status_readback, wire + 0.010) is True
+        assert C.motor_status_readback in profile.drifted
+        assert profile.observe(C.motor_status_readback, wire + 0.0021) is False
+        assert not profile.drifted
+
+    def test_observes_exchange_not_own_wait(self) -> None:
+        clock = VirtualClock()
+        profile = LatencyProfile(
+            turnaround={C.readback_2: 0.02}, margin=2.0, ewma_alpha=1.0
+        )
+        wire = profile._wire_time(C.readback_2)
+        bus = VirtualRoller485(latency={C.readback_2: wire + 0.02}, clock=clock)
+        r485 = Roller485Util(target=0, baudrate=115200, transport=bus)
+        r485.clock = clock
+        r485.latency_profiles[0] = profile
+
+        # 応答は待ち時間 (応答時間の 2 倍) の間に揃うので、ドリフトではない
+        for _ in range(5):
+            assert r485.readback(C.readback_2)
+        assert not profile.drifted
+
+        # 待ち時間を過ぎても揃わないほど遅くなればドリフト
+        bus.latency[C.readback_2] = wire + 0.06
+        assert r485.readback(C.readback_2)
+        assert profile.observed[C.readback_2] == pytest.approx(0.06)
+        assert C.readback_2 in profile.drifted
+
+    def test_save_and_load(self, tmp_path: Path) -> None:
+        profile = LatencyProfile(
+            device_id=3, baudrate=19200, turnaround={C.readback_3: 0.0015}
+        )
+        path = tmp_path / "profile.json"
+        profile.save(str(path))
+
+        assert "readback_3" in path.read_text()
+        loaded = LatencyProfile.load(str(path))
+        assert loaded.device_id == 3
+        assert loaded.baudrate == 19200
+        assert loaded.turnaround == {C.readback_3: 0.0015}
+
+
+class TestCalibrate:
+    def test_measures_per_command_turnaround(self, r485: Roller485Util) -> None:
+        profile = calibrate(r485, samples=3)
+
+        assert set(profile.turnaround) == {
+            C.motor_status_readback,
+            C.other_status_readback,
+            C.readback_2,
+            C.readback_3,
+        }
+        slow = profile.turnaround[C.readback_2]
+        fast = profile.turnaround[C.other_status_readback]
+        assert slow > profile.turnaround[C.motor_status_readback] > fast
+        assert r485.latency_profiles[0] is profile
+
+    def test_include_settings_rewrites_current_values(
+        self, r485: Roller485Util, bus: VirtualRoller485
+    ) -> None:
+        bus.devices[0].speed_pid = (123_456, 7, 89)
+        profile = calibrate(r485, commands=(), include_settings=True, setting_samples=1)
+
+        assert C.speed_pid_config in profile.turnaround
+        assert C.save_to_flash in profile.turnaround
+        assert bus.devices[0].speed_pid == (123_456, 7, 89)
+
+    def test_profile_replaces_fixed_delay(self, r485: Roller485Util) -> None:
+        calibrate(r485, samples=2)
+        r485._delay = MagicMock()  # type: ignore[method-assign]
+
+        assert r485.get_motor_status()["mode"] == 1
+        r485._delay.assert_not_called()
+
+    def test_unreachable_device_keeps_previous_profile(
+        self, r485: Roller485Util, bus: VirtualRoller485
+    ) -> None:
+        previous = LatencyProfile(turnaround={C.readback_2: 0.001})
+        r485.latency_profiles[0] = previous
+        bus.devices[0].online = False
+        bus.timeout = 0.01
+
+        with pytest.raises(RuntimeError):
+            calibrate(r485, include_settings=True)
+        assert r485.latency_profiles[0] is previous
+
+
+class TestLatencyCalibrator:
+    def test_load_or_calibrate(self, r485: Roller485Util, tmp_path: Path) -> None:
+        path = str(tmp_path / "roller0.json")
+        first = LatencyCalibrator(r485, path=path, samples=2).load_or_calibrate()
+        assert Path(path).exists()
+
+        r485.latency_profiles.clear()
+        second = LatencyCalibrator(r485, path=path).load_or_calibrate()
+        assert second.turnaround == pytest.approx(first.turnaround)
+        assert r485.latency_profiles[0] is second
+
+    def test_recalibrates_on_drift(self, r485: Roller485Util) -> None:
+        calibrator = LatencyCalibrator(r485, samples=2)
+        calibrator.calibrate()
+        assert calibrator.maybe_recalibrate() is False
+
+        assert calibrator.profile is not None
+        calibrator.profile.drifted.add(C.readback_2)
+        assert calibrator.maybe_recalibrate() is True
+        assert not calibrator.profile.drifted
+
+
+class TestP2Quantile:
+    @pytest.mark.parametrize("quantile", [0.5, 0.9, 0.99])
+    def test_matches_exact_quantile(self, quantile: float) -> None:
+        rng = random.Random(1)
+        samples = [rng.expovariate(1 / 0.003) for _ in range(20_000)]
+        est = P2Quantile(quantile)
+        for x in samples:
+            est.add(x)
+
+        exact = sorted(samples)[int(quantile * len(samples))]
+        assert est.value() == pytest.approx(exact, rel=0.05)
+
+    def test_few_samples(self) -> None:
+        est = P2Quantile(0.5)
+        assert est.value() is None
+        for x in (3.0, 1.0, 2.0):
+            est.add(x)
+        assert est.value() == 2.0
+
+    def test_invalid_quantile(self) -> None:
+        with pytest.raises(ValueError):
+            P2Quantile(1.0)
+
+
+class TestAdaptiveTimeouts:
+    def test_ceiling_until_warmup(self) -> None:
+        adaptive = AdaptiveTimeouts(ceiling=0.5, warmup=10)
+        for _ in range(9):
+            adaptive.observe(0, C.readback_2, 0.004)
+        assert adaptive.timeout(0, C.readback_2) == 0.5
+        adaptive.observe(0, C.readback_2, 0.004)
+        assert adaptive.timeout(0, C.readback_2) == pytest.approx(0.008)
+
+    def test_floor_and_resolution(self) -> None:
+        adaptive = AdaptiveTimeouts(floor=0.01, warmup=1)
+        adaptive.observe(0, C.readback_2, 0.001)
+        assert adaptive.timeout(0, C.readback_2) == 0.01
+        adaptive.observe(1, C.readback_2, 0.0101)
+        assert adaptive.timeout(1, C.readback_2) == pytest.approx(0.021)
+
+    def test_per_device_and_command(self) -> None:
+        adaptive = AdaptiveTimeouts(warmup=1)
+        adaptive.observe(0, C.readback_2, 0.1)
+        assert adaptive.timeout(0, C.readback_3) == adaptive.ceiling
+        assert adaptive.timeout(1, C.readback_2) == adaptive.ceiling
+
+    def test_consecutive_timeouts_widen_deadline(self) -> None:
+        adaptive = AdaptiveTimeouts(warmup=5, multiplier=1.0, ceiling=0.1)
+        for _ in range(5):
+            adaptive.observe(0, C.readback_2, 0.01)
+        assert adaptive.timeout(0, C.readback_2) == pytest.approx(0.01)
+        adaptive.observe_timeout(0, C.readback_2)
+        assert adaptive.timeout(0, C.readback_2) == pytest.approx(0.01)
+        adaptive.observe_timeout(0, C.readback_2)
+        assert adaptive.timeout(0, C.readback_2) == pytest.approx(0.02)
+        for _ in range(100):
+            adaptive.observe_timeout(0, C.readback_2)
+        assert adaptive.timeout(0, C.readback_2) == 0.1
+        assert adaptive.snapshot()[0]["readback_2"]["timeouts"] == 102
+
+    def test_success_resets_consecutive_timeouts(self) -> None:
+        adaptive = AdaptiveTimeouts(warmup=1, multiplier=1.0)
+        adaptive.observe(0, C.readback_2, 0.01)
+        for _ in range(10):
+            adaptive.observe_timeout(0, C.readback_2)
+            adaptive.observe(0, C.readback_2, 0.01)
+        assert adaptive.timeout(0, C.readback_2) == pytest.approx(0.01)
+
+    def test_slow_command_recovers(self) -> None:
+        adaptive = AdaptiveTimeouts(warmup=5, multiplier=2.0, ceiling=1.0)
+        for _ in range(50):
+            adaptive.observe(0, C.readback_2, 0.005)
+        # コマンドが 0.05 秒かかるようになった
+        attempts = 0
+        while adaptive.timeout(0, C.readback_2) < 0.05:
+            adaptive.observe_timeout(0, C.readback_2)
+            attempts += 1
+        assert attempts <= 6
+        adaptive.observe(0, C.readback_2, 0.05)
+        assert adaptive.timeout(0, C.readback_2) >= 0.1
+
+    def test_delay_paths_learned_separately(self) -> None:
+        adaptive = AdaptiveTimeouts(warmup=1, floor=0.001)
+        adaptive.observe(0, C.readback_2, 0.0, delay=True)
+        adaptive.observe(0, C.readback_2, 0.02, delay=False)
+        assert adaptive.timeout(0, C.readback_2) == 0.001
+        assert adaptive.timeout(0, C.readback_2, delay=False) == pytest.approx(0.04)
+        assert set(adaptive.snapshot()[0]) == {"readback_2", "readback_2/nodelay"}
+
+    def test_snapshot(self) -> None:
+        adaptive = AdaptiveTimeouts(warmup=1)
+        adaptive.observe(2, C.motor_status_readback, 0.003)
+        adaptive.observe_timeout(2, C.motor_status_readback)
+
+        snap = adaptive.snapshot()
+        stats = snap[2]["motor_status_readback"]
+        assert stats["count"] == 1
+        assert stats["timeouts"] == 1
+        assert stats["timeout"] <= adaptive.ceiling
+
+        adaptive.reset(2)
+        assert adaptive.snapshot() == {}
+
+    def test_learns_read_phase_only(self, bus: VirtualRoller485) -> None:
+        r485 = Roller485Util(target=0, transport=bus)
+        r485.adaptive_timeouts = AdaptiveTimeouts(warmup=3, floor=0.001)
+        for _ in range(3):
+            assert r485.get_other_status()  # 毎回 _delay() で 50 ms 待つ
+        # 応答は _delay() の間に届いているので、学習した期限に 50 ms は含まれない
+        assert r485.adaptive_timeouts.timeout(0, C.other_status_readback) < 0.05
+
+    def test_full_status_uses_nodelay_timeout(self, bus: VirtualRoller485) -> None:
+        r485 = Roller485Util(target=0, transport=bus)
+        r485.adaptive_timeouts = AdaptiveTimeouts(warmup=3, floor=0.001)
+        for _ in range(3):
+            assert r485.get_other_status()
+        assert r485.get_full_status(sections=["other"]).other
+        snap = r485.adaptive_timeouts.snapshot()[0]
+        assert snap["other_status_readback"]["count"] == 3
+        assert snap["other_status_readback/nodelay"]["count"] == 1
+
+    def test_missing_device_fails_fast(self, bus: VirtualRoller485) -> None:
+        r485 = Roller485Util(target=0, transport=bus)
+        r485._delay = lambda: None  # type: ignore[method-assign]
+        r485.adaptive_timeouts = AdaptiveTimeouts(warmup=5, ceiling=0.5)
+        for _ in range(5):
+            assert r485.get_other_status()
+
+        bus.devices[0].online = False
+        start = time.perf_counter()
+        assert r485.get_other_status() == {}
+        assert time.perf_counter() - start < 0.1
+        assert bus.timeout == r485.adaptive_timeouts.timeout(0, C.other_status_readback)
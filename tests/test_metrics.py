@@ -0,0 +1,113 @@
+"""MetricsRegistry のテスト — エミュレータとの往復を計測."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from roller485.emulator import VirtualRoller485
+from roller485.metrics import Histogram, MetricsRegistry
+from roller485.retry import RetryPolicy
+from roller485.roller485_protocol import Roller485Protocol as Proto
+from roller485.util import Roller485Util
+
+C = Proto.CommandCode
+
+
+@pytest.fixture()
+def bus() -> VirtualRoller485:
+    return VirtualRoller485(device_ids=[0, 1], timeout=0.01)
+
+
+@pytest.fixture()
+def r485(bus: VirtualRoller485) -> Roller485Util:
+    r = Roller485Util(target=0, transport=bus)
+    r._delay = lambda: None  # type: ignore[method-assign]
+    r.metrics = MetricsRegistry()
+    return r
+
+
+class TestHistogram:
+    def test_buckets(self) -> None:
+        h = Histogram((0.001, 0.01))
+        for v in (0.0005, 0.001, 0.005, 0.5):
+            h.observe(v)
+        assert h.counts == [2, 1, 1]
+        assert h.count == 4
+        assert h.sum == pytest.approx(0.5065)
+        assert h.max == 0.5
+
+    def test_quantile(self) -> None:
+        h = Histogram((0.001, 0.01))
+        assert h.quantile(0.5) is None
+        for _ in range(99):
+            h.observe(0.0005)
+        h.observe(0.2)
+        assert h.quantile(0.5) == 0.001
+        assert h.quantile(0.99) == 0.001
+        assert h.quantile(1.0) == 0.2
+
+
+class TestMetricsRegistry:
+    def test_counts_and_bytes(self, r485: Roller485Util) -> None:
+        r485.get_motor_status()
+        r485.get_motor_status()
+        r485.set_current(10.0)
+
+        snap = r485.metrics.snapshot()[0]
+        readback = snap["motor_status_readback"]
+        assert readback["requests"] == 2
+        assert readback["bytes_sent"] == 8
+        assert readback["bytes_received"] == 40
+        assert readback["rtt"]["count"] == 2
+        assert readback["rtt_p50"] is not None
+        assert snap["current_control"]["bytes_sent"] == 15
+
+    def test_errors(self, r485: Roller485Util, bus: VirtualRoller485) -> None:
+        bus.devices[1].online = False
+        r485.readback(C.other_status_readback, device_id=1)
+
+        m = r485.metrics.snapshot()[1]["other_status_readback"]
+        assert m["timeouts"] == 1
+        assert m["bytes_received"] == 0
+        assert m["rtt"]["count"] == 0
+
+    def test_crc_and_retries(self, r485: Roller485Util, bus: VirtualRoller485) -> None:
+        r485.retry_policy = RetryPolicy(attempts=2, backoff=0.0)
+        original = bus.write
+        calls = []
+
+        def corrupt_first(data: bytes) -> int:
+            n = original(data)
+            if not calls:
+                with bus._cond:
+                    t, resp = bus._scheduled[-1]
+                    bus._scheduled[-1] = (t, resp[:-1] + bytes([resp[-1] ^ 0xFF]))
+            calls.append(data)
+            return n
+
+        bus.write = corrupt_first  # type: ignore[method-assign]
+        assert r485.get_speed_pid_and_rgb()
+
+        m = r485.metrics.snapshot()[0]["readback_2"]
+        assert (m["requests"], m["crc_failures"], m["retries"]) == (2, 1, 1)
+
+    def test_snapshot_is_plain_data(self, r485: Roller485Util) -> None:
+        r485.get_full_status()
+        snap = r485.metrics.snapshot()
+        assert json.loads(json.dumps(snap)) == {"0": snap[0]}
+
+    def test_format_and_reset(self, r485: Roller485Util) -> None:
+        r485.get_other_status()
+        text = r485.metrics.format()
+        assert "other_status_readback" in text.splitlines()[1]
+
+        r485.metrics.reset()
+        assert r485.metrics.snapshot() == {}
+
+    def test_disabled_records_nothing(self, bus: VirtualRoller485) -> None:
+        r485 = Roller485Util(target=0, transport=bus)
+        r485._delay = lambda: None  # type: ignore[method-assign]
+        assert r485.metrics is None
+        assert r485.get_motor_status()
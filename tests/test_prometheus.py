@@ -0,0 +1,140 @@
+"""PrometheusExporter のテスト — エミュレータとの往復を出力."""
+
+from __future__ import annotations
+
+import urllib.request
+from pathlib import Path
+
+import pytest
+
+from roller485.emulator import VirtualRoller485
+from roller485.prometheus import CONTENT_TYPE, PrometheusExporter
+from roller485.roller485_protocol import Roller485Protocol as Proto
+from roller485.util import Roller485Util
+
+
+@pytest.fixture()
+def bus() -> VirtualRoller485:
+    return VirtualRoller485(device_ids=[0, 1], timeout=0.01)
+
+
+@pytest.fixture()
+def r485(bus: VirtualRoller485) -> Roller485Util:
+    r = Roller485Util(target=0, baudrate=115200, transport=bus)
+    r._delay = lambda: None  # type: ignore[method-assign]
+    return r
+
+
+@pytest.fixture()
+def exporter(r485: Roller485Util):
+    exporter = PrometheusExporter(r485, bus="test")
+    yield exporter
+    exporter.close()
+
+
+def _samples(text: str) -> dict:
+    """コメント以外の行を {名前とラベル: 値} に"""
+    result = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            key, value = line.rsplit(" ", 1)
+            result[key] = value
+    return result
+
+
+class TestRender:
+    def test_requests_and_histogram(
+        self, r485: Roller485Util, exporter: PrometheusExporter
+    ) -> None:
+        r485.get_motor_status()
+        r485.get_motor_status()
+        samples = _samples(exporter.render())
+
+        base = 'bus="test",device="0",command="motor_status_readback"'
+        assert samples[f"roller485_requests_total{{{base}}}"] == "2"
+        assert (
+            samples[f'roller485_request_duration_seconds_bucket{{{base},le="+Inf"}}']
+            == "2"
+        )
+        assert samples[f"roller485_request_duration_seconds_count{{{base}}}"] == "2"
+        assert samples['roller485_bytes_total{bus="test",direction="tx"}'] == "8"
+        assert samples['roller485_bytes_total{bus="test",direction="rx"}'] == "40"
+
+    def test_type_lines(self, exporter: PrometheusExporter) -> None:
+        text = exporter.render()
+        assert "# TYPE roller485_requests_total counter" in text
+        assert "# TYPE roller485_request_duration_seconds histogram" in text
+        assert text.endswith("\n")
+
+    def test_errors_per_device(
+        self, r485: Roller485Util, bus: VirtualRoller485, exporter: PrometheusExporter
+    ) -> None:
+        bus.devices[1].online = False
+        r485.get_motor_status()
+        r485.readback(Proto.CommandCode.motor_status_readback, device_id=1)
+        samples = _samples(exporter.render())
+
+        assert (
+            samples['roller485_errors_total{bus="test",device="1",reason="timeout"}']
+            == "1"
+        )
+        assert (
+            samples['roller485_errors_total{bus="test",device="0",reason="timeout"}']
+            == "0"
+        )
+
+    def test_telemetry_from_latest_readbacks(
+        self, r485: Roller485Util, bus: VirtualRoller485, exporter: PrometheusExporter
+    ) -> None:
+        bus.devices[0].vin_x100 = 1250
+        bus.devices[0].temp = 41
+        bus.devices[0].current = 25000  # 250 mA
+        r485.get_other_status()
+        r485.get_motor_status()
+        samples = _samples(exporter.render())
+
+        assert samples['roller485_vin_volts{bus="test",device="0"}'] == "12.5"
+        assert samples['roller485_temperature_celsius{bus="test",device="0"}'] == "41"
+        assert float(
+            samples['roller485_current_amperes{bus="test",device="0"}']
+        ) == pytest.approx(0.25)
+
+    def test_bus_busy_counter(
+        self, r485: Roller485Util, exporter: PrometheusExporter
+    ) -> None:
+        samples = _samples(exporter.render())
+        assert samples['roller485_bus_busy_seconds_total{bus="test"}'] == "0.0"
+        r485.get_motor_status()
+        first = exporter.render()
+        # レンダリングは状態を変えないので、続けてスクレイプしても同じ値
+        assert exporter.render() == first
+        busy = float(_samples(first)['roller485_bus_busy_seconds_total{bus="test"}'])
+        assert busy == pytest.approx(24 * 10 / 115200)
+        assert "roller485_bus_utilization" not in first
+
+
+class TestOutputs:
+    def test_write_textfile(
+        self, r485: Roller485Util, exporter: PrometheusExporter, tmp_path: Path
+    ) -> None:
+        r485.get_motor_status()
+        path = tmp_path / "roller485.prom"
+        exporter.write_textfile(str(path))
+
+        assert "roller485_requests_total" in path.read_text()
+        assert [p.name for p in tmp_path.iterdir()] == ["roller485.prom"]
+
+    def test_serve(self, r485: Roller485Util, exporter: PrometheusExporter) -> None:
+        r485.get_motor_status()
+        server = exporter.serve(0)
+        port = server.server_address[1]
+
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as resp:
+            assert resp.headers["Content-Type"] == CONTENT_TYPE
+            assert b"roller485_requests_total" in resp.read()
+
+    def test_close_detaches(self, r485: Roller485Util) -> None:
+        exporter = PrometheusExporter(r485)
+        assert r485.metrics is exporter.registry
+        exporter.close()
+        assert r485.readback_observers == []
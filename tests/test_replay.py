@@ -0,0 +1,107 @@
+"""load_session / ReplayTransport のテスト."""
+
+from __future__ import annotations
+
+import time
+from pathlib import Path
+
+import pytest
+
+from roller485.capture import CaptureWriter, capture_files
+from roller485.emulator import VirtualRoller485
+from roller485.replay import ReplayTransport, load_session
+from roller485.roller485_protocol import Roller485Protocol as Proto
+from roller485.util import Roller485Util
+
+C = Proto.CommandCode
+
+
+def _client(transport) -> Roller485Util:
+    r485 = Roller485Util(target=0, transport=transport)
+    r485._delay = lambda: None  # type: ignore[method-assign]
+    return r485
+
+
+def _scenario(r485: Roller485Util) -> list:
+    return [
+        r485.motor_switch(Roller485Util.Switch.On),
+        r485.set_speed_and_max_current(100, 200.0),
+        r485.get_motor_status(),
+        r485.readback(C.other_status_readback, device_id=1),
+        r485.read_i2c_raw(0x50, 4),
+    ]
+
+
+@pytest.fixture
+def session(tmp_path: Path) -> tuple[str, list]:
+    path = str(tmp_path / "session.cap")
+    bus = VirtualRoller485(device_ids=[0, 1], latency={0x40: 0.02})
+    r485 = _client(bus)
+    r485.capture = CaptureWriter(path)
+    results = _scenario(r485)
+    r485.capture.close()
+    return path, results
+
+
+def test_load_session(session: tuple[str, list]) -> None:
+    path, _ = session
+    exchanges = load_session(capture_files(path))
+    assert len(exchanges) == 5
+    assert exchanges[2].request[0] == C.motor_status_readback
+    assert len(exchanges[2].response) == 20
+    assert exchanges[2].delay >= 0.015
+
+
+@pytest.mark.parametrize("timing", ["recorded", "fast"])
+def test_replay_matches_recording(session: tuple[str, list], timing: str) -> None:
+    path, expected = session
+    replay = ReplayTransport(load_session([path]), timing=timing)
+    r485 = _client(replay)
+
+    start = time.monotonic()
+    assert _scenario(r485) == expected
+    elapsed = time.monotonic() - start
+
+    assert replay.divergences == []
+    assert replay.report() == {
+        "recorded": 5,
+        "replayed": 5,
+        "remaining": 0,
+        "divergences": 0,
+    }
+    if timing == "recorded":
+        assert elapsed >= 0.015
+    else:
+        assert elapsed < 0.015
+
+
+def test_divergences(session: tuple[str, list]) -> None:
+    path, expected = session
+    replay = ReplayTransport(load_session([path]), timing="fast")
+    r485 = _client(replay)
+
+    # 記録にないリクエスト (速度が違う) には応答しない
+    assert r485.motor_switch(Roller485Util.Switch.On) is True
+    assert r485.set_speed_and_max_current(50, 200.0) is False
+    kinds = [d.kind for d in replay.divergences]
+    assert kinds == ["unexpected"]
+    assert replay.divergences[0].as_dict()["expected"] is not None
+
+    # 記録の set_speed_and_max_current を飛ばして先のリクエストに再同期
+    assert r485.get_motor_status() == expected[2]
+    assert [d.kind for d in replay.divergences] == ["unexpected", "skipped"]
+    assert replay.remaining == 2
+
+
+def test_replays_out_of_order_request(session: tuple[str, list]) -> None:
+    path, expected = session
+    replay = ReplayTransport(load_session([path]), timing="fast", resync_window=0)
+    r485 = _client(replay)
+    # 記録より先に読み出しても、同じリクエストの記録があれば応答する
+    assert r485.get_motor_status() == expected[2]
+    assert replay.divergences[0].kind == "unexpected"
+
+
+def test_invalid_timing() -> None:
+    with pytest.raises(ValueError):
+        ReplayTransport([], timing="slow")
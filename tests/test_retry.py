@@ -0,0 +1,155 @@
+"""RetryPolicy のテスト — エミュレータのレスポンスを壊して検証."""
+
+from __future__ import annotations
+
+from typing import Callable, List, Optional
+from unittest.mock import MagicMock
+
+import pytest
+
+from roller485.emulator import VirtualRoller485
+from roller485.errors import (
+    CrcError,
+    ExchangeError,
+    ResponseMismatchError,
+    ResponseTimeoutError,
+)
+from roller485.retry import RetryPolicy
+from roller485.roller485_protocol import Roller485Protocol as Proto
+from roller485.util import Roller485Util
+
+C = Proto.CommandCode
+Fault = Optional[Callable[[bytes], bytes]]
+
+
+def drop(resp: bytes) -> bytes:
+    return b""
+
+
+def corrupt_crc(resp: bytes) -> bytes:
+    return resp[:-1] + bytes([resp[-1] ^ 0xFF])
+
+
+def change_data1(resp: bytes) -> bytes:
+    body = resp[2:4] + bytes([resp[4] ^ 0x01]) + resp[5:-1]
+    return b"\xaa\x55" + body + bytes([Roller485Util.calculate_crc8(body)])
+
+
+def inject(bus: VirtualRoller485, faults: List[Fault]) -> None:
+    """bus の n 番目のレスポンスに faults[n] を適用する (None はそのまま)"""
+    original = bus.write
+
+    def write(data: bytes) -> int:
+        n = original(data)
+        fault = faults.pop(0) if faults else None
+        if fault is not None:
+            with bus._cond:
+                t, resp = bus._scheduled.pop()
+                resp = fault(resp)
+                if resp:
+                    bus._scheduled.append((t, resp))
+        return n
+
+    bus.write = write  # type: ignore[method-assign]
+
+
+@pytest.fixture()
+def bus() -> VirtualRoller485:
+    return VirtualRoller485(timeout=0.01)
+
+
+@pytest.fixture()
+def r485(bus: VirtualRoller485) -> Roller485Util:
+    r = Roller485Util(target=0, transport=bus)
+    r._delay = lambda: None  # type: ignore[method-assign]
+    r.retry_policy = RetryPolicy(attempts=3, backoff=0.0)
+    return r
+
+
+class TestRetryPolicy:
+    def test_non_idempotent_not_retried(self) -> None:
+        policy = RetryPolicy(attempts=5)
+        assert policy.attempts_for(C.motor_status_readback) == 5
+        assert policy.attempts_for(C.speed_control) == 5
+        assert policy.attempts_for(C.i2c_read_register) == 5
+        assert policy.attempts_for(C.save_to_flash) == 1
+        assert policy.attempts_for(C.device_id) == 1
+        assert policy.attempts_for(C.i2c_write_register) == 1
+
+    def test_opt_in_non_idempotent(self) -> None:
+        policy = RetryPolicy(attempts=2, retry_non_idempotent=True)
+        assert policy.attempts_for(C.save_to_flash) == 2
+
+    def test_backoff(self) -> None:
+        policy = RetryPolicy(backoff=0.01, backoff_factor=2.0, max_backoff=0.03)
+        assert [policy.backoff_time(n) for n in (1, 2, 3)] == [0.01, 0.02, 0.03]
+
+
+class TestRetries:
+    def test_readback_recovers_from_crc_error(
+        self, r485: Roller485Util, bus: VirtualRoller485
+    ) -> None:
+        inject(bus, [corrupt_crc])
+        assert r485.get_motor_status()["mode"] == 1
+        assert bus.requests == 2
+
+    def test_setpoint_recovers_from_timeout(
+        self, r485: Roller485Util, bus: VirtualRoller485
+    ) -> None:
+        inject(bus, [drop, drop])
+        assert r485.set_current(100.0) is True
+        assert bus.requests == 3
+
+    def test_resyncs_between_attempts(
+        self, r485: Roller485Util, bus: VirtualRoller485
+    ) -> None:
+        bus.reset_input_buffer = MagicMock(wraps=bus.reset_input_buffer)  # type: ignore[method-assign]
+        inject(bus, [corrupt_crc])
+        assert r485.get_other_status()
+        bus.reset_input_buffer.assert_called_once()
+
+    def test_exhausted_raises_typed_error(
+        self, r485: Roller485Util, bus: VirtualRoller485
+    ) -> None:
+        inject(bus, [drop, drop, drop])
+        with pytest.raises(ResponseTimeoutError) as excinfo:
+            r485.get_motor_status()
+        err = excinfo.value
+        assert isinstance(err, ExchangeError)
+        assert (err.reason, err.device_id, err.attempts) == ("timeout", 0, 3)
+        assert err.command == C.motor_status_readback
+
+    def test_non_idempotent_fails_once(
+        self, r485: Roller485Util, bus: VirtualRoller485
+    ) -> None:
+        inject(bus, [corrupt_crc])
+        with pytest.raises(CrcError) as excinfo:
+            r485.save_to_flash()
+        assert excinfo.value.attempts == 1
+        assert bus.requests == 1
+
+    def test_echo_mismatch(self, r485: Roller485Util, bus: VirtualRoller485) -> None:
+        inject(bus, [change_data1, change_data1, change_data1])
+        with pytest.raises(ResponseMismatchError):
+            r485.motor_switch(Roller485Util.Switch.On)
+
+    def test_flash_settings_not_retried_by_default(
+        self, r485: Roller485Util, bus: VirtualRoller485
+    ) -> None:
+        inject(bus, [corrupt_crc, corrupt_crc])
+        with pytest.raises(CrcError) as excinfo:
+            r485.set_speed_pid(1.0, 0.0, 0.0)
+        assert excinfo.value.attempts == 1
+
+        r485.retry_policy = RetryPolicy(backoff=0.0, retry_non_idempotent=True)
+        assert r485.mode_setting(Roller485Util.MotorMode.Position) is True
+        assert bus.requests == 3
+
+    def test_raise_errors_disabled(
+        self, r485: Roller485Util, bus: VirtualRoller485
+    ) -> None:
+        r485.retry_policy = RetryPolicy(attempts=2, backoff=0.0, raise_errors=False)
+        inject(bus, [corrupt_crc, corrupt_crc, drop, drop])
+        assert r485.get_motor_status() == {}
+        assert r485.motor_switch(Roller485Util.Switch.On) is False
+        assert bus.requests == 4
@@ -0,0 +1,221 @@
+"""CommandScheduler のテスト — Roller485Util をモックして検証."""
+
+from __future__ import annotations
+
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from roller485.emulator import VirtualRoller485
+from roller485.errors import DeadlineExceededError
+from roller485.scheduler import CommandScheduler, Priority
+from roller485.util import Roller485Util
+
+
+@pytest.fixture()
+def mock_bus() -> MagicMock:
+    """呼び出し順を記録する Roller485Util のモック."""
+    bus = MagicMock(spec=Roller485Util)
+    bus.calls = []
+    for name in (
+        "motor_switch",
+        "set_speed_and_max_current",
+        "set_speed_pid",
+        "get_motor_status",
+        "read_i2c",
+    ):
+        getattr(bus, name).side_effect = lambda *args, _name=name, **kwargs: (
+            bus.calls.append(_name) or _name
+        )
+    return bus
+
+
+class TestPriorityOrder:
+    """優先度順に送信されることを検証."""
+
+    def test_higher_priority_first(self, mock_bus: MagicMock) -> None:
+        sched = CommandScheduler(mock_bus, telemetry_deadline=None)
+        futures = [
+            sched.submit("read_i2c", 0x50, 0, 0, 1),
+            sched.submit("get_motor_status"),
+            sched.submit("set_speed_pid", 1.0, 0.0, 0.0),
+            sched.submit("set_speed_and_max_current", 100, 500),
+        ]
+        with sched:
+            for f in futures:
+                f.result(timeout=1)
+
+        assert mock_bus.calls == [
+            "set_speed_and_max_current",
+            "set_speed_pid",
+            "get_motor_status",
+            "read_i2c",
+        ]
+
+    def test_fifo_within_class(self, mock_bus: MagicMock) -> None:
+        sched = CommandScheduler(mock_bus)
+        f1 = sched.submit("set_speed_and_max_current", 1, 500)
+        f2 = sched.submit("set_speed_and_max_current", 2, 500)
+        with sched:
+            f2.result(timeout=1)
+        assert f1.done()
+        first, second = mock_bus.set_speed_and_max_current.call_args_list
+        assert first.args == (1, 500)
+        assert second.args == (2, 500)
+
+    def test_explicit_priority(self, mock_bus: MagicMock) -> None:
+        sched = CommandScheduler(mock_bus, telemetry_deadline=None)
+        sched.submit("set_speed_pid", 1.0, 0.0, 0.0)
+        f = sched.submit("get_motor_status", priority=Priority.Control)
+        with sched:
+            f.result(timeout=1)
+        assert mock_bus.calls[0] == "get_motor_status"
+
+    def test_target_switches_device_for_one_call(self, mock_bus: MagicMock) -> None:
+        mock_bus.target = 0
+        seen = []
+        mock_bus.get_motor_status.side_effect = lambda: seen.append(mock_bus.target)
+        with CommandScheduler(mock_bus) as sched:
+            sched.submit("get_motor_status", target=3).result(timeout=1)
+            sched.submit("get_motor_status").result(timeout=1)
+        assert seen == [3, 0]
+        assert mock_bus.target == 0
+
+    def test_unknown_method(self, mock_bus: MagicMock) -> None:
+        sched = CommandScheduler(mock_bus)
+        with pytest.raises(AttributeError):
+            sched.submit("no_such_method")
+
+
+class TestPreemption:
+    """Safety リクエストによる下位クラスのキャンセル."""
+
+    def test_stop_cancels_background_work(self, mock_bus: MagicMock) -> None:
+        sched = CommandScheduler(mock_bus, telemetry_deadline=None)
+        setpoint = sched.submit("set_speed_and_max_current", 100, 500)
+        config = sched.submit("set_speed_pid", 1.0, 0.0, 0.0)
+        status = sched.submit("get_motor_status")
+        i2c = sched.submit("read_i2c", 0x50, 0, 0, 1)
+        stop = sched.submit("motor_switch", Roller485Util.Switch.Off)
+
+        assert status.cancelled()
+        assert i2c.cancelled()
+        assert setpoint.cancelled()
+        assert config.cancelled()
+        with sched:
+            assert stop.result(timeout=1) == "motor_switch"
+
+        assert mock_bus.calls == ["motor_switch"]
+        stats = sched.latency_stats()
+        assert stats["Control"]["preempted"] == 1
+        assert stats["Configuration"]["preempted"] == 1
+        assert stats["Telemetry"]["preempted"] == 1
+        assert stats["I2C"]["preempted"] == 1
+
+    def test_stop_keeps_other_targets_commands(self, mock_bus: MagicMock) -> None:
+        mock_bus.target = 0
+        sched = CommandScheduler(mock_bus, telemetry_deadline=None)
+        same = sched.submit("set_speed_and_max_current", 100, 500, target=0)
+        default = sched.submit("set_speed_pid", 1.0, 0.0, 0.0)
+        other = sched.submit("set_speed_and_max_current", 100, 500, target=1)
+        sched.submit("motor_switch", Roller485Util.Switch.Off)
+
+        assert same.cancelled()
+        assert default.cancelled()
+        assert not other.cancelled()
+        with sched:
+            other.result(timeout=1)
+        assert mock_bus.calls == ["motor_switch", "set_speed_and_max_current"]
+
+    def test_switch_on_before_stop_never_runs(self) -> None:
+        bus = VirtualRoller485(device_ids=[0])
+        r485 = Roller485Util(target=0, transport=bus)
+        r485._delay = lambda: None  # type: ignore[method-assign]
+        started, release = threading.Event(), threading.Event()
+        r485.block = lambda: started.set() or release.wait(1)  # type: ignore[attr-defined]
+        with CommandScheduler(r485, telemetry_deadline=None) as sched:
+            # ワーカーを止めておき、On と Off をキューに積む
+            busy = sched.submit("block")
+            assert started.wait(1)
+            on = sched.submit("motor_switch", Roller485Util.Switch.On)
+            off = sched.submit("motor_switch", Roller485Util.Switch.Off)
+            release.set()
+            busy.result(timeout=1)
+            off.result(timeout=1)
+
+        assert on.cancelled()
+        assert bus.devices[0].switch == 0
+
+    def test_switch_on_is_configuration(self, mock_bus: MagicMock) -> None:
+        sched = CommandScheduler(mock_bus, telemetry_deadline=None)
+        config = sched.submit("set_speed_pid", 1.0, 0.0, 0.0)
+        status = sched.submit("get_motor_status")
+        on = sched.submit("motor_switch", state=Roller485Util.Switch.On)
+        assert not status.cancelled()
+        with sched:
+            on.result(timeout=1)
+            status.result(timeout=1)
+        assert config.done()
+        assert mock_bus.calls == ["set_speed_pid", "motor_switch", "get_motor_status"]
+
+    def test_preemption_disabled(self, mock_bus: MagicMock) -> None:
+        sched = CommandScheduler(
+            mock_bus, telemetry_deadline=None, preempt_on_safety=False
+        )
+        status = sched.submit("get_motor_status")
+        sched.submit("motor_switch", Roller485Util.Switch.Off)
+        with sched:
+            status.result(timeout=1)
+        assert mock_bus.calls == ["motor_switch", "get_motor_status"]
+
+
+class TestDeadline:
+    """期限切れのテレメトリが送信されずに破棄されることを検証."""
+
+    def test_stale_telemetry_dropped(self, mock_bus: MagicMock) -> None:
+        sched = CommandScheduler(mock_bus, telemetry_deadline=0.001)
+        f = sched.submit("get_motor_status")
+        time.sleep(0.01)
+        with sched:
+            with pytest.raises(DeadlineExceededError):
+                f.result(timeout=1)
+
+        mock_bus.get_motor_status.assert_not_called()
+        assert sched.latency_stats()["Telemetry"]["dropped"] == 1
+
+    def test_setpoints_have_no_default_deadline(self, mock_bus: MagicMock) -> None:
+        sched = CommandScheduler(mock_bus, telemetry_deadline=0.001)
+        f = sched.submit("set_speed_and_max_current", 100, 500)
+        time.sleep(0.01)
+        with sched:
+            assert f.result(timeout=1) == "set_speed_and_max_current"
+
+
+class TestStats:
+    """キュー待ち時間の統計と例外の伝搬."""
+
+    def test_latency_stats(self, mock_bus: MagicMock) -> None:
+        with CommandScheduler(mock_bus) as sched:
+            sched.submit("set_speed_and_max_current", 100, 500).result(timeout=1)
+            stats = sched.latency_stats()
+
+        assert set(stats) == {p.name for p in Priority}
+        assert stats["Control"]["count"] == 1
+        assert stats["Control"]["max"] >= stats["Control"]["mean"] >= 0.0
+        assert stats["Safety"]["count"] == 0
+
+    def test_exception_propagates(self, mock_bus: MagicMock) -> None:
+        mock_bus.get_motor_status.side_effect = OSError("port closed")
+        with CommandScheduler(mock_bus, telemetry_deadline=None) as sched:
+            f = sched.submit("get_motor_status")
+            with pytest.raises(OSError):
+                f.result(timeout=1)
+
+    def test_stop_cancels_pending(self, mock_bus: MagicMock) -> None:
+        sched = CommandScheduler(mock_bus)
+        f = sched.submit("set_speed_pid", 1.0, 0.0, 0.0)
+        sched.stop()
+        assert f.cancelled()
+        assert sched.pending == 0
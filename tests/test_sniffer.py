@@ -0,0 +1,163 @@
+"""FrameSplitter / Sniffer のテスト — エミュレータの送受信バイト列を分割."""
+
+from __future__ import annotations
+
+import random
+import time
+from pathlib import Path
+
+import pytest
+
+from roller485.capture import RX, TX, CaptureWriter, read_capture
+from roller485.emulator import VirtualRoller485
+from roller485.roller485_protocol import Roller485Protocol as Proto
+from roller485.sniffer import FrameSplitter, Sniffer
+from roller485.util import Roller485Util
+
+C = Proto.CommandCode
+
+
+def _traffic() -> list[bytes]:
+    """エミュレータとの往復で送受信したフレーム (送信順)"""
+    bus = VirtualRoller485(device_ids=[0, 1])
+    r485 = Roller485Util(target=0, transport=bus)
+    r485._delay = lambda: None  # type: ignore[method-assign]
+    frames: list[bytes] = []
+    write, read = bus.write, bus.read
+
+    def tap_write(data: bytes) -> int:
+        frames.append(bytes(data))
+        return write(data)
+
+    def tap_read(size: int) -> bytes:
+        data = read(size)
+        frames.append(data)
+        return data
+
+    bus.write = tap_write  # type: ignore[method-assign]
+    bus.read = tap_read  # type: ignore[method-assign]
+    r485.get_full_status()
+    r485.set_speed_and_max_current(100, 200.0)
+    r485.readback(C.other_status_readback, device_id=1)
+    r485.write_i2c(0x50, 1, 0x10, b"\x01\x02")
+    r485.read_i2c(0x50, 1, 0x10, 2)
+    r485.read_i2c_raw(0x50, 4)
+    return frames
+
+
+class FakePort:
+    def __init__(self, data: bytes, chunk: int = 7):
+        self.data = data
+        self.chunk = chunk
+        self.written = b""
+
+    @property
+    def in_waiting(self) -> int:
+        return min(self.chunk, len(self.data))
+
+    def read(self, size: int) -> bytes:
+        out, self.data = self.data[:size], self.data[size:]
+        return out
+
+    def write(self, data: bytes) -> int:  # pragma: no cover - 呼ばれてはいけない
+        self.written += data
+        return len(data)
+
+
+class TestFrameSplitter:
+    def test_splits_both_directions(self) -> None:
+        traffic = _traffic()
+        stream = b"".join(traffic)
+        splitter = FrameSplitter(gap_ns=None)
+        rng = random.Random(0)
+        frames = []
+        pos = 0
+        while pos < len(stream):
+            n = rng.randint(1, 30)
+            frames += splitter.feed(stream[pos : pos + n], 0)
+            pos += n
+
+        assert [f.data for f in frames] == traffic
+        assert all(f.crc_ok for f in frames)
+        assert [f.direction for f in frames] == [TX, RX] * (len(traffic) // 2)
+        assert splitter.garbage_bytes == 0
+
+    def test_decode(self) -> None:
+        traffic = _traffic()
+        frames = FrameSplitter().feed(b"".join(traffic[:2]), 0)
+        request, response = frames
+        assert request.command == C.motor_status_readback
+        assert response.command == C.motor_status_readback_resp
+        assert response.device_id == 0
+        assert response.decode()["mode"] == 1
+        assert response.as_dict()["command"] == "motor_status_readback_resp"
+        assert "motor_status_readback_resp" in response.format()
+
+    def test_garbage_and_bad_crc(self) -> None:
+        traffic = _traffic()
+        bad = traffic[1][:-1] + bytes([traffic[1][-1] ^ 0xFF])
+        splitter = FrameSplitter()
+        frames = splitter.feed(b"\xff\xaa\x00" + traffic[0] + bad, 0)
+
+        assert [f.crc_ok for f in frames] == [True, False]
+        assert splitter.garbage_bytes == 3
+        assert splitter.crc_errors == 1
+
+    def test_bad_request_resyncs(self) -> None:
+        traffic = _traffic()
+        bad = traffic[0][:-1] + bytes([traffic[0][-1] ^ 0xFF])
+        splitter = FrameSplitter()
+        frames = splitter.feed(bad + traffic[0] + traffic[1], 0)
+
+        assert [f.data for f in frames] == traffic[:2]
+        assert splitter.garbage_bytes == len(bad)
+
+    def test_gap_discards_partial_frame(self) -> None:
+        traffic = _traffic()
+        splitter = FrameSplitter(gap_ns=1_000_000)
+        assert splitter.feed(traffic[1][:10], 0) == []
+        frames = splitter.feed(traffic[0], 5_000_000)
+        assert [f.data for f in frames] == [traffic[0]]
+        assert splitter.garbage_bytes == 10
+
+    def test_keeps_up_with_line_rate(self) -> None:
+        stream = b"".join(_traffic()) * 500
+        splitter = FrameSplitter(gap_ns=None)
+        start = time.perf_counter()
+        for pos in range(0, len(stream), 64):
+            splitter.feed(stream[pos : pos + 64], 0)
+        elapsed = time.perf_counter() - start
+
+        wire_time = len(stream) * 10 / 115200
+        assert elapsed < wire_time / 5
+
+
+class TestSniffer:
+    def test_run_and_capture(self, tmp_path: Path) -> None:
+        traffic = _traffic()
+        port = FakePort(b"".join(traffic))
+        path = str(tmp_path / "sniff.cap")
+        seen = []
+        with CaptureWriter(path, port_id=2) as capture:
+            sniffer = Sniffer(port, on_frame=seen.append, capture=capture, gap_ns=None)
+            assert sniffer.run(count=len(traffic)) == len(traffic)
+
+        assert port.written == b""
+        assert [f.data for f in seen] == traffic
+        records = list(read_capture(path))
+        assert [r.data for r in records] == traffic
+        assert records[0].direction == TX and records[1].direction == RX
+        assert sniffer.stats() == {
+            "frames": len(traffic),
+            "crc_errors": 0,
+            "garbage_bytes": 0,
+        }
+
+    def test_stop(self) -> None:
+        sniffer = Sniffer(FakePort(b""))
+        sniffer.stop()
+        assert list(sniffer.frames()) == []
+
+    @pytest.mark.parametrize("duration", [0.0])
+    def test_duration(self, duration: float) -> None:
+        assert Sniffer(FakePort(b"")).run(duration=duration) == 0
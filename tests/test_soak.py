@@ -0,0 +1,133 @@
+"""SoakHarness のテスト."""
+
+from __future__ import annotations
+
+import json
+import sys
+
+import pytest
+
+import roller485.soak
+
+from roller485.cli import create_parser, run
+from roller485.faults import FaultConfig, FaultInjector
+from roller485.soak import (
+    SoakHarness,
+    SoakReport,
+    SoakSample,
+    SoakThresholds,
+    current_rss,
+    emulated_client,
+)
+
+
+def _sample(elapsed: float, throughput: float, rss: int, objects: int) -> SoakSample:
+    return SoakSample(elapsed, int(throughput), 0, throughput, None, None, rss, objects)
+
+
+class TestSoakHarness:
+    def test_run_samples_every_interval(self) -> None:
+        bus, r485 = emulated_client((0, 1))
+        seen = []
+        report = SoakHarness(r485, device_ids=(0, 1)).run(
+            0.3, interval=0.1, on_sample=seen.append
+        )
+
+        assert report.passed, report.failures
+        assert report.samples == seen
+        assert 3 <= len(report.samples) <= 4
+        assert report.operations == sum(s.operations for s in report.samples) > 0
+        assert report.errors == 0
+        assert bus.requests == report.operations
+        assert report.samples[0].rtt_p99 is not None
+        assert report.samples[0].rss > 0
+        assert r485.target == 0
+
+    def test_mix_selects_operations(self) -> None:
+        bus, r485 = emulated_client()
+        SoakHarness(r485, mix={"i2c": 1.0, "setpoint": 0}).run(0.05)
+        # 書き込んだ I2C レジスタと、セットポイントを送っていない速度
+        assert 0x50 in bus.devices[0].i2c_registers
+        assert bus.devices[0].speed == 0
+
+    def test_unknown_operation(self) -> None:
+        _, r485 = emulated_client()
+        with pytest.raises(ValueError):
+            SoakHarness(r485, mix={"flash": 1.0})
+        with pytest.raises(ValueError):
+            SoakHarness(r485, mix={"readback": 0})
+
+    def test_errors_fail_the_run(self) -> None:
+        bus, r485 = emulated_client()
+        bus.timeout = 0.001
+        faulty = FaultInjector(bus, FaultConfig(drop=0.5), seed=1)
+        r485._transport = faulty
+        report = SoakHarness(r485, mix={"readback": 1.0}).run(0.2, interval=0.1)
+
+        assert report.errors > 0
+        assert not report.passed
+        assert "error rate" in report.failures[0]
+        assert "FAIL" in report.format()
+
+    def test_check_detects_growth_and_slowdown(self) -> None:
+        _, r485 = emulated_client()
+        harness = SoakHarness(r485, thresholds=SoakThresholds(max_rss_growth=1000))
+        report = SoakReport(300, 0, 3.0)
+        report.samples = [
+            _sample(1.0, 100.0, 10_000, 1000),
+            _sample(2.0, 90.0, 10_500, 1100),
+            _sample(3.0, 10.0, 20_000, 5000),
+        ]
+        # 最後の (端数の) 区間は比較しない
+        assert harness.check(report) == []
+
+        report.samples.insert(2, _sample(2.5, 40.0, 12_000, 1300))
+        failures = harness.check(report)
+        assert len(failures) == 3
+        assert any("RSS" in f for f in failures)
+        assert any("objects" in f for f in failures)
+        assert any("throughput" in f for f in failures)
+
+    def test_current_rss(self) -> None:
+        assert current_rss() > 1 << 20
+
+    def test_current_rss_without_resource(self, monkeypatch) -> None:
+        def no_proc(*args, **kwargs):
+            raise OSError("no /proc")
+
+        monkeypatch.setattr(roller485.soak, "open", no_proc, raising=False)
+        monkeypatch.setitem(sys.modules, "resource", None)
+        assert current_rss() == 0
+
+
+class TestSoakCli:
+    def test_soak_writes_json(self, tmp_path, capsys) -> None:
+        out = tmp_path / "soak.json"
+        args = create_parser().parse_args(
+            [
+                "soak",
+                "--duration",
+                "0.2",
+                "--interval",
+                "0.1",
+                "--warmup",
+                "0",
+                "--devices",
+                "2",
+                "--mix",
+                "readback=1",
+                "--json",
+                str(out),
+            ]
+        )
+        assert args.port is None
+        assert run(args) == 0
+        assert "PASS" in capsys.readouterr().out
+        report = json.loads(out.read_text())
+        assert report["passed"] is True
+        assert report["samples"]
+
+    def test_soak_rejects_unknown_operation(self, capsys) -> None:
+        args = create_parser().parse_args(["soak", "--mix", "flash=1"])
+        assert run(args) == 2
+        assert "unknown operations" in capsys.readouterr().err
@@ -0,0 +1,182 @@
+"""TelemetryScheduler のテスト — 時刻と Roller485Util をモックして検証."""
+
+from __future__ import annotations
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from roller485.clock import VirtualClock
+from roller485.roller485_protocol import Roller485Protocol as Proto
+from roller485.telemetry import TelemetryScheduler
+from roller485.util import Roller485Util
+
+MOTOR = Proto.CommandCode.motor_status_readback
+OTHER = Proto.CommandCode.other_status_readback
+PID = Proto.CommandCode.readback_2
+
+
+class FakeClock:
+    """time.monotonic() の代わりに使う手動時計."""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture()
+def clock():
+    c = FakeClock()
+    with patch("roller485.clock.time.monotonic", c):
+        yield c
+
+
+@pytest.fixture()
+def mock_bus() -> MagicMock:
+    bus = MagicMock(spec=Roller485Util)
+    bus.readback.side_effect = lambda command, device_id=None, delay=True: {
+        "command": command,
+        "device_id": device_id,
+    }
+    return bus
+
+
+class TestCapacity:
+    """要求レートとバス容量の見積もり."""
+
+    def test_utilization(self, mock_bus: MagicMock, clock: FakeClock) -> None:
+        sched = TelemetryScheduler(mock_bus, baudrate=115200, headroom=0.8)
+        report = sched.add(0, MOTOR, period=0.01)
+
+        assert report.capacity == pytest.approx(115200 / 10 * 0.8)
+        assert report.demand == pytest.approx(24 * 100)
+        assert report.utilization == pytest.approx(2400 / 9216)
+        assert report.overloaded is False
+
+    def test_on_change_tasks_not_counted(
+        self, mock_bus: MagicMock, clock: FakeClock
+    ) -> None:
+        sched = TelemetryScheduler(mock_bus, baudrate=115200)
+        assert sched.add(0, PID, period=None).demand == 0.0
+
+    def test_overload_reported(self, mock_bus: MagicMock, clock: FakeClock) -> None:
+        reports = []
+        sched = TelemetryScheduler(mock_bus, baudrate=9600, on_overload=reports.append)
+        for device_id in range(10):
+            sched.add(device_id, MOTOR, period=0.01)
+
+        assert reports
+        assert reports[-1].overloaded is True
+        assert reports[-1].utilization > 1.0
+
+    def test_invalid_command(self, mock_bus: MagicMock, clock: FakeClock) -> None:
+        sched = TelemetryScheduler(mock_bus, baudrate=115200)
+        with pytest.raises(ValueError):
+            sched.add(0, Proto.CommandCode.motor_switch, period=1.0)
+        with pytest.raises(ValueError):
+            sched.add(0, MOTOR, period=0)
+
+
+class TestStep:
+    """step() による送信順序と再スケジュール."""
+
+    def test_periodic_rates(self, mock_bus: MagicMock, clock: FakeClock) -> None:
+        """周期の短いタスクほど多く読み出される."""
+        samples = []
+        sched = TelemetryScheduler(mock_bus, on_sample=samples.append, baudrate=115200)
+        sched.add(0, MOTOR, period=0.01)
+        sched.add(0, OTHER, period=0.1)
+
+        for _ in range(100):
+            while sched.step() is not None:
+                pass
+            clock.now += 0.001
+
+        counts = {s["command"]: s["samples"] for s in sched.stats()}
+        assert counts["motor_status_readback"] == 10
+        assert counts["other_status_readback"] == 1
+        assert len(samples) == 11
+        assert sched.latest[(0, MOTOR)].data["device_id"] == 0
+
+    def test_interleaves_devices(self, mock_bus: MagicMock, clock: FakeClock) -> None:
+        sched = TelemetryScheduler(mock_bus, baudrate=115200)
+        sched.add(1, MOTOR, period=0.01)
+        sched.add(2, MOTOR, period=0.01)
+
+        first = sched.step()
+        second = sched.step()
+        assert first is not None and second is not None
+        assert {first.device_id, second.device_id} == {1, 2}
+        assert sched.step() is None
+        mock_bus.readback.assert_called_with(MOTOR, device_id=2, delay=False)
+
+    def test_on_change_task(self, mock_bus: MagicMock, clock: FakeClock) -> None:
+        """period=None のタスクは最初と invalidate() 後だけ読み出される."""
+        sched = TelemetryScheduler(mock_bus, baudrate=115200)
+        sched.add(0, PID, period=None)
+
+        assert sched.step() is not None
+        clock.now += 10
+        assert sched.step() is None
+
+        sched.invalidate(0)
+        assert sched.step() is not None
+        assert sched.next_wakeup() is None
+
+    def test_byte_budget(self, mock_bus: MagicMock, clock: FakeClock) -> None:
+        """バイト予算を使い切ると、補充されるまで送信しない."""
+        sched = TelemetryScheduler(mock_bus, baudrate=9600, headroom=0.1)
+        for device_id in range(8):
+            sched.add(device_id, MOTOR, period=0.01)
+
+        sent = 0
+        while sched.step() is not None:
+            sent += 1
+        assert sent == 4  # トークンバケットの上限 (4 往復分)
+
+        clock.now += 24 / (9600 / 10 * 0.1)
+        assert sched.step() is not None
+
+    def test_late_counted(self, mock_bus: MagicMock, clock: FakeClock) -> None:
+        sched = TelemetryScheduler(mock_bus, baudrate=115200)
+        sched.add(0, MOTOR, period=0.01)
+        sched.step()
+        clock.now += 0.05
+        sched.step()
+        assert sched.stats()[0]["late"] == 1
+
+    def test_due_at_zero_keeps_schedule(self, mock_bus: MagicMock) -> None:
+        """next_due == 0.0 も期限として扱い、実行時刻からずらさない."""
+        clock = VirtualClock()
+        sched = TelemetryScheduler(mock_bus, baudrate=115200, clock=clock)
+        sched.add(0, MOTOR, period=0.01)
+        sched.add(1, MOTOR, period=0.01)
+        clock.advance(0.004)
+
+        assert sched.step() is not None
+        assert sched.step() is not None
+        assert sched.next_wakeup() == pytest.approx(0.01)
+
+    def test_remove(self, mock_bus: MagicMock, clock: FakeClock) -> None:
+        sched = TelemetryScheduler(mock_bus, baudrate=115200)
+        sched.add(0, MOTOR, period=0.01)
+        sched.remove(0, MOTOR)
+        assert sched.step() is None
+        assert sched.stats() == []
+
+
+class TestRun:
+    def test_run_for_duration(self, mock_bus: MagicMock) -> None:
+        sched = TelemetryScheduler(mock_bus, baudrate=115200)
+        sched.add(0, MOTOR, period=0.01)
+        sched.run(duration=0.05)
+        assert 1 <= sched.stats()[0]["samples"] <= 10
+
+    def test_start_stop(self, mock_bus: MagicMock) -> None:
+        sched = TelemetryScheduler(mock_bus, baudrate=115200)
+        sched.add(0, PID, period=None)
+        sched.start()
+        sched.stop()
+        assert sched._thread is None
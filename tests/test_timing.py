@@ -0,0 +1,105 @@
+"""BusTiming / CapacityPlanner のテスト."""
+
+from __future__ import annotations
+
+import pytest
+
+from roller485.roller485_protocol import Roller485Protocol as Proto
+from roller485.timing import (
+    BusTiming,
+    CapacityPlanner,
+    exchange_bytes,
+    request_commands,
+    response_command,
+)
+
+MOTOR = Proto.CommandCode.motor_status_readback
+OTHER = Proto.CommandCode.other_status_readback
+
+
+class TestCommands:
+    def test_response_command(self) -> None:
+        assert response_command(Proto.CommandCode.motor_switch) == (
+            Proto.CommandCode.motor_switch_resp
+        )
+        assert response_command(Proto.CommandCode.i2c_write_raw) == (
+            Proto.CommandCode.i2c_write_raw_resp
+        )
+
+    def test_request_commands(self) -> None:
+        commands = request_commands()
+        assert len(commands) == 24
+        assert all(not c.value & 0x10 for c in commands)
+
+    def test_exchange_bytes(self) -> None:
+        """リクエスト 4 バイト + レスポンス 20 バイト."""
+        assert exchange_bytes(MOTOR) == 24
+        assert exchange_bytes(Proto.CommandCode.speed_control) == 15 + 17
+
+
+class TestBusTiming:
+    """ワイヤ時間の計算."""
+
+    @pytest.mark.parametrize("baudrate", [9600, 19200, 115200])
+    def test_byte_time(self, baudrate: int) -> None:
+        assert BusTiming(baudrate).byte_time == pytest.approx(10 / baudrate)
+
+    def test_frame_time(self) -> None:
+        timing = BusTiming(9600)
+        assert timing.frame_time(MOTOR) == pytest.approx(4 * 10 / 9600)
+        assert timing.frame_time(Proto.CommandCode.motor_status_readback_resp) == (
+            pytest.approx(20 * 10 / 9600)
+        )
+
+    def test_exchange_time(self) -> None:
+        timing = BusTiming(115200, turnaround=0.001, host_gap=0.0002)
+        expected = 24 * 10 / 115200 + 0.001 + 0.0002
+        assert timing.exchange_time(MOTOR) == pytest.approx(expected)
+        assert timing.max_rate(MOTOR) == pytest.approx(1 / expected)
+
+    def test_host_delay_dominates(self) -> None:
+        """同期 API の _delay() がある場合は turnaround より長く待つ."""
+        timing = BusTiming(115200, turnaround=0.001, host_gap=0.0, host_delay=0.05)
+        assert timing.exchange_time(MOTOR) == pytest.approx(24 * 10 / 115200 + 0.05)
+
+    def test_table(self) -> None:
+        table = BusTiming().table()
+        assert len(table) == 24
+        row = next(r for r in table if r["command"] == "motor_status_readback")
+        assert row["request_bytes"] == 4
+        assert row["response_bytes"] == 20
+
+
+class TestCapacityPlanner:
+    """容量計画."""
+
+    def test_uniform_plan(self) -> None:
+        timing = BusTiming(115200, turnaround=0.0, host_gap=0.0)
+        plan = CapacityPlanner(timing).plan(4, {MOTOR: 100, OTHER: 1})
+
+        motor_util = 4 * 100 * timing.exchange_time(MOTOR)
+        other_util = 4 * 1 * timing.exchange_time(OTHER)
+        assert plan.utilization == pytest.approx(motor_util + other_util)
+        assert plan.max_scale == pytest.approx(1 / plan.utilization)
+        assert plan.max_devices == int(4 / plan.utilization)
+        assert plan.feasible is True
+        assert [e.command for e in plan.entries] == [MOTOR, OTHER]
+        assert plan.entries[0].devices == 4
+
+    def test_overloaded(self) -> None:
+        plan = CapacityPlanner(BusTiming(9600)).plan(8, {MOTOR: 100})
+        assert plan.feasible is False
+        assert "OVERLOADED" in plan.format()
+
+    def test_per_device(self) -> None:
+        timing = BusTiming(115200)
+        plan = CapacityPlanner(timing).plan_per_device(
+            [(0, MOTOR, 100), (1, MOTOR, 50)]
+        )
+        assert plan.entries[0].rate == pytest.approx(75)
+        assert plan.utilization == pytest.approx(150 * timing.exchange_time(MOTOR))
+
+    def test_empty(self) -> None:
+        plan = CapacityPlanner().plan(0, {})
+        assert plan.utilization == 0.0
+        assert plan.feasible is True
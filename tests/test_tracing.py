@@ -0,0 +1,106 @@
+"""Tracer のテスト — エミュレータとの往復のフェーズを記録."""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from roller485.emulator import VirtualRoller485
+from roller485.roller485_protocol import Roller485Protocol as Proto
+from roller485.tracing import Tracer, phase_summary
+from roller485.util import Roller485Util
+
+C = Proto.CommandCode
+
+
+@pytest.fixture()
+def r485() -> Roller485Util:
+    r = Roller485Util(target=0, transport=VirtualRoller485(device_ids=[0, 1]))
+    r._delay = lambda: None  # type: ignore[method-assign]
+    r.tracer = Tracer()
+    return r
+
+
+class TestPhases:
+    def test_readback_phases(self, r485: Roller485Util) -> None:
+        r485.get_motor_status()
+        spans = r485.tracer.snapshot()
+
+        assert sorted(s.name for s in spans) == sorted(
+            ["encode", "exchange", "write", "delay", "wait", "decode"]
+        )
+        assert {(s.device_id, s.command) for s in spans} == {
+            (0, C.motor_status_readback)
+        }
+        by_name = {s.name: s for s in spans}
+        exchange = by_name["exchange"]
+        assert by_name["encode"].end_ns <= exchange.start_ns
+        assert exchange.start_ns == by_name["write"].start_ns
+        assert by_name["wait"].end_ns == exchange.end_ns
+        assert exchange.end_ns <= by_name["decode"].start_ns
+
+    def test_no_delay_phase(self, r485: Roller485Util) -> None:
+        r485.readback(C.readback_2, device_id=1, delay=False)
+        names = [s.name for s in r485.tracer.snapshot()]
+        assert "delay" not in names
+        assert {s.device_id for s in r485.tracer.snapshot()} == {1}
+
+    @pytest.mark.parametrize(
+        "call, command",
+        [
+            (lambda r: r.set_current(10.0), C.current_control),
+            (lambda r: r.read_i2c(0x50, 0, 0x00, 2), C.i2c_read_register),
+            (lambda r: r.write_i2c_raw(0x50, 1, b"\x01"), C.i2c_write_raw),
+        ],
+    )
+    def test_other_operations(self, r485: Roller485Util, call, command) -> None:
+        call(r485)
+        spans = r485.tracer.snapshot()
+        assert {s.command for s in spans} == {command}
+        assert {"encode", "decode", "wait"} <= {s.name for s in spans}
+
+    def test_disabled(self) -> None:
+        r485 = Roller485Util(target=0, transport=VirtualRoller485())
+        r485._delay = lambda: None  # type: ignore[method-assign]
+        assert r485.get_motor_status()
+
+
+class TestTracer:
+    def test_bounded_buffer(self) -> None:
+        tracer = Tracer(capacity=3)
+        for i in range(5):
+            tracer.add("write", i, i + 1, 0, C.motor_switch)
+        assert [s.start_ns for s in tracer.snapshot()] == [2, 3, 4]
+        assert tracer.dropped == 2
+
+        tracer.clear()
+        assert tracer.snapshot() == []
+        assert tracer.dropped == 0
+
+    def test_chrome_export(self, r485: Roller485Util, tmp_path: Path) -> None:
+        r485.get_motor_status()
+        r485.readback(C.other_status_readback, device_id=1)
+        path = tmp_path / "trace.json"
+        r485.tracer.export_chrome(str(path))
+
+        trace = json.loads(path.read_text())
+        complete = [e for e in trace["traceEvents"] if e["ph"] == "X"]
+        assert len(complete) == 12
+        assert {e["tid"] for e in complete} == {0, 1}
+        assert all(e["dur"] >= 0 and e["ts"] >= 0 for e in complete)
+        assert complete[0]["args"]["command"] == "motor_status_readback"
+        names = {
+            e["args"]["name"]
+            for e in trace["traceEvents"]
+            if e["name"] == "thread_name"
+        }
+        assert names == {"device 0", "device 1"}
+
+    def test_phase_summary(self) -> None:
+        tracer = Tracer()
+        tracer.add("wait", 0, 100, 0, C.readback_2)
+        tracer.add("wait", 0, 300, 0, C.readback_2)
+        summary = phase_summary(tracer.snapshot())
+        assert summary == {"wait": {"count": 2, "total_ns": 400, "max_ns": 300}}
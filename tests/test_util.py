@@ -3,10 +3,12 @@
 from __future__ import annotations
 
 import struct
-from unittest.mock import patch
+from unittest.mock import PropertyMock, patch
 
 import pytest
 
+from roller485.clock import VirtualClock
+from roller485.emulator import VirtualRoller485
 from roller485.roller485_protocol import Roller485Protocol as Proto
 from roller485.util import Roller485Util
 
@@ -128,7 +130,7 @@ class TestSettingResp:
 class TestMotorSwitch:
     """motor_switch() のテスト."""
 
-    @patch("roller485.util.time.sleep")
+    @patch("roller485.clock.time.sleep")
     def test_motor_switch_on(self, _mock_sleep, mock_roller: Roller485Util) -> None:
         resp = build_setting_response(Proto.CommandCode.motor_switch_resp, data1=1)
         mock_roller.read.return_value = resp  # type: ignore[attr-defined]
@@ -137,7 +139,7 @@ class TestMotorSwitch:
         assert result is True
         mock_roller.write.assert_called_once()  # type: ignore[attr-defined]
 
-    @patch("roller485.util.time.sleep")
+    @patch("roller485.clock.time.sleep")
     def test_motor_switch_off(self, _mock_sleep, mock_roller: Roller485Util) -> None:
         resp = build_setting_response(Proto.CommandCode.motor_switch_resp, data1=0)
         mock_roller.read.return_value = resp  # type: ignore[attr-defined]
@@ -149,7 +151,7 @@ class TestMotorSwitch:
 class TestModeSetting:
     """mode_setting() のテスト."""
 
-    @patch("roller485.util.time.sleep")
+    @patch("roller485.clock.time.sleep")
     def test_set_speed_mode(self, _mock_sleep, mock_roller: Roller485Util) -> None:
         resp = build_setting_response(Proto.CommandCode.mode_setting_resp, data1=1)
         mock_roller.read.return_value = resp  # type: ignore[attr-defined]
@@ -157,7 +159,7 @@ class TestModeSetting:
         result = mock_roller.mode_setting(Roller485Util.MotorMode.Speed)
         assert result is True
 
-    @patch("roller485.util.time.sleep")
+    @patch("roller485.clock.time.sleep")
     def test_set_position_mode(self, _mock_sleep, mock_roller: Roller485Util) -> None:
         resp = build_setting_response(Proto.CommandCode.mode_setting_resp, data1=2)
         mock_roller.read.return_value = resp  # type: ignore[attr-defined]
@@ -169,7 +171,7 @@ class TestModeSetting:
 class TestSaveToFlash:
     """save_to_flash() のテスト."""
 
-    @patch("roller485.util.time.sleep")
+    @patch("roller485.clock.time.sleep")
     def test_save_success(self, _mock_sleep, mock_roller: Roller485Util) -> None:
         resp = build_setting_response(Proto.CommandCode.save_to_flash_resp, data1=1)
         mock_roller.read.return_value = resp  # type: ignore[attr-defined]
@@ -186,7 +188,7 @@ class TestSaveToFlash:
 class TestSpeedAndMaxCurrent:
     """set_speed_and_max_current() のデータ変換テスト."""
 
-    @patch("roller485.util.time.sleep")
+    @patch("roller485.clock.time.sleep")
     def test_speed_scaling(self, _mock_sleep, mock_roller: Roller485Util) -> None:
         """speed は *100 でスケーリングされる."""
         speed = 100
@@ -209,7 +211,7 @@ class TestSpeedAndMaxCurrent:
         d1 = struct.unpack_from("<i", written, 2)[0]
         assert d1 == expected_speed
 
-    @patch("roller485.util.time.sleep")
+    @patch("roller485.clock.time.sleep")
     def test_speed_clipping_upper(
         self, _mock_sleep, mock_roller: Roller485Util
     ) -> None:
@@ -230,7 +232,7 @@ class TestSpeedAndMaxCurrent:
         d1 = struct.unpack_from("<i", written, 2)[0]
         assert d1 == expected_speed
 
-    @patch("roller485.util.time.sleep")
+    @patch("roller485.clock.time.sleep")
     def test_speed_clipping_lower(
         self, _mock_sleep, mock_roller: Roller485Util
     ) -> None:
@@ -255,7 +257,7 @@ class TestSpeedAndMaxCurrent:
 class TestSpeedPid:
     """set_speed_pid() / set_position_pid() のスケーリングテスト."""
 
-    @patch("roller485.util.time.sleep")
+    @patch("roller485.clock.time.sleep")
     def test_pid_scaling(self, _mock_sleep, mock_roller: Roller485Util) -> None:
         """PID 値は *100_000 でスケーリングされる."""
         p, i, d = 1.5, 0.1, 0.05
@@ -286,7 +288,7 @@ class TestSpeedPid:
 class TestRgbLedControl:
     """rgb_led_control() のエンコードテスト."""
 
-    @patch("roller485.util.time.sleep")
+    @patch("roller485.clock.time.sleep")
     def test_rgb_encoding(self, _mock_sleep, mock_roller: Roller485Util) -> None:
         """r, g, b, mode が data1 に正しくエンコードされる."""
         r, g, b, mode, brightness = 255, 128, 64, 1, 80
@@ -305,7 +307,7 @@ class TestRgbLedControl:
         )
         assert result is True
 
-    @patch("roller485.util.time.sleep")
+    @patch("roller485.clock.time.sleep")
     def test_rgb_clipping(self, _mock_sleep, mock_roller: Roller485Util) -> None:
         """RGB 値は 0-255、brightness は 0-100 にクリッピングされる."""
         # 上限超過
@@ -336,7 +338,7 @@ class TestRgbLedControl:
 class TestSetCurrent:
     """set_current() のスケーリングテスト."""
 
-    @patch("roller485.util.time.sleep")
+    @patch("roller485.clock.time.sleep")
     def test_current_scaling(self, _mock_sleep, mock_roller: Roller485Util) -> None:
         """current は *100 でスケーリングされる."""
         current = 500.5
@@ -350,7 +352,7 @@ class TestSetCurrent:
         result = mock_roller.set_current(current)
         assert result is True
 
-    @patch("roller485.util.time.sleep")
+    @patch("roller485.clock.time.sleep")
     def test_current_clipping(self, _mock_sleep, mock_roller: Roller485Util) -> None:
         """current は -1200〜1200 にクリッピングされる."""
         current = 9999.0
@@ -373,7 +375,7 @@ class TestSetCurrent:
 class TestGetMotorStatus:
     """get_motor_status() のテスト."""
 
-    @patch("roller485.util.time.sleep")
+    @patch("roller485.clock.time.sleep")
     def test_successful_read(self, _mock_sleep, mock_roller: Roller485Util) -> None:
         """正常なレスポンスから dict を返す."""
         speed = 10000  # 100.00 RPM
@@ -398,7 +400,7 @@ class TestGetMotorStatus:
         assert result["status"] == 0
         assert result["error"] == 0
 
-    @patch("roller485.util.time.sleep")
+    @patch("roller485.clock.time.sleep")
     def test_bad_crc_returns_empty(
         self, _mock_sleep, mock_roller: Roller485Util
     ) -> None:
@@ -420,7 +422,7 @@ class TestGetMotorStatus:
 class TestGetOtherStatus:
     """get_other_status() のテスト."""
 
-    @patch("roller485.util.time.sleep")
+    @patch("roller485.clock.time.sleep")
     def test_successful_read(self, _mock_sleep, mock_roller: Roller485Util) -> None:
         vin_x100 = 1200  # 12.00 V
         temp = 35
@@ -455,7 +457,7 @@ class TestGetOtherStatus:
 class TestGetSpeedPidAndRgb:
     """get_speed_pid_and_rgb() のテスト."""
 
-    @patch("roller485.util.time.sleep")
+    @patch("roller485.clock.time.sleep")
     def test_successful_read(self, _mock_sleep, mock_roller: Roller485Util) -> None:
         speed_p = 150_000  # 1.50000
         speed_i = 10_000  # 0.10000
@@ -483,7 +485,7 @@ class TestGetSpeedPidAndRgb:
 class TestGetPositionPidAndOther:
     """get_position_pid_and_other() のテスト."""
 
-    @patch("roller485.util.time.sleep")
+    @patch("roller485.clock.time.sleep")
     def test_successful_read(self, _mock_sleep, mock_roller: Roller485Util) -> None:
         position_p = 200_000
         position_i = 5_000
@@ -524,7 +526,7 @@ class TestGetPositionPidAndOther:
 class TestRemoveProtection:
     """remove_protection() のテスト."""
 
-    @patch("roller485.util.time.sleep")
+    @patch("roller485.clock.time.sleep")
     def test_remove_protection(self, _mock_sleep, mock_roller: Roller485Util) -> None:
         resp = build_setting_response(
             Proto.CommandCode.remove_protection_resp, data2=100
@@ -534,7 +536,7 @@ class TestRemoveProtection:
         result = mock_roller.remove_protection(100)
         assert result is True
 
-    @patch("roller485.util.time.sleep")
+    @patch("roller485.clock.time.sleep")
     def test_clipping(self, _mock_sleep, mock_roller: Roller485Util) -> None:
         """status は 0-255 にクリッピングされる."""
         resp = build_setting_response(
@@ -549,7 +551,7 @@ class TestRemoveProtection:
 class TestSetEncoder:
     """set_encoder() のテスト."""
 
-    @patch("roller485.util.time.sleep")
+    @patch("roller485.clock.time.sleep")
     def test_set_encoder(self, _mock_sleep, mock_roller: Roller485Util) -> None:
         resp = build_setting_response(Proto.CommandCode.encoder_resp, data1=12345)
         mock_roller.read.return_value = resp  # type: ignore[attr-defined]
@@ -561,7 +563,7 @@ class TestSetEncoder:
 class TestButtonSwitchingMode:
     """button_switching_mode() のテスト."""
 
-    @patch("roller485.util.time.sleep")
+    @patch("roller485.clock.time.sleep")
     def test_button_mode_on(self, _mock_sleep, mock_roller: Roller485Util) -> None:
         resp = build_setting_response(
             Proto.CommandCode.button_switch_mode_resp, data1=1
@@ -575,7 +577,7 @@ class TestButtonSwitchingMode:
 class TestSetDeviceId:
     """set_device_id() のテスト."""
 
-    @patch("roller485.util.time.sleep")
+    @patch("roller485.clock.time.sleep")
     def test_set_device_id(self, _mock_sleep, mock_roller: Roller485Util) -> None:
         resp = build_setting_response(Proto.CommandCode.device_id_resp, data1=5)
         mock_roller.read.return_value = resp  # type: ignore[attr-defined]
@@ -583,7 +585,7 @@ class TestSetDeviceId:
         result = mock_roller.set_device_id(5)
         assert result is True
 
-    @patch("roller485.util.time.sleep")
+    @patch("roller485.clock.time.sleep")
     def test_device_id_clipping(self, _mock_sleep, mock_roller: Roller485Util) -> None:
         resp = build_setting_response(Proto.CommandCode.device_id_resp, data1=255)
         mock_roller.read.return_value = resp  # type: ignore[attr-defined]
@@ -595,7 +597,7 @@ class TestSetDeviceId:
 class TestMotorJamProtection:
     """set_motor_jam_protection() のテスト."""
 
-    @patch("roller485.util.time.sleep")
+    @patch("roller485.clock.time.sleep")
     def test_enable(self, _mock_sleep, mock_roller: Roller485Util) -> None:
         resp = build_setting_response(
             Proto.CommandCode.motor_jam_protection_resp, data1=1
@@ -605,7 +607,7 @@ class TestMotorJamProtection:
         result = mock_roller.set_motor_jam_protection(True)
         assert result is True
 
-    @patch("roller485.util.time.sleep")
+    @patch("roller485.clock.time.sleep")
     def test_disable(self, _mock_sleep, mock_roller: Roller485Util) -> None:
         resp = build_setting_response(
             Proto.CommandCode.motor_jam_protection_resp, data1=0
@@ -619,7 +621,7 @@ class TestMotorJamProtection:
 class TestPositionOverRangeProtection:
     """set_motor_position_over_range_protection() のテスト."""
 
-    @patch("roller485.util.time.sleep")
+    @patch("roller485.clock.time.sleep")
     def test_enable(self, _mock_sleep, mock_roller: Roller485Util) -> None:
         resp = build_setting_response(
             Proto.CommandCode.motor_position_over_range_protection_resp,
@@ -634,7 +636,7 @@ class TestPositionOverRangeProtection:
 class TestSetRs485BaudRate:
     """set_rs485_baud_rate() のテスト."""
 
-    @patch("roller485.util.time.sleep")
+    @patch("roller485.clock.time.sleep")
     def test_set_baud_115200(self, _mock_sleep, mock_roller: Roller485Util) -> None:
         resp = build_setting_response(Proto.CommandCode.rs485_baud_rate_resp, data1=0)
         mock_roller.read.return_value = resp  # type: ignore[attr-defined]
@@ -646,7 +648,7 @@ class TestSetRs485BaudRate:
 class TestSetPositionAndMaxCurrent:
     """set_position_and_max_current() のテスト."""
 
-    @patch("roller485.util.time.sleep")
+    @patch("roller485.clock.time.sleep")
     def test_position_scaling(self, _mock_sleep, mock_roller: Roller485Util) -> None:
         position = 500
         max_current = 300.0
@@ -667,7 +669,7 @@ class TestSetPositionAndMaxCurrent:
 class TestSetPositionPid:
     """set_position_pid() のテスト."""
 
-    @patch("roller485.util.time.sleep")
+    @patch("roller485.clock.time.sleep")
     def test_position_pid_scaling(
         self, _mock_sleep, mock_roller: Roller485Util
     ) -> None:
@@ -686,3 +688,296 @@ class TestSetPositionPid:
 
         result = mock_roller.set_position_pid(p, i, d)
         assert result is True
+
+
+# ---------------------------------------------------------------------------
+# fire-and-forget モード
+# ---------------------------------------------------------------------------
+
+
+class TestFireAndForget:
+    """set_fire_and_forget() とエコーの後検証のテスト."""
+
+    def test_setpoint_returns_without_reading(self, mock_roller: Roller485Util) -> None:
+        """書き込み直後に True を返し、read() は呼ばれない."""
+        mock_roller.set_fire_and_forget(True)
+        with patch.object(
+            Roller485Util, "in_waiting", new_callable=PropertyMock, return_value=0
+        ):
+            result = mock_roller.set_current(100)
+
+        assert result is True
+        mock_roller.write.assert_called_once()  # type: ignore[attr-defined]
+        mock_roller.read.assert_not_called()  # type: ignore[attr-defined]
+        assert mock_roller.pending_echoes == 1
+
+    def test_poll_echoes_verifies_success(self, mock_roller: Roller485Util) -> None:
+        """受信したエコーが期待通りなら失敗はカウントされない."""
+        mock_roller.set_fire_and_forget(True)
+        with patch.object(
+            Roller485Util, "in_waiting", new_callable=PropertyMock, return_value=0
+        ):
+            mock_roller.set_current(100)
+        mock_roller.read.return_value = build_setting_response(  # type: ignore[attr-defined]
+            Proto.CommandCode.current_control_resp, data1=10000
+        )
+
+        assert mock_roller.poll_echoes(block=True) == 1
+        assert mock_roller.pending_echoes == 0
+        assert mock_roller.echo_verified == 1
+        assert mock_roller.echo_failures == 0
+
+    def test_poll_echoes_nonblocking_waits_for_bytes(
+        self, mock_roller: Roller485Util
+    ) -> None:
+        """受信バッファにエコーが揃っていなければ読み取らない."""
+        mock_roller.set_fire_and_forget(True)
+        with patch.object(
+            Roller485Util, "in_waiting", new_callable=PropertyMock, return_value=5
+        ):
+            mock_roller.set_current(100)
+            assert mock_roller.poll_echoes() == 0
+
+        mock_roller.read.assert_not_called()  # type: ignore[attr-defined]
+        assert mock_roller.pending_echoes == 1
+
+    def test_failure_callback(self, mock_roller: Roller485Util) -> None:
+        """エコー不一致はコールバックとカウンタで通知される."""
+        failures = []
+        mock_roller.set_fire_and_forget(
+            True, on_failure=lambda echo, reason: failures.append((echo, reason))
+        )
+        with patch.object(
+            Roller485Util, "in_waiting", new_callable=PropertyMock, return_value=0
+        ):
+            mock_roller.set_current(100)
+        mock_roller.read.return_value = build_setting_response(  # type: ignore[attr-defined]
+            Proto.CommandCode.current_control_resp, data1=0
+        )
+
+        mock_roller.poll_echoes(block=True)
+
+        assert mock_roller.echo_failures == 1
+        assert len(failures) == 1
+        echo, reason = failures[0]
+        assert echo.command == Proto.CommandCode.current_control_resp
+        assert echo.data1 == 10000
+        assert reason == "mismatch"
+
+    def test_timeout_reason(self, mock_roller: Roller485Util) -> None:
+        """エコーが届かない場合は timeout として扱う."""
+        failures = []
+        mock_roller.set_fire_and_forget(
+            True, on_failure=lambda echo, reason: failures.append(reason)
+        )
+        with patch.object(
+            Roller485Util, "in_waiting", new_callable=PropertyMock, return_value=0
+        ):
+            mock_roller.set_current(100)
+        mock_roller.read.return_value = b""  # type: ignore[attr-defined]
+
+        mock_roller.poll_echoes(block=True)
+        assert failures == ["timeout"]
+
+    def test_fallback_to_synchronous(self, mock_roller: Roller485Util) -> None:
+        """連続失敗が閾値に達すると同期検証に戻る."""
+        mock_roller.set_fire_and_forget(True, fallback_threshold=2)
+        mock_roller.read.return_value = build_setting_response(  # type: ignore[attr-defined]
+            Proto.CommandCode.current_control_resp, data1=0
+        )
+        with patch.object(
+            Roller485Util, "in_waiting", new_callable=PropertyMock, return_value=17
+        ):
+            mock_roller.set_current(100)
+            mock_roller.set_current(100)
+            assert mock_roller.fire_and_forget is True
+            # 3 回目の送信前に 2 件のエコーが検証されて閾値に到達し、
+            # 3 回目は同期検証になる
+            with patch("roller485.clock.time.sleep"):
+                result = mock_roller.set_current(100)
+
+        assert result is False
+        assert mock_roller.echo_consecutive_failures == 2
+        assert mock_roller.fire_and_forget is False
+        assert mock_roller.pending_echoes == 0
+
+    @patch("roller485.clock.time.sleep")
+    def test_sync_command_drains_pending(
+        self, _mock_sleep, mock_roller: Roller485Util
+    ) -> None:
+        """同期コマンドの前に保留中のエコーが検証される."""
+        mock_roller.set_fire_and_forget(True)
+        with patch.object(
+            Roller485Util, "in_waiting", new_callable=PropertyMock, return_value=0
+        ):
+            mock_roller.set_current(100)
+        mock_roller.read.side_effect = [  # type: ignore[attr-defined]
+            build_setting_response(Proto.CommandCode.current_control_resp, data1=10000),
+            build_setting_response(Proto.CommandCode.motor_switch_resp, data1=0),
+        ]
+
+        assert mock_roller.motor_switch(Roller485Util.Switch.Off) is True
+        assert mock_roller.pending_echoes == 0
+        assert mock_roller.echo_verified == 1
+
+    def test_disable_drains_pending(self, mock_roller: Roller485Util) -> None:
+        """無効化すると保留中のエコーが検証される."""
+        mock_roller.set_fire_and_forget(True)
+        with patch.object(
+            Roller485Util, "in_waiting", new_callable=PropertyMock, return_value=0
+        ):
+            mock_roller.set_current(100)
+        mock_roller.read.return_value = build_setting_response(  # type: ignore[attr-defined]
+            Proto.CommandCode.current_control_resp, data1=10000
+        )
+
+        mock_roller.set_fire_and_forget(False)
+        assert mock_roller.pending_echoes == 0
+        assert mock_roller.fire_and_forget is False
+
+    def test_dead_device_times_out(self) -> None:
+        """応答しないデバイスのエコーは期限を過ぎると timeout になり、同期検証に戻る."""
+        clock = VirtualClock()
+        bus = VirtualRoller485(device_ids=[0], timeout=0.05, clock=clock)
+        r485 = Roller485Util(target=9, transport=bus)
+        r485.clock = clock
+        r485._delay = lambda: None  # type: ignore[method-assign]
+        failures = []
+        r485.set_fire_and_forget(
+            True, on_failure=lambda echo, reason: failures.append(reason)
+        )
+        for _ in range(1000):
+            r485.set_speed_and_max_current(100, 500)
+            assert r485.pending_echoes <= r485.echo_queue_limit
+            clock.advance(0.01)
+
+        assert r485.fire_and_forget is False
+        assert r485.pending_echoes == 0
+        assert failures and set(failures) == {"timeout"}
+        assert clock.monotonic() < 1000 * 0.01 + 1000 * 0.05 + 1.0
+
+    def test_queue_limit_falls_back_to_sync(self) -> None:
+        """検証待ちが上限に達すると同期検証で送信する."""
+        bus = VirtualRoller485(device_ids=[0])
+        r485 = Roller485Util(target=0, transport=bus)
+        r485._delay = lambda: None  # type: ignore[method-assign]
+        r485.set_fire_and_forget(True, max_pending=4)
+        # 書き込み直後はエコーが届いていないことにして、検証待ちを積み上げる
+        with patch.object(
+            type(bus), "in_waiting", new_callable=PropertyMock
+        ) as waiting:
+            waiting.return_value = 0
+            for _ in range(4):
+                assert r485.set_current(100) is True
+            assert r485.pending_echoes == 4
+            requests = bus.requests
+            # 5 回目は保留中のエコーを検証してから同期検証で送信する
+            assert r485.set_current(100) is True
+            assert bus.requests == requests + 1
+
+        assert r485.pending_echoes == 0
+        assert r485.echo_verified == 4
+        assert r485.echo_failures == 0
+        assert r485.fire_and_forget is True
+
+
+# ---------------------------------------------------------------------------
+# get_full_status
+# ---------------------------------------------------------------------------
+
+
+def _motor_status_resp() -> bytes:
+    payload = struct.pack("<iiiBBB", 10000, -50000, 25000, 1, 0, 0)
+    return build_readback_response(
+        Proto.CommandCode.motor_status_readback_resp, payload_bytes=payload
+    )
+
+
+def _other_status_resp() -> bytes:
+    payload = struct.pack("<IiiBBB", 1200, 35, 500, 1, 80, 0)
+    return build_readback_response(
+        Proto.CommandCode.other_status_readback_resp, payload_bytes=payload
+    )
+
+
+def _readback_2_resp() -> bytes:
+    payload = struct.pack("<IIIBBB", 150_000, 10_000, 0, 0, 255, 128)
+    return build_readback_response(
+        Proto.CommandCode.readback_2_resp, payload_bytes=payload
+    )
+
+
+def _readback_3_resp() -> bytes:
+    payload = struct.pack("<IIIBBB", 200_000, 5_000, 1_000, 3, 0, 1)
+    return build_readback_response(
+        Proto.CommandCode.readback_3_resp, payload_bytes=payload
+    )
+
+
+class TestGetFullStatus:
+    """get_full_status() のテスト."""
+
+    @patch("roller485.clock.time.sleep")
+    def test_all_sections_without_delay(
+        self, mock_sleep, mock_roller: Roller485Util
+    ) -> None:
+        """4 つのリードバックを _delay() なしで順に送信する."""
+        mock_roller.read.side_effect = [  # type: ignore[attr-defined]
+            _motor_status_resp(),
+            _other_status_resp(),
+            _readback_2_resp(),
+            _readback_3_resp(),
+        ]
+
+        status = mock_roller.get_full_status()
+
+        mock_sleep.assert_not_called()
+        written = [c.args[0][0] for c in mock_roller.write.call_args_list]  # type: ignore[attr-defined]
+        assert written == [0x40, 0x41, 0x42, 0x43]
+        assert status.motor["speed"] == pytest.approx(100.0)
+        assert status.other["vin"] == pytest.approx(12.0)
+        assert status.speed_pid_rgb["speed_p"] == pytest.approx(1.5)
+        assert status.position_pid_other["rs485_id"] == 3
+        assert status.timestamp > 0
+        assert status.duration >= 0.0
+
+    @patch("roller485.clock.time.sleep")
+    def test_subset(self, _mock_sleep, mock_roller: Roller485Util) -> None:
+        """指定したセクションだけを読み出す."""
+        mock_roller.read.side_effect = [  # type: ignore[attr-defined]
+            _motor_status_resp(),
+            _other_status_resp(),
+        ]
+
+        status = mock_roller.get_full_status(["other", "motor"])
+
+        assert mock_roller.write.call_count == 2  # type: ignore[attr-defined]
+        assert status.motor["mode"] == 1
+        assert status.other["temp"] == 35
+        assert status.speed_pid_rgb == {}
+        assert status.position_pid_other == {}
+        assert set(status.as_dict()) == {
+            "timestamp",
+            "duration",
+            "motor",
+            "other",
+            "speed_pid_rgb",
+            "position_pid_other",
+        }
+
+    def test_unknown_section(self, mock_roller: Roller485Util) -> None:
+        with pytest.raises(ValueError):
+            mock_roller.get_full_status(["motor", "bogus"])
+
+    @patch("roller485.clock.time.sleep")
+    def test_bad_section_is_empty(
+        self, _mock_sleep, mock_roller: Roller485Util
+    ) -> None:
+        """CRC8 不正のセクションは空 dict になり、他のセクションは読み出される."""
+        bad = bytearray(_motor_status_resp())
+        bad[-1] ^= 0xFF
+        mock_roller.read.side_effect = [bytes(bad), _other_status_resp()]  # type: ignore[attr-defined]
+
+        status = mock_roller.get_full_status(["motor", "other"])
+        assert status.motor == {}
+        assert status.other["vin"] == pytest.approx(12.0)